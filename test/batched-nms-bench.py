@@ -0,0 +1,59 @@
+import argparse
+
+import torch
+import torch.utils.benchmark as benchmark
+from torchvision.ops import boxes as box_ops
+
+
+parser = argparse.ArgumentParser(description="Compare the batched_nms implementations on CPU")
+parser.add_argument("--num-classes", default=[1, 10, 80, 1000], type=int, nargs="+", help="number of categories")
+parser.add_argument(
+    "--num-boxes", default=[100, 500, 1000, 2000, 5000, 10000], type=int, nargs="+", help="number of boxes"
+)
+parser.add_argument("--iou-threshold", default=0.5, type=float, help="IoU threshold used by NMS")
+parser.add_argument("--threads", default=1, type=int, help="number of threads used by torch")
+parser.add_argument("--min-run-time", default=0.5, type=float, help="minimum run time per measurement in seconds")
+
+
+def _make_inputs(num_boxes, num_classes):
+    boxes = torch.rand(num_boxes, 4) * 500
+    boxes[:, 2:] = boxes[:, :2] + torch.rand(num_boxes, 2) * 100 + 1
+    scores = torch.rand(num_boxes)
+    idxs = torch.randint(0, num_classes, (num_boxes,))
+    return boxes, scores, idxs
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    torch.set_num_threads(args.threads)
+
+    implementations = {
+        "coordinate_trick": box_ops._batched_nms_coordinate_trick,
+        "vanilla": box_ops._batched_nms_vanilla,
+        "native": box_ops._batched_nms_native,
+    }
+
+    results = []
+    for num_classes in args.num_classes:
+        for num_boxes in args.num_boxes:
+            boxes, scores, idxs = _make_inputs(num_boxes, num_classes)
+            for name, fn in implementations.items():
+                timer = benchmark.Timer(
+                    stmt="fn(boxes, scores, idxs, iou_threshold)",
+                    globals={
+                        "fn": fn,
+                        "boxes": boxes,
+                        "scores": scores,
+                        "idxs": idxs,
+                        "iou_threshold": args.iou_threshold,
+                    },
+                    label="batched_nms",
+                    sub_label=f"{num_boxes} boxes, {num_classes} classes",
+                    description=name,
+                    num_threads=args.threads,
+                )
+                results.append(timer.blocked_autorange(min_run_time=args.min_run_time))
+
+    compare = benchmark.Compare(results)
+    compare.trim_significant_figures()
+    compare.print()
@@ -0,0 +1,74 @@
+import argparse
+
+import torch
+import torch.utils.benchmark as benchmark
+from torchvision.models.detection._utils import BoxCoder
+from torchvision.ops import clip_boxes_to_image
+
+
+parser = argparse.ArgumentParser(description="Benchmark the fused box decoding and clipping of BoxCoder")
+parser.add_argument("--threads", default=[1, 4], type=int, nargs="+", help="numbers of threads")
+parser.add_argument("--batch-size", default=2, type=int, help="number of images")
+parser.add_argument(
+    "--cases",
+    default=["200000x1", "1000x91"],
+    nargs="+",
+    help="boxes per image x classes. The defaults are the RPN anchors of an 800x1088 image and the "
+    "proposals of the RoIHeads of a COCO Faster R-CNN",
+)
+parser.add_argument("--min-run-time", default=0.5, type=float, help="minimum run time per measurement in seconds")
+
+
+def _make_inputs(batch_size, num_boxes, num_classes):
+    boxes = []
+    for _ in range(batch_size):
+        b = torch.rand(num_boxes, 4) * 800
+        b[:, 2:] += b[:, :2]
+        boxes.append(b)
+    rel_codes = torch.randn(batch_size * num_boxes, 4 * num_classes)
+    image_shapes = [(800, 1088)] * batch_size
+    return rel_codes, boxes, image_shapes
+
+
+def _decode_then_clip(box_coder, rel_codes, boxes, image_shapes):
+    pred_boxes = box_coder.decode(rel_codes, boxes)
+    boxes_per_image = [len(b) for b in boxes]
+    return [
+        clip_boxes_to_image(image_boxes, image_shape)
+        for image_boxes, image_shape in zip(pred_boxes.split(boxes_per_image), image_shapes)
+    ]
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    box_coder = BoxCoder((10.0, 10.0, 5.0, 5.0))
+
+    results = []
+    for case in args.cases:
+        num_boxes, num_classes = (int(v) for v in case.split("x"))
+        rel_codes, boxes, image_shapes = _make_inputs(args.batch_size, num_boxes, num_classes)
+        stmts = {
+            "decode + clip_boxes_to_image": "fn(box_coder, rel_codes, boxes, image_shapes)",
+            "decode_and_clip": "box_coder.decode_and_clip(rel_codes, boxes, image_shapes)",
+        }
+        for label, stmt in stmts.items():
+            for num_threads in args.threads:
+                timer = benchmark.Timer(
+                    stmt=stmt,
+                    globals={
+                        "fn": _decode_then_clip,
+                        "box_coder": box_coder,
+                        "rel_codes": rel_codes,
+                        "boxes": boxes,
+                        "image_shapes": image_shapes,
+                    },
+                    label="box decoding",
+                    sub_label=f"{args.batch_size}x{case} {label}",
+                    description=f"{num_threads} threads",
+                    num_threads=num_threads,
+                )
+                results.append(timer.blocked_autorange(min_run_time=args.min_run_time))
+
+    compare = benchmark.Compare(results)
+    compare.trim_significant_figures()
+    compare.print()
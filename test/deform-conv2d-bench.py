@@ -0,0 +1,113 @@
+import argparse
+
+import torch
+import torch.nn.functional as F
+import torch.utils.benchmark as benchmark
+from torchvision import ops
+
+
+parser = argparse.ArgumentParser(description="Benchmark the CPU deform_conv2d kernels for different numbers of threads")
+parser.add_argument("--threads", default=[1, 2, 4, 8, 16, 32], type=int, nargs="+", help="numbers of threads")
+parser.add_argument("--batch-size", default=2, type=int, help="number of images")
+parser.add_argument(
+    "--layers",
+    default=["64x100x136", "128x50x68", "256x25x34"],
+    nargs="+",
+    help="feature maps, as channels x height x width. The defaults are the 3x3 DCNv2 layers of a "
+    "ResNet-50 backbone, at 1/8, 1/16 and 1/32 of an 800x1088 image",
+)
+parser.add_argument("--offset-scale", default=2.0, type=float, help="standard deviation of the sampling offsets")
+parser.add_argument("--no-mask", action="store_true", help="use DCNv1, without modulation mask")
+parser.add_argument("--backward", action="store_true", help="also measure the backward pass")
+parser.add_argument("--min-run-time", default=0.5, type=float, help="minimum run time per measurement in seconds")
+
+
+def _make_inputs(batch_size, channels, height, width, offset_scale, use_mask):
+    input = torch.rand(batch_size, channels, height, width)
+    weight = torch.randn(channels, channels, 3, 3) / (3 * channels ** 0.5)
+    offset = torch.randn(batch_size, 2 * 9, height, width) * offset_scale
+    mask = torch.rand(batch_size, 9, height, width) if use_mask else None
+    return input, weight, offset, mask
+
+
+def _reference_deform_conv2d(input, offset, weight, mask):
+    """
+    Reference for the untiled im2col + GEMM path, in plain PyTorch: the columns of the whole batch are sampled
+    at once with grid_sample, then contracted with the weight. It checks the outputs of the kernels and gives a
+    baseline that does not depend on their tiling. Stride and dilation 1, and padding of half the kernel size,
+    as in the measured layers.
+    """
+    batch_size, channels, height, width = input.shape
+    out_channels, _, kernel_h, kernel_w = weight.shape
+    kernel_y, kernel_x = torch.meshgrid(torch.arange(kernel_h), torch.arange(kernel_w), indexing="ij")
+    offset = offset.view(batch_size, kernel_h * kernel_w, 2, height, width)
+    y = torch.arange(height).view(-1, 1) + (kernel_y - kernel_h // 2).view(-1, 1, 1) + offset[:, :, 0]
+    x = torch.arange(width) + (kernel_x - kernel_w // 2).view(-1, 1, 1) + offset[:, :, 1]
+    # with align_corners=True, -1 and 1 are the centers of the border pixels and the samples outside are zeros,
+    # which is the bilinear interpolation of the kernels
+    grid = torch.stack((2 * x / (width - 1) - 1, 2 * y / (height - 1) - 1), dim=-1)
+    columns = F.grid_sample(
+        input, grid.view(batch_size, -1, width, 2), mode="bilinear", padding_mode="zeros", align_corners=True
+    ).view(batch_size, channels, kernel_h * kernel_w, height, width)
+    if mask is not None:
+        columns = columns * mask.unsqueeze(1)
+    return torch.einsum("ock,bckhw->bohw", weight.flatten(2), columns)
+
+
+def _forward_backward(fn, input, offset, weight, mask, grad):
+    output = fn(input, offset, weight, mask)
+    output.backward(grad)
+
+
+def _deform_conv2d(input, offset, weight, mask):
+    return ops.deform_conv2d(input, offset, weight, padding=(1, 1), mask=mask)
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    results = []
+    for layer in args.layers:
+        channels, height, width = (int(v) for v in layer.split("x"))
+        input, weight, offset, mask = _make_inputs(
+            args.batch_size, channels, height, width, args.offset_scale, not args.no_mask
+        )
+        grad = torch.rand(args.batch_size, channels, height, width)
+        torch.testing.assert_close(
+            _deform_conv2d(input, offset, weight, mask),
+            _reference_deform_conv2d(input, offset, weight, mask),
+            rtol=1e-4,
+            atol=1e-4,
+        )
+
+        stmts = {"forward": "fn(input, offset, weight, mask)"}
+        if args.backward:
+            stmts["forward + backward"] = "forward_backward(fn, input, offset, weight, mask, grad)"
+        for label, stmt in stmts.items():
+            requires_grad = label != "forward"
+            for tensor in (input, weight, offset, mask):
+                if tensor is not None:
+                    tensor.requires_grad_(requires_grad)
+            for implementation, fn in (("deform_conv2d", _deform_conv2d), ("reference", _reference_deform_conv2d)):
+                for num_threads in args.threads:
+                    timer = benchmark.Timer(
+                        stmt=stmt,
+                        globals={
+                            "fn": fn,
+                            "forward_backward": _forward_backward,
+                            "input": input,
+                            "weight": weight,
+                            "offset": offset,
+                            "mask": mask,
+                            "grad": grad,
+                        },
+                        label=f"deform_conv2d {label}",
+                        sub_label=f"{implementation}, {args.batch_size}x{layer}",
+                        description=f"{num_threads} threads",
+                        num_threads=num_threads,
+                    )
+                    results.append(timer.blocked_autorange(min_run_time=args.min_run_time))
+
+    compare = benchmark.Compare(results)
+    compare.trim_significant_figures()
+    compare.print()
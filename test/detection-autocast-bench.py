@@ -0,0 +1,99 @@
+import argparse
+
+import torch
+import torch.utils.benchmark as benchmark
+import torchvision
+from torchvision.io import ImageReadMode, read_image
+from torchvision.ops import box_iou
+
+
+parser = argparse.ArgumentParser(
+    description="Compare the detections and the latency of a detection model in float32 and under CPU autocast"
+)
+parser.add_argument("--model", default="fasterrcnn_resnet50_fpn", help="detection model builder")
+parser.add_argument("--pretrained", action="store_true", help="use the pre-trained weights of the model")
+parser.add_argument("--dtype", default="bfloat16", help="autocast dtype")
+parser.add_argument("--threads", default=[1, 4], type=int, nargs="+", help="numbers of threads")
+parser.add_argument(
+    "--images", default=[], nargs="*", help="images to run the model on. Random images are used if none are given"
+)
+parser.add_argument("--batch-size", default=2, type=int, help="number of random images")
+parser.add_argument("--size", default=[800, 1088], type=int, nargs=2, help="height and width of the random images")
+parser.add_argument("--score-thresh", default=0.5, type=float, help="minimum score of the compared detections")
+parser.add_argument("--iou-thresh", default=0.5, type=float, help="IoU above which two detections match")
+parser.add_argument("--min-run-time", default=2.0, type=float, help="minimum run time per measurement in seconds")
+
+
+def _load_images(args):
+    if args.images:
+        return [read_image(path, ImageReadMode.RGB).float() / 255 for path in args.images]
+    torch.manual_seed(0)
+    return [torch.rand(3, *args.size) for _ in range(args.batch_size)]
+
+
+def _filter(detections, score_thresh):
+    return [{k: v[d["scores"] >= score_thresh] for k, v in d.items()} for d in detections]
+
+
+def _compare(reference, detections, iou_thresh):
+    # Matches every reference detection to the detection of the same label it overlaps the most
+    matched, num_ref, ious, score_diffs = 0, 0, [], []
+    for ref, det in zip(reference, detections):
+        num_ref += len(ref["boxes"])
+        if len(ref["boxes"]) == 0 or len(det["boxes"]) == 0:
+            continue
+        iou = box_iou(ref["boxes"], det["boxes"].float())
+        iou[ref["labels"][:, None] != det["labels"][None, :]] = 0
+        best_iou, best = iou.max(dim=1)
+        keep = best_iou > iou_thresh
+        matched += int(keep.sum())
+        ious.append(best_iou[keep])
+        score_diffs.append((ref["scores"][keep] - det["scores"][best[keep]].float()).abs())
+    ious = torch.cat(ious) if ious else torch.zeros(0)
+    score_diffs = torch.cat(score_diffs) if score_diffs else torch.zeros(0)
+    return {
+        "reference detections": num_ref,
+        "detections": sum(len(det["boxes"]) for det in detections),
+        "matched": matched,
+        "mean IoU of matches": ious.mean().item() if len(ious) else float("nan"),
+        "max score difference": score_diffs.max().item() if len(score_diffs) else float("nan"),
+    }
+
+
+def _run(model, images, autocast_dtype):
+    with torch.no_grad():
+        if autocast_dtype is None:
+            return model(images)
+        with torch.autocast("cpu", dtype=autocast_dtype):
+            return model(images)
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    dtype = getattr(torch, args.dtype)
+    builder = getattr(torchvision.models.detection, args.model)
+    model = builder(pretrained=args.pretrained, pretrained_backbone=args.pretrained).eval()
+    images = _load_images(args)
+
+    reference = _filter(_run(model, images, None), args.score_thresh)
+    detections = _filter(_run(model, images, dtype), args.score_thresh)
+    print(f"{args.model} float32 vs autocast {args.dtype}")
+    for key, value in _compare(reference, detections, args.iou_thresh).items():
+        print(f"  {key}: {value}")
+
+    results = []
+    for label, run_dtype in [("float32", None), (f"autocast {args.dtype}", dtype)]:
+        for num_threads in args.threads:
+            timer = benchmark.Timer(
+                stmt="fn(model, images, dtype)",
+                globals={"fn": _run, "model": model, "images": images, "dtype": run_dtype},
+                label=f"{args.model} inference",
+                sub_label=f"{len(images)} images {label}",
+                description=f"{num_threads} threads",
+                num_threads=num_threads,
+            )
+            results.append(timer.blocked_autorange(min_run_time=args.min_run_time))
+
+    compare = benchmark.Compare(results)
+    compare.trim_significant_figures()
+    compare.print()
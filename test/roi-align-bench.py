@@ -0,0 +1,68 @@
+import argparse
+
+import torch
+import torch.utils.benchmark as benchmark
+from torchvision import ops
+
+
+parser = argparse.ArgumentParser(description="Benchmark the CPU roi_align kernels for different numbers of threads")
+parser.add_argument("--threads", default=[1, 2, 4, 8, 16, 32], type=int, nargs="+", help="numbers of threads")
+parser.add_argument("--num-rois", default=[100, 1000], type=int, nargs="+", help="number of RoIs")
+parser.add_argument("--channels", default=256, type=int, help="number of channels of the feature map")
+parser.add_argument("--size", default=[200, 304], type=int, nargs=2, help="height and width of the feature map")
+parser.add_argument("--output-size", default=7, type=int, help="size of the pooled RoIs")
+parser.add_argument("--sampling-ratio", default=2, type=int, help="number of sampling points per bin")
+parser.add_argument("--backward", action="store_true", help="also measure the backward pass")
+parser.add_argument("--min-run-time", default=0.5, type=float, help="minimum run time per measurement in seconds")
+
+
+def _make_rois(num_rois, height, width):
+    boxes = torch.rand(num_rois, 4) * torch.tensor([width, height, width, height]) * 4
+    boxes[:, 2:] = boxes[:, :2] + torch.rand(num_rois, 2) * 200 + 4
+    return torch.cat([torch.zeros(num_rois, 1), boxes], dim=1)
+
+
+def _forward_backward(input, rois, grad, output_size, sampling_ratio):
+    output = ops.roi_align(input, rois, output_size, 0.25, sampling_ratio, True)
+    output.backward(grad)
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    height, width = args.size
+    features = torch.rand(1, args.channels, height, width)
+
+    results = []
+    for num_rois in args.num_rois:
+        rois = _make_rois(num_rois, height, width)
+        for memory_format in (torch.contiguous_format, torch.channels_last):
+            input = features.contiguous(memory_format=memory_format)
+            grad = torch.rand(num_rois, args.channels, args.output_size, args.output_size).contiguous(
+                memory_format=memory_format
+            )
+            stmts = {"forward": "ops.roi_align(input, rois, output_size, 0.25, sampling_ratio, True)"}
+            if args.backward:
+                stmts["forward + backward"] = "fn(input.requires_grad_(), rois, grad, output_size, sampling_ratio)"
+            for label, stmt in stmts.items():
+                for num_threads in args.threads:
+                    timer = benchmark.Timer(
+                        stmt=stmt,
+                        globals={
+                            "ops": ops,
+                            "fn": _forward_backward,
+                            "input": input,
+                            "rois": rois,
+                            "grad": grad,
+                            "output_size": args.output_size,
+                            "sampling_ratio": args.sampling_ratio,
+                        },
+                        label=f"roi_align {label}",
+                        sub_label=f"{num_rois} RoIs, {'channels_last' if memory_format == torch.channels_last else 'contiguous'}",
+                        description=f"{num_threads} threads",
+                        num_threads=num_threads,
+                    )
+                    results.append(timer.blocked_autorange(min_run_time=args.min_run_time))
+
+    compare = benchmark.Compare(results)
+    compare.trim_significant_figures()
+    compare.print()
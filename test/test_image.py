@@ -13,6 +13,7 @@ from PIL import Image, __version__ as PILLOW_VERSION
 from torchvision.io.image import (
     decode_png,
     decode_jpeg,
+    decode_jpegs,
     encode_jpeg,
     write_jpeg,
     decode_image,
@@ -24,6 +25,7 @@ from torchvision.io.image import (
     read_image,
     _read_png_16,
 )
+from torchvision.transforms import RandomResizedCrop
 
 IMAGE_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
 FAKEDATA_DIR = os.path.join(IMAGE_ROOT, "fakedata")
@@ -111,6 +113,180 @@ def test_decode_jpeg_errors():
         decode_jpeg(torch.empty((100), dtype=torch.uint8))
 
 
+@pytest.mark.parametrize("mode", [ImageReadMode.UNCHANGED, ImageReadMode.GRAY, ImageReadMode.RGB])
+@pytest.mark.parametrize("scripted", (False, True))
+def test_decode_jpeg_batch(mode, scripted):
+    # CMYK images can only be decoded as they are
+    paths = [path for path in get_images(IMAGE_ROOT, ".jpg") if mode == ImageReadMode.UNCHANGED or "cmyk" not in path]
+    data = [read_file(path) for path in paths]
+    decoder = torch.jit.script(decode_jpegs) if scripted else decode_jpegs
+
+    images = decoder(data, mode=mode)
+    assert isinstance(images, list)
+    assert len(images) == len(data)
+    for image, image_data in zip(images, data):
+        assert_equal(image, decode_jpeg(image_data, mode=mode))
+    assert decode_jpegs([], mode=mode) == []
+
+
+def test_decode_jpeg_batch_errors():
+    data = read_file(next(get_images(IMAGE_ROOT, ".jpg")))
+    with pytest.raises(RuntimeError, match=r"Not a JPEG file.*\(image 1 of the batch\)"):
+        decode_jpegs([data, torch.zeros(100, dtype=torch.uint8)])
+    with pytest.raises(RuntimeError, match="Expected a torch.uint8 tensor"):
+        decode_jpegs([data, data.float()])
+
+
+def test_decode_jpeg_scripted_caller():
+    # The result of decode_jpeg is typed as a Tensor in scripted callers
+    def to_float(data: torch.Tensor) -> torch.Tensor:
+        return decode_jpeg(data).float() / 255
+
+    data = read_file(next(get_images(IMAGE_ROOT, ".jpg")))
+    assert_equal(torch.jit.script(to_float)(data), to_float(data))
+
+
+@pytest.mark.parametrize("size_hint", [(480, 640), (250, 300), (100, 100), (60, 80), (30, 40)])
+def test_decode_jpeg_size_hint(size_hint):
+    torch.manual_seed(0)
+    image = F.resize(torch.randint(0, 256, (3, 30, 40), dtype=torch.uint8), [480, 640])
+    data = encode_jpeg(image, quality=95)
+    full = decode_jpeg(data)
+
+    reduced = decode_jpeg(data, size_hint=size_hint)
+    denom = max(d for d in (1, 2, 4, 8) if 480 // d >= size_hint[0] and 640 // d >= size_hint[1])
+    assert reduced.shape == (3, 480 // denom, 640 // denom)
+    expected = F.resize(full, list(reduced.shape[-2:]), antialias=True)
+    assert (reduced.float() - expected.float()).abs().mean() < 5
+
+    assert_equal(decode_image(data, size_hint=size_hint), reduced)
+    assert_equal(decode_jpegs([data, data], size_hint=size_hint), [reduced, reduced])
+    assert_equal(torch.jit.script(decode_jpeg)(data, size_hint=size_hint), reduced)
+
+
+def test_decode_jpeg_size_hint_errors():
+    data = read_file(next(get_images(IMAGE_ROOT, ".jpg")))
+    for size_hint in [(0, 10), (10, -1)]:
+        with pytest.raises(RuntimeError, match="size_hint should be a"):
+            decode_jpeg(data, size_hint=size_hint)
+    with pytest.raises(ValueError, match="are only supported when decoding on CPU"):
+        decode_jpeg(data, device="cuda", size_hint=(10, 10))
+
+
+def test_decode_ops_default_size_hint():
+    # The ops can still be called without the arguments added after them
+    data = read_file(next(get_images(IMAGE_ROOT, ".jpg")))
+    expected = decode_jpeg(data)
+    assert_equal(torch.ops.image.decode_jpeg(data, ImageReadMode.UNCHANGED.value), expected)
+    assert_equal(torch.ops.image.decode_image(data, ImageReadMode.UNCHANGED.value), expected)
+    assert_equal(torch.ops.image.decode_jpegs([data], ImageReadMode.UNCHANGED.value), [expected])
+
+
+def test_decode_image_size_hint_png():
+    path = next(get_images(FAKEDATA_DIR, ".png"))
+    assert_equal(read_image(path, size_hint=(1, 1)), read_image(path))
+
+
+@pytest.mark.parametrize(
+    "img_path",
+    [pytest.param(jpeg_path, id=_get_safe_image_name(jpeg_path)) for jpeg_path in get_images(IMAGE_ROOT, ".jpg")],
+)
+@pytest.mark.parametrize("mode", [ImageReadMode.UNCHANGED, ImageReadMode.GRAY, ImageReadMode.RGB])
+def test_decode_jpeg_crop(img_path, mode):
+    if "cmyk" in img_path and mode != ImageReadMode.UNCHANGED:
+        pytest.skip("CMYK images can only be decoded as they are")
+    data = read_file(img_path)
+    full = decode_jpeg(data, mode=mode)
+    height, width = full.shape[-2:]
+    torch.manual_seed(0)
+    crops = [(0, 0, height, width), (0, 0, 1, 1), (height - 1, width - 1, 1, 1), (3, 17, height // 2, width // 3)]
+    crops += [RandomResizedCrop.get_params(full, scale=(0.08, 1.0), ratio=(3 / 4, 4 / 3)) for _ in range(5)]
+    # left edges on an iMCU boundary, 16 pixels wide for 4:2:0 images
+    crops += [(59, 32, 12, 54), (31, 32, 39, 18), (0, 16, height // 2, width // 2)]
+    crops = [(top, left, h, w) for top, left, h, w in crops if top + h <= height and left + w <= width]
+    for top, left, h, w in crops:
+        cropped = decode_jpeg(data, mode=mode, crop=(top, left, h, w))
+        assert_equal(cropped, full[:, top : top + h, left : left + w])
+
+
+def test_decode_jpeg_crop_size_hint():
+    torch.manual_seed(0)
+    image = F.resize(torch.randint(0, 256, (3, 30, 40), dtype=torch.uint8), [480, 640])
+    data = encode_jpeg(image, quality=95)
+
+    # the second crop starts on an iMCU boundary of the reduced images
+    for top, left, h, w in [(100, 200, 240, 320), (100, 128, 240, 320)]:
+        for size_hint, denom in [((60, 80), 4), ((30, 20), 8), ((200, 10), 1)]:
+            cropped = decode_jpeg(data, size_hint=size_hint, crop=(top, left, h, w))
+            reduced = decode_jpeg(data, size_hint=(480 // denom, 640 // denom))
+            bottom, right = -(-(top + h) // denom), -(-(left + w) // denom)
+            assert_equal(cropped, reduced[:, top // denom : bottom, left // denom : right])
+            assert cropped.shape[-2] >= size_hint[0] and cropped.shape[-1] >= size_hint[1]
+
+
+def test_decode_jpeg_crop_errors():
+    data = read_file(next(get_images(IMAGE_ROOT, ".jpg")))
+    height, width = decode_jpeg(data).shape[-2:]
+    for crop in [(0, 0, 0, 10), (-1, 0, 10, 10), (0, 0, 10)]:
+        with pytest.raises(RuntimeError, match="crop should be a"):
+            torch.ops.image.decode_jpeg(data, ImageReadMode.UNCHANGED.value, [], list(crop))
+    with pytest.raises(RuntimeError, match="is out of the bounds of the image"):
+        decode_jpeg(data, crop=(1, 0, height, width))
+    with pytest.raises(RuntimeError, match="is out of the bounds of the image"):
+        decode_jpeg(data, crop=(0, width, 1, 1))
+
+
+@pytest.mark.parametrize("decoder, ext", [(decode_png, ".png"), (decode_jpeg, ".jpg")])
+@pytest.mark.parametrize("memory_format", [torch.contiguous_format, torch.channels_last])
+@pytest.mark.parametrize("scripted", (False, True))
+def test_decode_out(decoder, ext, memory_format, scripted):
+    path = next(path for path in get_images(IMAGE_ROOT, ext) if "cmyk" not in path and "16" not in path)
+    data = read_file(path)
+    expected = decoder(data, mode=ImageReadMode.RGB)
+    decoder = torch.jit.script(decoder) if scripted else decoder
+
+    batch = torch.zeros((2,) + expected.shape, dtype=torch.uint8).to(memory_format=memory_format)
+    output = decoder(data, mode=ImageReadMode.RGB, out=batch[1])
+    assert output.data_ptr() == batch[1].data_ptr()
+    assert_equal(batch[1], expected)
+    assert_equal(batch[0], torch.zeros_like(expected))
+
+    # The image can be decoded in place into a region of a larger HWC canvas
+    channels, height, width = expected.shape
+    canvas = torch.zeros(height + 10, width + 20, channels, dtype=torch.uint8).permute(2, 0, 1)
+    decoder(data, mode=ImageReadMode.RGB, out=canvas[:, 5 : 5 + height, 10 : 10 + width])
+    padded = torch.nn.functional.pad(expected, [10, 10, 5, 5])
+    assert_equal(canvas, padded)
+
+
+def test_decode_out_scripted_aliasing():
+    # The result aliases out, scripted callers must see writes through either of them
+    def decode_and_clear(data: torch.Tensor, out: torch.Tensor) -> torch.Tensor:
+        decoded = decode_jpeg(data, out=out)
+        decoded.zero_()
+        return out.sum()
+
+    data = read_file(next(path for path in get_images(IMAGE_ROOT, ".jpg") if "cmyk" not in path))
+    out = torch.empty_like(decode_jpeg(data))
+    assert torch.jit.script(decode_and_clear)(data, out) == 0
+    assert_equal(out, torch.zeros_like(out))
+
+
+def test_decode_out_errors():
+    data = read_file(next(path for path in get_images(IMAGE_ROOT, ".jpg") if "cmyk" not in path))
+    channels, height, width = decode_jpeg(data, mode=ImageReadMode.RGB).shape
+    for out in [
+        torch.empty(channels, height, width + 1, dtype=torch.uint8),
+        torch.empty(1, height, width, dtype=torch.uint8),
+        torch.empty(channels, height, width, dtype=torch.float),
+    ]:
+        with pytest.raises(RuntimeError, match="Expected out to be a Byte tensor of shape"):
+            decode_jpeg(data, mode=ImageReadMode.RGB, out=out)
+    with pytest.raises(RuntimeError, match="Expected out to be a Int tensor of shape"):
+        data_16 = read_file(next(path for path in get_images(FAKEDATA_DIR, ".png") if "16" in path))
+        torch.ops.image.decode_png(data_16, ImageReadMode.UNCHANGED.value, True, torch.empty(0, dtype=torch.uint8))
+
+
 def test_decode_bad_huffman_images():
     # sanity check: make sure we can decode the bad Huffman encoding
     bad_huff = read_file(os.path.join(DAMAGED_JPEG, "bad_huffman.jpg"))
@@ -268,6 +444,38 @@ def test_read_file_non_ascii(tmpdir):
     assert_equal(data, expected)
 
 
+@pytest.mark.skipif(sys.platform == "win32", reason="memory mapping files is not supported on Windows")
+def test_read_file_mmap(tmpdir):
+    jpeg_path = next(path for path in get_images(IMAGE_ROOT, ".jpg") if "cmyk" not in path)
+    png_path = next(get_images(FAKEDATA_DIR, ".png"))
+    records = [read_file(jpeg_path), read_file(png_path)]
+    fpath = os.path.join(tmpdir, "records.bin")
+    write_file(fpath, torch.cat(records))
+
+    data = read_file(fpath, mmap=True)
+    assert_equal(data, read_file(fpath))
+    # Writes to the private mapping never reach the file
+    data[0] = 0
+    assert_equal(read_file(fpath), torch.cat(records))
+    data[0] = records[0][0]
+
+    # The mapping outlives the path and is shared by the views of the tensor
+    os.unlink(fpath)
+    offset = 0
+    for record in records:
+        view = data[offset : offset + record.numel()]
+        offset += record.numel()
+        assert_equal(decode_image(view), decode_image(record))
+    assert_equal(decode_jpeg(data[: records[0].numel()]), decode_jpeg(records[0]))
+    assert_equal(decode_png(data[records[0].numel() :]), decode_png(records[1]))
+
+    assert_equal(torch.jit.script(read_file)(jpeg_path, mmap=True), records[0])
+    with pytest.raises(RuntimeError, match="No such file or directory: 'tst'"):
+        read_file("tst", mmap=True)
+    # The op can still be called without the mmap argument
+    assert_equal(torch.ops.image.read_file(jpeg_path), records[0])
+
+
 def test_write_file(tmpdir):
     fname, content = "test1.bin", b"TorchVision\211\n"
     fpath = os.path.join(tmpdir, fname)
@@ -97,3 +97,52 @@ class Tester:
         assert tuple(dboxes[1].shape) == (4, 4)
         torch.testing.assert_close(dboxes[0], dboxes_output, rtol=1e-5, atol=1e-8)
         torch.testing.assert_close(dboxes[1], dboxes_output, rtol=1e-5, atol=1e-8)
+
+    @pytest.mark.parametrize("generator", ("anchor", "defaultbox"))
+    def test_cache(self, generator):
+        if generator == "anchor":
+            model = AnchorGenerator(((10,),), ((1,),), cache_size=2)
+        else:
+            model = DefaultBoxGenerator([[2]], cache_size=2)
+
+        def run(size, dtype=torch.float32):
+            images = ImageList(torch.zeros(2, 3, size, size, dtype=dtype), [(size, size)] * 2)
+            return model(images, [torch.zeros(2, 8, size // 5, size // 5, dtype=dtype)])
+
+        expected = run(15)
+        assert (model.cache_hits, model.cache_misses) == (0, 1)
+        anchors = run(15)
+        assert (model.cache_hits, model.cache_misses) == (1, 1)
+        assert anchors[0] is expected[0]
+        assert anchors[1] is expected[1]
+
+        assert run(15, dtype=torch.float64)[0].dtype == torch.float64
+        assert (model.cache_hits, model.cache_misses) == (1, 2)
+
+        # the least recently used entry is evicted
+        run(15)
+        anchors = run(20)
+        assert (model.cache_hits, model.cache_misses) == (2, 3)
+        assert anchors[0].shape != expected[0].shape
+        assert run(15)[0] is expected[0]
+        assert (model.cache_hits, model.cache_misses) == (3, 3)
+        run(15, dtype=torch.float64)
+        assert (model.cache_hits, model.cache_misses) == (3, 4)
+
+    @pytest.mark.parametrize("generator", ("anchor", "defaultbox"))
+    def test_reduced_precision_feature_maps(self, generator):
+        if generator == "anchor":
+            model = AnchorGenerator(((32,),), ((1,),))
+        else:
+            model = DefaultBoxGenerator([[2]])
+        # feature maps computed under autocast keep the anchors of the float images in float
+        images = ImageList(torch.zeros(1, 3, 1000, 1000), [(1000, 1000)])
+        anchors = model(images, [torch.zeros(1, 8, 50, 50, dtype=torch.bfloat16)])
+        assert anchors[0].dtype == torch.float32
+        assert anchors[0] is model(images, [torch.zeros(1, 8, 50, 50)])[0]
+
+    def test_invalid_cache_size(self):
+        with pytest.raises(ValueError, match="cache_size should be a positive integer"):
+            AnchorGenerator(cache_size=0)
+        with pytest.raises(ValueError, match="cache_size should be a positive integer"):
+            DefaultBoxGenerator([[2]], cache_size=0)
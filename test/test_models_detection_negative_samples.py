@@ -50,6 +50,29 @@ class TestModelsDetectionNegativeSamples:
         assert matched_gt_boxes[0].shape == anchors[0].shape
         assert matched_gt_boxes[0].dtype == torch.float32
 
+    def test_targets_to_anchors_box_similarity(self):
+        torch.manual_seed(0)
+        anchors = [torch.rand(50, 4) * 50 + torch.tensor([0, 0, 50, 50])]
+        targets = [{"boxes": torch.rand(3, 4) * 50 + torch.tensor([0, 0, 50, 50])}]
+        rpn_anchor_generator = AnchorGenerator(((32,),), ((1.0,),))
+        rpn_head = RPNHead(4, rpn_anchor_generator.num_anchors_per_location()[0])
+        head = RegionProposalNetwork(rpn_anchor_generator, rpn_head, 0.5, 0.3, 256, 0.5, 2000, 2000, 0.7, 0.05)
+        expected_labels, expected_boxes = head.assign_targets_to_anchors(anchors, targets)
+
+        # A replaced box_similarity is used to match the anchors
+        calls = []
+
+        def similarity(boxes1, boxes2):
+            calls.append(boxes1)
+            return torchvision.ops.box_iou(boxes1, boxes2).pow(2)
+
+        head.box_similarity = similarity
+        labels, matched_gt_boxes = head.assign_targets_to_anchors(anchors, targets)
+        assert len(calls) == 1
+        matched_idxs = head.proposal_matcher(similarity(targets[0]["boxes"], anchors[0]))
+        assert_equal(labels[0], (matched_idxs >= 0).float() - (matched_idxs == -2).float())
+        assert not torch.equal(labels[0], expected_labels[0])
+
     def test_assign_targets_to_proposals(self):
 
         proposals = [torch.randint(-50, 50, (20, 4), dtype=torch.float32)]
@@ -90,6 +113,41 @@ class TestModelsDetectionNegativeSamples:
         assert labels[0].shape == torch.Size([proposals[0].shape[0]])
         assert labels[0].dtype == torch.int64
 
+    def test_assign_targets_to_proposals_box_similarity(self):
+        torch.manual_seed(0)
+        proposals = [torch.rand(50, 4) * 50 + torch.tensor([0, 0, 50, 50])]
+        gt_boxes = [torch.rand(3, 4) * 50 + torch.tensor([0, 0, 50, 50])]
+        gt_labels = [torch.tensor([1, 2, 3])]
+        box_roi_pool = MultiScaleRoIAlign(featmap_names=["0"], output_size=7, sampling_ratio=2)
+        roi_heads = RoIHeads(
+            box_roi_pool,
+            TwoMLPHead(4 * 7 ** 2, 16),
+            FastRCNNPredictor(16, 4),
+            0.5,
+            0.5,
+            512,
+            0.25,
+            None,
+            0.05,
+            0.5,
+            100,
+        )
+        expected_idxs, _ = roi_heads.assign_targets_to_proposals(proposals, gt_boxes, gt_labels)
+        assert_equal(
+            expected_idxs[0],
+            roi_heads.proposal_matcher(torchvision.ops.box_iou(gt_boxes[0], proposals[0])).clamp(min=0),
+        )
+
+        # A replaced box_similarity is used to match the proposals
+        def similarity(boxes1, boxes2):
+            return torchvision.ops.box_iou(boxes1, boxes2).pow(2)
+
+        roi_heads.box_similarity = similarity
+        matched_idxs, labels = roi_heads.assign_targets_to_proposals(proposals, gt_boxes, gt_labels)
+        expected = roi_heads.proposal_matcher(similarity(gt_boxes[0], proposals[0]))
+        assert_equal(matched_idxs[0], expected.clamp(min=0))
+        assert_equal(labels[0] == 0, expected == -1)
+
     @pytest.mark.parametrize(
         "name",
         [
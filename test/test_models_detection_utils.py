@@ -1,11 +1,26 @@
 import copy
+from typing import Dict, List, Optional, Tuple
 
 import pytest
 import torch
+import torch.nn.functional as F
+from torch import Tensor
 from common_utils import assert_equal
 from torchvision.models.detection import _utils
 from torchvision.models.detection import backbone_utils
+from torchvision.models.detection import roi_heads
+from torchvision.models.detection import fasterrcnn_mobilenet_v3_large_320_fpn
+from torchvision.models.detection.image_list import ImageList
+from torchvision.models.detection import rpn as rpn_module
+from torchvision.models.detection.rpn import (
+    AnchorGenerator,
+    RPNHead,
+    RegionProposalNetwork,
+    concat_box_prediction_layers,
+)
 from torchvision.models.detection.transform import GeneralizedRCNNTransform
+from torchvision.ops import boxes as box_ops
+from torchvision.ops import box_iou, clip_boxes_to_image, masks_to_boxes, rle_masks_to_boxes
 
 
 class TestModelsDetectionUtils:
@@ -22,6 +37,119 @@ class TestModelsDetectionUtils:
         assert neg[0].sum() == 3
         assert neg[0][0:6].sum() == 3
 
+    def test_balanced_positive_negative_sampler_batch(self):
+        torch.random.manual_seed(0)
+        sampler = _utils.BalancedPositiveNegativeSampler(64, 0.25)
+        matched_idxs = [
+            torch.randint(-1, 3, (1000,)),
+            # not enough positives, the negatives complete the batch
+            torch.tensor([0] * 100 + [2] * 5 + [-1] * 10),
+            # not enough negatives
+            torch.tensor([0] * 10 + [1] * 100),
+            torch.zeros(0, dtype=torch.int64),
+        ]
+        pos, neg = sampler(matched_idxs)
+        assert len(pos) == len(neg) == len(matched_idxs)
+        for pos_mask, neg_mask, matched_idxs_per_image, num_pos, num_neg in zip(
+            pos, neg, matched_idxs, (16, 5, 16, 0), (48, 59, 10, 0)
+        ):
+            assert pos_mask.shape == neg_mask.shape == matched_idxs_per_image.shape
+            assert pos_mask.dtype == neg_mask.dtype == torch.uint8
+            assert pos_mask.sum() == num_pos
+            assert neg_mask.sum() == num_neg
+            assert (matched_idxs_per_image[pos_mask.bool()] >= 1).all()
+            assert (matched_idxs_per_image[neg_mask.bool()] == 0).all()
+
+    @pytest.mark.parametrize(
+        "matcher",
+        (_utils.Matcher(0.7, 0.3, allow_low_quality_matches=True), _utils.Matcher(0.5, 0.4), _utils.SSDMatcher(0.5)),
+    )
+    def test_matcher_match_boxes(self, matcher):
+        torch.random.manual_seed(0)
+        gt_boxes = torch.rand(5, 4) * 50
+        gt_boxes[:, 2:] += gt_boxes[:, :2]
+        anchors = torch.randint(0, 50, (1000, 4)).float()
+        anchors[:, 2:] += anchors[:, :2] + 1
+        assert_equal(matcher.match_boxes(gt_boxes, anchors), matcher(box_iou(gt_boxes, anchors)))
+
+        with pytest.raises(ValueError, match="No ground-truth boxes"):
+            matcher.match_boxes(torch.empty(0, 4), anchors)
+        with pytest.raises(ValueError, match="No proposal boxes"):
+            matcher.match_boxes(gt_boxes, torch.empty(0, 4))
+
+    @pytest.mark.parametrize("num_classes", (1, 5))
+    @pytest.mark.parametrize("dtype", (torch.float32, torch.float64))
+    def test_box_coder_decode_and_clip(self, num_classes, dtype):
+        torch.random.manual_seed(0)
+        box_coder = _utils.BoxCoder((10.0, 10.0, 5.0, 5.0))
+        boxes = [torch.rand(n, 4, dtype=dtype) * 100 for n in (30, 0, 20)]
+        for b in boxes:
+            b[:, 2:] += b[:, :2]
+        rel_codes = torch.randn(50, 4 * num_classes, dtype=dtype) * 2
+        # large scales are clamped to bbox_xform_clip
+        rel_codes[0, 2:4] = 1000
+        image_shapes = [(80, 90), (10, 10), (150, 40)]
+
+        pred_boxes = box_coder.decode_and_clip(rel_codes, boxes, image_shapes)
+        decoded = box_coder.decode(rel_codes, boxes)
+        expected = [
+            clip_boxes_to_image(image_boxes, image_shape)
+            for image_boxes, image_shape in zip(decoded.split([30, 0, 20]), image_shapes)
+        ]
+        assert pred_boxes.shape == (50, num_classes, 4)
+        torch.testing.assert_close(pred_boxes, torch.cat(expected))
+
+    def test_box_coder_decode_bfloat16(self):
+        torch.random.manual_seed(0)
+        box_coder = _utils.BoxCoder((1.0, 1.0, 1.0, 1.0))
+        # bfloat16 rounds these coordinates to multiples of 8
+        boxes = [torch.rand(40, 4) * 100 + 1000]
+        boxes[0][:, 2:] += boxes[0][:, :2]
+        rel_codes = torch.randn(40, 4).bfloat16()
+        image_shapes = [(2000, 2000)]
+
+        decoded = box_coder.decode(rel_codes, boxes)
+        assert decoded.dtype == torch.float32
+        torch.testing.assert_close(decoded, box_coder.decode(rel_codes.float(), boxes))
+        pred_boxes = box_coder.decode_and_clip(rel_codes, boxes, image_shapes)
+        assert pred_boxes.dtype == torch.float32
+        torch.testing.assert_close(pred_boxes, box_coder.decode_and_clip(rel_codes.float(), boxes, image_shapes))
+
+    @pytest.mark.parametrize("topk", (5, 50))
+    def test_select_topk_per_segment(self, topk):
+        torch.random.manual_seed(0)
+        scores = torch.rand(3, 4, 20)
+        # no candidate above the threshold
+        scores[1, 2] = 0.1
+
+        image_idxs, segment_idxs, candidate_idxs, selected_scores = _utils._select_topk_per_segment(scores, 0.5, topk)
+        expected = []
+        for image_idx in range(3):
+            for segment_idx in range(4):
+                segment_scores = scores[image_idx, segment_idx]
+                candidates = torch.where(segment_scores > 0.5)[0]
+                top_scores, idxs = segment_scores[candidates].topk(min(topk, len(candidates)))
+                expected.extend((image_idx, segment_idx, i, s) for i, s in zip(candidates[idxs].tolist(), top_scores))
+        assert image_idxs.tolist() == [e[0] for e in expected]
+        assert segment_idxs.tolist() == [e[1] for e in expected]
+        assert candidate_idxs.tolist() == [e[2] for e in expected]
+        assert_equal(selected_scores, torch.stack([e[3] for e in expected]))
+
+    @pytest.mark.parametrize("num_images", (0, 2))
+    def test_batched_nms_per_image(self, num_images):
+        torch.random.manual_seed(0)
+        boxes = [torch.rand(n, 4) * 50 + torch.tensor([0.0, 0.0, 50.0, 50.0]) for n in (10, 0)[:num_images]]
+        scores = [torch.rand(len(b)) for b in boxes]
+        labels = [torch.randint(0, 3, (len(b),)) for b in boxes]
+
+        detections = _utils._batched_nms_per_image(boxes, scores, labels, 0.5, 5)
+        assert len(detections) == num_images
+        for b, s, l, detection in zip(boxes, scores, labels, detections):
+            keep = box_ops.batched_nms(b, s, l, 0.5)[:5]
+            assert_equal(detection["boxes"], b[keep])
+            assert_equal(detection["scores"], s[keep])
+            assert_equal(detection["labels"], l[keep])
+
     @pytest.mark.parametrize("train_layers, exp_froz_params", [(0, 53), (1, 43), (2, 24), (3, 11), (4, 1), (5, 0)])
     def test_resnet_fpn_backbone_frozen_layers(self, train_layers, exp_froz_params):
         # we know how many initial layers and parameters of the network should
@@ -52,6 +180,161 @@ class TestModelsDetectionUtils:
             )
         assert ret == 5
 
+    @pytest.mark.parametrize("training", (False, True))
+    def test_rpn_topk_before_decode(self, training):
+        torch.random.manual_seed(0)
+        anchor_generator = AnchorGenerator(((16,), (32,)), ((0.5, 1.0, 2.0),) * 2)
+        rpn = RegionProposalNetwork(
+            anchor_generator,
+            RPNHead(8, anchor_generator.num_anchors_per_location()[0]),
+            0.7,
+            0.3,
+            256,
+            0.5,
+            dict(training=100, testing=50),
+            dict(training=40, testing=20),
+            0.7,
+        )
+        rpn.train(training)
+        images = ImageList(torch.rand(2, 3, 64, 96), [(64, 90), (60, 96)])
+        features = {"0": torch.rand(2, 8, 16, 24), "1": torch.rand(2, 8, 8, 12)}
+        targets = [
+            {"boxes": torch.tensor([[10.0, 10.0, 40.0, 50.0]])},
+            {"boxes": torch.tensor([[0.0, 5.0, 30.0, 20.0]])},
+        ]
+
+        # the same anchors are sampled for the losses
+        torch.random.manual_seed(0)
+        expected_boxes, expected_losses = rpn(images, features, targets)
+        rpn.topk_before_decode = True
+        torch.random.manual_seed(0)
+        boxes, losses = rpn(images, features, targets)
+        assert_equal(boxes, expected_boxes)
+        assert_equal(losses, expected_losses)
+
+    @pytest.mark.parametrize("topk_before_decode", (False, True))
+    def test_rpn_proposals_clipped_once(self, topk_before_decode, monkeypatch):
+        torch.random.manual_seed(0)
+        anchor_generator = AnchorGenerator(((16,), (32,)), ((0.5, 1.0, 2.0),) * 2)
+        rpn = RegionProposalNetwork(
+            anchor_generator,
+            RPNHead(8, anchor_generator.num_anchors_per_location()[0]),
+            0.7,
+            0.3,
+            256,
+            0.5,
+            dict(training=100, testing=50),
+            dict(training=40, testing=20),
+            0.7,
+            topk_before_decode=topk_before_decode,
+        ).eval()
+        images = ImageList(torch.rand(2, 3, 64, 96), [(64, 90), (60, 96)])
+        features = [torch.rand(2, 8, 16, 24), torch.rand(2, 8, 8, 12)]
+
+        # filter_proposals clips the proposals of external callers
+        objectness, pred_bbox_deltas = rpn.head(features)
+        anchors = rpn.anchor_generator(images, features)
+        num_anchors_per_level = [o[0].numel() for o in objectness]
+        objectness, pred_bbox_deltas = concat_box_prediction_layers(objectness, pred_bbox_deltas)
+        proposals = rpn.box_coder.decode(pred_bbox_deltas.detach(), anchors).view(2, -1, 4)
+        expected_boxes, _ = rpn.filter_proposals(proposals, objectness, images.image_sizes, num_anchors_per_level)
+
+        # forward() gets its proposals clipped by decode_and_clip and does not clip them again
+        def clip_boxes_to_image(*args):
+            raise AssertionError("the proposals are clipped twice")
+
+        monkeypatch.setattr(rpn_module.box_ops, "clip_boxes_to_image", clip_boxes_to_image)
+        boxes, _ = rpn(images, {"0": features[0], "1": features[1]})
+        for boxes_per_image, expected_boxes_per_image in zip(boxes, expected_boxes):
+            torch.testing.assert_close(boxes_per_image, expected_boxes_per_image)
+
+    def test_rpn_static_shapes(self):
+        torch.random.manual_seed(0)
+        anchor_generator = AnchorGenerator(((16,), (32,)), ((0.5, 1.0, 2.0),) * 2)
+        rpn = RegionProposalNetwork(
+            anchor_generator,
+            RPNHead(8, anchor_generator.num_anchors_per_location()[0]),
+            0.7,
+            0.3,
+            256,
+            0.5,
+            dict(training=100, testing=50),
+            dict(training=40, testing=120),
+            0.7,
+            score_thresh=0.5,
+        ).eval()
+        images = ImageList(torch.rand(2, 3, 64, 96), [(64, 90), (60, 96)])
+        features = {"0": torch.rand(2, 8, 16, 24), "1": torch.rand(2, 8, 8, 12)}
+
+        expected_boxes, _ = rpn(images, features)
+        rpn.static_shapes = True
+        boxes, _ = rpn(images, features)
+        for boxes_per_image, expected_boxes_per_image in zip(boxes, expected_boxes):
+            # padded with empty boxes
+            assert boxes_per_image.shape == (120, 4)
+            num_boxes = len(expected_boxes_per_image)
+            assert 0 < num_boxes < 120
+            assert_equal(boxes_per_image[:num_boxes], expected_boxes_per_image)
+            assert_equal(boxes_per_image[num_boxes:], torch.zeros(120 - num_boxes, 4))
+
+    def test_static_shapes(self):
+        torch.random.manual_seed(0)
+        kwargs = dict(pretrained=False, pretrained_backbone=False, num_classes=5, box_score_thresh=0.2)
+        model = fasterrcnn_mobilenet_v3_large_320_fpn(**kwargs).eval()
+        static_model = fasterrcnn_mobilenet_v3_large_320_fpn(static_shapes=True, **kwargs).eval()
+        static_model.load_state_dict(model.state_dict())
+        images = [torch.rand(3, 300, 320), torch.rand(3, 200, 150)]
+
+        # the images are padded to max_size x max_size
+        assert static_model.transform(images)[0].tensors.shape == (2, 3, 640, 640)
+        # the detections depend on the padded size, the same padded images are given to both models
+        model.transform.fixed_size = static_model.transform.fixed_size = (320, 320)
+        with torch.no_grad():
+            expected_detections = model(images)
+            detections = static_model(images)
+        for detections_per_image, expected_detections_per_image in zip(detections, expected_detections):
+            assert detections_per_image["boxes"].shape == (100, 4)
+            # the padding detections have a -1 label
+            valid = detections_per_image["labels"] >= 0
+            assert 0 < valid.sum() < 100
+            assert not valid[valid.sum() :].any()
+            for key in ("boxes", "scores", "labels"):
+                torch.testing.assert_close(detections_per_image[key][valid], expected_detections_per_image[key])
+
+    def test_custom_roi_heads_without_batch_image_shape(self):
+        class CustomRoIHeads(roi_heads.RoIHeads):
+            def forward(
+                self,
+                features: Dict[str, Tensor],
+                proposals: List[Tensor],
+                image_shapes: List[Tuple[int, int]],
+                targets: Optional[List[Dict[str, Tensor]]] = None,
+            ):
+                # inference only, with the signature RoIHeads.forward used to have
+                box_features = self.box_roi_pool(features, proposals, image_shapes)
+                class_logits, box_regression = self.box_predictor(self.box_head(box_features))
+                boxes, scores, labels = self.postprocess_detections(
+                    class_logits, box_regression, proposals, image_shapes
+                )
+                result: List[Dict[str, Tensor]] = []
+                for i in range(len(boxes)):
+                    result.append({"boxes": boxes[i], "labels": labels[i], "scores": scores[i]})
+                losses: Dict[str, Tensor] = {}
+                return result, losses
+
+        torch.random.manual_seed(0)
+        model = fasterrcnn_mobilenet_v3_large_320_fpn(pretrained=False, pretrained_backbone=False, num_classes=5)
+        model.eval()
+        images = [torch.rand(3, 300, 320)]
+        with torch.no_grad():
+            expected = model(images)
+            model.roi_heads.__class__ = CustomRoIHeads
+            detections = model(images)
+            _, scripted_detections = torch.jit.script(model)(images)
+        for key in ("boxes", "scores", "labels"):
+            assert_equal(detections[0][key], expected[0][key])
+            assert_equal(scripted_detections[0][key], expected[0][key])
+
     def test_transform_copy_targets(self):
         transform = GeneralizedRCNNTransform(300, 500, torch.zeros(3), torch.ones(3))
         image = [torch.rand(3, 200, 300), torch.rand(3, 200, 200)]
@@ -61,6 +344,144 @@ class TestModelsDetectionUtils:
         assert_equal(targets[0]["boxes"], targets_copy[0]["boxes"])
         assert_equal(targets[1]["boxes"], targets_copy[1]["boxes"])
 
+    @pytest.mark.parametrize("fixed_size", (None, (300, 250)))
+    def test_transform_batch(self, fixed_size):
+        transform = GeneralizedRCNNTransform(
+            300, 500, [0.4, 0.5, 0.6], [0.2, 0.3, 0.1], fixed_size=fixed_size, batched_inputs=True
+        ).eval()
+        images = torch.rand(2, 3, 200, 310)
+        targets = [
+            {"boxes": torch.rand(3, 4) * 100, "masks": torch.randint(0, 2, (3, 200, 310), dtype=torch.uint8)},
+            {"boxes": torch.rand(1, 4) * 100, "masks": torch.randint(0, 2, (1, 200, 310), dtype=torch.uint8)},
+        ]
+        targets_copy = copy.deepcopy(targets)
+
+        image_list, batch_targets = transform(images, targets)
+        expected_image_list, expected_targets = transform(list(images), targets)
+        assert_equal(image_list.tensors, expected_image_list.tensors)
+        assert image_list.image_sizes == expected_image_list.image_sizes
+        for target, expected_target in zip(batch_targets, expected_targets):
+            assert_equal(target, expected_target)
+        # the targets given as input are not modified
+        assert_equal(targets, targets_copy)
+
+    def test_transform_stacked_images_per_image(self):
+        # without batched_inputs, a stacked batch is still transformed image by image, and a size
+        # is drawn for every image during training
+        transform = GeneralizedRCNNTransform((200, 300, 400), 500, [0.4, 0.5, 0.6], [0.2, 0.3, 0.1])
+        images = torch.rand(4, 3, 200, 310)
+        torch.manual_seed(0)
+        image_list, _ = transform(images)
+        torch.manual_seed(0)
+        expected_image_list, _ = transform(list(images))
+        assert_equal(image_list.tensors, expected_image_list.tensors)
+        assert image_list.image_sizes == expected_image_list.image_sizes
+
+    def test_transform_batch_reuse_buffer(self):
+        transform = GeneralizedRCNNTransform(
+            300, 500, [0.4, 0.5, 0.6], [0.2, 0.3, 0.1], batched_inputs=True, reuse_batch_buffer=True
+        )
+        transform.eval()
+        image_list, _ = transform(torch.rand(2, 3, 200, 310))
+        buffer = image_list.tensors
+        image_list, _ = transform(torch.rand(2, 3, 200, 310))
+        assert image_list.tensors is buffer
+
+        # same padded size, but a smaller image: the padding must be cleared
+        images = torch.rand(2, 3, 200, 300)
+        image_list, _ = transform(images)
+        assert image_list.tensors is buffer
+        expected_image_list, _ = transform(list(images))
+        assert_equal(image_list.tensors, expected_image_list.tensors)
+
+        image_list, _ = transform(torch.rand(1, 3, 200, 300))
+        assert image_list.tensors is not buffer
+
+    def _make_paste_inputs(self, num_masks, height, width):
+        torch.random.manual_seed(0)
+        boxes = torch.rand(num_masks, 4) * torch.tensor([width, height, width, height])
+        boxes[:, 2:] = boxes[:, :2] + torch.rand(num_masks, 2) * 60
+        # a box covering the image, one smaller than a pixel and one outside of the image
+        boxes[0] = torch.tensor([-10.0, -10.0, width + 10.0, height + 10.0])
+        boxes[1, 2:] = boxes[1, :2] + 0.5
+        boxes[2] = torch.tensor([width + 5.0, 3.0, width + 20.0, 10.0])
+        return torch.rand(num_masks, 1, 28, 28), boxes
+
+    def test_paste_masks_in_image(self):
+        height, width = 70, 90
+        masks, boxes = self._make_paste_inputs(12, height, width)
+        result = roi_heads.paste_masks_in_image(masks, boxes, (height, width))
+
+        expanded_masks, scale = roi_heads.expand_masks(masks, padding=1)
+        expanded_boxes = roi_heads.expand_boxes(boxes, scale).to(dtype=torch.int64)
+        # paste_mask_in_image does not support boxes outside of the image
+        expanded_boxes[2] = torch.tensor([0, 0, -1, -1])
+        expected = [
+            roi_heads.paste_mask_in_image(mask[0], box, height, width)
+            for mask, box in zip(expanded_masks, expanded_boxes)
+        ]
+        torch.testing.assert_close(result, torch.stack(expected)[:, None])
+
+        thresholded = roi_heads.paste_masks_in_image(masks, boxes, (height, width), threshold=0.5)
+        assert thresholded.dtype == torch.bool
+        assert_equal(thresholded, result > 0.5)
+
+        empty = roi_heads.paste_masks_in_image(masks[:0], boxes[:0], (height, width))
+        assert empty.shape == (0, 1, height, width)
+
+    def test_paste_masks_in_boxes(self):
+        height, width = 70, 90
+        masks, boxes = self._make_paste_inputs(12, height, width)
+        expected = roi_heads.paste_masks_in_image(masks, boxes, (height, width))
+        crops, regions = roi_heads.paste_masks_in_boxes(masks, boxes, (height, width))
+        assert len(crops) == len(boxes)
+        for crop, (x1, y1, x2, y2), mask in zip(crops, regions.tolist(), expected[:, 0]):
+            assert_equal(crop, mask[y1:y2, x1:x2])
+            outside = mask.clone()
+            outside[y1:y2, x1:x2] = 0
+            assert not outside.any()
+
+    def test_paste_masks_in_image_rle(self):
+        height, width = 70, 90
+        masks, boxes = self._make_paste_inputs(12, height, width)
+        expected = roi_heads.paste_masks_in_image(masks, boxes, (height, width), threshold=0.5)[:, 0]
+        counts = roi_heads.paste_masks_in_image_rle(masks, boxes, (height, width), threshold=0.5)
+        for count, mask in zip(counts, expected):
+            decoded = torch.repeat_interleave(torch.arange(len(count)) % 2, count).bool()
+            assert_equal(decoded.reshape(width, height).t(), mask)
+
+        not_empty = expected.flatten(1).any(dim=1)
+        rle_boxes = rle_masks_to_boxes([count for count, keep in zip(counts, not_empty) if keep], height)
+        assert_equal(rle_boxes, masks_to_boxes(expected[not_empty]))
+
+    def test_heatmaps_to_keypoints(self):
+        torch.random.manual_seed(0)
+        rois = torch.rand(20, 4) * 100
+        rois[:, 2:] = rois[:, :2] + torch.rand(20, 2) * 80
+        # boxes smaller than a pixel
+        rois[:2, 2:] = rois[:2, :2] + 0.5
+        maps = torch.randn(20, 5, 14, 14)
+        keypoints, scores = roi_heads.heatmaps_to_keypoints(maps, rois)
+        assert keypoints.shape == (20, 5, 3)
+        assert scores.shape == (20, 5)
+
+        widths = (rois[:, 2] - rois[:, 0]).clamp(min=1)
+        heights = (rois[:, 3] - rois[:, 1]).clamp(min=1)
+        for i in range(len(rois)):
+            size = (int(heights[i].ceil()), int(widths[i].ceil()))
+            roi_map = F.interpolate(maps[i][:, None], size=size, mode="bicubic", align_corners=False)[:, 0]
+            expected_scores, pos = roi_map.flatten(1).max(dim=1)
+            x = (pos % size[1]).float() + 0.5
+            y = torch.div(pos, size[1], rounding_mode="floor").float() + 0.5
+            assert_equal(keypoints[i, :, 0], x * (widths[i] / size[1]) + rois[i, 0])
+            assert_equal(keypoints[i, :, 1], y * (heights[i] / size[0]) + rois[i, 1])
+            assert_equal(keypoints[i, :, 2], torch.ones(5))
+            torch.testing.assert_close(scores[i], expected_scores)
+
+        keypoints, scores = roi_heads.heatmaps_to_keypoints(maps[:0], rois[:0])
+        assert keypoints.shape == (0, 5, 3)
+        assert scores.shape == (0, 5)
+
     def test_not_float_normalize(self):
         transform = GeneralizedRCNNTransform(300, 500, torch.zeros(3), torch.ones(3))
         image = [torch.randint(0, 255, (3, 200, 300), dtype=torch.uint8)]
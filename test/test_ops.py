@@ -1,6 +1,7 @@
 import math
 import os
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from functools import lru_cache
 from typing import Tuple
 
@@ -17,6 +18,8 @@ from torchvision import models, ops
 
 class RoIOpTester(ABC):
     dtype = torch.float64
+    # whether the op runs in bfloat16 instead of float32 under CPU autocast
+    reduced_precision_autocast_cpu = False
 
     @pytest.mark.parametrize("device", cpu_and_gpu())
     @pytest.mark.parametrize("contiguous", (True, False))
@@ -44,6 +47,8 @@ class RoIOpTester(ABC):
         )
 
         tol = 1e-3 if (x_dtype is torch.half or rois_dtype is torch.half) else 1e-5
+        if torch.bfloat16 in (x_dtype, rois_dtype):
+            tol = 1e-2
         torch.testing.assert_close(gt_y.to(y), y, rtol=tol, atol=tol)
 
     @pytest.mark.parametrize("seed", range(10))
@@ -74,6 +79,19 @@ class RoIOpTester(ABC):
         with torch.cuda.amp.autocast():
             self.test_forward(torch.device("cuda"), contiguous=False, x_dtype=x_dtype, rois_dtype=rois_dtype)
 
+    @pytest.mark.parametrize("x_dtype", (torch.float, torch.bfloat16))
+    @pytest.mark.parametrize("rois_dtype", (torch.float, torch.bfloat16))
+    def test_autocast_cpu(self, x_dtype, rois_dtype):
+        torch.random.manual_seed(0)
+        x = torch.rand(2, 8, 10, 10, dtype=x_dtype)
+        rois = torch.tensor([[0, 0, 0, 9, 9], [0, 0, 5, 4, 9], [1, 5, 5, 9, 9]], dtype=rois_dtype)
+        with torch.cpu.amp.autocast():
+            y = self.fn(x, rois, 2, 2, spatial_scale=1, sampling_ratio=-1)
+        expected = self.fn(x.float(), rois.float(), 2, 2, spatial_scale=1, sampling_ratio=-1)
+
+        assert y.dtype == (torch.bfloat16 if self.reduced_precision_autocast_cpu else x_dtype)
+        torch.testing.assert_close(y.float(), expected, rtol=1e-2, atol=1e-2)
+
     def _helper_boxes_shape(self, func):
         # test boxes as Tensor[N, 5]
         with pytest.raises(AssertionError):
@@ -218,6 +236,8 @@ def bilinear_interpolate(data, y, x, snap_border=False):
 
 
 class TestRoIAlign(RoIOpTester):
+    reduced_precision_autocast_cpu = True
+
     def fn(self, x, rois, pool_h, pool_w, spatial_scale=1, sampling_ratio=-1, aligned=False, **kwargs):
         return ops.RoIAlign(
             (pool_h, pool_w), spatial_scale=spatial_scale, sampling_ratio=sampling_ratio, aligned=aligned
@@ -286,6 +306,30 @@ class TestRoIAlign(RoIOpTester):
             device=device, contiguous=contiguous, x_dtype=x_dtype, rois_dtype=rois_dtype, aligned=aligned
         )
 
+    @pytest.mark.parametrize("aligned", (True, False))
+    @pytest.mark.parametrize("contiguous", (True, False))
+    @pytest.mark.parametrize("rois_dtype", (torch.float, torch.bfloat16))
+    def test_forward_bfloat16(self, contiguous, aligned, rois_dtype):
+        self.test_forward(
+            torch.device("cpu"), contiguous=contiguous, aligned=aligned, x_dtype=torch.bfloat16, rois_dtype=rois_dtype
+        )
+
+    @pytest.mark.parametrize("aligned", (True, False))
+    @pytest.mark.parametrize("channels_last", (True, False))
+    def test_backward_bfloat16(self, aligned, channels_last):
+        torch.random.manual_seed(0)
+        x = torch.rand(2, 6, 10, 10)
+        if channels_last:
+            x = x.contiguous(memory_format=torch.channels_last)
+        rois = self._make_rois(img_size=10, num_imgs=2, dtype=torch.float, num_rois=20)
+        x_bf16 = x.bfloat16().requires_grad_()
+        x = x_bf16.detach().float().requires_grad_()
+
+        ops.roi_align(x_bf16, rois, output_size=3, sampling_ratio=-1, aligned=aligned).sum().backward()
+        ops.roi_align(x, rois, output_size=3, sampling_ratio=-1, aligned=aligned).sum().backward()
+        assert x_bf16.grad.dtype == torch.bfloat16
+        torch.testing.assert_close(x_bf16.grad.float(), x.grad, rtol=1e-2, atol=1e-2)
+
     @needs_cuda
     @pytest.mark.parametrize("aligned", (True, False))
     @pytest.mark.parametrize("x_dtype", (torch.float, torch.half))
@@ -302,6 +346,28 @@ class TestRoIAlign(RoIOpTester):
         rois[:, 3:] += rois[:, 1:3]  # make sure boxes aren't degenerate
         return rois
 
+    @pytest.mark.parametrize("aligned", (True, False))
+    @pytest.mark.parametrize("device", cpu_and_gpu())
+    def test_channels_last(self, device, aligned):
+        torch.random.manual_seed(0)
+        x = torch.rand(2, 6, 10, 10, dtype=self.dtype, device=device, requires_grad=True)
+        x_channels_last = x.detach().contiguous(memory_format=torch.channels_last).requires_grad_()
+        rois = self._make_rois(img_size=10, num_imgs=2, dtype=self.dtype, num_rois=20).to(device)
+
+        y = ops.roi_align(x, rois, output_size=3, sampling_ratio=-1, aligned=aligned)
+        y_channels_last = ops.roi_align(x_channels_last, rois, output_size=3, sampling_ratio=-1, aligned=aligned)
+        assert_equal(y_channels_last, y)
+
+        grad = torch.rand_like(y)
+        y.backward(grad)
+        y_channels_last.backward(grad.contiguous(memory_format=torch.channels_last))
+        assert_equal(x_channels_last.grad, x.grad)
+
+        def func(z):
+            return ops.roi_align(z, rois, output_size=2, sampling_ratio=1, aligned=aligned)
+
+        gradcheck(func, (x_channels_last[:, :2],))
+
     @pytest.mark.parametrize("aligned", (True, False))
     @pytest.mark.parametrize("scale, zero_point", ((1, 0), (2, 10), (0.1, 50)))
     @pytest.mark.parametrize("qdtype", (torch.qint8, torch.quint8, torch.qint32))
@@ -371,6 +437,8 @@ class TestRoIAlign(RoIOpTester):
 
 
 class TestPSRoIAlign(RoIOpTester):
+    reduced_precision_autocast_cpu = True
+
     def fn(self, x, rois, pool_h, pool_w, spatial_scale=1, sampling_ratio=-1, **kwargs):
         return ops.PSRoIAlign((pool_h, pool_w), spatial_scale=spatial_scale, sampling_ratio=sampling_ratio)(x, rois)
 
@@ -420,6 +488,11 @@ class TestPSRoIAlign(RoIOpTester):
     def test_boxes_shape(self):
         self._helper_boxes_shape(ops.ps_roi_align)
 
+    @pytest.mark.parametrize("contiguous", (True, False))
+    @pytest.mark.parametrize("rois_dtype", (torch.float, torch.bfloat16))
+    def test_forward_bfloat16(self, contiguous, rois_dtype):
+        self.test_forward(torch.device("cpu"), contiguous=contiguous, x_dtype=torch.bfloat16, rois_dtype=rois_dtype)
+
 
 class TestMultiScaleRoIAlign:
     def test_msroialign_repr(self):
@@ -436,6 +509,103 @@ class TestMultiScaleRoIAlign:
         )
         assert repr(t) == expected_string
 
+    def _make_inputs(self, dtype, channels_last=False):
+        torch.manual_seed(0)
+        image_shapes = [(256, 320), (192, 256)]
+        features = OrderedDict()
+        for name, stride in (("p2", 4), ("p3", 8), ("p4", 16), ("p5", 32)):
+            feature = torch.rand(2, 3, 320 // stride, 320 // stride, dtype=dtype)
+            if channels_last:
+                feature = feature.contiguous(memory_format=torch.channels_last)
+            features[name] = feature.requires_grad_()
+        # reduced precision features are pooled with float boxes
+        box_dtype = torch.float32 if dtype == torch.bfloat16 else dtype
+        boxes = []
+        for height, width in image_shapes:
+            # boxes of all sizes, so that every level gets some of them
+            xy = torch.rand(30, 2, dtype=box_dtype) * torch.tensor([width, height], dtype=box_dtype) / 2
+            wh = torch.logspace(0, 9.5, 30, base=2, dtype=box_dtype).unsqueeze(1).repeat(1, 2)
+            boxes.append(torch.cat([xy, xy + wh], dim=1))
+        return features, boxes, image_shapes
+
+    @pytest.mark.parametrize("dtype", (torch.float32, torch.float64, torch.bfloat16))
+    @pytest.mark.parametrize("channels_last", (False, True))
+    def test_multi_level_matches_per_level(self, dtype, channels_last, monkeypatch):
+        features, boxes, image_shapes = self._make_inputs(dtype, channels_last)
+        pooler = ops.MultiScaleRoIAlign(["p2", "p3", "p4", "p5"], 7, 2)
+        assert ops.poolers._use_multi_level_roi_align(list(features.values()), pooler.convert_to_roi_format(boxes))
+
+        result = pooler(features, boxes, image_shapes)
+        levels = pooler.map_levels(boxes)
+        assert levels.unique().numel() == 4
+        grad = torch.rand_like(result)
+        grads = torch.autograd.grad(result, list(features.values()), grad)
+
+        monkeypatch.setattr(ops.poolers, "_use_multi_level_roi_align", lambda x_filtered, rois: False)
+        expected = pooler(features, boxes, image_shapes)
+        expected_grads = torch.autograd.grad(expected, list(features.values()), grad)
+
+        torch.testing.assert_close(result, expected, rtol=0, atol=0)
+        for actual_grad, expected_grad in zip(grads, expected_grads):
+            torch.testing.assert_close(actual_grad, expected_grad)
+
+    def test_multi_level_gradcheck(self):
+        torch.manual_seed(0)
+        features = [torch.rand(1, 2, size, size, dtype=torch.float64, requires_grad=True) for size in (10, 5)]
+        rois = torch.tensor(
+            [[0, 0, 0, 9, 9], [0, 4, 4, 38, 30], [0, 1, 2, 5, 8]],
+            dtype=torch.float64,
+        )
+        levels = torch.tensor([0, 1, 0])
+
+        def func(*features):
+            return torch.ops.torchvision.multi_level_roi_align(list(features), rois, levels, [1.0, 0.5], 3, 3, 2, False)
+
+        gradcheck(func, features)
+
+    def test_scales_cache(self):
+        pooler = ops.MultiScaleRoIAlign(["p2", "p3"], 7, 2, cache_size=2)
+        boxes = [torch.tensor([[0.0, 0.0, 32.0, 32.0]])]
+
+        def features(size):
+            return OrderedDict(
+                [("p2", torch.rand(1, 1, size // 4, size // 4)), ("p3", torch.rand(1, 1, size // 8, size // 8))]
+            )
+
+        pooler(features(64), boxes, [(64, 64)])
+        scales, mapper = pooler.scales, pooler.map_levels
+        assert scales == [1 / 4, 1 / 8]
+        pooler(features(64), boxes, [(64, 64)])
+        assert pooler.scales is scales and pooler.map_levels is mapper
+
+        # a new input shape gets its own scales instead of reusing the ones of the first call
+        pooler(features(128), boxes, [(64, 64)])
+        assert pooler.scales == [1 / 2, 1 / 4]
+        assert len(pooler._scales_cache) == 2
+
+        # the least recently used entry is evicted
+        pooler(features(64), boxes, [(64, 64)])
+        pooler(features(256), boxes, [(64, 64)])
+        assert len(pooler._scales_cache) == 2
+        pooler(features(64), boxes, [(64, 64)])
+        assert pooler.scales is scales and pooler.map_levels is mapper
+        pooler(features(128), boxes, [(64, 64)])
+        assert pooler.scales == [1 / 2, 1 / 4]
+        assert pooler.scales is not scales
+        assert (pooler._scales_cache_keys.hits, pooler._scales_cache_keys.misses) == (3, 4)
+
+    def test_invalid_cache_size(self):
+        with pytest.raises(ValueError, match="cache_size should be a positive integer"):
+            ops.MultiScaleRoIAlign(["p2"], 7, 2, cache_size=0)
+
+    def test_multi_level_scripted(self):
+        features, boxes, image_shapes = self._make_inputs(torch.float32)
+        pooler = ops.MultiScaleRoIAlign(["p2", "p3", "p4", "p5"], 7, 2)
+        scripted = torch.jit.script(pooler)
+        torch.testing.assert_close(scripted(features, boxes, image_shapes), pooler(features, boxes, image_shapes))
+        # cache hit
+        torch.testing.assert_close(scripted(features, boxes, image_shapes), pooler(features, boxes, image_shapes))
+
 
 class TestNMS:
     def _reference_nms(self, boxes, scores, iou_threshold):
@@ -543,6 +713,20 @@ class TestNMS:
         with torch.cuda.amp.autocast():
             self.test_nms_cuda(iou=iou, dtype=dtype)
 
+    @pytest.mark.parametrize("iou", (0.2, 0.5, 0.8))
+    def test_autocast_cpu(self, iou):
+        torch.random.manual_seed(0)
+        boxes, scores = self._create_tensors_with_iou(1000, iou)
+        boxes, scores = boxes.bfloat16(), scores.bfloat16()
+        idxs = torch.randint(0, 4, (boxes.size(0),))
+        with torch.cpu.amp.autocast():
+            keep = ops.nms(boxes, scores, iou)
+            batched_keep = ops.batched_nms(boxes, scores, idxs, iou)
+            iou_matrix = ops.box_iou(boxes, boxes)
+        assert_equal(keep, ops.nms(boxes.float(), scores.float(), iou))
+        assert_equal(batched_keep, ops.batched_nms(boxes.float(), scores.float(), idxs, iou))
+        assert iou_matrix.dtype == torch.float32
+
     @needs_cuda
     def test_nms_cuda_float16(self):
         boxes = torch.tensor(
@@ -584,6 +768,153 @@ class TestNMS:
         empty = torch.empty((0,), dtype=torch.int64)
         torch.testing.assert_close(empty, ops.batched_nms(empty, None, None, None))
 
+    @pytest.mark.parametrize("seed", range(10))
+    @pytest.mark.parametrize("num_classes", (1, 4, 80))
+    def test_batched_nms_native(self, seed, num_classes):
+        torch.random.manual_seed(seed)
+
+        num_boxes = 2000
+        iou_threshold = 0.5
+
+        boxes = torch.rand(num_boxes, 4) * 100
+        boxes[:, 2:] += boxes[:, :2]
+        scores = torch.rand(num_boxes)
+        idxs = torch.randint(0, num_classes, size=(num_boxes,))
+        keep_vanilla = ops.boxes._batched_nms_vanilla(boxes, scores, idxs, iou_threshold)
+        keep_native = ops.boxes._batched_nms_native(boxes, scores, idxs, iou_threshold)
+        torch.testing.assert_close(keep_vanilla, keep_native)
+
+        # batched_nms picks the native kernel for CPU inputs
+        torch.testing.assert_close(ops.batched_nms(boxes, scores, idxs, iou_threshold), keep_native)
+
+        empty = torch.empty((0, 4))
+        keep = ops.boxes._batched_nms_native(empty, torch.empty(0), torch.empty(0, dtype=torch.int64), iou_threshold)
+        assert keep.numel() == 0 and keep.dtype == torch.int64
+
+    @pytest.mark.parametrize("device", cpu_and_gpu())
+    @pytest.mark.parametrize("topk", (0, 1, 100, 5000))
+    @pytest.mark.parametrize("num_classes", (1, 10))
+    def test_batched_nms_topk(self, device, topk, num_classes):
+        torch.random.manual_seed(0)
+
+        num_boxes = 2000
+        iou_threshold = 0.5
+
+        boxes = torch.rand(num_boxes, 4, device=device) * 100
+        boxes[:, 2:] += boxes[:, :2]
+        scores = torch.rand(num_boxes, device=device)
+        idxs = torch.randint(0, num_classes, size=(num_boxes,), device=device)
+        keep = ops.batched_nms(boxes, scores, idxs, iou_threshold)
+        keep_topk = ops.batched_nms(boxes, scores, idxs, iou_threshold, topk=topk)
+        torch.testing.assert_close(keep_topk, keep[:topk])
+
+    @pytest.mark.parametrize("device", cpu_and_gpu())
+    @pytest.mark.parametrize("num_boxes", (0, 10, 5000))
+    def test_batched_nms_negative_topk(self, device, num_boxes):
+        boxes = torch.rand(num_boxes, 4, device=device) * 100
+        boxes[:, 2:] += boxes[:, :2]
+        scores = torch.rand(num_boxes, device=device)
+        idxs = torch.zeros(num_boxes, dtype=torch.int64, device=device)
+        with pytest.raises(ValueError, match="topk should be non-negative, got -1"):
+            ops.batched_nms(boxes, scores, idxs, 0.5, topk=-1)
+        with pytest.raises(torch.jit.Error, match="topk should be non-negative, got -1"):
+            torch.jit.script(ops.batched_nms)(boxes, scores, idxs, 0.5, topk=-1)
+
+    def _reference_soft_nms(self, boxes, scores, idxs, iou_threshold, sigma, score_threshold, method):
+        picked, picked_scores = [], []
+        for class_id in torch.unique(idxs):
+            indexes = torch.where(idxs == class_id)[0]
+            class_scores = scores[indexes].clone()
+            keep = class_scores >= score_threshold
+            indexes, class_scores = indexes[keep], class_scores[keep]
+            while len(indexes) > 0:
+                best = class_scores.argmax()
+                picked.append(indexes[best].item())
+                picked_scores.append(class_scores[best].item())
+                rest = torch.arange(len(indexes)) != best
+                iou = ops.box_iou(boxes[indexes[rest]], boxes[indexes[best]].unsqueeze(0)).squeeze(1)
+                indexes, class_scores = indexes[rest], class_scores[rest]
+                if method == "gaussian":
+                    class_scores = class_scores * torch.exp(-(iou * iou) / sigma)
+                else:
+                    class_scores = torch.where(iou > iou_threshold, class_scores * (1 - iou), class_scores)
+                keep = class_scores >= score_threshold
+                indexes, class_scores = indexes[keep], class_scores[keep]
+
+        picked_scores, order = torch.tensor(picked_scores, dtype=scores.dtype).sort(descending=True)
+        return torch.tensor(picked, dtype=torch.int64)[order], picked_scores
+
+    @pytest.mark.parametrize("method", ("linear", "gaussian"))
+    @pytest.mark.parametrize("seed", range(3))
+    def test_batched_soft_nms_ref(self, method, seed):
+        torch.random.manual_seed(seed)
+
+        num_boxes = 200
+        boxes = torch.rand(num_boxes, 4, dtype=torch.float64) * 100
+        boxes[:, 2:] += boxes[:, :2]
+        scores = torch.rand(num_boxes, dtype=torch.float64)
+        idxs = torch.randint(0, 3, size=(num_boxes,))
+
+        keep_ref, scores_ref = self._reference_soft_nms(boxes, scores, idxs, 0.3, 0.5, 0.01, method)
+        keep, new_scores = ops.batched_soft_nms(
+            boxes, scores, idxs, 0.3, sigma=0.5, score_threshold=0.01, method=method
+        )
+        torch.testing.assert_close(keep, keep_ref)
+        torch.testing.assert_close(new_scores, scores_ref)
+        # the scores can only be decayed
+        assert (new_scores <= scores[keep]).all()
+
+    def test_batched_soft_nms_errors(self):
+        boxes, scores, idxs = torch.rand(3, 4), torch.rand(3), torch.zeros(3, dtype=torch.int64)
+        with pytest.raises(ValueError, match="method should be"):
+            ops.batched_soft_nms(boxes, scores, idxs, 0.5, method="hard")
+        with pytest.raises(RuntimeError):
+            ops.batched_soft_nms(boxes, scores, idxs, 0.5, sigma=0.0)
+        with pytest.raises(RuntimeError):
+            ops.batched_soft_nms(boxes, torch.rand(4), idxs, 0.5)
+
+        keep, new_scores = ops.batched_soft_nms(torch.empty(0, 4), torch.empty(0), torch.empty(0), 0.5)
+        assert keep.numel() == 0 and new_scores.numel() == 0
+
+    @pytest.mark.parametrize("device", cpu_and_gpu())
+    @pytest.mark.parametrize("max_det", (0, 10, 1000))
+    def test_multi_image_batched_nms(self, device, max_det):
+        torch.random.manual_seed(0)
+
+        batch_size, num_boxes, iou_threshold = 4, 500, 0.5
+        boxes = torch.rand(batch_size, num_boxes, 4, device=device) * 100
+        boxes[..., 2:] += boxes[..., :2]
+        scores = torch.rand(batch_size, num_boxes, device=device)
+        labels = torch.randint(0, 5, size=(batch_size, num_boxes), device=device)
+        # images have different numbers of valid candidates, the last one has none
+        num_valid = [num_boxes, 300, 1, 0]
+        for index, n in enumerate(num_valid):
+            labels[index, n:] = -1
+
+        keep, num_keep = ops.multi_image_batched_nms(boxes, scores, labels, iou_threshold, max_det)
+        assert keep.shape == (batch_size, max_det)
+        assert num_keep.shape == (batch_size,)
+        for index, n in enumerate(num_valid):
+            expected = ops.batched_nms(boxes[index, :n], scores[index, :n], labels[index, :n], iou_threshold)
+            expected = expected[:max_det]
+            assert num_keep[index].item() == expected.numel()
+            torch.testing.assert_close(keep[index, : expected.numel()], expected)
+            assert (keep[index, expected.numel() :] == -1).all()
+
+    def test_multi_image_batched_nms_input_errors(self):
+        with pytest.raises(RuntimeError):
+            ops.multi_image_batched_nms(torch.rand(3, 4), torch.rand(3), torch.zeros(3, dtype=torch.int64), 0.5, 10)
+        with pytest.raises(RuntimeError):
+            ops.multi_image_batched_nms(
+                torch.rand(2, 3, 4), torch.rand(2, 4), torch.zeros(2, 3, dtype=torch.int64), 0.5, 10
+            )
+
+    def test_batched_nms_native_input_errors(self):
+        with pytest.raises(RuntimeError):
+            ops.boxes._batched_nms_native(torch.rand(3, 4), torch.rand(3), torch.zeros(4, dtype=torch.int64), 0.5)
+        with pytest.raises(RuntimeError):
+            ops.boxes._batched_nms_native(torch.rand(3, 4), torch.rand(3), torch.zeros(3, 1, dtype=torch.int64), 0.5)
+
 
 class TestDeformConv:
     dtype = torch.float64
@@ -795,6 +1126,40 @@ class TestDeformConv:
             fast_mode=True,
         )
 
+    def test_tiled_columns(self):
+        # The columns of 2 images of 40x40 with 64 channels and a 3x3 kernel don't fit in the column buffer of
+        # the CPU kernels, which then processes them in several tiles. A single image fits in one tile.
+        torch.manual_seed(0)
+        x = torch.rand(2, 64, 40, 40, dtype=self.dtype, requires_grad=True)
+        weight = torch.randn(32, 32, 3, 3, dtype=self.dtype, requires_grad=True)
+        bias = torch.randn(32, dtype=self.dtype, requires_grad=True)
+        offset = torch.zeros(2, 18, 40, 40, dtype=self.dtype, requires_grad=True)
+        mask = torch.ones(2, 9, 40, 40, dtype=self.dtype, requires_grad=True)
+        grad = torch.rand(2, 32, 40, 40, dtype=self.dtype)
+
+        # without offsets, a deformable convolution is a regular convolution
+        res = ops.deform_conv2d(x, offset, weight, bias, padding=1, mask=mask)
+        res_grads = torch.autograd.grad(res, (x, weight, bias), grad)
+        expected = nn.functional.conv2d(x, weight, bias, padding=1, groups=2)
+        expected_grads = torch.autograd.grad(expected, (x, weight, bias), grad)
+        torch.testing.assert_close(res, expected)
+        for res_grad, expected_grad in zip(res_grads, expected_grads):
+            torch.testing.assert_close(res_grad, expected_grad)
+
+        inputs = (x, torch.randn_like(offset) * 2, torch.rand_like(mask))
+        inputs = tuple(t.detach().requires_grad_() for t in inputs)
+        res = ops.deform_conv2d(inputs[0], inputs[1], weight, bias, padding=1, mask=inputs[2])
+        res_grads = torch.autograd.grad(res, inputs + (weight,), grad)
+        for i in range(2):
+            image_inputs = tuple(t[i : i + 1] for t in inputs)
+            expected = ops.deform_conv2d(
+                image_inputs[0], image_inputs[1], weight, bias, padding=1, mask=image_inputs[2]
+            )
+            expected_grads = torch.autograd.grad(expected, inputs + (weight,), grad[i : i + 1])
+            torch.testing.assert_close(res[i : i + 1], expected)
+            for res_grad, expected_grad in zip(res_grads[:3], expected_grads[:3]):
+                torch.testing.assert_close(res_grad[i : i + 1], expected_grad[i : i + 1])
+
     @needs_cuda
     @pytest.mark.parametrize("contiguous", (True, False))
     def test_compare_cpu_cuda_grads(self, contiguous):
@@ -1079,6 +1444,40 @@ class TestBoxIou:
         scripted_iou = scripted_fn(box_tensor, box_tensor)
         torch.testing.assert_close(scripted_iou, expected, rtol=0.0, atol=TOLERANCE)
 
+    @staticmethod
+    def _make_boxes(num_boxes, dtype=torch.float):
+        boxes = torch.randint(0, 50, (num_boxes, 4)).to(dtype)
+        boxes[:, 2:] += boxes[:, :2] + 1
+        return boxes
+
+    @pytest.mark.parametrize("dtype", (torch.float32, torch.float64))
+    def test_iou_native(self, dtype):
+        torch.random.manual_seed(0)
+        boxes1, boxes2 = self._make_boxes(30, dtype), self._make_boxes(200, dtype)
+        inter, union = ops.boxes._box_inter_union(boxes1, boxes2)
+        assert_equal(ops.box_iou(boxes1, boxes2), inter / union)
+
+    @pytest.mark.parametrize("dtype", (torch.int64, torch.float32, torch.float64))
+    @pytest.mark.parametrize("with_low_quality_matches", (True, False))
+    @pytest.mark.parametrize("max_chunk_numel", (64, 2 ** 24))
+    def test_iou_match(self, dtype, with_low_quality_matches, max_chunk_numel):
+        # integer boxes go through the chunked fallback, and lead to many ties
+        torch.random.manual_seed(0)
+        boxes1, boxes2 = self._make_boxes(10, dtype), self._make_boxes(300, dtype)
+        iou = ops.box_iou(boxes1, boxes2)
+
+        matched_vals, matches, best_foreach_boxes1, highest_quality = ops.boxes._box_iou_match(
+            boxes1, boxes2, with_low_quality_matches, max_chunk_numel=max_chunk_numel
+        )
+        expected_vals, expected_matches = iou.max(dim=0)
+        assert_equal(matched_vals, expected_vals)
+        assert_equal(matches, expected_matches)
+        assert_equal(best_foreach_boxes1, iou.max(dim=1)[1])
+        if with_low_quality_matches:
+            assert_equal(highest_quality, (iou == iou.max(dim=1)[0][:, None]).any(dim=0))
+        else:
+            assert not highest_quality.any()
+
 
 class TestGenBoxIou:
     def test_gen_iou(self):
@@ -1114,6 +1513,90 @@ class TestGenBoxIou:
         torch.testing.assert_close(scripted_iou, expected, rtol=0.0, atol=TOLERANCE)
 
 
+class TestBoxIouLoss:
+    loss_fns = (ops.generalized_box_iou_loss, ops.distance_box_iou_loss, ops.complete_box_iou_loss)
+
+    @staticmethod
+    def _make_boxes(num_boxes, dtype=torch.float):
+        boxes = torch.rand(num_boxes, 4, dtype=dtype) * 100
+        boxes[:, 2:] = boxes[:, :2] + torch.rand(num_boxes, 2, dtype=dtype) * 50 + 1
+        return boxes
+
+    @pytest.mark.parametrize("device", cpu_and_gpu())
+    @pytest.mark.parametrize("dtype", (torch.int64, torch.float32, torch.float64))
+    @pytest.mark.parametrize(
+        "loss_fn, expected",
+        (
+            (ops.generalized_box_iou_loss, [0.0, 0.75, 1.8611]),
+            (ops.distance_box_iou_loss, [0.0, 0.8125, 1.5625]),
+            (ops.complete_box_iou_loss, [0.0, 0.8125, 1.5625]),
+        ),
+    )
+    def test_loss(self, device, dtype, loss_fn, expected):
+        boxes1 = torch.tensor([[0, 0, 100, 100], [0, 0, 100, 100], [0, 0, 50, 50]], dtype=dtype, device=device)
+        boxes2 = torch.tensor([[0, 0, 100, 100], [0, 0, 50, 50], [200, 200, 300, 300]], dtype=dtype, device=device)
+        expected = torch.tensor(expected, device=device)
+
+        torch.testing.assert_close(loss_fn(boxes1, boxes2), expected, rtol=0.0, atol=1e-4, check_dtype=False)
+        torch.testing.assert_close(
+            loss_fn(boxes1, boxes2, reduction="sum"), expected.sum(), rtol=0.0, atol=1e-4, check_dtype=False
+        )
+        torch.testing.assert_close(
+            loss_fn(boxes1, boxes2, reduction="mean"), expected.mean(), rtol=0.0, atol=1e-4, check_dtype=False
+        )
+
+    @pytest.mark.parametrize("dtype", (torch.float32, torch.float64))
+    @pytest.mark.parametrize(
+        "loss_fn, module",
+        (
+            (ops.generalized_box_iou_loss, "giou_loss"),
+            (ops.distance_box_iou_loss, "diou_loss"),
+            (ops.complete_box_iou_loss, "ciou_loss"),
+        ),
+    )
+    def test_native_matches_reference(self, dtype, loss_fn, module, monkeypatch):
+        torch.random.manual_seed(0)
+        boxes1 = self._make_boxes(300, dtype).view(3, 100, 4).requires_grad_()
+        boxes2 = self._make_boxes(300, dtype).view(3, 100, 4).requires_grad_()
+        # identical boxes, where the gradients of min and max are split between both inputs
+        with torch.no_grad():
+            boxes2[0, :10] = boxes1[0, :10]
+
+        loss = loss_fn(boxes1, boxes2)
+        grads = torch.autograd.grad(loss.sum(), (boxes1, boxes2))
+
+        monkeypatch.setattr(getattr(ops, module), "_use_native_box_iou_loss", lambda boxes1, boxes2: False)
+        expected_loss = loss_fn(boxes1, boxes2)
+        expected_grads = torch.autograd.grad(expected_loss.sum(), (boxes1, boxes2))
+
+        assert loss.shape == (3, 100)
+        torch.testing.assert_close(loss, expected_loss)
+        torch.testing.assert_close(grads, expected_grads)
+
+    # The aspect ratio weight of the complete IoU loss isn't differentiated
+    @pytest.mark.parametrize("loss_fn", (ops.generalized_box_iou_loss, ops.distance_box_iou_loss))
+    def test_gradcheck(self, loss_fn):
+        torch.random.manual_seed(0)
+        boxes1 = self._make_boxes(10, torch.float64).requires_grad_()
+        boxes2 = self._make_boxes(10, torch.float64).requires_grad_()
+        gradcheck(loss_fn, (boxes1, boxes2))
+
+    @pytest.mark.parametrize("loss_fn", loss_fns)
+    def test_empty(self, loss_fn):
+        boxes = torch.zeros(0, 4, requires_grad=True)
+        loss = loss_fn(boxes, boxes, reduction="sum")
+        loss.backward()
+        assert_equal(loss, torch.tensor(0.0))
+        assert boxes.grad.shape == (0, 4)
+
+    @pytest.mark.parametrize("loss_fn", loss_fns)
+    def test_jit(self, loss_fn):
+        torch.random.manual_seed(0)
+        boxes1, boxes2 = self._make_boxes(10), self._make_boxes(10)
+        scripted_fn = torch.jit.script(loss_fn)
+        torch.testing.assert_close(scripted_fn(boxes1, boxes2), loss_fn(boxes1, boxes2))
+
+
 class TestMasksToBoxes:
     def test_masks_box(self):
         def masks_box_check(masks, expected, tolerance=1e-4):
@@ -1155,6 +1638,81 @@ class TestMasksToBoxes:
             masks = _create_masks(image, masks)
             masks_box_check(masks, expected)
 
+    @staticmethod
+    def _make_masks(num_masks, height, width):
+        masks = torch.zeros(num_masks, height, width, dtype=torch.bool)
+        for i in range(num_masks - 1):
+            if i % 3 == 0:
+                masks[i] = torch.rand(height, width) < 0.02
+            else:
+                y1, x1 = torch.randint(0, height, (1,)).item(), torch.randint(0, width, (1,)).item()
+                y2, x2 = torch.randint(y1, height, (1,)).item(), torch.randint(x1, width, (1,)).item()
+                masks[i, y1 : y2 + 1, x1 : x2 + 1] = True
+        # the last mask is empty
+        return masks
+
+    @staticmethod
+    def _reference_boxes(masks):
+        boxes = torch.zeros(masks.shape[0], 4)
+        for i, mask in enumerate(masks):
+            y, x = torch.where(mask)
+            if x.numel() > 0:
+                boxes[i] = torch.stack([x.min(), y.min(), x.max(), y.max()]).float()
+        return boxes
+
+    @staticmethod
+    def _encode_rle(mask):
+        # column-major runs, starting with background
+        pixels = mask.t().flatten()
+        changes = torch.where(pixels[1:] != pixels[:-1])[0] + 1
+        bounds = torch.cat([torch.tensor([0]), changes, torch.tensor([pixels.numel()])])
+        counts = bounds[1:] - bounds[:-1]
+        if pixels[0]:
+            counts = torch.cat([torch.tensor([0]), counts])
+        return counts
+
+    @pytest.mark.parametrize("dtype", (torch.bool, torch.uint8, torch.int32, torch.float32))
+    @pytest.mark.parametrize("max_chunk_numel", (1, 2 ** 24))
+    def test_masks_box_random(self, dtype, max_chunk_numel):
+        torch.random.manual_seed(0)
+        masks = self._make_masks(10, 23, 37)
+        boxes = ops.boxes._masks_to_boxes(masks.to(dtype), max_chunk_numel=max_chunk_numel)
+        assert_equal(boxes, self._reference_boxes(masks))
+
+    @pytest.mark.parametrize("height, width", ((1, 1), (23, 37), (16, 64)))
+    def test_packed_masks_box(self, height, width):
+        torch.random.manual_seed(0)
+        masks = self._make_masks(10, height, width)
+        packed_masks = torch.from_numpy(np.packbits(masks.numpy(), axis=-1))
+        assert_equal(ops.packed_masks_to_boxes(packed_masks), self._reference_boxes(masks))
+
+        with pytest.raises(ValueError, match="uint8"):
+            ops.packed_masks_to_boxes(masks)
+
+    @pytest.mark.parametrize("height, width", ((1, 1), (23, 37), (16, 64)))
+    def test_rle_masks_box(self, height, width):
+        torch.random.manual_seed(0)
+        masks = self._make_masks(10, height, width)
+        # a mask that starts with foreground
+        masks[0, 0, 0] = True
+        counts = [self._encode_rle(mask) for mask in masks]
+        assert_equal(ops.rle_masks_to_boxes(counts, height), self._reference_boxes(masks))
+
+    def test_masks_box_empty(self):
+        assert ops.masks_to_boxes(torch.zeros(0, 10, 10)).shape == (0, 4)
+        assert ops.packed_masks_to_boxes(torch.zeros(0, 10, 2, dtype=torch.uint8)).shape == (0, 4)
+        assert ops.rle_masks_to_boxes([], 10).shape == (0, 4)
+
+    def test_masks_box_jit(self):
+        torch.random.manual_seed(0)
+        masks = self._make_masks(5, 23, 37)
+        expected = self._reference_boxes(masks)
+        assert_equal(torch.jit.script(ops.masks_to_boxes)(masks), expected)
+        packed_masks = torch.from_numpy(np.packbits(masks.numpy(), axis=-1))
+        assert_equal(torch.jit.script(ops.packed_masks_to_boxes)(packed_masks), expected)
+        counts = [self._encode_rle(mask) for mask in masks]
+        assert_equal(torch.jit.script(ops.rle_masks_to_boxes)(counts, 23), expected)
+
 
 class TestStochasticDepth:
     @pytest.mark.parametrize("seed", range(10))
@@ -1210,6 +1768,21 @@ class TestUtils:
         assert len(params[0]) == 92
         assert len(params[1]) == 82
 
+    @pytest.mark.parametrize("scripted", (False, True))
+    def test_lru_cache_keys(self, scripted):
+        cls = torch.jit.script(ops._utils._LRUCacheKeys) if scripted else ops._utils._LRUCacheKeys
+        keys = cls(2)
+        assert not keys.lookup("a")
+        assert keys.insert("a") is None
+        assert not keys.lookup("b")
+        assert keys.insert("b") is None
+        assert keys.lookup("a")
+        # "b" is now the least recently used key
+        assert not keys.lookup("c")
+        assert keys.insert("c") == "b"
+        assert keys.keys == ["a", "c"]
+        assert (keys.hits, keys.misses) == (1, 3)
+
 
 if __name__ == "__main__":
     pytest.main([__file__])
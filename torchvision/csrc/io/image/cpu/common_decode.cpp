@@ -0,0 +1,54 @@
+#include "common_decode.h"
+
+namespace vision {
+namespace image {
+namespace detail {
+
+torch::Tensor decode_output(
+    const c10::optional<torch::Tensor>& out,
+    int64_t height,
+    int64_t width,
+    int64_t channels,
+    torch::ScalarType dtype) {
+  if (!out.has_value()) {
+    return torch::empty({height, width, channels}, dtype);
+  }
+  TORCH_CHECK(
+      out->device() == torch::kCPU,
+      "Expected out to be on CPU, got ",
+      out->device());
+  TORCH_CHECK(
+      out->scalar_type() == dtype &&
+          out->sizes() == at::IntArrayRef({channels, height, width}),
+      "Expected out to be a ",
+      dtype,
+      " tensor of shape ",
+      at::IntArrayRef({channels, height, width}),
+      " to hold the decoded image, got a ",
+      out->scalar_type(),
+      " tensor of shape ",
+      out->sizes());
+
+  auto output = out->permute({1, 2, 0});
+  if ((channels == 1 || output.stride(2) == 1) &&
+      (width == 1 || output.stride(1) == channels)) {
+    return output;
+  }
+  return torch::empty({height, width, channels}, dtype);
+}
+
+torch::Tensor finish_decode_output(
+    const torch::Tensor& output,
+    const c10::optional<torch::Tensor>& out) {
+  if (!out.has_value()) {
+    return output.permute({2, 0, 1});
+  }
+  if (output.data_ptr() != out->data_ptr()) {
+    out->copy_(output.permute({2, 0, 1}));
+  }
+  return *out;
+}
+
+} // namespace detail
+} // namespace image
+} // namespace vision
@@ -0,0 +1,28 @@
+#pragma once
+
+#include <torch/types.h>
+
+namespace vision {
+namespace image {
+namespace detail {
+
+// Returns the (height, width, channels) tensor the decoders write their rows
+// into, which may have any stride between the rows. This is out itself when
+// its pixels are stored in HWC order, e.g. when it is a slice of a
+// channels_last batch, and a new tensor otherwise.
+torch::Tensor decode_output(
+    const c10::optional<torch::Tensor>& out,
+    int64_t height,
+    int64_t width,
+    int64_t channels,
+    torch::ScalarType dtype);
+
+// Returns the decoded image in CHW order, after copying it into out when it
+// could not be decoded in place.
+torch::Tensor finish_decode_output(
+    const torch::Tensor& output,
+    const c10::optional<torch::Tensor>& out);
+
+} // namespace detail
+} // namespace image
+} // namespace vision
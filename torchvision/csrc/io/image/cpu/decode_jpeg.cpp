@@ -1,14 +1,29 @@
 #include "decode_jpeg.h"
+#include <ATen/Parallel.h>
+#include "common_decode.h"
 #include "common_jpeg.h"
 
 namespace vision {
 namespace image {
 
 #if !JPEG_FOUND
-torch::Tensor decode_jpeg(const torch::Tensor& data, ImageReadMode mode) {
+torch::Tensor decode_jpeg(
+    const torch::Tensor& data,
+    ImageReadMode mode,
+    at::IntArrayRef size_hint,
+    at::IntArrayRef crop,
+    const c10::optional<torch::Tensor>& out) {
   TORCH_CHECK(
       false, "decode_jpeg: torchvision not compiled with libjpeg support");
 }
+
+std::vector<torch::Tensor> decode_jpegs(
+    const std::vector<torch::Tensor>& data,
+    ImageReadMode mode,
+    at::IntArrayRef size_hint) {
+  TORCH_CHECK(
+      false, "decode_jpegs: torchvision not compiled with libjpeg support");
+}
 #else
 
 using namespace detail;
@@ -67,15 +82,90 @@ static void torch_jpeg_set_source_mgr(
   src->pub.next_input_byte = src->data;
 }
 
+// The largest DCT scaling that decodes the image to at least size_hint. Only
+// 1/2, 1/4 and 1/8 are considered, which all the libjpeg versions support and
+// libjpeg-turbo accelerates.
+unsigned int jpeg_scale_denom(
+    JDIMENSION height,
+    JDIMENSION width,
+    at::IntArrayRef size_hint) {
+  for (unsigned int denom = 8; denom > 1; denom /= 2) {
+    if ((height + denom - 1) / denom >= size_hint[0] &&
+        (width + denom - 1) / denom >= size_hint[1]) {
+      return denom;
+    }
+  }
+  return 1;
+}
+
+// Reads the rows [top, top + height) and the columns [left, left + width) of
+// the output image into ptr, row_stride apart. The rows below the crop are
+// never decoded and, with libjpeg-turbo, neither are the rows above it nor the
+// iMCU columns outside of it.
+void read_cropped_scanlines(
+    j_decompress_ptr cinfo,
+    uint8_t* ptr,
+    int64_t row_stride,
+    JDIMENSION top,
+    JDIMENSION left,
+    JDIMENSION height,
+    JDIMENSION width) {
+#if LIBJPEG_TURBO_VERSION_NUMBER >= 2000000
+  // Aligns xoffset down to an iMCU boundary and widens crop_width to match,
+  // output_width is updated accordingly
+  // The chroma upsampling treats both edges of the cropped scanlines as the
+  // edges of the image, a margin of one iMCU on each side keeps the requested
+  // columns identical to a full decode
+  JDIMENSION margin = cinfo->max_h_samp_factor * cinfo->min_DCT_scaled_size;
+  JDIMENSION xoffset = left >= margin ? left - margin : 0;
+  JDIMENSION crop_width =
+      std::min(left + width + margin, cinfo->output_width) - xoffset;
+  jpeg_crop_scanline(cinfo, &xoffset, &crop_width);
+  jpeg_skip_scanlines(cinfo, top);
+#else
+  JDIMENSION xoffset = 0;
+#endif
+  int channels = cinfo->output_components;
+  // Allocated in the image pool so that it is released by
+  // jpeg_destroy_decompress, even when decoding fails
+  JSAMPARRAY row = (*cinfo->mem->alloc_sarray)(
+      (j_common_ptr)cinfo, JPOOL_IMAGE, cinfo->output_width * channels, 1);
+  while (cinfo->output_scanline < top) {
+    jpeg_read_scanlines(cinfo, row, 1);
+  }
+  for (JDIMENSION i = 0; i < height; i++) {
+    jpeg_read_scanlines(cinfo, row, 1);
+    memcpy(ptr, row[0] + (left - xoffset) * channels, width * channels);
+    ptr += row_stride;
+  }
+}
+
 } // namespace
 
-torch::Tensor decode_jpeg(const torch::Tensor& data, ImageReadMode mode) {
+torch::Tensor decode_jpeg(
+    const torch::Tensor& data,
+    ImageReadMode mode,
+    at::IntArrayRef size_hint,
+    at::IntArrayRef crop,
+    const c10::optional<torch::Tensor>& out) {
   // Check that the input tensor dtype is uint8
   TORCH_CHECK(data.dtype() == torch::kU8, "Expected a torch.uint8 tensor");
   // Check that the input tensor is 1-dimensional
   TORCH_CHECK(
       data.dim() == 1 && data.numel() > 0,
       "Expected a non empty 1-dimensional tensor");
+  TORCH_CHECK(
+      size_hint.empty() ||
+          (size_hint.size() == 2 && size_hint[0] > 0 && size_hint[1] > 0),
+      "size_hint should be a (height, width) pair of positive integers, got ",
+      size_hint);
+  TORCH_CHECK(
+      crop.empty() ||
+          (crop.size() == 4 && crop[0] >= 0 && crop[1] >= 0 && crop[2] > 0 &&
+           crop[3] > 0),
+      "crop should be a (top, left, height, width) tuple of non-negative "
+      "offsets and positive sizes, got ",
+      crop);
 
   struct jpeg_decompress_struct cinfo;
   struct torch_jpeg_error_mgr jerr;
@@ -99,6 +189,29 @@ torch::Tensor decode_jpeg(const torch::Tensor& data, ImageReadMode mode) {
   // read info from header.
   jpeg_read_header(&cinfo, TRUE);
 
+  if (!crop.empty() &&
+      (crop[0] + crop[2] > cinfo.image_height ||
+       crop[1] + crop[3] > cinfo.image_width)) {
+    jpeg_destroy_decompress(&cinfo);
+    TORCH_CHECK(
+        false,
+        "crop ",
+        crop,
+        " is out of the bounds of the image of size (",
+        cinfo.image_height,
+        ", ",
+        cinfo.image_width,
+        ")");
+  }
+
+  if (!size_hint.empty()) {
+    // libjpeg computes the scaled output size in jpeg_start_decompress
+    cinfo.scale_num = 1;
+    cinfo.scale_denom = crop.empty()
+        ? jpeg_scale_denom(cinfo.image_height, cinfo.image_width, size_hint)
+        : jpeg_scale_denom(crop[2], crop[3], size_hint);
+  }
+
   int channels = cinfo.num_components;
 
   if (mode != IMAGE_READ_MODE_UNCHANGED) {
@@ -130,13 +243,41 @@ torch::Tensor decode_jpeg(const torch::Tensor& data, ImageReadMode mode) {
 
   jpeg_start_decompress(&cinfo);
 
-  int height = cinfo.output_height;
-  int width = cinfo.output_width;
+  JDIMENSION top = 0;
+  JDIMENSION left = 0;
+  JDIMENSION height = cinfo.output_height;
+  JDIMENSION width = cinfo.output_width;
+  if (!crop.empty()) {
+    // The crop is given in the coordinates of the full image, the output is
+    // scaled down by scale_denom
+    JDIMENSION denom = cinfo.scale_denom;
+    top = crop[0] / denom;
+    left = crop[1] / denom;
+    height = std::min<JDIMENSION>(
+                 (crop[0] + crop[2] + denom - 1) / denom, cinfo.output_height) -
+        top;
+    width = std::min<JDIMENSION>(
+                (crop[1] + crop[3] + denom - 1) / denom, cinfo.output_width) -
+        left;
+  }
 
-  int stride = width * channels;
-  auto tensor =
-      torch::empty({int64_t(height), int64_t(width), channels}, torch::kU8);
+  torch::Tensor tensor;
+  try {
+    tensor = decode_output(out, height, width, channels, torch::kU8);
+  } catch (const c10::Error&) {
+    jpeg_destroy_decompress(&cinfo);
+    throw;
+  }
+  // The rows of out may be further apart than width * channels
+  auto stride = tensor.stride(0);
   auto ptr = tensor.data_ptr<uint8_t>();
+  if (!crop.empty()) {
+    read_cropped_scanlines(&cinfo, ptr, stride, top, left, height, width);
+    // The remaining scanlines are not needed, jpeg_destroy_decompress aborts
+    // the decompression
+    jpeg_destroy_decompress(&cinfo);
+    return finish_decode_output(tensor, out);
+  }
   while (cinfo.output_scanline < cinfo.output_height) {
     /* jpeg_read_scanlines expects an array of pointers to scanlines.
      * Here the array is only one element long, but you could ask for
@@ -148,7 +289,26 @@ torch::Tensor decode_jpeg(const torch::Tensor& data, ImageReadMode mode) {
 
   jpeg_finish_decompress(&cinfo);
   jpeg_destroy_decompress(&cinfo);
-  return tensor.permute({2, 0, 1});
+  return finish_decode_output(tensor, out);
+}
+
+std::vector<torch::Tensor> decode_jpegs(
+    const std::vector<torch::Tensor>& data,
+    ImageReadMode mode,
+    at::IntArrayRef size_hint) {
+  std::vector<torch::Tensor> images(data.size());
+  // All the state of libjpeg lives in the decompression struct of each call,
+  // so the images are decoded independently on the intra-op threads
+  at::parallel_for(0, data.size(), 1, [&](int64_t begin, int64_t end) {
+    for (int64_t i = begin; i < end; i++) {
+      try {
+        images[i] = decode_jpeg(data[i], mode, size_hint, {}, c10::nullopt);
+      } catch (const c10::Error& e) {
+        TORCH_CHECK(false, e.msg(), " (image ", i, " of the batch)");
+      }
+    }
+  });
+  return images;
 }
 
 #endif
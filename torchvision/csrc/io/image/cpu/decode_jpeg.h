@@ -8,7 +8,15 @@ namespace image {
 
 C10_EXPORT torch::Tensor decode_jpeg(
     const torch::Tensor& data,
-    ImageReadMode mode = IMAGE_READ_MODE_UNCHANGED);
+    ImageReadMode mode = IMAGE_READ_MODE_UNCHANGED,
+    at::IntArrayRef size_hint = {},
+    at::IntArrayRef crop = {},
+    const c10::optional<torch::Tensor>& out = c10::nullopt);
+
+C10_EXPORT std::vector<torch::Tensor> decode_jpegs(
+    const std::vector<torch::Tensor>& data,
+    ImageReadMode mode = IMAGE_READ_MODE_UNCHANGED,
+    at::IntArrayRef size_hint = {});
 
 } // namespace image
 } // namespace vision
@@ -1,4 +1,5 @@
 #include "decode_png.h"
+#include "common_decode.h"
 #include "common_png.h"
 
 namespace vision {
@@ -8,12 +9,15 @@ namespace image {
 torch::Tensor decode_png(
     const torch::Tensor& data,
     ImageReadMode mode,
-    bool allow_16_bits) {
+    bool allow_16_bits,
+    const c10::optional<torch::Tensor>& out) {
   TORCH_CHECK(
       false, "decode_png: torchvision not compiled with libPNG support");
 }
 #else
 
+using namespace detail;
+
 bool is_little_endian() {
   uint32_t x = 1;
   return *(uint8_t*)&x;
@@ -22,7 +26,8 @@ bool is_little_endian() {
 torch::Tensor decode_png(
     const torch::Tensor& data,
     ImageReadMode mode,
-    bool allow_16_bits) {
+    bool allow_16_bits,
+    const c10::optional<torch::Tensor>& out) {
   // Check that the input tensor dtype is uint8
   TORCH_CHECK(data.dtype() == torch::kU8, "Expected a torch.uint8 tensor");
   // Check that the input tensor is 1-dimensional
@@ -183,18 +188,29 @@ torch::Tensor decode_png(
   }
 
   auto num_pixels_per_row = width * channels;
-  auto tensor = torch::empty(
-      {int64_t(height), int64_t(width), channels},
-      bit_depth <= 8 ? torch::kU8 : torch::kI32);
+  torch::Tensor tensor;
+  try {
+    tensor = decode_output(
+        out,
+        height,
+        width,
+        channels,
+        bit_depth <= 8 ? torch::kU8 : torch::kI32);
+  } catch (const c10::Error&) {
+    png_destroy_read_struct(&png_ptr, &info_ptr, nullptr);
+    throw;
+  }
+  // The rows of out may be further apart than num_pixels_per_row
+  auto row_stride = tensor.stride(0);
 
   if (bit_depth <= 8) {
-    auto t_ptr = tensor.accessor<uint8_t, 3>().data();
+    auto t_ptr = tensor.data_ptr<uint8_t>();
     for (int pass = 0; pass < number_of_passes; pass++) {
       for (png_uint_32 i = 0; i < height; ++i) {
         png_read_row(png_ptr, t_ptr, nullptr);
-        t_ptr += num_pixels_per_row;
+        t_ptr += row_stride;
       }
-      t_ptr = tensor.accessor<uint8_t, 3>().data();
+      t_ptr = tensor.data_ptr<uint8_t>();
     }
   } else {
     // We're reading a 16bits png, but pytorch doesn't support uint16.
@@ -203,7 +219,7 @@ torch::Tensor decode_png(
     if (is_little_endian()) {
       png_set_swap(png_ptr);
     }
-    int32_t* t_ptr = tensor.accessor<int32_t, 3>().data();
+    int32_t* t_ptr = tensor.data_ptr<int32_t>();
 
     // We create a tensor instead of malloc-ing for automatic memory management
     auto tmp_buffer_tensor = torch::empty(
@@ -218,13 +234,13 @@ torch::Tensor decode_png(
         for (size_t j = 0; j < num_pixels_per_row; ++j) {
           t_ptr[j] = (int32_t)tmp_buffer[j];
         }
-        t_ptr += num_pixels_per_row;
+        t_ptr += row_stride;
       }
-      t_ptr = tensor.accessor<int32_t, 3>().data();
+      t_ptr = tensor.data_ptr<int32_t>();
     }
   }
   png_destroy_read_struct(&png_ptr, &info_ptr, nullptr);
-  return tensor.permute({2, 0, 1});
+  return finish_decode_output(tensor, out);
 }
 #endif
 
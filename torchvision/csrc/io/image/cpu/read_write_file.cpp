@@ -32,7 +32,7 @@ std::wstring utf8_decode(const std::string& str) {
 } // namespace
 #endif
 
-torch::Tensor read_file(const std::string& filename) {
+torch::Tensor read_file(const std::string& filename, bool mmap) {
 #ifdef _WIN32
   // According to
   // https://docs.microsoft.com/en-us/cpp/c-runtime-library/reference/stat-functions?view=vs-2019,
@@ -53,24 +53,29 @@ torch::Tensor read_file(const std::string& filename) {
   TORCH_CHECK(size > 0, "Expected a non empty file");
 
 #ifdef _WIN32
-  // TODO: Once torch::from_file handles UTF-8 paths correctly, we should move
-  // back to use the following implementation since it uses file mapping.
-  //   auto data =
-  //       torch::from_file(filename, /*shared=*/false, /*size=*/size,
-  //       torch::kU8).clone()
+  // TODO: Once torch::from_file handles UTF-8 paths correctly, we should
+  // support mmap on Windows too.
+  TORCH_CHECK(!mmap, "Memory mapping files is not supported on Windows");
   FILE* infile = _wfopen(fileW.c_str(), L"rb");
+#else
+  if (mmap) {
+    // The mapping is private, so writes to the tensor never reach the file,
+    // and it is released with the storage of the tensor and of its views
+    return torch::from_file(
+        filename, /*shared=*/false, /*size=*/size, torch::kU8);
+  }
+  FILE* infile = fopen(filename.c_str(), "rb");
+#endif
 
   TORCH_CHECK(infile != nullptr, "Error opening input file");
 
   auto data = torch::empty({size}, torch::kU8);
   auto dataBytes = data.data_ptr<uint8_t>();
 
-  fread(dataBytes, sizeof(uint8_t), size, infile);
+  size_t bytesRead = fread(dataBytes, sizeof(uint8_t), size, infile);
   fclose(infile);
-#else
-  auto data =
-      torch::from_file(filename, /*shared=*/false, /*size=*/size, torch::kU8);
-#endif
+
+  TORCH_CHECK(bytesRead == size_t(size), "Error reading input file");
 
   return data;
 }
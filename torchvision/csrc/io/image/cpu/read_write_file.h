@@ -5,7 +5,9 @@
 namespace vision {
 namespace image {
 
-C10_EXPORT torch::Tensor read_file(const std::string& filename);
+C10_EXPORT torch::Tensor read_file(
+    const std::string& filename,
+    bool mmap = false);
 
 C10_EXPORT void write_file(const std::string& filename, torch::Tensor& data);
 
@@ -14,15 +14,29 @@ PyMODINIT_FUNC PyInit_image(void) {
 namespace vision {
 namespace image {
 
-static auto registry = torch::RegisterOperators()
-                           .op("image::decode_png", &decode_png)
-                           .op("image::encode_png", &encode_png)
-                           .op("image::decode_jpeg", &decode_jpeg)
-                           .op("image::encode_jpeg", &encode_jpeg)
-                           .op("image::read_file", &read_file)
-                           .op("image::write_file", &write_file)
-                           .op("image::decode_image", &decode_image)
-                           .op("image::decode_jpeg_cuda", &decode_jpeg_cuda);
+// The decoders write into out and return it when it is given, the schemas say
+// so explicitly so that TorchScript neither reorders or eliminates these calls
+// nor assumes that their result is independent of out
+static auto registry =
+    torch::RegisterOperators()
+        .op("image::decode_png(Tensor data, int mode, bool allow_16_bits, Tensor(a!)? out=None) -> Tensor(a!)",
+            &decode_png,
+            torch::RegisterOperators::options().aliasAnalysis(
+                c10::AliasAnalysisKind::FROM_SCHEMA))
+        .op("image::encode_png", &encode_png)
+        .op("image::decode_jpeg(Tensor data, int mode, int[] size_hint=[], int[] crop=[], Tensor(a!)? out=None) -> Tensor(a!)",
+            &decode_jpeg,
+            torch::RegisterOperators::options().aliasAnalysis(
+                c10::AliasAnalysisKind::FROM_SCHEMA))
+        .op("image::decode_jpegs(Tensor[] data, int mode, int[] size_hint=[]) -> Tensor[]",
+            &decode_jpegs)
+        .op("image::encode_jpeg", &encode_jpeg)
+        .op("image::read_file(str filename, bool mmap=False) -> Tensor",
+            &read_file)
+        .op("image::write_file", &write_file)
+        .op("image::decode_image(Tensor data, int mode, int[] size_hint=[]) -> Tensor",
+            &decode_image)
+        .op("image::decode_jpeg_cuda", &decode_jpeg_cuda);
 
 } // namespace image
 } // namespace vision
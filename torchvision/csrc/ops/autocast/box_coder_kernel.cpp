@@ -0,0 +1,39 @@
+#include "../box_coder.h"
+
+#include <ATen/autocast_mode.h>
+#include <torch/types.h>
+
+namespace vision {
+namespace ops {
+
+namespace {
+
+// The regression outputs of a reduced precision head are decoded against float
+// anchors, otherwise the boxes lose a pixel or more on large images
+at::Tensor decode_and_clip_autocast(
+    const at::Tensor& rel_codes,
+    const at::Tensor& boxes,
+    at::ArrayRef<double> weights,
+    double bbox_xform_clip,
+    at::IntArrayRef image_sizes,
+    at::IntArrayRef boxes_per_image) {
+  c10::impl::ExcludeDispatchKeyGuard no_autocast(c10::DispatchKey::AutocastCPU);
+  return decode_and_clip(
+      at::autocast::cached_cast(at::kFloat, rel_codes, c10::DeviceType::CPU),
+      at::autocast::cached_cast(at::kFloat, boxes, c10::DeviceType::CPU),
+      weights,
+      bbox_xform_clip,
+      image_sizes,
+      boxes_per_image);
+}
+
+} // namespace
+
+TORCH_LIBRARY_IMPL(torchvision, AutocastCPU, m) {
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::decode_and_clip"),
+      TORCH_FN(decode_and_clip_autocast));
+}
+
+} // namespace ops
+} // namespace vision
@@ -0,0 +1,45 @@
+#include "../box_iou.h"
+
+#include <ATen/autocast_mode.h>
+#include <torch/types.h>
+
+namespace vision {
+namespace ops {
+
+namespace {
+
+// The overlaps of the boxes are compared with thresholds and with each other,
+// so they are computed in float
+at::Tensor box_iou_autocast(
+    const at::Tensor& boxes1,
+    const at::Tensor& boxes2) {
+  c10::impl::ExcludeDispatchKeyGuard no_autocast(c10::DispatchKey::AutocastCPU);
+  return box_iou(
+      at::autocast::cached_cast(at::kFloat, boxes1, c10::DeviceType::CPU),
+      at::autocast::cached_cast(at::kFloat, boxes2, c10::DeviceType::CPU));
+}
+
+std::tuple<at::Tensor, at::Tensor, at::Tensor, at::Tensor>
+box_iou_match_autocast(
+    const at::Tensor& boxes1,
+    const at::Tensor& boxes2,
+    bool with_low_quality_matches) {
+  c10::impl::ExcludeDispatchKeyGuard no_autocast(c10::DispatchKey::AutocastCPU);
+  return box_iou_match(
+      at::autocast::cached_cast(at::kFloat, boxes1, c10::DeviceType::CPU),
+      at::autocast::cached_cast(at::kFloat, boxes2, c10::DeviceType::CPU),
+      with_low_quality_matches);
+}
+
+} // namespace
+
+TORCH_LIBRARY_IMPL(torchvision, AutocastCPU, m) {
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::box_iou"), TORCH_FN(box_iou_autocast));
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::box_iou_match"),
+      TORCH_FN(box_iou_match_autocast));
+}
+
+} // namespace ops
+} // namespace vision
@@ -0,0 +1,33 @@
+#include "../box_iou_loss.h"
+
+#include <ATen/autocast_mode.h>
+#include <torch/types.h>
+
+namespace vision {
+namespace ops {
+
+namespace {
+
+at::Tensor box_iou_loss_autocast(
+    const at::Tensor& boxes1,
+    const at::Tensor& boxes2,
+    int64_t loss_type,
+    double eps) {
+  c10::impl::ExcludeDispatchKeyGuard no_autocast(c10::DispatchKey::AutocastCPU);
+  return box_iou_loss(
+      at::autocast::cached_cast(at::kFloat, boxes1, c10::DeviceType::CPU),
+      at::autocast::cached_cast(at::kFloat, boxes2, c10::DeviceType::CPU),
+      loss_type,
+      eps);
+}
+
+} // namespace
+
+TORCH_LIBRARY_IMPL(torchvision, AutocastCPU, m) {
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::box_iou_loss"),
+      TORCH_FN(box_iou_loss_autocast));
+}
+
+} // namespace ops
+} // namespace vision
@@ -8,21 +8,108 @@ namespace ops {
 
 namespace {
 
+template <c10::DispatchKey autocast_key, c10::DeviceType device_type>
 at::Tensor nms_autocast(
     const at::Tensor& dets,
     const at::Tensor& scores,
     double iou_threshold) {
-  c10::impl::ExcludeDispatchKeyGuard no_autocast(c10::DispatchKey::Autocast);
+  c10::impl::ExcludeDispatchKeyGuard no_autocast(autocast_key);
   return nms(
-      at::autocast::cached_cast(at::kFloat, dets),
-      at::autocast::cached_cast(at::kFloat, scores),
+      at::autocast::cached_cast(at::kFloat, dets, device_type),
+      at::autocast::cached_cast(at::kFloat, scores, device_type),
       iou_threshold);
 }
 
+// The batched variants only have CPU kernels. Overlaps are computed in float,
+// as the scores of the kept boxes are compared with each other.
+at::Tensor batched_nms_autocast(
+    const at::Tensor& dets,
+    const at::Tensor& scores,
+    const at::Tensor& idxs,
+    double iou_threshold) {
+  c10::impl::ExcludeDispatchKeyGuard no_autocast(c10::DispatchKey::AutocastCPU);
+  return batched_nms(
+      at::autocast::cached_cast(at::kFloat, dets, c10::DeviceType::CPU),
+      at::autocast::cached_cast(at::kFloat, scores, c10::DeviceType::CPU),
+      idxs,
+      iou_threshold);
+}
+
+at::Tensor batched_nms_topk_autocast(
+    const at::Tensor& dets,
+    const at::Tensor& scores,
+    const at::Tensor& idxs,
+    double iou_threshold,
+    int64_t topk) {
+  c10::impl::ExcludeDispatchKeyGuard no_autocast(c10::DispatchKey::AutocastCPU);
+  return batched_nms_topk(
+      at::autocast::cached_cast(at::kFloat, dets, c10::DeviceType::CPU),
+      at::autocast::cached_cast(at::kFloat, scores, c10::DeviceType::CPU),
+      idxs,
+      iou_threshold,
+      topk);
+}
+
+std::tuple<at::Tensor, at::Tensor> batched_soft_nms_autocast(
+    const at::Tensor& dets,
+    const at::Tensor& scores,
+    const at::Tensor& idxs,
+    double iou_threshold,
+    double sigma,
+    double score_threshold,
+    int64_t method) {
+  c10::impl::ExcludeDispatchKeyGuard no_autocast(c10::DispatchKey::AutocastCPU);
+  return batched_soft_nms(
+      at::autocast::cached_cast(at::kFloat, dets, c10::DeviceType::CPU),
+      at::autocast::cached_cast(at::kFloat, scores, c10::DeviceType::CPU),
+      idxs,
+      iou_threshold,
+      sigma,
+      score_threshold,
+      method);
+}
+
+std::tuple<at::Tensor, at::Tensor> multi_image_batched_nms_autocast(
+    const at::Tensor& dets,
+    const at::Tensor& scores,
+    const at::Tensor& idxs,
+    double iou_threshold,
+    int64_t max_det) {
+  c10::impl::ExcludeDispatchKeyGuard no_autocast(c10::DispatchKey::AutocastCPU);
+  return multi_image_batched_nms(
+      at::autocast::cached_cast(at::kFloat, dets, c10::DeviceType::CPU),
+      at::autocast::cached_cast(at::kFloat, scores, c10::DeviceType::CPU),
+      idxs,
+      iou_threshold,
+      max_det);
+}
+
 } // namespace
 
 TORCH_LIBRARY_IMPL(torchvision, Autocast, m) {
-  m.impl(TORCH_SELECTIVE_NAME("torchvision::nms"), TORCH_FN(nms_autocast));
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::nms"),
+      TORCH_FN(
+          (nms_autocast<c10::DispatchKey::Autocast, c10::DeviceType::CUDA>)));
+}
+
+TORCH_LIBRARY_IMPL(torchvision, AutocastCPU, m) {
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::nms"),
+      TORCH_FN(
+          (nms_autocast<c10::DispatchKey::AutocastCPU, c10::DeviceType::CPU>)));
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::batched_nms"),
+      TORCH_FN(batched_nms_autocast));
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::batched_nms_topk"),
+      TORCH_FN(batched_nms_topk_autocast));
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::batched_soft_nms"),
+      TORCH_FN(batched_soft_nms_autocast));
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::multi_image_batched_nms"),
+      TORCH_FN(multi_image_batched_nms_autocast));
 }
 
 } // namespace ops
@@ -29,6 +29,26 @@ std::tuple<at::Tensor, at::Tensor> ps_roi_align_autocast(
       std::get<1>(result).to(input.scalar_type()));
 }
 
+// Reduced precision features are pooled with float rois, as in
+// roi_align_autocast_cpu
+std::tuple<at::Tensor, at::Tensor> ps_roi_align_autocast_cpu(
+    const at::Tensor& input,
+    const at::Tensor& rois,
+    double spatial_scale,
+    int64_t pooled_height,
+    int64_t pooled_width,
+    int64_t sampling_ratio) {
+  c10::impl::ExcludeDispatchKeyGuard no_autocast(c10::DispatchKey::AutocastCPU);
+  return ps_roi_align(
+      at::autocast::cached_cast(
+          at::autocast::get_autocast_cpu_dtype(), input, c10::DeviceType::CPU),
+      at::autocast::cached_cast(at::kFloat, rois, c10::DeviceType::CPU),
+      spatial_scale,
+      pooled_height,
+      pooled_width,
+      sampling_ratio);
+}
+
 } // namespace
 
 TORCH_LIBRARY_IMPL(torchvision, Autocast, m) {
@@ -37,5 +57,11 @@ TORCH_LIBRARY_IMPL(torchvision, Autocast, m) {
       TORCH_FN(ps_roi_align_autocast));
 }
 
+TORCH_LIBRARY_IMPL(torchvision, AutocastCPU, m) {
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::ps_roi_align"),
+      TORCH_FN(ps_roi_align_autocast_cpu));
+}
+
 } // namespace ops
 } // namespace vision
@@ -8,16 +8,17 @@ namespace ops {
 
 namespace {
 
+template <c10::DispatchKey autocast_key, c10::DeviceType device_type>
 std::tuple<at::Tensor, at::Tensor> ps_roi_pool_autocast(
     const at::Tensor& input,
     const at::Tensor& rois,
     double spatial_scale,
     int64_t pooled_height,
     int64_t pooled_width) {
-  c10::impl::ExcludeDispatchKeyGuard no_autocast(c10::DispatchKey::Autocast);
+  c10::impl::ExcludeDispatchKeyGuard no_autocast(autocast_key);
   auto result = ps_roi_pool(
-      at::autocast::cached_cast(at::kFloat, input),
-      at::autocast::cached_cast(at::kFloat, rois),
+      at::autocast::cached_cast(at::kFloat, input, device_type),
+      at::autocast::cached_cast(at::kFloat, rois, device_type),
       spatial_scale,
       pooled_height,
       pooled_width);
@@ -32,7 +33,17 @@ std::tuple<at::Tensor, at::Tensor> ps_roi_pool_autocast(
 TORCH_LIBRARY_IMPL(torchvision, Autocast, m) {
   m.impl(
       TORCH_SELECTIVE_NAME("torchvision::ps_roi_pool"),
-      TORCH_FN(ps_roi_pool_autocast));
+      TORCH_FN((ps_roi_pool_autocast<
+                c10::DispatchKey::Autocast,
+                c10::DeviceType::CUDA>)));
+}
+
+TORCH_LIBRARY_IMPL(torchvision, AutocastCPU, m) {
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::ps_roi_pool"),
+      TORCH_FN((ps_roi_pool_autocast<
+                c10::DispatchKey::AutocastCPU,
+                c10::DeviceType::CPU>)));
 }
 
 } // namespace ops
@@ -28,6 +28,51 @@ at::Tensor roi_align_autocast(
       .to(input.scalar_type());
 }
 
+// The CPU kernels pool reduced precision features with float rois and
+// accumulate in float, so the features stay in the autocast type and only the
+// rois are kept in float
+at::Tensor roi_align_autocast_cpu(
+    const at::Tensor& input,
+    const at::Tensor& rois,
+    double spatial_scale,
+    int64_t pooled_height,
+    int64_t pooled_width,
+    int64_t sampling_ratio,
+    bool aligned) {
+  c10::impl::ExcludeDispatchKeyGuard no_autocast(c10::DispatchKey::AutocastCPU);
+  return roi_align(
+      at::autocast::cached_cast(
+          at::autocast::get_autocast_cpu_dtype(), input, c10::DeviceType::CPU),
+      at::autocast::cached_cast(at::kFloat, rois, c10::DeviceType::CPU),
+      spatial_scale,
+      pooled_height,
+      pooled_width,
+      sampling_ratio,
+      aligned);
+}
+
+at::Tensor multi_level_roi_align_autocast_cpu(
+    at::TensorList inputs,
+    const at::Tensor& rois,
+    const at::Tensor& levels,
+    at::ArrayRef<double> spatial_scales,
+    int64_t pooled_height,
+    int64_t pooled_width,
+    int64_t sampling_ratio,
+    bool aligned) {
+  c10::impl::ExcludeDispatchKeyGuard no_autocast(c10::DispatchKey::AutocastCPU);
+  return multi_level_roi_align(
+      at::autocast::cached_cast(
+          at::autocast::get_autocast_cpu_dtype(), inputs, c10::DeviceType::CPU),
+      at::autocast::cached_cast(at::kFloat, rois, c10::DeviceType::CPU),
+      levels,
+      spatial_scales,
+      pooled_height,
+      pooled_width,
+      sampling_ratio,
+      aligned);
+}
+
 } // namespace
 
 TORCH_LIBRARY_IMPL(torchvision, Autocast, m) {
@@ -36,5 +81,14 @@ TORCH_LIBRARY_IMPL(torchvision, Autocast, m) {
       TORCH_FN(roi_align_autocast));
 }
 
+TORCH_LIBRARY_IMPL(torchvision, AutocastCPU, m) {
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::roi_align"),
+      TORCH_FN(roi_align_autocast_cpu));
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::multi_level_roi_align"),
+      TORCH_FN(multi_level_roi_align_autocast_cpu));
+}
+
 } // namespace ops
 } // namespace vision
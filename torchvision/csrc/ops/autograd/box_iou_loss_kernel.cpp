@@ -0,0 +1,104 @@
+#include "../box_iou_loss.h"
+
+#include <torch/autograd.h>
+#include <torch/types.h>
+
+namespace vision {
+namespace ops {
+
+namespace {
+
+class BoxIoULossFunction
+    : public torch::autograd::Function<BoxIoULossFunction> {
+ public:
+  static torch::autograd::variable_list forward(
+      torch::autograd::AutogradContext* ctx,
+      const torch::autograd::Variable& boxes1,
+      const torch::autograd::Variable& boxes2,
+      int64_t loss_type,
+      double eps) {
+    ctx->saved_data["loss_type"] = loss_type;
+    ctx->saved_data["eps"] = eps;
+    ctx->save_for_backward({boxes1, boxes2});
+    at::AutoDispatchBelowADInplaceOrView g;
+    auto result = box_iou_loss(boxes1, boxes2, loss_type, eps);
+    return {result};
+  }
+
+  static torch::autograd::variable_list backward(
+      torch::autograd::AutogradContext* ctx,
+      const torch::autograd::variable_list& grad_output) {
+    // Use data saved in forward
+    auto saved = ctx->get_saved_variables();
+    auto boxes1 = saved[0];
+    auto boxes2 = saved[1];
+    auto result = detail::_box_iou_loss_backward(
+        grad_output[0],
+        boxes1,
+        boxes2,
+        ctx->saved_data["loss_type"].toInt(),
+        ctx->saved_data["eps"].toDouble());
+    return {
+        std::get<0>(result),
+        std::get<1>(result),
+        torch::autograd::Variable(),
+        torch::autograd::Variable()};
+  }
+};
+
+// TODO: There should be an easier way to do this
+class BoxIoULossBackwardFunction
+    : public torch::autograd::Function<BoxIoULossBackwardFunction> {
+ public:
+  static torch::autograd::variable_list forward(
+      torch::autograd::AutogradContext* ctx,
+      const torch::autograd::Variable& grad,
+      const torch::autograd::Variable& boxes1,
+      const torch::autograd::Variable& boxes2,
+      int64_t loss_type,
+      double eps) {
+    at::AutoDispatchBelowADInplaceOrView g;
+    auto result =
+        detail::_box_iou_loss_backward(grad, boxes1, boxes2, loss_type, eps);
+    return {std::get<0>(result), std::get<1>(result)};
+  }
+
+  static torch::autograd::variable_list backward(
+      torch::autograd::AutogradContext* ctx,
+      const torch::autograd::variable_list& grad_output) {
+    TORCH_CHECK(0, "double backwards on box_iou_loss not supported");
+  }
+};
+
+at::Tensor box_iou_loss_autograd(
+    const at::Tensor& boxes1,
+    const at::Tensor& boxes2,
+    int64_t loss_type,
+    double eps) {
+  return BoxIoULossFunction::apply(boxes1, boxes2, loss_type, eps)[0];
+}
+
+std::tuple<at::Tensor, at::Tensor> box_iou_loss_backward_autograd(
+    const at::Tensor& grad,
+    const at::Tensor& boxes1,
+    const at::Tensor& boxes2,
+    int64_t loss_type,
+    double eps) {
+  auto result =
+      BoxIoULossBackwardFunction::apply(grad, boxes1, boxes2, loss_type, eps);
+  return std::make_tuple(result[0], result[1]);
+}
+
+} // namespace
+
+TORCH_LIBRARY_IMPL(torchvision, Autograd, m) {
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::box_iou_loss"),
+      TORCH_FN(box_iou_loss_autograd));
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::_box_iou_loss_backward"),
+      TORCH_FN(box_iou_loss_backward_autograd));
+}
+
+} // namespace ops
+} // namespace vision
@@ -108,6 +108,115 @@ class ROIAlignBackwardFunction
   }
 };
 
+class MultiLevelROIAlignFunction
+    : public torch::autograd::Function<MultiLevelROIAlignFunction> {
+ public:
+  static torch::autograd::variable_list forward(
+      torch::autograd::AutogradContext* ctx,
+      at::TensorList inputs,
+      const torch::autograd::Variable& rois,
+      const torch::autograd::Variable& levels,
+      at::ArrayRef<double> spatial_scales,
+      int64_t pooled_height,
+      int64_t pooled_width,
+      int64_t sampling_ratio,
+      bool aligned) {
+    std::vector<int64_t> heights, widths;
+    for (const auto& input : inputs) {
+      heights.push_back(input.size(2));
+      widths.push_back(input.size(3));
+    }
+    ctx->saved_data["spatial_scales"] = spatial_scales.vec();
+    ctx->saved_data["pooled_height"] = pooled_height;
+    ctx->saved_data["pooled_width"] = pooled_width;
+    ctx->saved_data["sampling_ratio"] = sampling_ratio;
+    ctx->saved_data["aligned"] = aligned;
+    ctx->saved_data["batch_size"] = inputs[0].size(0);
+    ctx->saved_data["channels"] = inputs[0].size(1);
+    ctx->saved_data["heights"] = heights;
+    ctx->saved_data["widths"] = widths;
+    ctx->save_for_backward({rois, levels});
+    at::AutoDispatchBelowADInplaceOrView g;
+    auto result = multi_level_roi_align(
+        inputs,
+        rois,
+        levels,
+        spatial_scales,
+        pooled_height,
+        pooled_width,
+        sampling_ratio,
+        aligned);
+    return {result};
+  }
+
+  static torch::autograd::variable_list backward(
+      torch::autograd::AutogradContext* ctx,
+      const torch::autograd::variable_list& grad_output) {
+    // Use data saved in forward
+    auto saved = ctx->get_saved_variables();
+    auto rois = saved[0];
+    auto levels = saved[1];
+    auto grad_inputs = detail::_multi_level_roi_align_backward(
+        grad_output[0],
+        rois,
+        levels,
+        ctx->saved_data["spatial_scales"].toDoubleVector(),
+        ctx->saved_data["pooled_height"].toInt(),
+        ctx->saved_data["pooled_width"].toInt(),
+        ctx->saved_data["batch_size"].toInt(),
+        ctx->saved_data["channels"].toInt(),
+        ctx->saved_data["heights"].toIntVector(),
+        ctx->saved_data["widths"].toIntVector(),
+        ctx->saved_data["sampling_ratio"].toInt(),
+        ctx->saved_data["aligned"].toBool());
+    // one gradient per feature map, and none for the other arguments
+    torch::autograd::variable_list result(
+        grad_inputs.begin(), grad_inputs.end());
+    result.resize(grad_inputs.size() + 7);
+    return result;
+  }
+};
+
+class MultiLevelROIAlignBackwardFunction
+    : public torch::autograd::Function<MultiLevelROIAlignBackwardFunction> {
+ public:
+  static torch::autograd::variable_list forward(
+      torch::autograd::AutogradContext* ctx,
+      const torch::autograd::Variable& grad,
+      const torch::autograd::Variable& rois,
+      const torch::autograd::Variable& levels,
+      at::ArrayRef<double> spatial_scales,
+      int64_t pooled_height,
+      int64_t pooled_width,
+      int64_t batch_size,
+      int64_t channels,
+      at::IntArrayRef heights,
+      at::IntArrayRef widths,
+      int64_t sampling_ratio,
+      bool aligned) {
+    at::AutoDispatchBelowADInplaceOrView g;
+    return detail::_multi_level_roi_align_backward(
+        grad,
+        rois,
+        levels,
+        spatial_scales,
+        pooled_height,
+        pooled_width,
+        batch_size,
+        channels,
+        heights,
+        widths,
+        sampling_ratio,
+        aligned);
+  }
+
+  static torch::autograd::variable_list backward(
+      torch::autograd::AutogradContext* ctx,
+      const torch::autograd::variable_list& grad_output) {
+    TORCH_CHECK(0, "double backwards on multi_level_roi_align not supported");
+  }
+};
+
 at::Tensor roi_align_autograd(
     const at::Tensor& input,
     const at::Tensor& rois,
@@ -152,6 +261,54 @@ at::Tensor roi_align_backward_autograd(
       aligned)[0];
 }
 
+at::Tensor multi_level_roi_align_autograd(
+    at::TensorList inputs,
+    const at::Tensor& rois,
+    const at::Tensor& levels,
+    at::ArrayRef<double> spatial_scales,
+    int64_t pooled_height,
+    int64_t pooled_width,
+    int64_t sampling_ratio,
+    bool aligned) {
+  return MultiLevelROIAlignFunction::apply(
+      inputs,
+      rois,
+      levels,
+      spatial_scales,
+      pooled_height,
+      pooled_width,
+      sampling_ratio,
+      aligned)[0];
+}
+
+std::vector<at::Tensor> multi_level_roi_align_backward_autograd(
+    const at::Tensor& grad,
+    const at::Tensor& rois,
+    const at::Tensor& levels,
+    at::ArrayRef<double> spatial_scales,
+    int64_t pooled_height,
+    int64_t pooled_width,
+    int64_t batch_size,
+    int64_t channels,
+    at::IntArrayRef heights,
+    at::IntArrayRef widths,
+    int64_t sampling_ratio,
+    bool aligned) {
+  return MultiLevelROIAlignBackwardFunction::apply(
+      grad,
+      rois,
+      levels,
+      spatial_scales,
+      pooled_height,
+      pooled_width,
+      batch_size,
+      channels,
+      heights,
+      widths,
+      sampling_ratio,
+      aligned);
+}
+
 } // namespace
 
 TORCH_LIBRARY_IMPL(torchvision, Autograd, m) {
@@ -161,6 +318,12 @@ TORCH_LIBRARY_IMPL(torchvision, Autograd, m) {
   m.impl(
       TORCH_SELECTIVE_NAME("torchvision::_roi_align_backward"),
       TORCH_FN(roi_align_backward_autograd));
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::multi_level_roi_align"),
+      TORCH_FN(multi_level_roi_align_autograd));
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::_multi_level_roi_align_backward"),
+      TORCH_FN(multi_level_roi_align_backward_autograd));
 }
 
 } // namespace ops
@@ -0,0 +1,28 @@
+#include "box_coder.h"
+
+#include <torch/types.h>
+
+namespace vision {
+namespace ops {
+
+at::Tensor decode_and_clip(
+    const at::Tensor& rel_codes,
+    const at::Tensor& boxes,
+    at::ArrayRef<double> weights,
+    double bbox_xform_clip,
+    at::IntArrayRef image_sizes,
+    at::IntArrayRef boxes_per_image) {
+  static auto op = c10::Dispatcher::singleton()
+                       .findSchemaOrThrow("torchvision::decode_and_clip", "")
+                       .typed<decltype(decode_and_clip)>();
+  return op.call(
+      rel_codes, boxes, weights, bbox_xform_clip, image_sizes, boxes_per_image);
+}
+
+TORCH_LIBRARY_FRAGMENT(torchvision, m) {
+  m.def(TORCH_SELECTIVE_SCHEMA(
+      "torchvision::decode_and_clip(Tensor rel_codes, Tensor boxes, float[] weights, float bbox_xform_clip, int[] image_sizes, int[] boxes_per_image) -> Tensor"));
+}
+
+} // namespace ops
+} // namespace vision
@@ -0,0 +1,18 @@
+#pragma once
+
+#include <ATen/ATen.h>
+#include "../macros.h"
+
+namespace vision {
+namespace ops {
+
+VISION_API at::Tensor decode_and_clip(
+    const at::Tensor& rel_codes,
+    const at::Tensor& boxes,
+    at::ArrayRef<double> weights,
+    double bbox_xform_clip,
+    at::IntArrayRef image_sizes,
+    at::IntArrayRef boxes_per_image);
+
+} // namespace ops
+} // namespace vision
@@ -0,0 +1,33 @@
+#include "box_iou.h"
+
+#include <torch/types.h>
+
+namespace vision {
+namespace ops {
+
+at::Tensor box_iou(const at::Tensor& boxes1, const at::Tensor& boxes2) {
+  static auto op = c10::Dispatcher::singleton()
+                       .findSchemaOrThrow("torchvision::box_iou", "")
+                       .typed<decltype(box_iou)>();
+  return op.call(boxes1, boxes2);
+}
+
+std::tuple<at::Tensor, at::Tensor, at::Tensor, at::Tensor> box_iou_match(
+    const at::Tensor& boxes1,
+    const at::Tensor& boxes2,
+    bool with_low_quality_matches) {
+  static auto op = c10::Dispatcher::singleton()
+                       .findSchemaOrThrow("torchvision::box_iou_match", "")
+                       .typed<decltype(box_iou_match)>();
+  return op.call(boxes1, boxes2, with_low_quality_matches);
+}
+
+TORCH_LIBRARY_FRAGMENT(torchvision, m) {
+  m.def(TORCH_SELECTIVE_SCHEMA(
+      "torchvision::box_iou(Tensor boxes1, Tensor boxes2) -> Tensor"));
+  m.def(TORCH_SELECTIVE_SCHEMA(
+      "torchvision::box_iou_match(Tensor boxes1, Tensor boxes2, bool with_low_quality_matches) -> (Tensor, Tensor, Tensor, Tensor)"));
+}
+
+} // namespace ops
+} // namespace vision
@@ -0,0 +1,20 @@
+#pragma once
+
+#include <ATen/ATen.h>
+#include "../macros.h"
+
+namespace vision {
+namespace ops {
+
+VISION_API at::Tensor box_iou(
+    const at::Tensor& boxes1,
+    const at::Tensor& boxes2);
+
+VISION_API std::tuple<at::Tensor, at::Tensor, at::Tensor, at::Tensor>
+box_iou_match(
+    const at::Tensor& boxes1,
+    const at::Tensor& boxes2,
+    bool with_low_quality_matches);
+
+} // namespace ops
+} // namespace vision
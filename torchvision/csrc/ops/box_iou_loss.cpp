@@ -0,0 +1,44 @@
+#include "box_iou_loss.h"
+
+#include <torch/types.h>
+
+namespace vision {
+namespace ops {
+
+at::Tensor box_iou_loss(
+    const at::Tensor& boxes1,
+    const at::Tensor& boxes2,
+    int64_t loss_type,
+    double eps) {
+  static auto op = c10::Dispatcher::singleton()
+                       .findSchemaOrThrow("torchvision::box_iou_loss", "")
+                       .typed<decltype(box_iou_loss)>();
+  return op.call(boxes1, boxes2, loss_type, eps);
+}
+
+namespace detail {
+
+std::tuple<at::Tensor, at::Tensor> _box_iou_loss_backward(
+    const at::Tensor& grad,
+    const at::Tensor& boxes1,
+    const at::Tensor& boxes2,
+    int64_t loss_type,
+    double eps) {
+  static auto op =
+      c10::Dispatcher::singleton()
+          .findSchemaOrThrow("torchvision::_box_iou_loss_backward", "")
+          .typed<decltype(_box_iou_loss_backward)>();
+  return op.call(grad, boxes1, boxes2, loss_type, eps);
+}
+
+} // namespace detail
+
+TORCH_LIBRARY_FRAGMENT(torchvision, m) {
+  m.def(TORCH_SELECTIVE_SCHEMA(
+      "torchvision::box_iou_loss(Tensor boxes1, Tensor boxes2, int loss_type, float eps) -> Tensor"));
+  m.def(TORCH_SELECTIVE_SCHEMA(
+      "torchvision::_box_iou_loss_backward(Tensor grad, Tensor boxes1, Tensor boxes2, int loss_type, float eps) -> (Tensor, Tensor)"));
+}
+
+} // namespace ops
+} // namespace vision
@@ -0,0 +1,27 @@
+#pragma once
+
+#include <ATen/ATen.h>
+#include "../macros.h"
+
+namespace vision {
+namespace ops {
+
+VISION_API at::Tensor box_iou_loss(
+    const at::Tensor& boxes1,
+    const at::Tensor& boxes2,
+    int64_t loss_type,
+    double eps);
+
+namespace detail {
+
+std::tuple<at::Tensor, at::Tensor> _box_iou_loss_backward(
+    const at::Tensor& grad,
+    const at::Tensor& boxes1,
+    const at::Tensor& boxes2,
+    int64_t loss_type,
+    double eps);
+
+} // namespace detail
+
+} // namespace ops
+} // namespace vision
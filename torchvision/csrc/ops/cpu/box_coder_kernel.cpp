@@ -0,0 +1,158 @@
+#include <ATen/ATen.h>
+#include <ATen/Parallel.h>
+#include <torch/library.h>
+
+#include <cmath>
+
+namespace vision {
+namespace ops {
+
+namespace {
+
+// Clamps like Tensor.clamp(min=0, max=size) does, NaNs included.
+template <typename scalar_t>
+inline scalar_t clip_coordinate(scalar_t value, scalar_t size) {
+  value = value < 0 ? static_cast<scalar_t>(0) : value;
+  return value > size ? size : value;
+}
+
+// Decodes the codes of the boxes [begin, end) of one image and clips them to
+// its size. Same operations, in the same order, as BoxCoder.decode_single
+// followed by clip_boxes_to_image, without any intermediate tensor.
+template <typename scalar_t>
+void decode_and_clip_boxes(
+    const scalar_t* rel_codes,
+    const scalar_t* boxes,
+    const scalar_t* weights,
+    scalar_t bbox_xform_clip,
+    scalar_t height,
+    scalar_t width,
+    int64_t num_classes,
+    int64_t begin,
+    int64_t end,
+    scalar_t* output) {
+  const auto half = static_cast<scalar_t>(0.5);
+  for (int64_t i = begin; i < end; i++) {
+    auto box = boxes + i * 4;
+    auto widths = box[2] - box[0];
+    auto heights = box[3] - box[1];
+    auto ctr_x = box[0] + half * widths;
+    auto ctr_y = box[1] + half * heights;
+
+    for (int64_t c = 0; c < num_classes; c++) {
+      auto code = rel_codes + (i * num_classes + c) * 4;
+      auto dx = code[0] / weights[0];
+      auto dy = code[1] / weights[1];
+      auto dw = code[2] / weights[2];
+      auto dh = code[3] / weights[3];
+      // Prevent sending too large values into exp()
+      dw = dw > bbox_xform_clip ? bbox_xform_clip : dw;
+      dh = dh > bbox_xform_clip ? bbox_xform_clip : dh;
+
+      auto pred_ctr_x = dx * widths + ctr_x;
+      auto pred_ctr_y = dy * heights + ctr_y;
+      auto c_to_c_w = half * (std::exp(dw) * widths);
+      auto c_to_c_h = half * (std::exp(dh) * heights);
+
+      auto out = output + (i * num_classes + c) * 4;
+      out[0] = clip_coordinate(pred_ctr_x - c_to_c_w, width);
+      out[1] = clip_coordinate(pred_ctr_y - c_to_c_h, height);
+      out[2] = clip_coordinate(pred_ctr_x + c_to_c_w, width);
+      out[3] = clip_coordinate(pred_ctr_y + c_to_c_h, height);
+    }
+  }
+}
+
+at::Tensor decode_and_clip_kernel(
+    const at::Tensor& rel_codes,
+    const at::Tensor& boxes,
+    at::ArrayRef<double> weights,
+    double bbox_xform_clip,
+    at::IntArrayRef image_sizes,
+    at::IntArrayRef boxes_per_image) {
+  TORCH_CHECK(!rel_codes.is_cuda(), "rel_codes must be a CPU tensor");
+  TORCH_CHECK(!boxes.is_cuda(), "boxes must be a CPU tensor");
+  TORCH_CHECK(
+      boxes.dim() == 2 && boxes.size(1) == 4,
+      "boxes should be a [N, 4] tensor, got ",
+      boxes.sizes());
+  TORCH_CHECK(
+      rel_codes.dim() == 2 && rel_codes.size(0) == boxes.size(0) &&
+          rel_codes.size(1) % 4 == 0,
+      "rel_codes should be a [N, 4 * K] tensor, with N the number of boxes, got ",
+      rel_codes.sizes());
+  TORCH_CHECK(
+      rel_codes.scalar_type() == boxes.scalar_type(),
+      "rel_codes should have the same type as boxes");
+  TORCH_CHECK(weights.size() == 4, "weights should have 4 elements");
+  TORCH_CHECK(
+      image_sizes.size() == 2 * boxes_per_image.size(),
+      "image_sizes should have a height and a width for each image");
+  int64_t num_boxes = 0;
+  for (auto n : boxes_per_image) {
+    TORCH_CHECK(n >= 0, "boxes_per_image should not be negative");
+    num_boxes += n;
+  }
+  TORCH_CHECK(
+      num_boxes == boxes.size(0),
+      "boxes_per_image should sum to the number of boxes, got ",
+      num_boxes,
+      " and ",
+      boxes.size(0));
+
+  at::Tensor output = at::empty_like(rel_codes, at::MemoryFormat::Contiguous);
+  if (output.numel() == 0)
+    return output;
+
+  auto rel_codes_ = rel_codes.contiguous();
+  auto boxes_ = boxes.contiguous();
+  auto num_classes = rel_codes.size(1) / 4;
+  AT_DISPATCH_FLOATING_TYPES(
+      rel_codes.scalar_type(), "decode_and_clip_kernel", [&] {
+        scalar_t weights_[4];
+        for (size_t k = 0; k < 4; k++) {
+          weights_[k] = static_cast<scalar_t>(weights[k]);
+        }
+        auto codes = rel_codes_.data_ptr<scalar_t>();
+        auto b = boxes_.data_ptr<scalar_t>();
+        auto out = output.data_ptr<scalar_t>();
+        auto grain_size =
+            std::max<int64_t>(1, at::internal::GRAIN_SIZE / (16 * num_classes));
+
+        int64_t offset = 0;
+        for (size_t image = 0; image < boxes_per_image.size(); image++) {
+          auto height = static_cast<scalar_t>(image_sizes[2 * image]);
+          auto width = static_cast<scalar_t>(image_sizes[2 * image + 1]);
+          at::parallel_for(
+              offset,
+              offset + boxes_per_image[image],
+              grain_size,
+              [&](int64_t begin, int64_t end) {
+                decode_and_clip_boxes(
+                    codes,
+                    b,
+                    weights_,
+                    static_cast<scalar_t>(bbox_xform_clip),
+                    height,
+                    width,
+                    num_classes,
+                    begin,
+                    end,
+                    out);
+              });
+          offset += boxes_per_image[image];
+        }
+      });
+  return output;
+}
+
+} // namespace
+
+TORCH_LIBRARY_IMPL(torchvision, CPU, m) {
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::decode_and_clip"),
+      TORCH_FN(decode_and_clip_kernel));
+}
+
+} // namespace ops
+} // namespace vision
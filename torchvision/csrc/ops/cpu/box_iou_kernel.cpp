@@ -0,0 +1,301 @@
+#include <ATen/ATen.h>
+#include <ATen/Parallel.h>
+#include <torch/library.h>
+
+#include <limits>
+#include <mutex>
+
+namespace vision {
+namespace ops {
+
+namespace {
+
+// Same operations, in the same order, as torchvision.ops.box_iou so that both
+// implementations give bitwise identical results. box_iou_match_kernel_impl
+// inlines the same computation.
+template <typename scalar_t>
+inline scalar_t pairwise_iou(
+    const scalar_t* box1,
+    scalar_t area1,
+    const scalar_t* box2,
+    scalar_t area2) {
+  auto w = std::max(
+      static_cast<scalar_t>(0),
+      std::min(box1[2], box2[2]) - std::max(box1[0], box2[0]));
+  auto h = std::max(
+      static_cast<scalar_t>(0),
+      std::min(box1[3], box2[3]) - std::max(box1[1], box2[1]));
+  auto inter = w * h;
+  return inter / (area1 + area2 - inter);
+}
+
+at::Tensor box_areas(const at::Tensor& boxes) {
+  return (boxes.select(1, 2) - boxes.select(1, 0)) *
+      (boxes.select(1, 3) - boxes.select(1, 1));
+}
+
+void check_box_iou_inputs(const at::Tensor& boxes1, const at::Tensor& boxes2) {
+  TORCH_CHECK(!boxes1.is_cuda(), "boxes1 must be a CPU tensor");
+  TORCH_CHECK(!boxes2.is_cuda(), "boxes2 must be a CPU tensor");
+  TORCH_CHECK(
+      boxes1.dim() == 2 && boxes1.size(1) == 4,
+      "boxes1 should be a [N, 4] tensor, got ",
+      boxes1.sizes());
+  TORCH_CHECK(
+      boxes2.dim() == 2 && boxes2.size(1) == 4,
+      "boxes2 should be a [M, 4] tensor, got ",
+      boxes2.sizes());
+  TORCH_CHECK(
+      boxes1.scalar_type() == boxes2.scalar_type(),
+      "boxes1 should have the same type as boxes2");
+}
+
+template <typename scalar_t>
+void box_iou_kernel_impl(
+    const at::Tensor& boxes1,
+    const at::Tensor& boxes2,
+    at::Tensor& output) {
+  auto n1 = boxes1.size(0);
+  auto n2 = boxes2.size(0);
+
+  auto areas1_t = box_areas(boxes1).contiguous();
+  auto areas2_t = box_areas(boxes2).contiguous();
+
+  auto b1 = boxes1.data_ptr<scalar_t>();
+  auto b2 = boxes2.data_ptr<scalar_t>();
+  auto areas1 = areas1_t.data_ptr<scalar_t>();
+  auto areas2 = areas2_t.data_ptr<scalar_t>();
+  auto out = output.data_ptr<scalar_t>();
+
+  auto grain_size = std::max<int64_t>(1, at::internal::GRAIN_SIZE / n2);
+  at::parallel_for(0, n1, grain_size, [&](int64_t begin, int64_t end) {
+    for (int64_t i = begin; i < end; i++) {
+      for (int64_t j = 0; j < n2; j++) {
+        out[i * n2 + j] =
+            pairwise_iou(b1 + i * 4, areas1[i], b2 + j * 4, areas2[j]);
+      }
+    }
+  });
+}
+
+at::Tensor box_iou_kernel(const at::Tensor& boxes1, const at::Tensor& boxes2) {
+  check_box_iou_inputs(boxes1, boxes2);
+
+  at::Tensor output =
+      at::empty({boxes1.size(0), boxes2.size(0)}, boxes1.options());
+  if (output.numel() == 0)
+    return output;
+
+  auto boxes1_ = boxes1.contiguous();
+  auto boxes2_ = boxes2.contiguous();
+  AT_DISPATCH_FLOATING_TYPES(boxes1.scalar_type(), "box_iou_kernel", [&] {
+    box_iou_kernel_impl<scalar_t>(boxes1_, boxes2_, output);
+  });
+  return output;
+}
+
+// IoUs between one box and the boxes [0, len) of the per-coordinate arrays.
+// Same computation as pairwise_iou, written so that it can be vectorized.
+template <typename scalar_t>
+inline void iou_row(
+    const scalar_t* box,
+    scalar_t area,
+    const scalar_t* __restrict__ x1,
+    const scalar_t* __restrict__ y1,
+    const scalar_t* __restrict__ x2,
+    const scalar_t* __restrict__ y2,
+    const scalar_t* __restrict__ areas,
+    int64_t len,
+    scalar_t* __restrict__ out) {
+  auto bx1 = box[0];
+  auto by1 = box[1];
+  auto bx2 = box[2];
+  auto by2 = box[3];
+  for (int64_t j = 0; j < len; j++) {
+    auto w = std::max(
+        static_cast<scalar_t>(0), std::min(bx2, x2[j]) - std::max(bx1, x1[j]));
+    auto h = std::max(
+        static_cast<scalar_t>(0), std::min(by2, y2[j]) - std::max(by1, y1[j]));
+    auto inter = w * h;
+    out[j] = inter / (area + areas[j] - inter);
+  }
+}
+
+// The reductions of the IoU matrix that the detection matchers need, without
+// ever materializing it. For the M x N matrix of IoUs between boxes1 and
+// boxes2, computes
+//  - the max and argmax over boxes1 for every box of boxes2,
+//  - the argmax over boxes2 for every box of boxes1,
+//  - optionally, whether every box of boxes2 reaches the max IoU of one of
+//    the boxes of boxes1 (ties included).
+// Argmaxes return the first maximal index, like Tensor.max(dim) does.
+//
+// The work is split over chunks of boxes2, processed by tiles whose IoUs with
+// each box of boxes1 are computed into a small buffer and then reduced.
+template <typename scalar_t>
+void box_iou_match_kernel_impl(
+    const at::Tensor& boxes1,
+    const at::Tensor& boxes2,
+    bool with_low_quality_matches,
+    at::Tensor& matched_vals_t,
+    at::Tensor& matches_t,
+    at::Tensor& best_foreach_boxes1_t,
+    at::Tensor& highest_quality_t) {
+  constexpr int64_t kTileSize = 256;
+  auto n1 = boxes1.size(0);
+  auto n2 = boxes2.size(0);
+
+  auto areas1_t = box_areas(boxes1).contiguous();
+  auto areas2_t = box_areas(boxes2).contiguous();
+  auto coords2_t = boxes2.t().contiguous();
+  at::Tensor max_foreach_boxes1_t = at::empty({n1}, boxes1.options());
+
+  auto b1 = boxes1.data_ptr<scalar_t>();
+  auto x1 = coords2_t.data_ptr<scalar_t>();
+  auto y1 = x1 + n2;
+  auto x2 = y1 + n2;
+  auto y2 = x2 + n2;
+  auto areas1 = areas1_t.data_ptr<scalar_t>();
+  auto areas2 = areas2_t.data_ptr<scalar_t>();
+  auto matched_vals = matched_vals_t.data_ptr<scalar_t>();
+  auto matches = matches_t.data_ptr<int64_t>();
+  auto max_foreach_boxes1 = max_foreach_boxes1_t.data_ptr<scalar_t>();
+  auto best_foreach_boxes1 = best_foreach_boxes1_t.data_ptr<int64_t>();
+  auto highest_quality = highest_quality_t.data_ptr<bool>();
+
+  std::fill(
+      max_foreach_boxes1,
+      max_foreach_boxes1 + n1,
+      std::numeric_limits<scalar_t>::lowest());
+  std::fill(best_foreach_boxes1, best_foreach_boxes1 + n1, n2);
+
+  auto grain_size = std::max<int64_t>(
+      kTileSize, at::internal::GRAIN_SIZE / n1 / kTileSize * kTileSize);
+  std::mutex mutex;
+
+  at::parallel_for(0, n2, grain_size, [&](int64_t begin, int64_t end) {
+    std::vector<scalar_t> chunk_max(
+        n1, std::numeric_limits<scalar_t>::lowest());
+    std::vector<int64_t> chunk_best(n1, begin);
+    scalar_t ious[kTileSize];
+
+    for (int64_t tile = begin; tile < end; tile += kTileSize) {
+      auto len = std::min(kTileSize, end - tile);
+      auto tile_vals = matched_vals + tile;
+      auto tile_matches = matches + tile;
+      for (int64_t i = 0; i < n1; i++) {
+        iou_row(
+            b1 + i * 4,
+            areas1[i],
+            x1 + tile,
+            y1 + tile,
+            x2 + tile,
+            y2 + tile,
+            areas2 + tile,
+            len,
+            ious);
+        if (i == 0) {
+          std::copy(ious, ious + len, tile_vals);
+          std::fill(tile_matches, tile_matches + len, 0);
+        } else {
+          for (int64_t j = 0; j < len; j++) {
+            bool update = ious[j] > tile_vals[j];
+            tile_vals[j] = update ? ious[j] : tile_vals[j];
+            tile_matches[j] = update ? i : tile_matches[j];
+          }
+        }
+        for (int64_t j = 0; j < len; j++) {
+          if (ious[j] > chunk_max[i]) {
+            chunk_max[i] = ious[j];
+            chunk_best[i] = tile + j;
+          }
+        }
+      }
+    }
+
+    // Chunks may finish in any order, so ties go to the smallest index
+    std::lock_guard<std::mutex> lock(mutex);
+    for (int64_t i = 0; i < n1; i++) {
+      if (chunk_max[i] > max_foreach_boxes1[i] ||
+          (chunk_max[i] == max_foreach_boxes1[i] &&
+           chunk_best[i] < best_foreach_boxes1[i])) {
+        max_foreach_boxes1[i] = chunk_max[i];
+        best_foreach_boxes1[i] = chunk_best[i];
+      }
+    }
+  });
+
+  if (!with_low_quality_matches)
+    return;
+
+  at::parallel_for(0, n2, grain_size, [&](int64_t begin, int64_t end) {
+    scalar_t ious[kTileSize];
+    for (int64_t tile = begin; tile < end; tile += kTileSize) {
+      auto len = std::min(kTileSize, end - tile);
+      auto tile_highest_quality = highest_quality + tile;
+      for (int64_t i = 0; i < n1; i++) {
+        iou_row(
+            b1 + i * 4,
+            areas1[i],
+            x1 + tile,
+            y1 + tile,
+            x2 + tile,
+            y2 + tile,
+            areas2 + tile,
+            len,
+            ious);
+        auto max_val = max_foreach_boxes1[i];
+        for (int64_t j = 0; j < len; j++) {
+          tile_highest_quality[j] |= ious[j] == max_val;
+        }
+      }
+    }
+  });
+}
+
+std::tuple<at::Tensor, at::Tensor, at::Tensor, at::Tensor> box_iou_match_kernel(
+    const at::Tensor& boxes1,
+    const at::Tensor& boxes2,
+    bool with_low_quality_matches) {
+  check_box_iou_inputs(boxes1, boxes2);
+  TORCH_CHECK(
+      boxes1.size(0) > 0 && boxes2.size(0) > 0,
+      "boxes1 and boxes2 should not be empty");
+
+  auto n1 = boxes1.size(0);
+  auto n2 = boxes2.size(0);
+  at::Tensor matched_vals = at::empty({n2}, boxes2.options());
+  at::Tensor matches = at::empty({n2}, boxes2.options().dtype(at::kLong));
+  at::Tensor best_foreach_boxes1 =
+      at::empty({n1}, boxes1.options().dtype(at::kLong));
+  at::Tensor highest_quality =
+      at::zeros({n2}, boxes2.options().dtype(at::kBool));
+
+  auto boxes1_ = boxes1.contiguous();
+  auto boxes2_ = boxes2.contiguous();
+  AT_DISPATCH_FLOATING_TYPES(boxes1.scalar_type(), "box_iou_match_kernel", [&] {
+    box_iou_match_kernel_impl<scalar_t>(
+        boxes1_,
+        boxes2_,
+        with_low_quality_matches,
+        matched_vals,
+        matches,
+        best_foreach_boxes1,
+        highest_quality);
+  });
+  return std::make_tuple(
+      matched_vals, matches, best_foreach_boxes1, highest_quality);
+}
+
+} // namespace
+
+TORCH_LIBRARY_IMPL(torchvision, CPU, m) {
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::box_iou"), TORCH_FN(box_iou_kernel));
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::box_iou_match"),
+      TORCH_FN(box_iou_match_kernel));
+}
+
+} // namespace ops
+} // namespace vision
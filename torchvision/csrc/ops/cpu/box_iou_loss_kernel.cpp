@@ -0,0 +1,333 @@
+#include <ATen/ATen.h>
+#include <ATen/Parallel.h>
+#include <torch/library.h>
+
+#include <cmath>
+
+namespace vision {
+namespace ops {
+
+namespace {
+
+// Values of the loss_type argument of box_iou_loss. They should be kept in
+// sync with torchvision.ops._utils._box_iou_loss.
+enum BoxIoULossType { GIOU = 0, DIOU = 1, CIOU = 2 };
+
+constexpr double kPi = 3.14159265358979323846;
+
+// Gradients of max(a, b) and min(a, b). As in autograd, the gradient is
+// evenly split between both inputs when they are equal.
+template <typename T>
+inline void max_backward(T a, T b, T grad, T& grad_a, T& grad_b) {
+  if (a > b) {
+    grad_a += grad;
+  } else if (a < b) {
+    grad_b += grad;
+  } else {
+    grad_a += grad / 2;
+    grad_b += grad / 2;
+  }
+}
+
+template <typename T>
+inline void min_backward(T a, T b, T grad, T& grad_a, T& grad_b) {
+  max_backward(b, a, grad, grad_a, grad_b);
+}
+
+// Everything the loss of a pair of boxes depends on. Computed once in the
+// forward pass, and once again in the backward pass.
+template <typename T>
+struct BoxPair {
+  // boxes, as (x1, y1, x2, y2)
+  T b1[4];
+  T b2[4];
+  // intersection, union and IoU
+  T iw;
+  T ih;
+  bool overlap;
+  T inter;
+  T uni;
+  T iou;
+  // width and height of the smallest enclosing box
+  T cw;
+  T ch;
+
+  BoxPair(const T* boxes1, const T* boxes2, T eps) {
+    for (int k = 0; k < 4; k++) {
+      b1[k] = boxes1[k];
+      b2[k] = boxes2[k];
+    }
+    iw = std::min(b1[2], b2[2]) - std::max(b1[0], b2[0]);
+    ih = std::min(b1[3], b2[3]) - std::max(b1[1], b2[1]);
+    overlap = iw > 0 && ih > 0;
+    inter = overlap ? iw * ih : static_cast<T>(0);
+    uni = (b1[2] - b1[0]) * (b1[3] - b1[1]) +
+        (b2[2] - b2[0]) * (b2[3] - b2[1]) - inter;
+    iou = inter / (uni + eps);
+    cw = std::max(b1[2], b2[2]) - std::min(b1[0], b2[0]);
+    ch = std::max(b1[3], b2[3]) - std::min(b1[1], b2[1]);
+  }
+
+  T center_dx() const {
+    return (b1[2] + b1[0]) / 2 - (b2[0] + b2[2]) / 2;
+  }
+
+  T center_dy() const {
+    return (b1[3] + b1[1]) / 2 - (b2[1] + b2[3]) / 2;
+  }
+
+  // Difference of the aspect ratio angles used by the CIoU penalty
+  T aspect_angle() const {
+    return std::atan((b2[2] - b2[0]) / (b2[3] - b2[1])) -
+        std::atan((b1[2] - b1[0]) / (b1[3] - b1[1]));
+  }
+};
+
+template <typename T>
+inline T box_iou_loss_single(
+    const T* boxes1,
+    const T* boxes2,
+    int64_t loss_type,
+    T eps) {
+  BoxPair<T> p(boxes1, boxes2, eps);
+
+  if (loss_type == GIOU) {
+    auto area_c = p.cw * p.ch;
+    return 1 - (p.iou - (area_c - p.uni) / (area_c + eps));
+  }
+
+  auto dx = p.center_dx();
+  auto dy = p.center_dy();
+  auto diag = p.cw * p.cw + p.ch * p.ch + eps;
+  auto loss = 1 - p.iou + (dx * dx + dy * dy) / diag;
+  if (loss_type == CIOU) {
+    auto angle = p.aspect_angle();
+    auto v = static_cast<T>(4 / (kPi * kPi)) * angle * angle;
+    auto alpha = v / (1 - p.iou + v + eps);
+    loss += alpha * v;
+  }
+  return loss;
+}
+
+template <typename T>
+inline void box_iou_loss_backward_single(
+    T grad,
+    const T* boxes1,
+    const T* boxes2,
+    int64_t loss_type,
+    T eps,
+    T* grad_boxes1,
+    T* grad_boxes2) {
+  BoxPair<T> p(boxes1, boxes2, eps);
+  const T* b1 = p.b1;
+  const T* b2 = p.b2;
+  T g1[4] = {0, 0, 0, 0};
+  T g2[4] = {0, 0, 0, 0};
+
+  // every loss is 1 - iou + penalty
+  auto grad_iou = -grad;
+  auto grad_inter = grad_iou / (p.uni + eps);
+  auto grad_uni = -grad_iou * p.iou / (p.uni + eps);
+  T grad_cw, grad_ch;
+
+  if (loss_type == GIOU) {
+    auto area_c = p.cw * p.ch;
+    grad_uni -= grad / (area_c + eps);
+    auto grad_area_c = grad * (p.uni + eps) / ((area_c + eps) * (area_c + eps));
+    grad_cw = grad_area_c * p.ch;
+    grad_ch = grad_area_c * p.cw;
+  } else {
+    auto dx = p.center_dx();
+    auto dy = p.center_dy();
+    auto dist = dx * dx + dy * dy;
+    auto diag = p.cw * p.cw + p.ch * p.ch + eps;
+    auto grad_dist = grad / diag;
+    auto grad_diag = -grad * dist / (diag * diag);
+    grad_cw = 2 * grad_diag * p.cw;
+    grad_ch = 2 * grad_diag * p.ch;
+    // the centers are the means of the coordinates
+    auto grad_x = grad_dist * dx;
+    auto grad_y = grad_dist * dy;
+    g1[0] += grad_x;
+    g1[2] += grad_x;
+    g2[0] -= grad_x;
+    g2[2] -= grad_x;
+    g1[1] += grad_y;
+    g1[3] += grad_y;
+    g2[1] -= grad_y;
+    g2[3] -= grad_y;
+
+    if (loss_type == CIOU) {
+      // alpha is a constant weight, as in the reference implementation
+      auto angle = p.aspect_angle();
+      auto k = static_cast<T>(4 / (kPi * kPi));
+      auto v = k * angle * angle;
+      auto alpha = v / (1 - p.iou + v + eps);
+      auto grad_angle = grad * alpha * 2 * k * angle;
+      auto w1 = b1[2] - b1[0];
+      auto h1 = b1[3] - b1[1];
+      auto w2 = b2[2] - b2[0];
+      auto h2 = b2[3] - b2[1];
+      // d atan(w / h) = (h dw - w dh) / (w^2 + h^2)
+      auto n1 = -grad_angle / (w1 * w1 + h1 * h1);
+      auto n2 = grad_angle / (w2 * w2 + h2 * h2);
+      g1[2] += n1 * h1;
+      g1[0] -= n1 * h1;
+      g1[3] -= n1 * w1;
+      g1[1] += n1 * w1;
+      g2[2] += n2 * h2;
+      g2[0] -= n2 * h2;
+      g2[3] -= n2 * w2;
+      g2[1] += n2 * w2;
+    }
+  }
+
+  // smallest enclosing box
+  max_backward(b1[2], b2[2], grad_cw, g1[2], g2[2]);
+  min_backward(b1[0], b2[0], -grad_cw, g1[0], g2[0]);
+  max_backward(b1[3], b2[3], grad_ch, g1[3], g2[3]);
+  min_backward(b1[1], b2[1], -grad_ch, g1[1], g2[1]);
+
+  // union = area1 + area2 - inter
+  grad_inter -= grad_uni;
+  g1[2] += grad_uni * (b1[3] - b1[1]);
+  g1[0] -= grad_uni * (b1[3] - b1[1]);
+  g1[3] += grad_uni * (b1[2] - b1[0]);
+  g1[1] -= grad_uni * (b1[2] - b1[0]);
+  g2[2] += grad_uni * (b2[3] - b2[1]);
+  g2[0] -= grad_uni * (b2[3] - b2[1]);
+  g2[3] += grad_uni * (b2[2] - b2[0]);
+  g2[1] -= grad_uni * (b2[2] - b2[0]);
+
+  // intersection
+  if (p.overlap) {
+    auto grad_iw = grad_inter * p.ih;
+    auto grad_ih = grad_inter * p.iw;
+    min_backward(b1[2], b2[2], grad_iw, g1[2], g2[2]);
+    max_backward(b1[0], b2[0], -grad_iw, g1[0], g2[0]);
+    min_backward(b1[3], b2[3], grad_ih, g1[3], g2[3]);
+    max_backward(b1[1], b2[1], -grad_ih, g1[1], g2[1]);
+  }
+
+  for (int k = 0; k < 4; k++) {
+    grad_boxes1[k] = g1[k];
+    grad_boxes2[k] = g2[k];
+  }
+}
+
+void check_box_iou_loss_inputs(
+    const at::Tensor& boxes1,
+    const at::Tensor& boxes2,
+    int64_t loss_type) {
+  TORCH_CHECK(!boxes1.is_cuda(), "boxes1 must be a CPU tensor");
+  TORCH_CHECK(!boxes2.is_cuda(), "boxes2 must be a CPU tensor");
+  TORCH_CHECK(
+      boxes1.dim() >= 1 && boxes1.size(-1) == 4,
+      "boxes1 should be a [..., 4] tensor, got ",
+      boxes1.sizes());
+  TORCH_CHECK(
+      boxes1.sizes() == boxes2.sizes(),
+      "boxes1 and boxes2 should have the same shape, got ",
+      boxes1.sizes(),
+      " and ",
+      boxes2.sizes());
+  TORCH_CHECK(
+      boxes1.scalar_type() == boxes2.scalar_type(),
+      "boxes1 should have the same type as boxes2");
+  TORCH_CHECK(
+      loss_type == GIOU || loss_type == DIOU || loss_type == CIOU,
+      "unknown loss_type ",
+      loss_type);
+}
+
+at::Tensor box_iou_loss_kernel(
+    const at::Tensor& boxes1,
+    const at::Tensor& boxes2,
+    int64_t loss_type,
+    double eps) {
+  check_box_iou_loss_inputs(boxes1, boxes2, loss_type);
+
+  at::Tensor output =
+      at::empty(boxes1.sizes().slice(0, boxes1.dim() - 1), boxes1.options());
+  auto n = output.numel();
+  if (n == 0)
+    return output;
+
+  auto boxes1_ = boxes1.contiguous();
+  auto boxes2_ = boxes2.contiguous();
+  AT_DISPATCH_FLOATING_TYPES(boxes1.scalar_type(), "box_iou_loss_kernel", [&] {
+    auto b1 = boxes1_.data_ptr<scalar_t>();
+    auto b2 = boxes2_.data_ptr<scalar_t>();
+    auto out = output.data_ptr<scalar_t>();
+    auto eps_ = static_cast<scalar_t>(eps);
+    at::parallel_for(
+        0, n, at::internal::GRAIN_SIZE, [&](int64_t begin, int64_t end) {
+          for (int64_t i = begin; i < end; i++) {
+            out[i] =
+                box_iou_loss_single(b1 + i * 4, b2 + i * 4, loss_type, eps_);
+          }
+        });
+  });
+  return output;
+}
+
+std::tuple<at::Tensor, at::Tensor> box_iou_loss_backward_kernel(
+    const at::Tensor& grad,
+    const at::Tensor& boxes1,
+    const at::Tensor& boxes2,
+    int64_t loss_type,
+    double eps) {
+  check_box_iou_loss_inputs(boxes1, boxes2, loss_type);
+  TORCH_CHECK(!grad.is_cuda(), "grad must be a CPU tensor");
+  TORCH_CHECK(
+      grad.sizes() == boxes1.sizes().slice(0, boxes1.dim() - 1),
+      "grad should have the shape of the loss, got ",
+      grad.sizes());
+
+  at::Tensor grad_boxes1 = at::empty(boxes1.sizes(), boxes1.options());
+  at::Tensor grad_boxes2 = at::empty(boxes2.sizes(), boxes2.options());
+  auto n = grad.numel();
+  if (n == 0)
+    return std::make_tuple(grad_boxes1, grad_boxes2);
+
+  auto grad_ = grad.to(boxes1.scalar_type()).contiguous();
+  auto boxes1_ = boxes1.contiguous();
+  auto boxes2_ = boxes2.contiguous();
+  AT_DISPATCH_FLOATING_TYPES(
+      boxes1.scalar_type(), "box_iou_loss_backward_kernel", [&] {
+        auto g = grad_.data_ptr<scalar_t>();
+        auto b1 = boxes1_.data_ptr<scalar_t>();
+        auto b2 = boxes2_.data_ptr<scalar_t>();
+        auto gb1 = grad_boxes1.data_ptr<scalar_t>();
+        auto gb2 = grad_boxes2.data_ptr<scalar_t>();
+        auto eps_ = static_cast<scalar_t>(eps);
+        at::parallel_for(
+            0, n, at::internal::GRAIN_SIZE, [&](int64_t begin, int64_t end) {
+              for (int64_t i = begin; i < end; i++) {
+                box_iou_loss_backward_single(
+                    g[i],
+                    b1 + i * 4,
+                    b2 + i * 4,
+                    loss_type,
+                    eps_,
+                    gb1 + i * 4,
+                    gb2 + i * 4);
+              }
+            });
+      });
+  return std::make_tuple(grad_boxes1, grad_boxes2);
+}
+
+} // namespace
+
+TORCH_LIBRARY_IMPL(torchvision, CPU, m) {
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::box_iou_loss"),
+      TORCH_FN(box_iou_loss_kernel));
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::_box_iou_loss_backward"),
+      TORCH_FN(box_iou_loss_backward_kernel));
+}
+
+} // namespace ops
+} // namespace vision
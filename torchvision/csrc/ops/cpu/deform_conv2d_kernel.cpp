@@ -67,6 +67,7 @@
 // https://github.com/open-mmlab/mmdetection/blob/master/mmdet/ops/dcn/src/deform_conv_cuda.cpp
 
 #include <ATen/ATen.h>
+#include <ATen/Parallel.h>
 #include <torch/library.h>
 
 namespace vision {
@@ -76,6 +77,11 @@ namespace {
 
 const int kMaxParallelImgs = 32;
 
+// Upper bound on the number of elements of the column buffer. The output
+// positions of a block of images are processed by tiles whose columns fit in
+// it, so that the memory used does not grow with the size of the feature maps.
+const int64_t kMaxColumnsNumel = 1 << 20;
+
 template <typename scalar_t>
 scalar_t bilinear_interpolate(
     const scalar_t* in,
@@ -115,9 +121,11 @@ scalar_t bilinear_interpolate(
   return val;
 }
 
+// Computes the columns of the output positions [pos_begin, pos_end) of a
+// block of images, where the position of (b, y, x) is (b * out_h + y) * out_w
+// + x. The columns have one row per (in_c, i, j) and one column per position.
 template <typename scalar_t>
 void deformable_im2col_kernel(
-    int n,
     const scalar_t* input,
     const scalar_t* offset,
     const scalar_t* mask,
@@ -131,65 +139,74 @@ void deformable_im2col_kernel(
     int stride_w,
     int dilation_h,
     int dilation_w,
-    int batch_sz,
     int n_in_channels,
     int n_offset_grps,
     int out_h,
     int out_w,
     bool use_mask,
+    int64_t pos_begin,
+    int64_t pos_end,
     scalar_t* columns) {
-  for (int index = 0; index != n; ++index) {
-    const int out_x = index % out_w;
-    const int out_y = (index / out_w) % out_h;
-    const int out_b = (index / (out_w * out_h)) % batch_sz;
-    const int in_c = index / (out_w * out_h * batch_sz);
-    const int out_c = in_c * weight_h * weight_w;
-
-    int c_per_offset_grp = n_in_channels / n_offset_grps;
-    const int grp_idx = in_c / c_per_offset_grp;
-
-    auto columns_ptr = columns +
-        (out_c * (batch_sz * out_h * out_w) + out_b * (out_h * out_w) +
-         out_y * out_w + out_x);
-
-    auto input_ptr = input +
-        (out_b * (n_in_channels * height * width) + in_c * (height * width));
-
-    auto offset_ptr = offset +
-        (out_b * n_offset_grps + grp_idx) * 2 * weight_h * weight_w * out_h *
-            out_w;
-
-    auto mask_ptr = mask;
-    if (use_mask) {
-      mask_ptr += (out_b * n_offset_grps + grp_idx) * weight_h * weight_w *
-          out_h * out_w;
-    }
-
-    for (int i = 0; i < weight_h; ++i) {
-      for (int j = 0; j < weight_w; ++j) {
-        const int mask_idx = i * weight_w + j;
-        const int offset_idx = 2 * mask_idx;
-
-        scalar_t mask_value = 1;
-        if (use_mask) {
-          mask_value =
-              mask_ptr[mask_idx * (out_h * out_w) + out_y * out_w + out_x];
+  const int64_t tile_len = pos_end - pos_begin;
+  const int c_per_offset_grp = n_in_channels / n_offset_grps;
+  const int64_t grain_size =
+      std::max<int64_t>(1, at::internal::GRAIN_SIZE / (weight_h * weight_w));
+
+  // Each index writes its own entries of the columns
+  at::parallel_for(
+      0, n_in_channels * tile_len, grain_size, [&](int64_t begin, int64_t end) {
+        for (int64_t index = begin; index < end; ++index) {
+          const int64_t pos = pos_begin + index % tile_len;
+          const int out_x = pos % out_w;
+          const int out_y = (pos / out_w) % out_h;
+          const int out_b = pos / (out_w * out_h);
+          const int in_c = index / tile_len;
+          const int out_c = in_c * weight_h * weight_w;
+
+          const int grp_idx = in_c / c_per_offset_grp;
+
+          auto columns_ptr = columns + (out_c * tile_len + index % tile_len);
+
+          auto input_ptr = input +
+              (out_b * (n_in_channels * height * width) +
+               in_c * (height * width));
+
+          auto offset_ptr = offset +
+              (out_b * n_offset_grps + grp_idx) * 2 * weight_h * weight_w *
+                  out_h * out_w;
+
+          auto mask_ptr = mask;
+          if (use_mask) {
+            mask_ptr += (out_b * n_offset_grps + grp_idx) * weight_h *
+                weight_w * out_h * out_w;
+          }
+
+          for (int i = 0; i < weight_h; ++i) {
+            for (int j = 0; j < weight_w; ++j) {
+              const int mask_idx = i * weight_w + j;
+              const int offset_idx = 2 * mask_idx;
+
+              scalar_t mask_value = 1;
+              if (use_mask) {
+                mask_value = mask_ptr
+                    [mask_idx * (out_h * out_w) + out_y * out_w + out_x];
+              }
+
+              const scalar_t offset_h = offset_ptr
+                  [offset_idx * (out_h * out_w) + out_y * out_w + out_x];
+              const scalar_t offset_w = offset_ptr
+                  [(offset_idx + 1) * (out_h * out_w) + out_y * out_w + out_x];
+              const scalar_t y =
+                  (out_y * stride_h - pad_h) + i * dilation_h + offset_h;
+              const scalar_t x =
+                  (out_x * stride_w - pad_w) + j * dilation_w + offset_w;
+              *columns_ptr = mask_value *
+                  bilinear_interpolate(input_ptr, height, width, y, x);
+              columns_ptr += tile_len;
+            }
+          }
         }
-
-        const scalar_t offset_h =
-            offset_ptr[offset_idx * (out_h * out_w) + out_y * out_w + out_x];
-        const scalar_t offset_w = offset_ptr
-            [(offset_idx + 1) * (out_h * out_w) + out_y * out_w + out_x];
-        const scalar_t y =
-            (out_y * stride_h - pad_h) + i * dilation_h + offset_h;
-        const scalar_t x =
-            (out_x * stride_w - pad_w) + j * dilation_w + offset_w;
-        *columns_ptr =
-            mask_value * bilinear_interpolate(input_ptr, height, width, y, x);
-        columns_ptr += batch_sz * out_h * out_w;
-      }
-    }
-  }
+      });
 }
 
 void deformable_im2col(
@@ -209,16 +226,14 @@ void deformable_im2col(
     int dilation_w,
     int out_h,
     int out_w,
-    int parallel_imgs,
     int deformable_group,
     bool use_mask,
+    int64_t pos_begin,
+    int64_t pos_end,
     at::Tensor data_col) {
-  int num_kernels = n_in_channels * out_h * out_w * parallel_imgs;
-
   AT_DISPATCH_FLOATING_TYPES_AND_HALF(
       input.scalar_type(), "deformable_im2col", ([&] {
         deformable_im2col_kernel(
-            num_kernels,
             input.data_ptr<scalar_t>(),
             data_offset.data_ptr<scalar_t>(),
             data_mask.data_ptr<scalar_t>(),
@@ -232,12 +247,13 @@ void deformable_im2col(
             stride_w,
             dilation_h,
             dilation_w,
-            parallel_imgs,
             n_in_channels,
             deformable_group,
             out_h,
             out_w,
             use_mask,
+            pos_begin,
+            pos_end,
             data_col.data_ptr<scalar_t>());
       }));
 }
@@ -251,9 +267,10 @@ int get_greatest_divisor_below_bound(int n, int bound) {
   return 1;
 }
 
+// Accumulates into grad_im the gradient of the columns of the output
+// positions [pos_begin, pos_end), laid out as in deformable_im2col_kernel.
 template <typename scalar_t>
 void deformable_col2im_kernel(
-    int n,
     const scalar_t* col,
     const scalar_t* offset,
     const scalar_t* mask,
@@ -268,63 +285,82 @@ void deformable_col2im_kernel(
     int stride_w,
     int dilation_h,
     int dilation_w,
-    int batch_sz,
     int n_offset_grps,
     int out_h,
     int out_w,
     bool use_mask,
+    int64_t pos_begin,
+    int64_t pos_end,
     scalar_t* grad_im) {
-  for (int index = 0; index != n; ++index) {
-    const int out_x = index % out_w;
-    const int out_y = (index / out_w) % out_h;
-    const int b = (index / (out_w * out_h)) % batch_sz;
-    const int j = (index / (out_w * out_h * batch_sz)) % kernel_w;
-    const int i = (index / (out_w * out_h * batch_sz * kernel_w)) % kernel_h;
-    const int c = index / (out_w * out_h * batch_sz * kernel_w * kernel_h);
-
-    int c_per_offset_grp = channels / n_offset_grps;
-    const int offset_grp = c / c_per_offset_grp;
-
-    auto offset_ptr = offset +
-        (b * n_offset_grps + offset_grp) * 2 * kernel_h * kernel_w * out_h *
-            out_w;
-
-    auto mask_ptr = mask;
-    if (use_mask) {
-      mask_ptr += (b * n_offset_grps + offset_grp) * kernel_h * kernel_w *
-          out_h * out_w;
-    }
-
-    const int mask_idx = i * kernel_w + j;
-    const int offset_idx = 2 * mask_idx;
-
-    const int offset_h_ptr = ((offset_idx)*out_h + out_y) * out_w + out_x;
-    const int offset_w_ptr = ((offset_idx + 1) * out_h + out_y) * out_w + out_x;
-
-    const scalar_t offset_h = offset_ptr[offset_h_ptr];
-    const scalar_t offset_w = offset_ptr[offset_w_ptr];
-
-    scalar_t mask_value = 1;
-    if (use_mask) {
-      mask_value = mask_ptr[(mask_idx * out_h + out_y) * out_w + out_x];
-    }
-
-    const scalar_t y = (out_y * stride_h - pad_h) + i * dilation_h + offset_h;
-    const scalar_t x = (out_x * stride_w - pad_w) + j * dilation_w + offset_w;
-
-    for (int dy = -1; dy <= 1; dy++) {
-      for (int dx = -1; dx <= 1; dx++) {
-        int yp = int(y) + dy;
-        int xp = int(x) + dx;
-        if (0 <= yp && yp < height && 0 <= xp && xp < width &&
-            std::abs(y - yp) < 1 && std::abs(x - xp) < 1) {
-          int grad_pos = ((b * channels + c) * height + yp) * width + xp;
-          scalar_t weight = (1 - std::abs(y - yp)) * (1 - std::abs(x - xp));
-          grad_im[grad_pos] += mask_value * weight * col[index];
+  const int64_t tile_len = pos_end - pos_begin;
+  const int c_per_offset_grp = channels / n_offset_grps;
+
+  // The gradients of different channels go to different planes of grad_im,
+  // so the channels are split between threads. Within a channel they are
+  // accumulated in the same order whatever the number of threads.
+  at::parallel_for(0, channels, 1, [&](int64_t c_begin, int64_t c_end) {
+    for (int c = c_begin; c < c_end; ++c) {
+      const int offset_grp = c / c_per_offset_grp;
+
+      for (int i = 0; i < kernel_h; ++i) {
+        for (int j = 0; j < kernel_w; ++j) {
+          const int mask_idx = i * kernel_w + j;
+          const int offset_idx = 2 * mask_idx;
+          auto col_ptr = col + ((c * kernel_h + i) * kernel_w + j) * tile_len;
+
+          for (int64_t pos = pos_begin; pos < pos_end; ++pos) {
+            const int out_x = pos % out_w;
+            const int out_y = (pos / out_w) % out_h;
+            const int b = pos / (out_w * out_h);
+
+            auto offset_ptr = offset +
+                (b * n_offset_grps + offset_grp) * 2 * kernel_h * kernel_w *
+                    out_h * out_w;
+
+            auto mask_ptr = mask;
+            if (use_mask) {
+              mask_ptr += (b * n_offset_grps + offset_grp) * kernel_h *
+                  kernel_w * out_h * out_w;
+            }
+
+            const int offset_h_ptr =
+                ((offset_idx)*out_h + out_y) * out_w + out_x;
+            const int offset_w_ptr =
+                ((offset_idx + 1) * out_h + out_y) * out_w + out_x;
+
+            const scalar_t offset_h = offset_ptr[offset_h_ptr];
+            const scalar_t offset_w = offset_ptr[offset_w_ptr];
+
+            scalar_t mask_value = 1;
+            if (use_mask) {
+              mask_value = mask_ptr[(mask_idx * out_h + out_y) * out_w + out_x];
+            }
+
+            const scalar_t y =
+                (out_y * stride_h - pad_h) + i * dilation_h + offset_h;
+            const scalar_t x =
+                (out_x * stride_w - pad_w) + j * dilation_w + offset_w;
+            const scalar_t col_value = col_ptr[pos - pos_begin];
+
+            for (int dy = -1; dy <= 1; dy++) {
+              for (int dx = -1; dx <= 1; dx++) {
+                int yp = int(y) + dy;
+                int xp = int(x) + dx;
+                if (0 <= yp && yp < height && 0 <= xp && xp < width &&
+                    std::abs(y - yp) < 1 && std::abs(x - xp) < 1) {
+                  int grad_pos =
+                      ((b * channels + c) * height + yp) * width + xp;
+                  scalar_t weight =
+                      (1 - std::abs(y - yp)) * (1 - std::abs(x - xp));
+                  grad_im[grad_pos] += mask_value * weight * col_value;
+                }
+              }
+            }
+          }
         }
       }
     }
-  }
+  });
 }
 
 void compute_grad_input(
@@ -342,21 +378,19 @@ void compute_grad_input(
     int stride_w,
     int dilation_h,
     int dilation_w,
-    int parallel_imgs,
     int n_offset_grps,
     bool use_mask,
+    int64_t pos_begin,
+    int64_t pos_end,
     at::Tensor grad_im) {
   int out_h =
       (height + 2 * pad_h - (dilation_h * (weight_h - 1) + 1)) / stride_h + 1;
   int out_w =
       (width + 2 * pad_w - (dilation_w * (weight_w - 1) + 1)) / stride_w + 1;
-  int num_kernels =
-      channels * weight_h * weight_w * out_h * out_w * parallel_imgs;
 
   AT_DISPATCH_FLOATING_TYPES_AND_HALF(
       columns.scalar_type(), "compute_grad_input", ([&] {
         deformable_col2im_kernel(
-            num_kernels,
             columns.data_ptr<scalar_t>(),
             offset.data_ptr<scalar_t>(),
             mask.data_ptr<scalar_t>(),
@@ -371,11 +405,12 @@ void compute_grad_input(
             stride_w,
             dilation_h,
             dilation_w,
-            parallel_imgs,
             n_offset_grps,
             out_h,
             out_w,
             use_mask,
+            pos_begin,
+            pos_end,
             grad_im.data_ptr<scalar_t>());
       }));
 }
@@ -413,9 +448,11 @@ scalar_t get_coordinate_weight(
   }
 }
 
+// Computes the gradients of the offsets and of the mask at the output
+// positions [pos_begin, pos_end), from the gradient of their columns laid out
+// as in deformable_im2col_kernel.
 template <typename scalar_t>
 void deformable_col2im_coord_kernel(
-    int n,
     const scalar_t* col,
     const scalar_t* im,
     const scalar_t* offset,
@@ -431,99 +468,112 @@ void deformable_col2im_coord_kernel(
     int stride_w,
     int dilation_h,
     int dilation_w,
-    int batch_sz,
     int offset_channels,
     int n_offset_grps,
     int out_h,
     int out_w,
     bool use_mask,
+    int64_t pos_begin,
+    int64_t pos_end,
     scalar_t* grad_offset,
     scalar_t* grad_mask) {
-  for (int index = 0; index != n; ++index) {
-    scalar_t grad_offset_val = 0;
-    scalar_t grad_mask_val = 0;
-
-    int w = index % out_w;
-    int h = (index / out_w) % out_h;
-    int w_w = (index / (out_w * out_h * 2)) % weight_w;
-    int w_h = (index / (out_w * out_h * 2 * weight_w)) % weight_h;
-    int c = (index / (out_w * out_h)) % offset_channels;
-    int b = index / (out_w * out_h * offset_channels);
-
-    const int offset_grp = c / (2 * weight_h * weight_w);
-    const int col_step = weight_h * weight_w;
-
-    int c_per_offset_grp = channels / n_offset_grps;
-
-    auto col_ptr = col +
-        offset_grp * c_per_offset_grp * weight_h * weight_w * batch_sz * out_w *
-            out_h;
-    auto im_ptr = im +
-        (b * n_offset_grps + offset_grp) * c_per_offset_grp * height * width;
-    auto offset_ptr = offset +
-        (b * n_offset_grps + offset_grp) * 2 * weight_h * weight_w * out_h *
-            out_w;
-
-    auto mask_ptr = mask;
-    if (use_mask) {
-      mask_ptr += (b * n_offset_grps + offset_grp) * weight_h * weight_w *
-          out_h * out_w;
-    }
-
-    const int offset_c = c - offset_grp * 2 * weight_h * weight_w;
-    const bool is_y_direction = offset_c % 2 == 0;
-
-    const int c_bound = c_per_offset_grp * weight_h * weight_w;
-    for (int col_c = (offset_c / 2); col_c < c_bound; col_c += col_step) {
-      const int col_pos = (((col_c * batch_sz + b) * out_h) + h) * out_w + w;
-
-      int out_x = col_pos % out_w;
-      int out_y = (col_pos / out_w) % out_h;
-      int j = (col_pos / (out_w * out_h * batch_sz)) % weight_w;
-      int i = (col_pos / (out_w * out_h * batch_sz * weight_w)) % weight_h;
-
-      const int mask_idx = i * weight_w + j;
-
-      const int offset_h_idx =
-          (((2 * mask_idx) * out_h + out_y) * out_w + out_x);
-      const int offset_w_idx =
-          (((2 * mask_idx + 1) * out_h + out_y) * out_w + out_x);
-      const scalar_t offset_h = offset_ptr[offset_h_idx];
-      const scalar_t offset_w = offset_ptr[offset_w_idx];
-
-      scalar_t mask_value = 1;
-      if (use_mask) {
-        mask_value = mask_ptr[(mask_idx * out_h + out_y) * out_w + out_x];
-      }
-
-      scalar_t y = (out_y * stride_h - pad_h) + i * dilation_h + offset_h;
-      scalar_t x = (out_x * stride_w - pad_w) + j * dilation_w + offset_w;
-
-      const scalar_t weight =
-          get_coordinate_weight(im_ptr, height, width, y, x, is_y_direction);
-      grad_offset_val += mask_value * weight * col_ptr[col_pos];
-
-      if (use_mask && is_y_direction) {
-        grad_mask_val += col_ptr[col_pos] *
-            bilinear_interpolate(im_ptr, height, width, y, x);
-      }
-
-      im_ptr += height * width;
-    }
-
-    grad_offset[index] = grad_offset_val;
-
-    if (use_mask && is_y_direction) {
-      const int idx =
-          ((((b * n_offset_grps + offset_grp) * weight_h + w_h) * weight_w +
-            w_w) *
-               out_h +
-           h) *
-              out_w +
-          w;
-      grad_mask[idx] = grad_mask_val;
-    }
-  }
+  const int64_t tile_len = pos_end - pos_begin;
+  const int col_step = weight_h * weight_w;
+  const int c_per_offset_grp = channels / n_offset_grps;
+  const int64_t grain_size =
+      std::max<int64_t>(1, at::internal::GRAIN_SIZE / c_per_offset_grp);
+
+  // Each index writes its own entries of grad_offset and grad_mask
+  at::parallel_for(
+      0,
+      offset_channels * tile_len,
+      grain_size,
+      [&](int64_t begin, int64_t end) {
+        for (int64_t index = begin; index < end; ++index) {
+          scalar_t grad_offset_val = 0;
+          scalar_t grad_mask_val = 0;
+
+          const int64_t pos = pos_begin + index % tile_len;
+          int w = pos % out_w;
+          int h = (pos / out_w) % out_h;
+          int b = pos / (out_w * out_h);
+          int c = index / tile_len;
+          int w_w = (c / 2) % weight_w;
+          int w_h = (c / (2 * weight_w)) % weight_h;
+
+          const int offset_grp = c / (2 * weight_h * weight_w);
+
+          auto col_ptr = col +
+              offset_grp * c_per_offset_grp * weight_h * weight_w * tile_len +
+              index % tile_len;
+          auto im_ptr = im +
+              (b * n_offset_grps + offset_grp) * c_per_offset_grp * height *
+                  width;
+          auto offset_ptr = offset +
+              (b * n_offset_grps + offset_grp) * 2 * weight_h * weight_w *
+                  out_h * out_w;
+
+          auto mask_ptr = mask;
+          if (use_mask) {
+            mask_ptr += (b * n_offset_grps + offset_grp) * weight_h * weight_w *
+                out_h * out_w;
+          }
+
+          const int offset_c = c - offset_grp * 2 * weight_h * weight_w;
+          const bool is_y_direction = offset_c % 2 == 0;
+
+          const int c_bound = c_per_offset_grp * weight_h * weight_w;
+          for (int col_c = (offset_c / 2); col_c < c_bound; col_c += col_step) {
+            const scalar_t col_value = col_ptr[col_c * tile_len];
+
+            int j = col_c % weight_w;
+            int i = (col_c / weight_w) % weight_h;
+
+            const int mask_idx = i * weight_w + j;
+
+            const int offset_h_idx = (((2 * mask_idx) * out_h + h) * out_w + w);
+            const int offset_w_idx =
+                (((2 * mask_idx + 1) * out_h + h) * out_w + w);
+            const scalar_t offset_h = offset_ptr[offset_h_idx];
+            const scalar_t offset_w = offset_ptr[offset_w_idx];
+
+            scalar_t mask_value = 1;
+            if (use_mask) {
+              mask_value = mask_ptr[(mask_idx * out_h + h) * out_w + w];
+            }
+
+            scalar_t y = (h * stride_h - pad_h) + i * dilation_h + offset_h;
+            scalar_t x = (w * stride_w - pad_w) + j * dilation_w + offset_w;
+
+            const scalar_t weight = get_coordinate_weight(
+                im_ptr, height, width, y, x, is_y_direction);
+            grad_offset_val += mask_value * weight * col_value;
+
+            if (use_mask && is_y_direction) {
+              grad_mask_val +=
+                  col_value * bilinear_interpolate(im_ptr, height, width, y, x);
+            }
+
+            im_ptr += height * width;
+          }
+
+          grad_offset
+              [(b * offset_channels + c) * out_h * out_w + h * out_w + w] =
+                  grad_offset_val;
+
+          if (use_mask && is_y_direction) {
+            const int idx =
+                ((((b * n_offset_grps + offset_grp) * weight_h + w_h) *
+                      weight_w +
+                  w_w) *
+                     out_h +
+                 h) *
+                    out_w +
+                w;
+            grad_mask[idx] = grad_mask_val;
+          }
+        }
+      });
 }
 
 void compute_grad_offset_and_mask(
@@ -542,22 +592,20 @@ void compute_grad_offset_and_mask(
     int stride_w,
     int dilation_h,
     int dilation_w,
-    int parallel_imgs,
     int n_offset_grps,
     bool use_mask,
+    int64_t pos_begin,
+    int64_t pos_end,
     at::Tensor grad_offset,
     at::Tensor grad_mask) {
   int out_h =
       (height + 2 * pad_h - (dilation_h * (weight_h - 1) + 1)) / stride_h + 1;
   int out_w =
       (width + 2 * pad_w - (dilation_w * (weight_w - 1) + 1)) / stride_w + 1;
-  int num_kernels =
-      out_h * out_w * 2 * weight_h * weight_w * n_offset_grps * parallel_imgs;
 
   AT_DISPATCH_FLOATING_TYPES_AND_HALF(
       columns.scalar_type(), "compute_grad_offset_and_mask", ([&] {
         deformable_col2im_coord_kernel(
-            num_kernels,
             columns.data_ptr<scalar_t>(),
             input.data_ptr<scalar_t>(),
             offset.data_ptr<scalar_t>(),
@@ -573,17 +621,25 @@ void compute_grad_offset_and_mask(
             stride_w,
             dilation_h,
             dilation_w,
-            parallel_imgs,
             2 * weight_h * weight_w * n_offset_grps,
             n_offset_grps,
             out_h,
             out_w,
             use_mask,
+            pos_begin,
+            pos_end,
             grad_offset.data_ptr<scalar_t>(),
             grad_mask.data_ptr<scalar_t>());
       }));
 }
 
+// Number of output positions processed at once, so that their columns fit in
+// kMaxColumnsNumel elements.
+int64_t get_columns_tile_size(int64_t n_rows, int64_t n_positions) {
+  return std::max<int64_t>(
+      1, std::min<int64_t>(n_positions, kMaxColumnsNumel / n_rows));
+}
+
 std::tuple<at::Tensor, at::Tensor, at::Tensor> backward_gradient_inputs(
     at::Tensor input,
     at::Tensor weight,
@@ -624,9 +680,10 @@ std::tuple<at::Tensor, at::Tensor, at::Tensor> backward_gradient_inputs(
     return std::make_tuple(grad_input, grad_offset, grad_mask);
   }
 
-  auto columns = at::empty(
-      {n_in_channels * weight_w * weight_h, n_parallel_imgs * out_h * out_w},
-      input.options());
+  const int64_t n_rows = n_in_channels * weight_w * weight_h;
+  const int64_t n_positions = n_parallel_imgs * out_h * out_w;
+  const int64_t tile_size = get_columns_tile_size(n_rows, n_positions);
+  auto columns_buf = at::empty({n_rows * tile_size}, input.options());
 
   // Separate into blocks
   grad_input = grad_input.reshape(
@@ -670,7 +727,8 @@ std::tuple<at::Tensor, at::Tensor, at::Tensor> backward_gradient_inputs(
                       n_out_channels / n_weight_grps,
                       out_h,
                       out_w})
-                 .permute({0, 2, 3, 1, 4, 5});
+                 .permute({0, 2, 3, 1, 4, 5})
+                 .contiguous();
 
   weight = weight.reshape(
       {n_weight_grps,
@@ -679,58 +737,64 @@ std::tuple<at::Tensor, at::Tensor, at::Tensor> backward_gradient_inputs(
        weight.size(2),
        weight.size(3)});
 
-  columns = columns.view(
-      {n_weight_grps, columns.size(0) / n_weight_grps, columns.size(1)});
-
   for (int elt = 0; elt < batch_sz / n_parallel_imgs; elt++) {
-    columns.zero_();
-    // Separate into weight groups
-    for (int g = 0; g < n_weight_grps; g++) {
-      columns[g] = columns[g].addmm_(
-          weight[g].flatten(1).transpose(0, 1), grad_out[elt][g].flatten(1));
-    }
+    for (int64_t pos = 0; pos < n_positions; pos += tile_size) {
+      const int64_t tile_len = std::min(tile_size, n_positions - pos);
+      auto columns =
+          columns_buf.narrow(0, 0, n_rows * tile_len)
+              .view({n_weight_grps, n_rows / n_weight_grps, tile_len});
+      columns.zero_();
+      // Separate into weight groups
+      for (int g = 0; g < n_weight_grps; g++) {
+        columns[g].addmm_(
+            weight[g].flatten(1).transpose(0, 1),
+            grad_out[elt][g].flatten(1).narrow(1, pos, tile_len));
+      }
 
-    compute_grad_offset_and_mask(
-        columns,
-        input[elt],
-        offset[elt],
-        mask[elt],
-        n_in_channels,
-        in_h,
-        in_w,
-        weight_h,
-        weight_w,
-        pad_h,
-        pad_w,
-        stride_h,
-        stride_w,
-        dilation_h,
-        dilation_w,
-        n_parallel_imgs,
-        n_offset_grps,
-        use_mask,
-        grad_offset[elt],
-        grad_mask[elt]);
-
-    compute_grad_input(
-        columns,
-        offset[elt],
-        mask[elt],
-        n_in_channels,
-        in_h,
-        in_w,
-        weight_h,
-        weight_w,
-        pad_h,
-        pad_w,
-        stride_h,
-        stride_w,
-        dilation_h,
-        dilation_w,
-        n_parallel_imgs,
-        n_offset_grps,
-        use_mask,
-        grad_input[elt]);
+      compute_grad_offset_and_mask(
+          columns,
+          input[elt],
+          offset[elt],
+          mask[elt],
+          n_in_channels,
+          in_h,
+          in_w,
+          weight_h,
+          weight_w,
+          pad_h,
+          pad_w,
+          stride_h,
+          stride_w,
+          dilation_h,
+          dilation_w,
+          n_offset_grps,
+          use_mask,
+          pos,
+          pos + tile_len,
+          grad_offset[elt],
+          grad_mask[elt]);
+
+      compute_grad_input(
+          columns,
+          offset[elt],
+          mask[elt],
+          n_in_channels,
+          in_h,
+          in_w,
+          weight_h,
+          weight_w,
+          pad_h,
+          pad_w,
+          stride_h,
+          stride_w,
+          dilation_h,
+          dilation_w,
+          n_offset_grps,
+          use_mask,
+          pos,
+          pos + tile_len,
+          grad_input[elt]);
+    }
   }
 
   grad_input = grad_input.view({batch_sz, n_in_channels, in_h, in_w});
@@ -817,42 +881,44 @@ at::Tensor backward_gradient_parameters(
        grad_weight.size(2),
        grad_weight.size(3)});
 
-  auto columns = at::empty(
-      {n_weight_grps,
-       n_in_channels * weight_w * weight_h / n_weight_grps,
-       n_parallel_imgs * out_h * out_w},
-      input.options());
+  const int64_t n_rows = n_in_channels * weight_w * weight_h;
+  const int64_t n_positions = n_parallel_imgs * out_h * out_w;
+  const int64_t tile_size = get_columns_tile_size(n_rows, n_positions);
+  auto columns_buf = at::empty({n_rows * tile_size}, input.options());
 
   for (int elt = 0; elt < batch_sz / n_parallel_imgs; elt++) {
-    deformable_im2col(
-        input[elt],
-        offset[elt],
-        mask[elt],
-        n_in_channels,
-        in_h,
-        in_w,
-        weight_h,
-        weight_w,
-        pad_h,
-        pad_w,
-        stride_h,
-        stride_w,
-        dilation_h,
-        dilation_w,
-        out_h,
-        out_w,
-        n_parallel_imgs,
-        n_offset_grps,
-        use_mask,
-        columns);
-
-    for (int g = 0; g < n_weight_grps; g++) {
-      grad_weight[g] =
-          grad_weight[g]
-              .flatten(1)
-              .addmm_(
-                  grad_out_buf[elt][g].flatten(1), columns[g].transpose(1, 0))
-              .view_as(grad_weight[g]);
+    for (int64_t pos = 0; pos < n_positions; pos += tile_size) {
+      const int64_t tile_len = std::min(tile_size, n_positions - pos);
+      auto columns = columns_buf.narrow(0, 0, n_rows * tile_len);
+      deformable_im2col(
+          input[elt],
+          offset[elt],
+          mask[elt],
+          n_in_channels,
+          in_h,
+          in_w,
+          weight_h,
+          weight_w,
+          pad_h,
+          pad_w,
+          stride_h,
+          stride_w,
+          dilation_h,
+          dilation_w,
+          out_h,
+          out_w,
+          n_offset_grps,
+          use_mask,
+          pos,
+          pos + tile_len,
+          columns);
+
+      columns = columns.view({n_weight_grps, n_rows / n_weight_grps, tile_len});
+      for (int g = 0; g < n_weight_grps; g++) {
+        grad_weight[g].flatten(1).addmm_(
+            grad_out_buf[elt][g].flatten(1).narrow(1, pos, tile_len),
+            columns[g].transpose(1, 0));
+      }
     }
   }
 
@@ -1033,43 +1099,46 @@ at::Tensor deform_conv2d_forward_kernel(
        weight_c.size(2),
        weight_c.size(3)});
 
-  // Sample points and perform convolution
-  auto columns = at::zeros(
-      {n_in_channels * weight_h * weight_w, n_parallel_imgs * out_h * out_w},
-      input_c.options());
+  // Sample points and perform convolution, by tiles of output positions
+  const int64_t n_rows = n_in_channels * weight_h * weight_w;
+  const int64_t n_positions = n_parallel_imgs * out_h * out_w;
+  const int64_t tile_size = get_columns_tile_size(n_rows, n_positions);
+  auto columns_buf = at::empty({n_rows * tile_size}, input_c.options());
   for (int b = 0; b < batch_sz / n_parallel_imgs; b++) {
-    deformable_im2col(
-        input_c[b],
-        offset_c[b],
-        mask_c[b],
-        n_in_channels,
-        in_h,
-        in_w,
-        weight_h,
-        weight_w,
-        pad_h,
-        pad_w,
-        stride_h,
-        stride_w,
-        dilation_h,
-        dilation_w,
-        out_h,
-        out_w,
-        n_parallel_imgs,
-        n_offset_grps,
-        use_mask,
-        columns);
-
-    columns = columns.view(
-        {n_weight_grps, columns.size(0) / n_weight_grps, columns.size(1)});
-    for (int g = 0; g < n_weight_grps; g++) {
-      out_buf[b][g] = out_buf[b][g]
-                          .flatten(1)
-                          .addmm_(weight_c[g].flatten(1), columns[g])
-                          .view_as(out_buf[b][g]);
+    for (int64_t pos = 0; pos < n_positions; pos += tile_size) {
+      const int64_t tile_len = std::min(tile_size, n_positions - pos);
+      auto columns = columns_buf.narrow(0, 0, n_rows * tile_len);
+      deformable_im2col(
+          input_c[b],
+          offset_c[b],
+          mask_c[b],
+          n_in_channels,
+          in_h,
+          in_w,
+          weight_h,
+          weight_w,
+          pad_h,
+          pad_w,
+          stride_h,
+          stride_w,
+          dilation_h,
+          dilation_w,
+          out_h,
+          out_w,
+          n_offset_grps,
+          use_mask,
+          pos,
+          pos + tile_len,
+          columns);
+
+      columns = columns.view({n_weight_grps, n_rows / n_weight_grps, tile_len});
+      for (int g = 0; g < n_weight_grps; g++) {
+        out_buf[b][g]
+            .flatten(1)
+            .narrow(1, pos, tile_len)
+            .addmm_(weight_c[g].flatten(1), columns[g]);
+      }
     }
-    columns =
-        columns.view({columns.size(0) * columns.size(1), columns.size(2)});
   }
 
   out_buf = out_buf.view(
@@ -1,4 +1,5 @@
 #include <ATen/ATen.h>
+#include <ATen/Parallel.h>
 #include <torch/library.h>
 
 namespace vision {
@@ -106,10 +107,459 @@ at::Tensor nms_kernel(
   return result;
 }
 
+// Sorts by score and then stable-sorts by category, so that the boxes of each
+// category form a contiguous run in decreasing order of scores. Returns the
+// resulting order of the boxes and their sorted categories.
+std::tuple<at::Tensor, at::Tensor> sort_by_category(
+    const at::Tensor& scores,
+    const at::Tensor& idxs) {
+  auto order_t = std::get<1>(scores.sort(0, /* descending=*/true));
+  auto cats_t = idxs.to(at::kLong).index_select(0, order_t);
+  auto perm_t = std::get<1>(
+      cats_t.sort(/* stable=*/true, /* dim=*/0, /* descending=*/false));
+  order_t = order_t.index_select(0, perm_t).contiguous();
+  cats_t = cats_t.index_select(0, perm_t).contiguous();
+  return std::make_tuple(order_t, cats_t);
+}
+
+void check_batched_nms_inputs(
+    const at::Tensor& dets,
+    const at::Tensor& scores,
+    const at::Tensor& idxs) {
+  TORCH_CHECK(
+      dets.dim() == 2, "boxes should be a 2d tensor, got ", dets.dim(), "D");
+  TORCH_CHECK(
+      dets.size(1) == 4,
+      "boxes should have 4 elements in dimension 1, got ",
+      dets.size(1));
+  TORCH_CHECK(
+      scores.dim() == 1,
+      "scores should be a 1d tensor, got ",
+      scores.dim(),
+      "D");
+  TORCH_CHECK(
+      idxs.dim() == 1, "idxs should be a 1d tensor, got ", idxs.dim(), "D");
+  TORCH_CHECK(
+      dets.size(0) == scores.size(0) && dets.size(0) == idxs.size(0),
+      "boxes, scores and idxs should have same number of elements in ",
+      "dimension 0, got ",
+      dets.size(0),
+      ", ",
+      scores.size(0),
+      " and ",
+      idxs.size(0));
+}
+
+template <typename scalar_t>
+at::Tensor batched_nms_kernel_impl(
+    const at::Tensor& dets,
+    const at::Tensor& scores,
+    const at::Tensor& idxs,
+    double iou_threshold) {
+  TORCH_CHECK(!dets.is_cuda(), "dets must be a CPU tensor");
+  TORCH_CHECK(!scores.is_cuda(), "scores must be a CPU tensor");
+  TORCH_CHECK(!idxs.is_cuda(), "idxs must be a CPU tensor");
+  TORCH_CHECK(
+      dets.scalar_type() == scores.scalar_type(),
+      "dets should have the same type as scores");
+
+  if (dets.numel() == 0)
+    return at::empty({0}, dets.options().dtype(at::kLong));
+
+  auto x1_t = dets.select(1, 0).contiguous();
+  auto y1_t = dets.select(1, 1).contiguous();
+  auto x2_t = dets.select(1, 2).contiguous();
+  auto y2_t = dets.select(1, 3).contiguous();
+
+  at::Tensor areas_t = (x2_t - x1_t) * (y2_t - y1_t);
+
+  at::Tensor order_t, cats_t;
+  std::tie(order_t, cats_t) = sort_by_category(scores, idxs);
+
+  auto ndets = dets.size(0);
+  at::Tensor suppressed_t = at::zeros({ndets}, dets.options().dtype(at::kByte));
+
+  auto suppressed = suppressed_t.data_ptr<uint8_t>();
+  auto order = order_t.data_ptr<int64_t>();
+  auto cats = cats_t.data_ptr<int64_t>();
+  auto x1 = x1_t.data_ptr<scalar_t>();
+  auto y1 = y1_t.data_ptr<scalar_t>();
+  auto x2 = x2_t.data_ptr<scalar_t>();
+  auto y2 = y2_t.data_ptr<scalar_t>();
+  auto areas = areas_t.data_ptr<scalar_t>();
+
+  int64_t start = 0;
+  while (start < ndets) {
+    int64_t end = start + 1;
+    while (end < ndets && cats[end] == cats[start])
+      end++;
+
+    for (int64_t _i = start; _i < end; _i++) {
+      auto i = order[_i];
+      if (suppressed[i] == 1)
+        continue;
+      auto ix1 = x1[i];
+      auto iy1 = y1[i];
+      auto ix2 = x2[i];
+      auto iy2 = y2[i];
+      auto iarea = areas[i];
+
+      for (int64_t _j = _i + 1; _j < end; _j++) {
+        auto j = order[_j];
+        if (suppressed[j] == 1)
+          continue;
+        auto xx1 = std::max(ix1, x1[j]);
+        auto yy1 = std::max(iy1, y1[j]);
+        auto xx2 = std::min(ix2, x2[j]);
+        auto yy2 = std::min(iy2, y2[j]);
+
+        auto w = std::max(static_cast<scalar_t>(0), xx2 - xx1);
+        auto h = std::max(static_cast<scalar_t>(0), yy2 - yy1);
+        auto inter = w * h;
+        auto ovr = inter / (iarea + areas[j] - inter);
+        if (ovr > iou_threshold)
+          suppressed[j] = 1;
+      }
+    }
+    start = end;
+  }
+
+  auto keep_t = (suppressed_t == 0).nonzero().squeeze(1);
+  auto keep_order_t =
+      std::get<1>(scores.index_select(0, keep_t).sort(0, /* descending=*/true));
+  return keep_t.index_select(0, keep_order_t);
+}
+
+at::Tensor batched_nms_kernel(
+    const at::Tensor& dets,
+    const at::Tensor& scores,
+    const at::Tensor& idxs,
+    double iou_threshold) {
+  check_batched_nms_inputs(dets, scores, idxs);
+
+  auto result = at::empty({0}, dets.options());
+
+  AT_DISPATCH_FLOATING_TYPES(dets.scalar_type(), "batched_nms_kernel", [&] {
+    result =
+        batched_nms_kernel_impl<scalar_t>(dets, scores, idxs, iou_threshold);
+  });
+  return result;
+}
+
+template <typename scalar_t>
+at::Tensor batched_nms_topk_kernel_impl(
+    const at::Tensor& dets,
+    const at::Tensor& scores,
+    const at::Tensor& idxs,
+    double iou_threshold,
+    int64_t topk) {
+  TORCH_CHECK(!dets.is_cuda(), "dets must be a CPU tensor");
+  TORCH_CHECK(!scores.is_cuda(), "scores must be a CPU tensor");
+  TORCH_CHECK(!idxs.is_cuda(), "idxs must be a CPU tensor");
+  TORCH_CHECK(
+      dets.scalar_type() == scores.scalar_type(),
+      "dets should have the same type as scores");
+
+  if (dets.numel() == 0 || topk == 0)
+    return at::empty({0}, dets.options().dtype(at::kLong));
+
+  auto x1_t = dets.select(1, 0).contiguous();
+  auto y1_t = dets.select(1, 1).contiguous();
+  auto x2_t = dets.select(1, 2).contiguous();
+  auto y2_t = dets.select(1, 3).contiguous();
+
+  at::Tensor areas_t = (x2_t - x1_t) * (y2_t - y1_t);
+
+  auto order_t = std::get<1>(scores.sort(0, /* descending=*/true));
+  auto cats_t = idxs.to(at::kLong).contiguous();
+
+  auto ndets = dets.size(0);
+  auto max_keep = std::min(ndets, topk);
+  at::Tensor keep_t = at::zeros({max_keep}, dets.options().dtype(at::kLong));
+
+  auto keep = keep_t.data_ptr<int64_t>();
+  auto order = order_t.data_ptr<int64_t>();
+  auto cats = cats_t.data_ptr<int64_t>();
+  auto x1 = x1_t.data_ptr<scalar_t>();
+  auto y1 = y1_t.data_ptr<scalar_t>();
+  auto x2 = x2_t.data_ptr<scalar_t>();
+  auto y2 = y2_t.data_ptr<scalar_t>();
+  auto areas = areas_t.data_ptr<scalar_t>();
+
+  // A box survives greedy NMS iff no higher scoring box of its category that
+  // was kept overlaps it, so each candidate is only compared with the kept
+  // boxes and the scan stops as soon as topk boxes have been kept.
+  int64_t num_to_keep = 0;
+
+  for (int64_t _i = 0; _i < ndets && num_to_keep < max_keep; _i++) {
+    auto i = order[_i];
+    auto ix1 = x1[i];
+    auto iy1 = y1[i];
+    auto ix2 = x2[i];
+    auto iy2 = y2[i];
+    auto iarea = areas[i];
+
+    bool suppressed = false;
+    for (int64_t _k = 0; _k < num_to_keep; _k++) {
+      auto k = keep[_k];
+      if (cats[k] != cats[i])
+        continue;
+      auto xx1 = std::max(ix1, x1[k]);
+      auto yy1 = std::max(iy1, y1[k]);
+      auto xx2 = std::min(ix2, x2[k]);
+      auto yy2 = std::min(iy2, y2[k]);
+
+      auto w = std::max(static_cast<scalar_t>(0), xx2 - xx1);
+      auto h = std::max(static_cast<scalar_t>(0), yy2 - yy1);
+      auto inter = w * h;
+      auto ovr = inter / (iarea + areas[k] - inter);
+      if (ovr > iou_threshold) {
+        suppressed = true;
+        break;
+      }
+    }
+    if (!suppressed)
+      keep[num_to_keep++] = i;
+  }
+  return keep_t.narrow(/*dim=*/0, /*start=*/0, /*length=*/num_to_keep);
+}
+
+at::Tensor batched_nms_topk_kernel(
+    const at::Tensor& dets,
+    const at::Tensor& scores,
+    const at::Tensor& idxs,
+    double iou_threshold,
+    int64_t topk) {
+  check_batched_nms_inputs(dets, scores, idxs);
+  TORCH_CHECK(topk >= 0, "topk should be non-negative, got ", topk);
+
+  auto result = at::empty({0}, dets.options());
+
+  AT_DISPATCH_FLOATING_TYPES(
+      dets.scalar_type(), "batched_nms_topk_kernel", [&] {
+        result = batched_nms_topk_kernel_impl<scalar_t>(
+            dets, scores, idxs, iou_threshold, topk);
+      });
+  return result;
+}
+
+// Values of the method argument of batched_soft_nms. They should be kept in
+// sync with torchvision.ops.batched_soft_nms.
+enum SoftNMSMethod { LINEAR = 0, GAUSSIAN = 1 };
+
+template <typename scalar_t>
+std::tuple<at::Tensor, at::Tensor> batched_soft_nms_kernel_impl(
+    const at::Tensor& dets,
+    const at::Tensor& scores,
+    const at::Tensor& idxs,
+    double iou_threshold,
+    double sigma,
+    double score_threshold,
+    int64_t method) {
+  TORCH_CHECK(!dets.is_cuda(), "dets must be a CPU tensor");
+  TORCH_CHECK(!scores.is_cuda(), "scores must be a CPU tensor");
+  TORCH_CHECK(!idxs.is_cuda(), "idxs must be a CPU tensor");
+  TORCH_CHECK(
+      dets.scalar_type() == scores.scalar_type(),
+      "dets should have the same type as scores");
+
+  if (dets.numel() == 0)
+    return std::make_tuple(
+        at::empty({0}, dets.options().dtype(at::kLong)),
+        at::empty({0}, scores.options()));
+
+  auto x1_t = dets.select(1, 0).contiguous();
+  auto y1_t = dets.select(1, 1).contiguous();
+  auto x2_t = dets.select(1, 2).contiguous();
+  auto y2_t = dets.select(1, 3).contiguous();
+
+  at::Tensor areas_t = (x2_t - x1_t) * (y2_t - y1_t);
+
+  at::Tensor order_t, cats_t;
+  std::tie(order_t, cats_t) = sort_by_category(scores, idxs);
+
+  auto ndets = dets.size(0);
+  at::Tensor new_scores_t = scores.clone().contiguous();
+  at::Tensor keep_t = at::zeros({ndets}, dets.options().dtype(at::kLong));
+
+  auto new_scores = new_scores_t.data_ptr<scalar_t>();
+  auto keep = keep_t.data_ptr<int64_t>();
+  auto order = order_t.data_ptr<int64_t>();
+  auto cats = cats_t.data_ptr<int64_t>();
+  auto x1 = x1_t.data_ptr<scalar_t>();
+  auto y1 = y1_t.data_ptr<scalar_t>();
+  auto x2 = x2_t.data_ptr<scalar_t>();
+  auto y2 = y2_t.data_ptr<scalar_t>();
+  auto areas = areas_t.data_ptr<scalar_t>();
+
+  int64_t num_to_keep = 0;
+  std::vector<int64_t> candidates;
+
+  int64_t start = 0;
+  while (start < ndets) {
+    int64_t end = start + 1;
+    while (end < ndets && cats[end] == cats[start])
+      end++;
+
+    candidates.clear();
+    for (int64_t _i = start; _i < end; _i++) {
+      if (new_scores[order[_i]] >= score_threshold)
+        candidates.push_back(order[_i]);
+    }
+
+    while (!candidates.empty()) {
+      // decayed scores are no longer sorted, so look for the best candidate
+      size_t best = 0;
+      for (size_t _j = 1; _j < candidates.size(); _j++) {
+        if (new_scores[candidates[_j]] > new_scores[candidates[best]])
+          best = _j;
+      }
+      auto i = candidates[best];
+      candidates.erase(candidates.begin() + best);
+      keep[num_to_keep++] = i;
+
+      auto ix1 = x1[i];
+      auto iy1 = y1[i];
+      auto ix2 = x2[i];
+      auto iy2 = y2[i];
+      auto iarea = areas[i];
+
+      size_t num_candidates = 0;
+      for (size_t _j = 0; _j < candidates.size(); _j++) {
+        auto j = candidates[_j];
+        auto xx1 = std::max(ix1, x1[j]);
+        auto yy1 = std::max(iy1, y1[j]);
+        auto xx2 = std::min(ix2, x2[j]);
+        auto yy2 = std::min(iy2, y2[j]);
+
+        auto w = std::max(static_cast<scalar_t>(0), xx2 - xx1);
+        auto h = std::max(static_cast<scalar_t>(0), yy2 - yy1);
+        auto inter = w * h;
+        auto ovr = inter / (iarea + areas[j] - inter);
+        if (method == GAUSSIAN)
+          new_scores[j] *= std::exp(-(ovr * ovr) / sigma);
+        else if (ovr > iou_threshold)
+          new_scores[j] *= 1 - ovr;
+        if (new_scores[j] >= score_threshold)
+          candidates[num_candidates++] = j;
+      }
+      candidates.resize(num_candidates);
+    }
+    start = end;
+  }
+
+  keep_t = keep_t.narrow(/*dim=*/0, /*start=*/0, /*length=*/num_to_keep);
+  auto kept_scores_t = new_scores_t.index_select(0, keep_t);
+  auto keep_order_t = std::get<1>(kept_scores_t.sort(0, /* descending=*/true));
+  return std::make_tuple(
+      keep_t.index_select(0, keep_order_t),
+      kept_scores_t.index_select(0, keep_order_t));
+}
+
+std::tuple<at::Tensor, at::Tensor> batched_soft_nms_kernel(
+    const at::Tensor& dets,
+    const at::Tensor& scores,
+    const at::Tensor& idxs,
+    double iou_threshold,
+    double sigma,
+    double score_threshold,
+    int64_t method) {
+  check_batched_nms_inputs(dets, scores, idxs);
+  TORCH_CHECK(
+      method == LINEAR || method == GAUSSIAN,
+      "method should be 0 (linear) or 1 (gaussian), got ",
+      method);
+  TORCH_CHECK(
+      method != GAUSSIAN || sigma > 0, "sigma should be positive, got ", sigma);
+
+  std::tuple<at::Tensor, at::Tensor> result;
+
+  AT_DISPATCH_FLOATING_TYPES(
+      dets.scalar_type(), "batched_soft_nms_kernel", [&] {
+        result = batched_soft_nms_kernel_impl<scalar_t>(
+            dets, scores, idxs, iou_threshold, sigma, score_threshold, method);
+      });
+  return result;
+}
+
+std::tuple<at::Tensor, at::Tensor> multi_image_batched_nms_kernel(
+    const at::Tensor& dets,
+    const at::Tensor& scores,
+    const at::Tensor& idxs,
+    double iou_threshold,
+    int64_t max_det) {
+  TORCH_CHECK(
+      dets.dim() == 3, "boxes should be a 3d tensor, got ", dets.dim(), "D");
+  TORCH_CHECK(
+      dets.size(2) == 4,
+      "boxes should have 4 elements in dimension 2, got ",
+      dets.size(2));
+  TORCH_CHECK(
+      scores.dim() == 2,
+      "scores should be a 2d tensor, got ",
+      scores.dim(),
+      "D");
+  TORCH_CHECK(
+      idxs.dim() == 2, "idxs should be a 2d tensor, got ", idxs.dim(), "D");
+  TORCH_CHECK(
+      dets.size(0) == scores.size(0) && dets.size(0) == idxs.size(0) &&
+          dets.size(1) == scores.size(1) && dets.size(1) == idxs.size(1),
+      "boxes, scores and idxs should have the same batch size and number ",
+      "of elements per image, got ",
+      dets.sizes(),
+      ", ",
+      scores.sizes(),
+      " and ",
+      idxs.sizes());
+  TORCH_CHECK(max_det >= 0, "max_det should be non-negative, got ", max_det);
+
+  auto batch_size = dets.size(0);
+  at::Tensor keep_t =
+      at::full({batch_size, max_det}, -1, dets.options().dtype(at::kLong));
+  at::Tensor num_keep_t =
+      at::zeros({batch_size}, dets.options().dtype(at::kLong));
+  auto num_keep = num_keep_t.data_ptr<int64_t>();
+
+  AT_DISPATCH_FLOATING_TYPES(
+      dets.scalar_type(), "multi_image_batched_nms_kernel", [&] {
+        // Images are independent and write to disjoint rows of the outputs
+        at::parallel_for(0, batch_size, 1, [&](int64_t begin, int64_t end) {
+          for (int64_t b = begin; b < end; b++) {
+            // Entries with a negative category are padding
+            auto valid_t = (idxs[b] >= 0).nonzero().squeeze(1);
+            auto image_keep_t = batched_nms_topk_kernel_impl<scalar_t>(
+                dets[b].index_select(0, valid_t),
+                scores[b].index_select(0, valid_t),
+                idxs[b].index_select(0, valid_t),
+                iou_threshold,
+                max_det);
+            auto num_to_keep = image_keep_t.size(0);
+            keep_t[b]
+                .narrow(/*dim=*/0, /*start=*/0, /*length=*/num_to_keep)
+                .copy_(valid_t.index_select(0, image_keep_t));
+            num_keep[b] = num_to_keep;
+          }
+        });
+      });
+  return std::make_tuple(keep_t, num_keep_t);
+}
+
 } // namespace
 
 TORCH_LIBRARY_IMPL(torchvision, CPU, m) {
   m.impl(TORCH_SELECTIVE_NAME("torchvision::nms"), TORCH_FN(nms_kernel));
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::batched_nms"),
+      TORCH_FN(batched_nms_kernel));
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::batched_nms_topk"),
+      TORCH_FN(batched_nms_topk_kernel));
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::batched_soft_nms"),
+      TORCH_FN(batched_soft_nms_kernel));
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::multi_image_batched_nms"),
+      TORCH_FN(multi_image_batched_nms_kernel));
 }
 
 } // namespace ops
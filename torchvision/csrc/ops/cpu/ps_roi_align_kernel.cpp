@@ -1,4 +1,5 @@
 #include <ATen/ATen.h>
+#include <ATen/OpMathType.h>
 #include <torch/library.h>
 
 namespace vision {
@@ -6,13 +7,15 @@ namespace ops {
 
 namespace {
 
-template <typename T>
-T bilinear_interpolate(
+// Interpolates input, of type T, in acc_t, which is float for the reduced
+// precision types
+template <typename T, typename acc_t>
+acc_t bilinear_interpolate(
     const T* input,
     int height,
     int width,
-    T y,
-    T x,
+    acc_t y,
+    acc_t x,
     int index /* index for debug only*/) {
   // deal with cases that inverse elements are out of feature map boundary
   if (y < -1.0 || y > height || x < -1.0 || x > width) {
@@ -32,64 +35,68 @@ T bilinear_interpolate(
 
   if (y_low >= height - 1) {
     y_high = y_low = height - 1;
-    y = (T)y_low;
+    y = (acc_t)y_low;
   } else {
     y_high = y_low + 1;
   }
 
   if (x_low >= width - 1) {
     x_high = x_low = width - 1;
-    x = (T)x_low;
+    x = (acc_t)x_low;
   } else {
     x_high = x_low + 1;
   }
 
-  T ly = y - y_low;
-  T lx = x - x_low;
-  T hy = 1. - ly, hx = 1. - lx;
+  acc_t ly = y - y_low;
+  acc_t lx = x - x_low;
+  acc_t hy = 1. - ly, hx = 1. - lx;
 
   // do bilinear interpolation
-  T v1 = input[y_low * width + x_low];
-  T v2 = input[y_low * width + x_high];
-  T v3 = input[y_high * width + x_low];
-  T v4 = input[y_high * width + x_high];
-  T w1 = hy * hx, w2 = hy * lx, w3 = ly * hx, w4 = ly * lx;
+  acc_t v1 = input[y_low * width + x_low];
+  acc_t v2 = input[y_low * width + x_high];
+  acc_t v3 = input[y_high * width + x_low];
+  acc_t v4 = input[y_high * width + x_high];
+  acc_t w1 = hy * hx, w2 = hy * lx, w3 = ly * hx, w4 = ly * lx;
 
-  T val = (w1 * v1 + w2 * v2 + w3 * v3 + w4 * v4);
+  acc_t val = (w1 * v1 + w2 * v2 + w3 * v3 + w4 * v4);
 
   return val;
 }
 
-template <typename T>
+template <typename T, typename acc_t>
 void ps_roi_align_forward_kernel_impl(
     int num_rois,
     const T* input,
-    const T spatial_scale,
+    const acc_t spatial_scale,
     int channels,
     int height,
     int width,
     int pooled_height,
     int pooled_width,
     int sampling_ratio,
-    const T* rois,
+    const acc_t* rois,
     int channels_out,
     T* output,
     int* channel_mapping) {
   for (int n = 0; n < num_rois; n++) {
     // [start, end) interval for spatial sampling
-    const T* offset_rois = rois + n * 5;
+    const acc_t* offset_rois = rois + n * 5;
     int roi_batch_ind = offset_rois[0];
 
     // Do not using rounding; this implementation detail is critical
-    T roi_start_w = offset_rois[1] * spatial_scale - static_cast<T>(0.5);
-    T roi_start_h = offset_rois[2] * spatial_scale - static_cast<T>(0.5);
-    T roi_end_w = offset_rois[3] * spatial_scale - static_cast<T>(0.5);
-    T roi_end_h = offset_rois[4] * spatial_scale - static_cast<T>(0.5);
-
-    T roi_width = roi_end_w - roi_start_w;
-    T roi_height = roi_end_h - roi_start_h;
-    T bin_size_h = static_cast<T>(roi_height) / static_cast<T>(pooled_height);
-    T bin_size_w = static_cast<T>(roi_width) / static_cast<T>(pooled_width);
+    acc_t roi_start_w =
+        offset_rois[1] * spatial_scale - static_cast<acc_t>(0.5);
+    acc_t roi_start_h =
+        offset_rois[2] * spatial_scale - static_cast<acc_t>(0.5);
+    acc_t roi_end_w = offset_rois[3] * spatial_scale - static_cast<acc_t>(0.5);
+    acc_t roi_end_h = offset_rois[4] * spatial_scale - static_cast<acc_t>(0.5);
+
+    acc_t roi_width = roi_end_w - roi_start_w;
+    acc_t roi_height = roi_end_h - roi_start_h;
+    acc_t bin_size_h =
+        static_cast<acc_t>(roi_height) / static_cast<acc_t>(pooled_height);
+    acc_t bin_size_w =
+        static_cast<acc_t>(roi_width) / static_cast<acc_t>(pooled_width);
 
     int c_in = 0;
     for (int c_out = 0; c_out < channels_out; ++c_out) {
@@ -100,8 +107,8 @@ void ps_roi_align_forward_kernel_impl(
               pw;
 
           // Do not using floor/ceil; this implementation detail is critical
-          T hstart = static_cast<T>(ph) * bin_size_h + roi_start_h;
-          T wstart = static_cast<T>(pw) * bin_size_w + roi_start_w;
+          acc_t hstart = static_cast<acc_t>(ph) * bin_size_h + roi_start_h;
+          acc_t wstart = static_cast<acc_t>(pw) * bin_size_w + roi_start_w;
 
           // We use roi_bin_grid to sample the grid and mimic integral
           int roi_bin_grid_h = (sampling_ratio > 0)
@@ -110,28 +117,28 @@ void ps_roi_align_forward_kernel_impl(
           int roi_bin_grid_w = (sampling_ratio > 0)
               ? sampling_ratio
               : ceil(roi_width / pooled_width);
-          const T count = roi_bin_grid_h * roi_bin_grid_w;
+          const acc_t count = roi_bin_grid_h * roi_bin_grid_w;
 
           const T* offset_input =
               input + (roi_batch_ind * channels + c_in) * height * width;
 
-          T out_sum = 0;
+          acc_t out_sum = 0;
           for (int iy = 0; iy < roi_bin_grid_h; iy++) {
-            const T y = hstart +
-                static_cast<T>(iy + .5f) * bin_size_h /
-                    static_cast<T>(roi_bin_grid_h);
+            const acc_t y = hstart +
+                static_cast<acc_t>(iy + .5f) * bin_size_h /
+                    static_cast<acc_t>(roi_bin_grid_h);
             for (int ix = 0; ix < roi_bin_grid_w; ix++) {
-              const T x = wstart +
-                  static_cast<T>(ix + .5f) * bin_size_w /
-                      static_cast<T>(roi_bin_grid_w);
-              T val = bilinear_interpolate(
+              const acc_t x = wstart +
+                  static_cast<acc_t>(ix + .5f) * bin_size_w /
+                      static_cast<acc_t>(roi_bin_grid_w);
+              acc_t val = bilinear_interpolate(
                   offset_input, height, width, y, x, index);
               out_sum += val;
             }
           }
 
           out_sum /= count;
-          output[index] = out_sum;
+          output[index] = static_cast<T>(out_sum);
           channel_mapping[index] = c_in;
           c_in++;
         }
@@ -204,13 +211,14 @@ inline void add(T* address, const T& val) {
   *address += val;
 }
 
-template <typename T>
+// grad_input is accumulated in acc_t, see ps_roi_align_backward_kernel
+template <typename T, typename acc_t>
 void ps_roi_align_backward_kernel_impl(
     int nthreads,
     const T* grad_output,
     const int* channel_mapping,
     int num_rois,
-    const T spatial_scale,
+    const acc_t spatial_scale,
     int channels,
     int height,
     int width,
@@ -218,37 +226,39 @@ void ps_roi_align_backward_kernel_impl(
     int pooled_width,
     int sampling_ratio,
     int channels_out,
-    T* grad_input,
-    const T* rois) {
+    acc_t* grad_input,
+    const acc_t* rois) {
   for (int index = 0; index < nthreads; index++) {
     int pw = index % pooled_width;
     int ph = (index / pooled_width) % pooled_height;
     int n = index / pooled_width / pooled_height / channels_out;
 
-    const T* offset_rois = rois + n * 5;
+    const acc_t* offset_rois = rois + n * 5;
     int roi_batch_ind = offset_rois[0];
 
     // Do not using rounding; this implementation detail is critical
-    T roi_start_w = offset_rois[1] * spatial_scale - static_cast<T>(0.5);
-    T roi_start_h = offset_rois[2] * spatial_scale - static_cast<T>(0.5);
-    T roi_end_w = offset_rois[3] * spatial_scale - static_cast<T>(0.5);
-    T roi_end_h = offset_rois[4] * spatial_scale - static_cast<T>(0.5);
+    acc_t roi_start_w =
+        offset_rois[1] * spatial_scale - static_cast<acc_t>(0.5);
+    acc_t roi_start_h =
+        offset_rois[2] * spatial_scale - static_cast<acc_t>(0.5);
+    acc_t roi_end_w = offset_rois[3] * spatial_scale - static_cast<acc_t>(0.5);
+    acc_t roi_end_h = offset_rois[4] * spatial_scale - static_cast<acc_t>(0.5);
 
     // Force too small ROIs to be 1x1
-    T roi_width = roi_end_w - roi_start_w;
-    T roi_height = roi_end_h - roi_start_h;
-    T bin_size_h = roi_height / static_cast<T>(pooled_height);
-    T bin_size_w = roi_width / static_cast<T>(pooled_width);
+    acc_t roi_width = roi_end_w - roi_start_w;
+    acc_t roi_height = roi_end_h - roi_start_h;
+    acc_t bin_size_h = roi_height / static_cast<acc_t>(pooled_height);
+    acc_t bin_size_w = roi_width / static_cast<acc_t>(pooled_width);
 
     int c_in = channel_mapping[index];
-    T* grad_input_offset =
+    acc_t* grad_input_offset =
         grad_input + (roi_batch_ind * channels + c_in) * height * width;
 
     // Do not using floor/ceil; this implementation detail is critical
-    T hstart = static_cast<T>(ph) * bin_size_h + roi_start_h;
-    T wstart = static_cast<T>(pw) * bin_size_w + roi_start_w;
+    acc_t hstart = static_cast<acc_t>(ph) * bin_size_h + roi_start_h;
+    acc_t wstart = static_cast<acc_t>(pw) * bin_size_w + roi_start_w;
 
-    const T grad_output_this_bin = grad_output[index];
+    const acc_t grad_output_this_bin = grad_output[index];
 
     // We use roi_bin_grid to sample the grid and mimic integral
     int roi_bin_grid_h = (sampling_ratio > 0)
@@ -256,18 +266,18 @@ void ps_roi_align_backward_kernel_impl(
         : ceil(roi_height / pooled_height); // e.g., = 2
     int roi_bin_grid_w =
         (sampling_ratio > 0) ? sampling_ratio : ceil(roi_width / pooled_width);
-    const T count = roi_bin_grid_h * roi_bin_grid_w;
+    const acc_t count = roi_bin_grid_h * roi_bin_grid_w;
 
     for (int iy = 0; iy < roi_bin_grid_h; iy++) {
-      const T y = hstart +
-          static_cast<T>(iy + .5f) * bin_size_h /
-              static_cast<T>(roi_bin_grid_h);
+      const acc_t y = hstart +
+          static_cast<acc_t>(iy + .5f) * bin_size_h /
+              static_cast<acc_t>(roi_bin_grid_h);
       for (int ix = 0; ix < roi_bin_grid_w; ix++) {
-        const T x = wstart +
-            static_cast<T>(ix + .5f) * bin_size_w /
-                static_cast<T>(roi_bin_grid_w);
+        const acc_t x = wstart +
+            static_cast<acc_t>(ix + .5f) * bin_size_w /
+                static_cast<acc_t>(roi_bin_grid_w);
 
-        T w1, w2, w3, w4;
+        acc_t w1, w2, w3, w4;
         int x_low, x_high, y_low, y_high;
 
         bilinear_interpolate_gradient(
@@ -285,10 +295,10 @@ void ps_roi_align_backward_kernel_impl(
             y_high,
             index);
 
-        T g1 = grad_output_this_bin * w1 / count;
-        T g2 = grad_output_this_bin * w2 / count;
-        T g3 = grad_output_this_bin * w3 / count;
-        T g4 = grad_output_this_bin * w4 / count;
+        acc_t g1 = grad_output_this_bin * w1 / count;
+        acc_t g2 = grad_output_this_bin * w2 / count;
+        acc_t g3 = grad_output_this_bin * w3 / count;
+        acc_t g4 = grad_output_this_bin * w4 / count;
 
         if (x_low >= 0 && x_high >= 0 && y_low >= 0 && y_high >= 0) {
           add(grad_input_offset + y_low * width + x_low, g1);
@@ -301,6 +311,25 @@ void ps_roi_align_backward_kernel_impl(
   }
 }
 
+// The coordinates of the rois are read in the accumulation type of the
+// features, as in roi_align_forward_kernel
+void check_rois_type(
+    at::CheckedFrom c,
+    const at::Tensor& input,
+    const at::Tensor& rois) {
+  auto input_type = input.scalar_type();
+  TORCH_CHECK(
+      rois.scalar_type() == input_type ||
+          rois.scalar_type() == at::toOpMathType(input_type),
+      c,
+      ": rois should have the type of the input or ",
+      at::toOpMathType(input_type),
+      ", got ",
+      rois.scalar_type(),
+      " and ",
+      input_type);
+}
+
 std::tuple<at::Tensor, at::Tensor> ps_roi_align_forward_kernel(
     const at::Tensor& input,
     const at::Tensor& rois,
@@ -314,10 +343,7 @@ std::tuple<at::Tensor, at::Tensor> ps_roi_align_forward_kernel(
   TORCH_CHECK(
       rois.size(1) == 5, "Tensor rois should have shape as Tensor[K, 5]");
 
-  at::TensorArg input_t{input, "input", 1}, rois_t{rois, "rois", 2};
-
-  at::CheckedFrom c = "ps_roi_align_forward_kernel";
-  at::checkAllSameType(c, {input_t, rois_t});
+  check_rois_type("ps_roi_align_forward_kernel", input, rois);
 
   int num_rois = rois.size(0);
   int channels = input.size(1);
@@ -338,10 +364,16 @@ std::tuple<at::Tensor, at::Tensor> ps_roi_align_forward_kernel(
     return std::make_tuple(output, channel_mapping);
   }
 
-  auto input_ = input.contiguous(), rois_ = rois.contiguous();
-  AT_DISPATCH_FLOATING_TYPES_AND_HALF(
-      input.scalar_type(), "ps_roi_align_forward_kernel", [&] {
-        ps_roi_align_forward_kernel_impl<scalar_t>(
+  auto input_ = input.contiguous();
+  auto rois_ = rois.to(at::toOpMathType(input.scalar_type())).contiguous();
+  AT_DISPATCH_FLOATING_TYPES_AND2(
+      at::ScalarType::Half,
+      at::ScalarType::BFloat16,
+      input.scalar_type(),
+      "ps_roi_align_forward_kernel",
+      [&] {
+        using acc_t = at::opmath_type<scalar_t>;
+        ps_roi_align_forward_kernel_impl<scalar_t, acc_t>(
             num_rois,
             input_.data_ptr<scalar_t>(),
             spatial_scale,
@@ -351,7 +383,7 @@ std::tuple<at::Tensor, at::Tensor> ps_roi_align_forward_kernel(
             pooled_height,
             pooled_width,
             sampling_ratio,
-            rois_.data_ptr<scalar_t>(),
+            rois_.data_ptr<acc_t>(),
             channels_out,
             output.data_ptr<scalar_t>(),
             channel_mapping.data_ptr<int>());
@@ -378,27 +410,31 @@ at::Tensor ps_roi_align_backward_kernel(
       channel_mapping.device().is_cpu(),
       "channel_mapping must be a CPU tensor");
 
-  at::TensorArg grad_t{grad, "grad", 1}, rois_t{rois, "rois", 2},
-      channel_mapping_t{channel_mapping, "channel_mapping", 3};
-
-  at::CheckedFrom c = "ps_roi_align_backward_kernel";
-  at::checkAllSameType(c, {grad_t, rois_t});
+  check_rois_type("ps_roi_align_backward_kernel", grad, rois);
 
+  // grad_input is accumulated in the accumulation type of grad, as many
+  // sampling points add to the same pixels
+  auto acc_type = at::toOpMathType(grad.scalar_type());
   auto num_rois = rois.size(0);
-  auto grad_input =
-      at::zeros({batch_size, channels, height, width}, grad.options());
+  auto grad_input = at::zeros(
+      {batch_size, channels, height, width}, grad.options().dtype(acc_type));
 
   // handle possibly empty gradients
   if (grad.numel() == 0) {
-    return grad_input;
+    return grad_input.to(grad.scalar_type());
   }
 
   int channels_out = channels / (pooled_height * pooled_width);
 
-  auto grad_ = grad.contiguous(), rois_ = rois.contiguous();
-  AT_DISPATCH_FLOATING_TYPES_AND_HALF(
-      grad.scalar_type(), "ps_roi_align_backward_kernel", [&] {
-        ps_roi_align_backward_kernel_impl<scalar_t>(
+  auto grad_ = grad.contiguous(), rois_ = rois.to(acc_type).contiguous();
+  AT_DISPATCH_FLOATING_TYPES_AND2(
+      at::ScalarType::Half,
+      at::ScalarType::BFloat16,
+      grad.scalar_type(),
+      "ps_roi_align_backward_kernel",
+      [&] {
+        using acc_t = at::opmath_type<scalar_t>;
+        ps_roi_align_backward_kernel_impl<scalar_t, acc_t>(
             grad.numel(),
             grad_.data_ptr<scalar_t>(),
             channel_mapping.data_ptr<int>(),
@@ -411,10 +447,10 @@ at::Tensor ps_roi_align_backward_kernel(
             pooled_width,
             sampling_ratio,
             channels_out,
-            grad_input.data_ptr<scalar_t>(),
-            rois_.data_ptr<scalar_t>());
+            grad_input.data_ptr<acc_t>(),
+            rois_.data_ptr<acc_t>());
       });
-  return grad_input;
+  return grad_input.to(grad.scalar_type());
 }
 
 } // namespace
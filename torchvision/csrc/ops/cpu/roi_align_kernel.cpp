@@ -1,4 +1,6 @@
 #include <ATen/ATen.h>
+#include <ATen/OpMathType.h>
+#include <ATen/Parallel.h>
 #include <torch/library.h>
 
 #include "./roi_align_common.h"
@@ -8,174 +10,274 @@ namespace ops {
 
 namespace {
 
+// Sampling points of a RoI, shared by all the channels
 template <typename T>
-void roi_align_forward_kernel_impl(
-    int n_rois,
-    const T* input,
-    const T& spatial_scale,
-    int channels,
+struct RoIBins {
+  int batch_index;
+  // size of the feature map
+  int height;
+  int width;
+  int grid_h;
+  int grid_w;
+  T count;
+  std::vector<detail::PreCalc<T>> pre_calc;
+};
+
+template <typename T>
+void compute_roi_bins(
+    const T* offset_rois,
+    T spatial_scale,
     int height,
     int width,
     int pooled_height,
     int pooled_width,
     int sampling_ratio,
     bool aligned,
-    const T* rois,
-    T* output) {
-  // (n, c, ph, pw) is an element in the pooled output
-  // can be parallelized using omp
-  // #pragma omp parallel for num_threads(32)
-  for (int n = 0; n < n_rois; n++) {
-    int index_n = n * channels * pooled_width * pooled_height;
-
-    const T* offset_rois = rois + n * 5;
-    int roi_batch_ind = offset_rois[0];
-
-    // Do not using rounding; this implementation detail is critical
-    T offset = aligned ? (T)0.5 : (T)0.0;
-    T roi_start_w = offset_rois[1] * spatial_scale - offset;
-    T roi_start_h = offset_rois[2] * spatial_scale - offset;
-    T roi_end_w = offset_rois[3] * spatial_scale - offset;
-    T roi_end_h = offset_rois[4] * spatial_scale - offset;
-
-    T roi_width = roi_end_w - roi_start_w;
-    T roi_height = roi_end_h - roi_start_h;
-    if (!aligned) {
-      // Force malformed ROIs to be 1x1
-      roi_width = std::max(roi_width, (T)1.);
-      roi_height = std::max(roi_height, (T)1.);
-    }
-
-    T bin_size_h = static_cast<T>(roi_height) / static_cast<T>(pooled_height);
-    T bin_size_w = static_cast<T>(roi_width) / static_cast<T>(pooled_width);
-
-    // We use roi_bin_grid to sample the grid and mimic integral
-    int roi_bin_grid_h = (sampling_ratio > 0)
-        ? sampling_ratio
-        : ceil(roi_height / pooled_height); // e.g., = 2
-    int roi_bin_grid_w =
-        (sampling_ratio > 0) ? sampling_ratio : ceil(roi_width / pooled_width);
-
-    // We do average (integral) pooling inside a bin
-    // When the grid is empty, output zeros.
-    const T count = std::max(roi_bin_grid_h * roi_bin_grid_w, 1); // e.g. = 4
-
-    // we want to precalculate indices and weights shared by all chanels,
-    // this is the key point of optimization
-    std::vector<detail::PreCalc<T>> pre_calc(
-        roi_bin_grid_h * roi_bin_grid_w * pooled_width * pooled_height);
-    detail::pre_calc_for_bilinear_interpolate(
-        height,
-        width,
-        pooled_height,
-        pooled_width,
-        roi_start_h,
-        roi_start_w,
-        bin_size_h,
-        bin_size_w,
-        roi_bin_grid_h,
-        roi_bin_grid_w,
-        pre_calc);
-
-    for (int c = 0; c < channels; c++) {
-      int index_n_c = index_n + c * pooled_width * pooled_height;
-      const T* offset_input =
-          input + (roi_batch_ind * channels + c) * height * width;
-      int pre_calc_index = 0;
-
-      for (int ph = 0; ph < pooled_height; ph++) {
-        for (int pw = 0; pw < pooled_width; pw++) {
-          int index = index_n_c + ph * pooled_width + pw;
-
-          T output_val = 0.;
-          for (int iy = 0; iy < roi_bin_grid_h; iy++) {
-            for (int ix = 0; ix < roi_bin_grid_w; ix++) {
-              detail::PreCalc<T> pc = pre_calc[pre_calc_index];
-              output_val += pc.w1 * offset_input[pc.pos1] +
-                  pc.w2 * offset_input[pc.pos2] +
-                  pc.w3 * offset_input[pc.pos3] + pc.w4 * offset_input[pc.pos4];
-
-              pre_calc_index += 1;
-            }
-          }
-          output_val /= count; // Average pooling
+    RoIBins<T>& bins) {
+  bins.batch_index = offset_rois[0];
+  bins.height = height;
+  bins.width = width;
+
+  // Do not using rounding; this implementation detail is critical
+  T offset = aligned ? (T)0.5 : (T)0.0;
+  T roi_start_w = offset_rois[1] * spatial_scale - offset;
+  T roi_start_h = offset_rois[2] * spatial_scale - offset;
+  T roi_end_w = offset_rois[3] * spatial_scale - offset;
+  T roi_end_h = offset_rois[4] * spatial_scale - offset;
+
+  T roi_width = roi_end_w - roi_start_w;
+  T roi_height = roi_end_h - roi_start_h;
+  if (!aligned) {
+    // Force malformed ROIs to be 1x1
+    roi_width = std::max(roi_width, (T)1.);
+    roi_height = std::max(roi_height, (T)1.);
+  }
 
-          output[index] = output_val;
-        } // for pw
-      } // for ph
-    } // for c
-  } // for n
+  T bin_size_h = static_cast<T>(roi_height) / static_cast<T>(pooled_height);
+  T bin_size_w = static_cast<T>(roi_width) / static_cast<T>(pooled_width);
+
+  // We use roi_bin_grid to sample the grid and mimic integral
+  bins.grid_h = (sampling_ratio > 0)
+      ? sampling_ratio
+      : ceil(roi_height / pooled_height); // e.g., = 2
+  bins.grid_w =
+      (sampling_ratio > 0) ? sampling_ratio : ceil(roi_width / pooled_width);
+
+  // We do average (integral) pooling inside a bin
+  // When the grid is empty, output zeros.
+  bins.count = std::max(bins.grid_h * bins.grid_w, 1); // e.g. = 4
+
+  // we want to precalculate indices and weights shared by all chanels,
+  // this is the key point of optimization
+  bins.pre_calc.resize(
+      bins.grid_h * bins.grid_w * pooled_width * pooled_height);
+  detail::pre_calc_for_bilinear_interpolate(
+      height,
+      width,
+      pooled_height,
+      pooled_width,
+      roi_start_h,
+      roi_start_w,
+      bin_size_h,
+      bin_size_w,
+      bins.grid_h,
+      bins.grid_w,
+      bins.pre_calc);
 }
 
-template <typename T>
-void bilinear_interpolate_gradient(
-    int height,
-    int width,
-    T y,
-    T x,
-    T& w1,
-    T& w2,
-    T& w3,
-    T& w4,
-    int& x_low,
-    int& x_high,
-    int& y_low,
-    int& y_high,
-    int index /* index for debug only*/) {
-  // deal with cases that inverse elements are out of feature map boundary
-  if (y < -1.0 || y > height || x < -1.0 || x > width) {
-    // empty
-    w1 = w2 = w3 = w4 = 0.;
-    x_low = x_high = y_low = y_high = -1;
+// Pools one RoI from offset_input, the feature map of its image, into
+// offset_output. The sampling points are accumulated in acc_t, which is float
+// for the reduced precision types.
+template <typename T, typename acc_t>
+void roi_align_forward_roi(
+    const T* offset_input,
+    int channels,
+    int pooled_height,
+    int pooled_width,
+    bool channels_last,
+    const RoIBins<acc_t>& bins,
+    T* offset_output) {
+  int64_t n_grid = bins.grid_h * bins.grid_w;
+  int64_t n_bins = pooled_height * pooled_width;
+
+  if (channels_last) {
+    // (ph, pw, c) is an element in the pooled output. Every sampling point
+    // reads contiguous vectors of channels.
+    std::vector<acc_t> output_vals(channels);
+    for (int64_t bin = 0; bin < n_bins; bin++) {
+      std::fill(output_vals.begin(), output_vals.end(), (acc_t)0.);
+      for (int64_t i = bin * n_grid; i < (bin + 1) * n_grid; i++) {
+        const detail::PreCalc<acc_t>& pc = bins.pre_calc[i];
+        const T* input1 = offset_input + pc.pos1 * channels;
+        const T* input2 = offset_input + pc.pos2 * channels;
+        const T* input3 = offset_input + pc.pos3 * channels;
+        const T* input4 = offset_input + pc.pos4 * channels;
+        for (int c = 0; c < channels; c++) {
+          output_vals[c] += pc.w1 * static_cast<acc_t>(input1[c]) +
+              pc.w2 * static_cast<acc_t>(input2[c]) +
+              pc.w3 * static_cast<acc_t>(input3[c]) +
+              pc.w4 * static_cast<acc_t>(input4[c]);
+        }
+      }
+      T* offset_output_bin = offset_output + bin * channels;
+      for (int c = 0; c < channels; c++) {
+        // Average pooling
+        offset_output_bin[c] = static_cast<T>(output_vals[c] / bins.count);
+      }
+    }
     return;
   }
 
-  if (y <= 0)
-    y = 0;
-  if (x <= 0)
-    x = 0;
-
-  y_low = (int)y;
-  x_low = (int)x;
+  // (c, ph, pw) is an element in the pooled output
+  int64_t plane_size = bins.height * bins.width;
+  for (int c = 0; c < channels; c++) {
+    T* output_vals = offset_output + c * n_bins;
+    const T* offset_input_c = offset_input + c * plane_size;
+    int pre_calc_index = 0;
+
+    for (int64_t bin = 0; bin < n_bins; bin++) {
+      acc_t output_val = 0.;
+      for (int64_t i = 0; i < n_grid; i++) {
+        const detail::PreCalc<acc_t>& pc = bins.pre_calc[pre_calc_index];
+        output_val += pc.w1 * static_cast<acc_t>(offset_input_c[pc.pos1]) +
+            pc.w2 * static_cast<acc_t>(offset_input_c[pc.pos2]) +
+            pc.w3 * static_cast<acc_t>(offset_input_c[pc.pos3]) +
+            pc.w4 * static_cast<acc_t>(offset_input_c[pc.pos4]);
+
+        pre_calc_index += 1;
+      }
+      output_val /= bins.count; // Average pooling
+
+      output_vals[bin] = static_cast<T>(output_val);
+    } // for bin
+  } // for c
+}
 
-  if (y_low >= height - 1) {
-    y_high = y_low = height - 1;
-    y = (T)y_low;
-  } else {
-    y_high = y_low + 1;
+// Accumulates the gradient of the channels [c_begin, c_end) of one RoI into
+// offset_grad_input, the gradient of the feature map of its image. The
+// gradient is accumulated in acc_t, see roi_align_backward_kernel.
+template <typename T, typename acc_t>
+void roi_align_backward_roi(
+    const T* offset_grad_output,
+    int c_stride,
+    int h_stride,
+    int w_stride,
+    int64_t c_begin,
+    int64_t c_end,
+    int channels,
+    int pooled_height,
+    int pooled_width,
+    bool channels_last,
+    const RoIBins<acc_t>& bins,
+    acc_t* offset_grad_input) {
+  int64_t n_grid = bins.grid_h * bins.grid_w;
+  // bins.count is clamped to 1 for the forward pass, but there are no
+  // sampling points to propagate the gradient to when the grid is empty
+  const acc_t count = bins.grid_h * bins.grid_w;
+
+  if (channels_last) {
+    for (int ph = 0; ph < pooled_height; ph++) {
+      for (int pw = 0; pw < pooled_width; pw++) {
+        const T* grad_output_this_bin =
+            offset_grad_output + ph * h_stride + pw * w_stride;
+        int64_t bin = ph * pooled_width + pw;
+        for (int64_t i = bin * n_grid; i < (bin + 1) * n_grid; i++) {
+          const detail::PreCalc<acc_t>& pc = bins.pre_calc[i];
+          // sampling points outside of the feature map have no pixels
+          if (pc.w1 == 0 && pc.w2 == 0 && pc.w3 == 0 && pc.w4 == 0)
+            continue;
+          acc_t* grad_input1 = offset_grad_input + pc.pos1 * channels;
+          acc_t* grad_input2 = offset_grad_input + pc.pos2 * channels;
+          acc_t* grad_input3 = offset_grad_input + pc.pos3 * channels;
+          acc_t* grad_input4 = offset_grad_input + pc.pos4 * channels;
+          for (int64_t c = c_begin; c < c_end; c++) {
+            acc_t grad = grad_output_this_bin[c * c_stride];
+            grad_input1[c] += grad * pc.w1 / count;
+            grad_input2[c] += grad * pc.w2 / count;
+            grad_input3[c] += grad * pc.w3 / count;
+            grad_input4[c] += grad * pc.w4 / count;
+          }
+        }
+      }
+    }
+    return;
   }
 
-  if (x_low >= width - 1) {
-    x_high = x_low = width - 1;
-    x = (T)x_low;
-  } else {
-    x_high = x_low + 1;
+  int64_t plane_size = bins.height * bins.width;
+  for (int64_t c = c_begin; c < c_end; c++) {
+    acc_t* offset_grad_input_c = offset_grad_input + c * plane_size;
+    const T* offset_grad_output_c = offset_grad_output + c * c_stride;
+    int pre_calc_index = 0;
+    for (int ph = 0; ph < pooled_height; ph++) {
+      for (int pw = 0; pw < pooled_width; pw++) {
+        const acc_t grad_output_this_bin =
+            offset_grad_output_c[ph * h_stride + pw * w_stride];
+        for (int64_t i = 0; i < n_grid; i++) {
+          const detail::PreCalc<acc_t>& pc = bins.pre_calc[pre_calc_index];
+          pre_calc_index += 1;
+          // sampling points outside of the feature map have no pixels
+          if (pc.w1 == 0 && pc.w2 == 0 && pc.w3 == 0 && pc.w4 == 0)
+            continue;
+          offset_grad_input_c[pc.pos1] += grad_output_this_bin * pc.w1 / count;
+          offset_grad_input_c[pc.pos2] += grad_output_this_bin * pc.w2 / count;
+          offset_grad_input_c[pc.pos3] += grad_output_this_bin * pc.w3 / count;
+          offset_grad_input_c[pc.pos4] += grad_output_this_bin * pc.w4 / count;
+        }
+      }
+    }
   }
-
-  T ly = y - y_low;
-  T lx = x - x_low;
-  T hy = 1. - ly, hx = 1. - lx;
-
-  // reference in forward
-  // T v1 = input[y_low * width + x_low];
-  // T v2 = input[y_low * width + x_high];
-  // T v3 = input[y_high * width + x_low];
-  // T v4 = input[y_high * width + x_high];
-  // T val = (w1 * v1 + w2 * v2 + w3 * v3 + w4 * v4);
-
-  w1 = hy * hx, w2 = hy * lx, w3 = ly * hx, w4 = ly * lx;
 }
 
-template <class T>
-inline void add(T* address, const T& val) {
-  *address += val;
+template <typename T, typename acc_t>
+void roi_align_forward_kernel_impl(
+    int n_rois,
+    const T* input,
+    acc_t spatial_scale,
+    int channels,
+    int height,
+    int width,
+    int pooled_height,
+    int pooled_width,
+    int sampling_ratio,
+    bool aligned,
+    bool channels_last,
+    const acc_t* rois,
+    T* output) {
+  // RoIs write to distinct parts of the output, so they are processed in
+  // parallel
+  int64_t roi_numel = channels * pooled_height * pooled_width;
+  int64_t grain_size =
+      std::max<int64_t>(1, at::internal::GRAIN_SIZE / roi_numel);
+  at::parallel_for(0, n_rois, grain_size, [&](int64_t begin, int64_t end) {
+    RoIBins<acc_t> bins;
+    for (int64_t n = begin; n < end; n++) {
+      compute_roi_bins(
+          rois + n * 5,
+          spatial_scale,
+          height,
+          width,
+          pooled_height,
+          pooled_width,
+          sampling_ratio,
+          aligned,
+          bins);
+      roi_align_forward_roi(
+          input + bins.batch_index * channels * height * width,
+          channels,
+          pooled_height,
+          pooled_width,
+          channels_last,
+          bins,
+          output + n * roi_numel);
+    }
+  });
 }
 
-template <typename T>
+template <typename T, typename acc_t>
 void roi_align_backward_kernel_impl(
-    int nthreads,
+    int n_rois,
     const T* grad_output,
-    const T& spatial_scale,
+    acc_t spatial_scale,
     int channels,
     int height,
     int width,
@@ -183,100 +285,163 @@ void roi_align_backward_kernel_impl(
     int pooled_width,
     int sampling_ratio,
     bool aligned,
-    T* grad_input,
-    const T* rois,
+    bool channels_last,
+    acc_t* grad_input,
+    const acc_t* rois,
     int n_stride,
     int c_stride,
     int h_stride,
     int w_stride) {
-  for (int index = 0; index < nthreads; index++) {
-    // (n, c, ph, pw) is an element in the pooled output
-    int pw = index % pooled_width;
-    int ph = (index / pooled_width) % pooled_height;
-    int c = (index / pooled_width / pooled_height) % channels;
-    int n = index / pooled_width / pooled_height / channels;
-
-    const T* offset_rois = rois + n * 5;
-    int roi_batch_ind = offset_rois[0];
-
-    // Do not using rounding; this implementation detail is critical
-    T offset = aligned ? (T)0.5 : (T)0.0;
-    T roi_start_w = offset_rois[1] * spatial_scale - offset;
-    T roi_start_h = offset_rois[2] * spatial_scale - offset;
-    T roi_end_w = offset_rois[3] * spatial_scale - offset;
-    T roi_end_h = offset_rois[4] * spatial_scale - offset;
-
-    T roi_width = roi_end_w - roi_start_w;
-    T roi_height = roi_end_h - roi_start_h;
-    if (!aligned) {
-      // Force malformed ROIs to be 1x1
-      roi_width = std::max(roi_width, (T)1.);
-      roi_height = std::max(roi_height, (T)1.);
+  // Different RoIs can accumulate into the same pixels of grad_input, but
+  // channels never do, so channels are processed in parallel. Every channel
+  // receives its gradients in the same order as with a serial loop.
+  at::parallel_for(0, channels, 1, [&](int64_t begin, int64_t end) {
+    RoIBins<acc_t> bins;
+    for (int n = 0; n < n_rois; n++) {
+      compute_roi_bins(
+          rois + n * 5,
+          spatial_scale,
+          height,
+          width,
+          pooled_height,
+          pooled_width,
+          sampling_ratio,
+          aligned,
+          bins);
+      roi_align_backward_roi(
+          grad_output + n * n_stride,
+          c_stride,
+          h_stride,
+          w_stride,
+          begin,
+          end,
+          channels,
+          pooled_height,
+          pooled_width,
+          channels_last,
+          bins,
+          grad_input + bins.batch_index * channels * height * width);
     }
+  });
+}
 
-    T bin_size_h = static_cast<T>(roi_height) / static_cast<T>(pooled_height);
-    T bin_size_w = static_cast<T>(roi_width) / static_cast<T>(pooled_width);
-
-    T* offset_grad_input =
-        grad_input + ((roi_batch_ind * channels + c) * height * width);
-
-    int output_offset = n * n_stride + c * c_stride;
-    const T* offset_grad_output = grad_output + output_offset;
-    const T grad_output_this_bin =
-        offset_grad_output[ph * h_stride + pw * w_stride];
-
-    // We use roi_bin_grid to sample the grid and mimic integral
-    int roi_bin_grid_h = (sampling_ratio > 0)
-        ? sampling_ratio
-        : ceil(roi_height / pooled_height); // e.g., = 2
-    int roi_bin_grid_w =
-        (sampling_ratio > 0) ? sampling_ratio : ceil(roi_width / pooled_width);
-
-    // We do average (integral) pooling inside a bin
-    const T count = roi_bin_grid_h * roi_bin_grid_w; // e.g. = 4
-
-    for (int iy = 0; iy < roi_bin_grid_h; iy++) {
-      const T y = roi_start_h + ph * bin_size_h +
-          static_cast<T>(iy + .5f) * bin_size_h /
-              static_cast<T>(roi_bin_grid_h); // e.g., 0.5, 1.5
-      for (int ix = 0; ix < roi_bin_grid_w; ix++) {
-        const T x = roi_start_w + pw * bin_size_w +
-            static_cast<T>(ix + .5f) * bin_size_w /
-                static_cast<T>(roi_bin_grid_w);
+template <typename T, typename acc_t>
+void multi_level_roi_align_forward_kernel_impl(
+    int n_rois,
+    const std::vector<const T*>& inputs,
+    at::IntArrayRef heights,
+    at::IntArrayRef widths,
+    at::ArrayRef<double> spatial_scales,
+    const int64_t* levels,
+    int channels,
+    int pooled_height,
+    int pooled_width,
+    int sampling_ratio,
+    bool aligned,
+    bool channels_last,
+    const acc_t* rois,
+    T* output) {
+  int64_t roi_numel = channels * pooled_height * pooled_width;
+  int64_t grain_size =
+      std::max<int64_t>(1, at::internal::GRAIN_SIZE / roi_numel);
+  at::parallel_for(0, n_rois, grain_size, [&](int64_t begin, int64_t end) {
+    RoIBins<acc_t> bins;
+    for (int64_t n = begin; n < end; n++) {
+      auto level = levels[n];
+      compute_roi_bins(
+          rois + n * 5,
+          static_cast<acc_t>(spatial_scales[level]),
+          heights[level],
+          widths[level],
+          pooled_height,
+          pooled_width,
+          sampling_ratio,
+          aligned,
+          bins);
+      roi_align_forward_roi(
+          inputs[level] +
+              bins.batch_index * channels * heights[level] * widths[level],
+          channels,
+          pooled_height,
+          pooled_width,
+          channels_last,
+          bins,
+          output + n * roi_numel);
+    }
+  });
+}
 
-        T w1, w2, w3, w4;
-        int x_low, x_high, y_low, y_high;
+template <typename T, typename acc_t>
+void multi_level_roi_align_backward_kernel_impl(
+    int n_rois,
+    const T* grad_output,
+    at::IntArrayRef heights,
+    at::IntArrayRef widths,
+    at::ArrayRef<double> spatial_scales,
+    const int64_t* levels,
+    int channels,
+    int pooled_height,
+    int pooled_width,
+    int sampling_ratio,
+    bool aligned,
+    bool channels_last,
+    const std::vector<acc_t*>& grad_inputs,
+    const acc_t* rois,
+    int n_stride,
+    int c_stride,
+    int h_stride,
+    int w_stride) {
+  // parallel over channels, as in roi_align_backward_kernel_impl
+  at::parallel_for(0, channels, 1, [&](int64_t begin, int64_t end) {
+    RoIBins<acc_t> bins;
+    for (int n = 0; n < n_rois; n++) {
+      auto level = levels[n];
+      compute_roi_bins(
+          rois + n * 5,
+          static_cast<acc_t>(spatial_scales[level]),
+          heights[level],
+          widths[level],
+          pooled_height,
+          pooled_width,
+          sampling_ratio,
+          aligned,
+          bins);
+      roi_align_backward_roi(
+          grad_output + n * n_stride,
+          c_stride,
+          h_stride,
+          w_stride,
+          begin,
+          end,
+          channels,
+          pooled_height,
+          pooled_width,
+          channels_last,
+          bins,
+          grad_inputs[level] +
+              bins.batch_index * channels * heights[level] * widths[level]);
+    }
+  });
+}
 
-        bilinear_interpolate_gradient(
-            height,
-            width,
-            y,
-            x,
-            w1,
-            w2,
-            w3,
-            w4,
-            x_low,
-            x_high,
-            y_low,
-            y_high,
-            index);
-
-        T g1 = grad_output_this_bin * w1 / count;
-        T g2 = grad_output_this_bin * w2 / count;
-        T g3 = grad_output_this_bin * w3 / count;
-        T g4 = grad_output_this_bin * w4 / count;
-
-        if (x_low >= 0 && x_high >= 0 && y_low >= 0 && y_high >= 0) {
-          // atomic add is not needed for now since it is single threaded
-          add(offset_grad_input + y_low * width + x_low, static_cast<T>(g1));
-          add(offset_grad_input + y_low * width + x_high, static_cast<T>(g2));
-          add(offset_grad_input + y_high * width + x_low, static_cast<T>(g3));
-          add(offset_grad_input + y_high * width + x_high, static_cast<T>(g4));
-        } // if
-      } // ix
-    } // iy
-  } // for
+// The coordinates of the rois are read in the accumulation type of the
+// features, so reduced precision features can be pooled with float rois that
+// keep their precision on large images.
+void check_rois_type(
+    at::CheckedFrom c,
+    const at::Tensor& input,
+    const at::Tensor& rois) {
+  auto input_type = input.scalar_type();
+  TORCH_CHECK(
+      rois.scalar_type() == input_type ||
+          rois.scalar_type() == at::toOpMathType(input_type),
+      c,
+      ": rois should have the type of the input or ",
+      at::toOpMathType(input_type),
+      ", got ",
+      rois.scalar_type(),
+      " and ",
+      input_type);
 }
 
 at::Tensor roi_align_forward_kernel(
@@ -291,26 +456,34 @@ at::Tensor roi_align_forward_kernel(
   TORCH_CHECK(rois.device().is_cpu(), "rois must be a CPU tensor");
   TORCH_CHECK(rois.size(1) == 5, "rois must have shape as Tensor[K, 5]");
 
-  at::TensorArg input_t{input, "input", 1}, rois_t{rois, "rois", 2};
-
-  at::CheckedFrom c = "roi_align_forward_kernel";
-  at::checkAllSameType(c, {input_t, rois_t});
+  check_rois_type("roi_align_forward_kernel", input, rois);
 
   auto num_rois = rois.size(0);
   auto channels = input.size(1);
   auto height = input.size(2);
   auto width = input.size(3);
 
-  at::Tensor output = at::zeros(
-      {num_rois, channels, pooled_height, pooled_width}, input.options());
+  // The output has the memory format of the input
+  auto memory_format = input.suggest_memory_format();
+  bool channels_last = memory_format == at::MemoryFormat::ChannelsLast;
+  at::Tensor output = at::empty(
+                          {num_rois, channels, pooled_height, pooled_width},
+                          input.options().memory_format(memory_format))
+                          .zero_();
 
   if (output.numel() == 0)
     return output;
 
-  auto input_ = input.contiguous(), rois_ = rois.contiguous();
-  AT_DISPATCH_FLOATING_TYPES_AND_HALF(
-      input.scalar_type(), "roi_align_forward_kernel", [&] {
-        roi_align_forward_kernel_impl<scalar_t>(
+  auto input_ = input.contiguous(memory_format);
+  auto rois_ = rois.to(at::toOpMathType(input.scalar_type())).contiguous();
+  AT_DISPATCH_FLOATING_TYPES_AND2(
+      at::ScalarType::Half,
+      at::ScalarType::BFloat16,
+      input.scalar_type(),
+      "roi_align_forward_kernel",
+      [&] {
+        using acc_t = at::opmath_type<scalar_t>;
+        roi_align_forward_kernel_impl<scalar_t, acc_t>(
             num_rois,
             input_.data_ptr<scalar_t>(),
             spatial_scale,
@@ -321,7 +494,8 @@ at::Tensor roi_align_forward_kernel(
             pooled_width,
             sampling_ratio,
             aligned,
-            rois_.data_ptr<scalar_t>(),
+            channels_last,
+            rois_.data_ptr<acc_t>(),
             output.data_ptr<scalar_t>());
       });
   return output;
@@ -342,17 +516,24 @@ at::Tensor roi_align_backward_kernel(
   TORCH_CHECK(grad.device().is_cpu(), "grad must be a CPU tensor");
   TORCH_CHECK(rois.device().is_cpu(), "rois must be a CPU tensor");
 
-  at::TensorArg grad_t{grad, "grad", 1}, rois_t{rois, "rois", 2};
-
-  at::CheckedFrom c = "roi_align_backward_kernel";
-  at::checkAllSameType(c, {grad_t, rois_t});
+  check_rois_type("roi_align_backward_kernel", grad, rois);
 
+  // grad_input has the memory format of grad, which is the one of the input
+  // of the forward pass unless it was changed afterwards. It is accumulated in
+  // the accumulation type of grad, as many sampling points add to the same
+  // pixels.
+  auto acc_type = at::toOpMathType(grad.scalar_type());
+  auto memory_format = grad.suggest_memory_format();
+  bool channels_last = memory_format == at::MemoryFormat::ChannelsLast;
   at::Tensor grad_input =
-      at::zeros({batch_size, channels, height, width}, grad.options());
+      at::empty(
+          {batch_size, channels, height, width},
+          grad.options().dtype(acc_type).memory_format(memory_format))
+          .zero_();
 
   // handle possibly empty gradients
   if (grad.numel() == 0) {
-    return grad_input;
+    return grad_input.to(grad.scalar_type());
   }
 
   // get stride values to ensure indexing into gradients is correct.
@@ -361,11 +542,16 @@ at::Tensor roi_align_backward_kernel(
   int h_stride = grad.stride(2);
   int w_stride = grad.stride(3);
 
-  auto rois_ = rois.contiguous();
-  AT_DISPATCH_FLOATING_TYPES_AND_HALF(
-      grad.scalar_type(), "roi_align_backward_kernel", [&] {
-        roi_align_backward_kernel_impl<scalar_t>(
-            grad.numel(),
+  auto rois_ = rois.to(acc_type).contiguous();
+  AT_DISPATCH_FLOATING_TYPES_AND2(
+      at::ScalarType::Half,
+      at::ScalarType::BFloat16,
+      grad.scalar_type(),
+      "roi_align_backward_kernel",
+      [&] {
+        using acc_t = at::opmath_type<scalar_t>;
+        roi_align_backward_kernel_impl<scalar_t, acc_t>(
+            grad.size(0),
             grad.data_ptr<scalar_t>(),
             spatial_scale,
             channels,
@@ -375,14 +561,222 @@ at::Tensor roi_align_backward_kernel(
             pooled_width,
             sampling_ratio,
             aligned,
-            grad_input.data_ptr<scalar_t>(),
-            rois_.data_ptr<scalar_t>(),
+            channels_last,
+            grad_input.data_ptr<acc_t>(),
+            rois_.data_ptr<acc_t>(),
+            n_stride,
+            c_stride,
+            h_stride,
+            w_stride);
+      });
+  return grad_input.to(grad.scalar_type());
+}
+
+void check_multi_level_roi_align_levels(
+    const at::Tensor& rois,
+    const at::Tensor& levels,
+    int64_t num_levels,
+    int64_t num_spatial_scales) {
+  TORCH_CHECK(rois.device().is_cpu(), "rois must be a CPU tensor");
+  TORCH_CHECK(levels.device().is_cpu(), "levels must be a CPU tensor");
+  TORCH_CHECK(
+      rois.dim() == 2 && rois.size(1) == 5,
+      "rois must have shape as Tensor[K, 5]");
+  TORCH_CHECK(
+      levels.dim() == 1 && levels.size(0) == rois.size(0),
+      "levels should be a [K] tensor, got ",
+      levels.sizes());
+  TORCH_CHECK(
+      levels.scalar_type() == at::kLong, "levels should be an int64 tensor");
+  TORCH_CHECK(num_levels > 0, "there should be at least one feature map");
+  TORCH_CHECK(
+      num_spatial_scales == num_levels,
+      "there should be one spatial scale per feature map, got ",
+      num_spatial_scales,
+      " scales for ",
+      num_levels,
+      " feature maps");
+  if (levels.numel() > 0) {
+    TORCH_CHECK(
+        levels.min().item<int64_t>() >= 0 &&
+            levels.max().item<int64_t>() < num_levels,
+        "levels should be in [0, ",
+        num_levels,
+        ")");
+  }
+}
+
+at::Tensor multi_level_roi_align_forward_kernel(
+    at::TensorList inputs,
+    const at::Tensor& rois,
+    const at::Tensor& levels,
+    at::ArrayRef<double> spatial_scales,
+    int64_t pooled_height,
+    int64_t pooled_width,
+    int64_t sampling_ratio,
+    bool aligned) {
+  check_multi_level_roi_align_levels(
+      rois, levels, inputs.size(), spatial_scales.size());
+
+  const auto& first = inputs[0];
+  std::vector<int64_t> heights, widths;
+  for (const auto& input : inputs) {
+    TORCH_CHECK(input.device().is_cpu(), "inputs must be CPU tensors");
+    TORCH_CHECK(
+        input.dim() == 4 && input.size(0) == first.size(0) &&
+            input.size(1) == first.size(1),
+        "inputs should be [N, C, H, W] tensors with the same N and C, got ",
+        input.sizes(),
+        " and ",
+        first.sizes());
+    TORCH_CHECK(
+        input.scalar_type() == first.scalar_type(),
+        "inputs should have the same type");
+    heights.push_back(input.size(2));
+    widths.push_back(input.size(3));
+  }
+
+  check_rois_type("multi_level_roi_align_forward_kernel", first, rois);
+
+  auto num_rois = rois.size(0);
+  auto channels = first.size(1);
+
+  // The output has the memory format of the first feature map, and the other
+  // ones are converted to it
+  auto memory_format = first.suggest_memory_format();
+  bool channels_last = memory_format == at::MemoryFormat::ChannelsLast;
+  at::Tensor output = at::empty(
+                          {num_rois, channels, pooled_height, pooled_width},
+                          first.options().memory_format(memory_format))
+                          .zero_();
+
+  if (output.numel() == 0)
+    return output;
+
+  std::vector<at::Tensor> inputs_;
+  for (const auto& input : inputs) {
+    inputs_.push_back(input.contiguous(memory_format));
+  }
+  auto rois_ = rois.to(at::toOpMathType(first.scalar_type())).contiguous();
+  auto levels_ = levels.contiguous();
+  AT_DISPATCH_FLOATING_TYPES_AND2(
+      at::ScalarType::Half,
+      at::ScalarType::BFloat16,
+      first.scalar_type(),
+      "multi_level_roi_align_forward_kernel",
+      [&] {
+        using acc_t = at::opmath_type<scalar_t>;
+        std::vector<const scalar_t*> input_ptrs;
+        for (const auto& input : inputs_) {
+          input_ptrs.push_back(input.data_ptr<scalar_t>());
+        }
+        multi_level_roi_align_forward_kernel_impl<scalar_t, acc_t>(
+            num_rois,
+            input_ptrs,
+            heights,
+            widths,
+            spatial_scales,
+            levels_.data_ptr<int64_t>(),
+            channels,
+            pooled_height,
+            pooled_width,
+            sampling_ratio,
+            aligned,
+            channels_last,
+            rois_.data_ptr<acc_t>(),
+            output.data_ptr<scalar_t>());
+      });
+  return output;
+}
+
+std::vector<at::Tensor> multi_level_roi_align_backward_kernel(
+    const at::Tensor& grad,
+    const at::Tensor& rois,
+    const at::Tensor& levels,
+    at::ArrayRef<double> spatial_scales,
+    int64_t pooled_height,
+    int64_t pooled_width,
+    int64_t batch_size,
+    int64_t channels,
+    at::IntArrayRef heights,
+    at::IntArrayRef widths,
+    int64_t sampling_ratio,
+    bool aligned) {
+  TORCH_CHECK(grad.device().is_cpu(), "grad must be a CPU tensor");
+  TORCH_CHECK(
+      heights.size() == widths.size(),
+      "heights and widths should have the same size");
+  check_multi_level_roi_align_levels(
+      rois, levels, heights.size(), spatial_scales.size());
+
+  check_rois_type("multi_level_roi_align_backward_kernel", grad, rois);
+
+  // grad_inputs have the memory format of grad and are accumulated in its
+  // accumulation type, as in roi_align_backward_kernel
+  auto acc_type = at::toOpMathType(grad.scalar_type());
+  auto memory_format = grad.suggest_memory_format();
+  bool channels_last = memory_format == at::MemoryFormat::ChannelsLast;
+  std::vector<at::Tensor> grad_inputs;
+  for (size_t level = 0; level < heights.size(); level++) {
+    grad_inputs.push_back(
+        at::empty(
+            {batch_size, channels, heights[level], widths[level]},
+            grad.options().dtype(acc_type).memory_format(memory_format))
+            .zero_());
+  }
+
+  auto to_grad_type = [&]() {
+    for (auto& grad_input : grad_inputs) {
+      grad_input = grad_input.to(grad.scalar_type());
+    }
+    return grad_inputs;
+  };
+
+  // handle possibly empty gradients
+  if (grad.numel() == 0) {
+    return to_grad_type();
+  }
+
+  // get stride values to ensure indexing into gradients is correct.
+  int n_stride = grad.stride(0);
+  int c_stride = grad.stride(1);
+  int h_stride = grad.stride(2);
+  int w_stride = grad.stride(3);
+
+  auto rois_ = rois.to(acc_type).contiguous();
+  auto levels_ = levels.contiguous();
+  AT_DISPATCH_FLOATING_TYPES_AND2(
+      at::ScalarType::Half,
+      at::ScalarType::BFloat16,
+      grad.scalar_type(),
+      "multi_level_roi_align_backward_kernel",
+      [&] {
+        using acc_t = at::opmath_type<scalar_t>;
+        std::vector<acc_t*> grad_input_ptrs;
+        for (const auto& grad_input : grad_inputs) {
+          grad_input_ptrs.push_back(grad_input.data_ptr<acc_t>());
+        }
+        multi_level_roi_align_backward_kernel_impl<scalar_t, acc_t>(
+            grad.size(0),
+            grad.data_ptr<scalar_t>(),
+            heights,
+            widths,
+            spatial_scales,
+            levels_.data_ptr<int64_t>(),
+            channels,
+            pooled_height,
+            pooled_width,
+            sampling_ratio,
+            aligned,
+            channels_last,
+            grad_input_ptrs,
+            rois_.data_ptr<acc_t>(),
             n_stride,
             c_stride,
             h_stride,
             w_stride);
       });
-  return grad_input;
+  return to_grad_type();
 }
 
 } // namespace
@@ -394,6 +788,12 @@ TORCH_LIBRARY_IMPL(torchvision, CPU, m) {
   m.impl(
       TORCH_SELECTIVE_NAME("torchvision::_roi_align_backward"),
       TORCH_FN(roi_align_backward_kernel));
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::multi_level_roi_align"),
+      TORCH_FN(multi_level_roi_align_forward_kernel));
+  m.impl(
+      TORCH_SELECTIVE_NAME("torchvision::_multi_level_roi_align_backward"),
+      TORCH_FN(multi_level_roi_align_backward_kernel));
 }
 
 } // namespace ops
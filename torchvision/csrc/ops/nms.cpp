@@ -15,9 +15,68 @@ at::Tensor nms(
   return op.call(dets, scores, iou_threshold);
 }
 
+at::Tensor batched_nms(
+    const at::Tensor& dets,
+    const at::Tensor& scores,
+    const at::Tensor& idxs,
+    double iou_threshold) {
+  static auto op = c10::Dispatcher::singleton()
+                       .findSchemaOrThrow("torchvision::batched_nms", "")
+                       .typed<decltype(batched_nms)>();
+  return op.call(dets, scores, idxs, iou_threshold);
+}
+
+at::Tensor batched_nms_topk(
+    const at::Tensor& dets,
+    const at::Tensor& scores,
+    const at::Tensor& idxs,
+    double iou_threshold,
+    int64_t topk) {
+  static auto op = c10::Dispatcher::singleton()
+                       .findSchemaOrThrow("torchvision::batched_nms_topk", "")
+                       .typed<decltype(batched_nms_topk)>();
+  return op.call(dets, scores, idxs, iou_threshold, topk);
+}
+
+std::tuple<at::Tensor, at::Tensor> batched_soft_nms(
+    const at::Tensor& dets,
+    const at::Tensor& scores,
+    const at::Tensor& idxs,
+    double iou_threshold,
+    double sigma,
+    double score_threshold,
+    int64_t method) {
+  static auto op = c10::Dispatcher::singleton()
+                       .findSchemaOrThrow("torchvision::batched_soft_nms", "")
+                       .typed<decltype(batched_soft_nms)>();
+  return op.call(
+      dets, scores, idxs, iou_threshold, sigma, score_threshold, method);
+}
+
+std::tuple<at::Tensor, at::Tensor> multi_image_batched_nms(
+    const at::Tensor& dets,
+    const at::Tensor& scores,
+    const at::Tensor& idxs,
+    double iou_threshold,
+    int64_t max_det) {
+  static auto op =
+      c10::Dispatcher::singleton()
+          .findSchemaOrThrow("torchvision::multi_image_batched_nms", "")
+          .typed<decltype(multi_image_batched_nms)>();
+  return op.call(dets, scores, idxs, iou_threshold, max_det);
+}
+
 TORCH_LIBRARY_FRAGMENT(torchvision, m) {
   m.def(TORCH_SELECTIVE_SCHEMA(
       "torchvision::nms(Tensor dets, Tensor scores, float iou_threshold) -> Tensor"));
+  m.def(TORCH_SELECTIVE_SCHEMA(
+      "torchvision::batched_nms(Tensor dets, Tensor scores, Tensor idxs, float iou_threshold) -> Tensor"));
+  m.def(TORCH_SELECTIVE_SCHEMA(
+      "torchvision::batched_nms_topk(Tensor dets, Tensor scores, Tensor idxs, float iou_threshold, int topk) -> Tensor"));
+  m.def(TORCH_SELECTIVE_SCHEMA(
+      "torchvision::batched_soft_nms(Tensor dets, Tensor scores, Tensor idxs, float iou_threshold, float sigma, float score_threshold, int method) -> (Tensor, Tensor)"));
+  m.def(TORCH_SELECTIVE_SCHEMA(
+      "torchvision::multi_image_batched_nms(Tensor dets, Tensor scores, Tensor idxs, float iou_threshold, int max_det) -> (Tensor, Tensor)"));
 }
 
 } // namespace ops
@@ -11,5 +11,34 @@ VISION_API at::Tensor nms(
     const at::Tensor& scores,
     double iou_threshold);
 
+VISION_API at::Tensor batched_nms(
+    const at::Tensor& dets,
+    const at::Tensor& scores,
+    const at::Tensor& idxs,
+    double iou_threshold);
+
+VISION_API at::Tensor batched_nms_topk(
+    const at::Tensor& dets,
+    const at::Tensor& scores,
+    const at::Tensor& idxs,
+    double iou_threshold,
+    int64_t topk);
+
+VISION_API std::tuple<at::Tensor, at::Tensor> batched_soft_nms(
+    const at::Tensor& dets,
+    const at::Tensor& scores,
+    const at::Tensor& idxs,
+    double iou_threshold,
+    double sigma,
+    double score_threshold,
+    int64_t method);
+
+VISION_API std::tuple<at::Tensor, at::Tensor> multi_image_batched_nms(
+    const at::Tensor& dets,
+    const at::Tensor& scores,
+    const at::Tensor& idxs,
+    double iou_threshold,
+    int64_t max_det);
+
 } // namespace ops
 } // namespace vision
@@ -1,5 +1,8 @@
 #pragma once
 
+#include "box_coder.h"
+#include "box_iou.h"
+#include "box_iou_loss.h"
 #include "deform_conv2d.h"
 #include "nms.h"
 #include "ps_roi_align.h"
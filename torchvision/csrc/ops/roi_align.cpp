@@ -29,6 +29,30 @@ at::Tensor roi_align(
       aligned);
 }
 
+at::Tensor multi_level_roi_align(
+    at::TensorList inputs,
+    const at::Tensor& rois,
+    const at::Tensor& levels,
+    at::ArrayRef<double> spatial_scales,
+    int64_t pooled_height,
+    int64_t pooled_width,
+    int64_t sampling_ratio,
+    bool aligned) {
+  static auto op =
+      c10::Dispatcher::singleton()
+          .findSchemaOrThrow("torchvision::multi_level_roi_align", "")
+          .typed<decltype(multi_level_roi_align)>();
+  return op.call(
+      inputs,
+      rois,
+      levels,
+      spatial_scales,
+      pooled_height,
+      pooled_width,
+      sampling_ratio,
+      aligned);
+}
+
 namespace detail {
 
 at::Tensor _roi_align_backward(
@@ -61,6 +85,38 @@ at::Tensor _roi_align_backward(
       aligned);
 }
 
+std::vector<at::Tensor> _multi_level_roi_align_backward(
+    const at::Tensor& grad,
+    const at::Tensor& rois,
+    const at::Tensor& levels,
+    at::ArrayRef<double> spatial_scales,
+    int64_t pooled_height,
+    int64_t pooled_width,
+    int64_t batch_size,
+    int64_t channels,
+    at::IntArrayRef heights,
+    at::IntArrayRef widths,
+    int64_t sampling_ratio,
+    bool aligned) {
+  static auto op =
+      c10::Dispatcher::singleton()
+          .findSchemaOrThrow("torchvision::_multi_level_roi_align_backward", "")
+          .typed<decltype(_multi_level_roi_align_backward)>();
+  return op.call(
+      grad,
+      rois,
+      levels,
+      spatial_scales,
+      pooled_height,
+      pooled_width,
+      batch_size,
+      channels,
+      heights,
+      widths,
+      sampling_ratio,
+      aligned);
+}
+
 } // namespace detail
 
 TORCH_LIBRARY_FRAGMENT(torchvision, m) {
@@ -68,6 +124,10 @@ TORCH_LIBRARY_FRAGMENT(torchvision, m) {
       "torchvision::roi_align(Tensor input, Tensor rois, float spatial_scale, int pooled_height, int pooled_width, int sampling_ratio, bool aligned) -> Tensor"));
   m.def(TORCH_SELECTIVE_SCHEMA(
       "torchvision::_roi_align_backward(Tensor grad, Tensor rois, float spatial_scale, int pooled_height, int pooled_width, int batch_size, int channels, int height, int width, int sampling_ratio, bool aligned) -> Tensor"));
+  m.def(TORCH_SELECTIVE_SCHEMA(
+      "torchvision::multi_level_roi_align(Tensor[] inputs, Tensor rois, Tensor levels, float[] spatial_scales, int pooled_height, int pooled_width, int sampling_ratio, bool aligned) -> Tensor"));
+  m.def(TORCH_SELECTIVE_SCHEMA(
+      "torchvision::_multi_level_roi_align_backward(Tensor grad, Tensor rois, Tensor levels, float[] spatial_scales, int pooled_height, int pooled_width, int batch_size, int channels, int[] heights, int[] widths, int sampling_ratio, bool aligned) -> Tensor[]"));
 }
 
 } // namespace ops
@@ -17,6 +17,7 @@ from .image import (
     ImageReadMode,
     decode_image,
     decode_jpeg,
+    decode_jpegs,
     decode_png,
     encode_jpeg,
     encode_png,
@@ -197,6 +198,7 @@ __all__ = [
     "ImageReadMode",
     "decode_image",
     "decode_jpeg",
+    "decode_jpegs",
     "decode_png",
     "encode_jpeg",
     "encode_png",
@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import List, Optional, Tuple
 
 import torch
 
@@ -30,18 +31,27 @@ class ImageReadMode(Enum):
     RGB_ALPHA = 4
 
 
-def read_file(path: str) -> torch.Tensor:
+def read_file(path: str, mmap: bool = False) -> torch.Tensor:
     """
     Reads and outputs the bytes contents of a file as a uint8 Tensor
     with one dimension.
 
+    With ``mmap=True``, the file is memory mapped instead of read: its pages are only
+    loaded when they are accessed, e.g. by :func:`decode_image`, which decodes them
+    in place. This avoids reading large files or the unused parts of packed files,
+    whose records can be decoded from slices of the returned tensor. The mapping is
+    private: writing to the tensor never modifies the file. It is released when the
+    tensor and all of its views are deleted, until then the file must not be truncated
+    or modified. Not supported on Windows.
+
     Args:
         path (str): the path to the file to be read
+        mmap (bool): whether to memory map the file instead of reading it. Default: ``False``.
 
     Returns:
         data (Tensor)
     """
-    data = torch.ops.image.read_file(path)
+    data = torch.ops.image.read_file(path, mmap)
     return data
 
 
@@ -57,7 +67,9 @@ def write_file(filename: str, data: torch.Tensor) -> None:
     torch.ops.image.write_file(filename, data)
 
 
-def decode_png(input: torch.Tensor, mode: ImageReadMode = ImageReadMode.UNCHANGED) -> torch.Tensor:
+def decode_png(
+    input: torch.Tensor, mode: ImageReadMode = ImageReadMode.UNCHANGED, out: Optional[torch.Tensor] = None
+) -> torch.Tensor:
     """
     Decodes a PNG image into a 3 dimensional RGB or grayscale Tensor.
     Optionally converts the image to the desired format.
@@ -70,11 +82,17 @@ def decode_png(input: torch.Tensor, mode: ImageReadMode = ImageReadMode.UNCHANGE
             converting the image. Default: ``ImageReadMode.UNCHANGED``.
             See `ImageReadMode` class for more information on various
             available modes.
+        out (Tensor[image_channels, image_height, image_width], optional): a uint8 tensor
+            to decode the image into, e.g. a slice of a preallocated batch. The image is
+            decoded in place when the pixels of ``out`` are stored in HWC order, e.g. when
+            the batch is in ``torch.channels_last`` memory format, and is decoded then
+            copied into ``out`` otherwise. Default: ``None``.
 
     Returns:
-        output (Tensor[image_channels, image_height, image_width])
+        output (Tensor[image_channels, image_height, image_width]): ``out`` if given,
+            otherwise a new tensor
     """
-    output = torch.ops.image.decode_png(input, mode.value, False)
+    output = torch.ops.image.decode_png(input, mode.value, False, out)
     return output
 
 
@@ -113,8 +131,19 @@ def write_png(input: torch.Tensor, filename: str, compression_level: int = 6):
     write_file(filename, output)
 
 
+def _size_hint_to_list(size_hint: Optional[Tuple[int, int]]) -> List[int]:
+    if size_hint is None:
+        return []
+    return [size_hint[0], size_hint[1]]
+
+
 def decode_jpeg(
-    input: torch.Tensor, mode: ImageReadMode = ImageReadMode.UNCHANGED, device: str = "cpu"
+    input: torch.Tensor,
+    mode: ImageReadMode = ImageReadMode.UNCHANGED,
+    device: str = "cpu",
+    size_hint: Optional[Tuple[int, int]] = None,
+    crop: Optional[Tuple[int, int, int, int]] = None,
+    out: Optional[torch.Tensor] = None,
 ) -> torch.Tensor:
     """
     Decodes a JPEG image into a 3 dimensional RGB or grayscale Tensor.
@@ -133,15 +162,70 @@ def decode_jpeg(
             be stored. If a cuda device is specified, the image will be decoded
             with `nvjpeg <https://developer.nvidia.com/nvjpeg>`_. This is only
             supported for CUDA version >= 10.1
+        size_hint (tuple of int, optional): the (height, width) the image is going to be
+            resized to. When given, the image is decoded at the smallest of the 1/8, 1/4
+            and 1/2 scales that is at least that large, which is much faster than decoding
+            it in full. The image is decoded in full when it is smaller than ``size_hint``.
+            Only supported on CPU. Default: ``None``.
+        crop (tuple of int, optional): the (top, left, height, width) region of the image
+            to decode, in the coordinates of the full image, e.g. as returned by
+            :meth:`~torchvision.transforms.RandomResizedCrop.get_params`. The rows below
+            the region are not decoded at all and, with libjpeg-turbo, neither are most of
+            the pixels outside of it. When ``size_hint`` is also given, it applies to the
+            size of the region, which is then decoded at the reduced scale. Only supported
+            on CPU and for a single image. Default: ``None``.
+        out (Tensor[image_channels, image_height, image_width], optional): a uint8 tensor
+            to decode the image into, see :func:`decode_png`. Only supported on CPU.
+            Default: ``None``.
 
     Returns:
-        output (Tensor[image_channels, image_height, image_width])
+        output (Tensor[image_channels, image_height, image_width]): ``out`` if given,
+            otherwise a new tensor
     """
     device = torch.device(device)
     if device.type == "cuda":
-        output = torch.ops.image.decode_jpeg_cuda(input, mode.value, device)
-    else:
-        output = torch.ops.image.decode_jpeg(input, mode.value)
+        if size_hint is not None or crop is not None or out is not None:
+            raise ValueError("size_hint, crop and out are only supported when decoding on CPU")
+        return torch.ops.image.decode_jpeg_cuda(input, mode.value, device)
+    crop_list: List[int] = [] if crop is None else [crop[0], crop[1], crop[2], crop[3]]
+    output = torch.ops.image.decode_jpeg(input, mode.value, _size_hint_to_list(size_hint), crop_list, out)
+    return output
+
+
+def decode_jpegs(
+    input: List[torch.Tensor],
+    mode: ImageReadMode = ImageReadMode.UNCHANGED,
+    device: str = "cpu",
+    size_hint: Optional[Tuple[int, int]] = None,
+) -> List[torch.Tensor]:
+    """
+    Decodes a list of JPEG images into 3 dimensional RGB or grayscale Tensors,
+    see :func:`decode_jpeg`.
+
+    On CPU, the images are decoded in parallel on the intra-op threads of PyTorch,
+    see :func:`torch.set_num_threads`. Note that the :class:`~torch.utils.data.DataLoader`
+    workers use a single thread by default.
+
+    Args:
+        input (list[Tensor[1]]): one dimensional uint8 tensors containing the raw bytes
+            of the JPEG images. These tensors must be on CPU, regardless of the ``device``
+            parameter.
+        mode (ImageReadMode): the read mode used for optionally converting the images.
+            Default: ``ImageReadMode.UNCHANGED``.
+        device (str or torch.device): The device on which the decoded images will
+            be stored, see :func:`decode_jpeg`.
+        size_hint (tuple of int, optional): the (height, width) the images are going to be
+            resized to, see :func:`decode_jpeg`. Only supported on CPU. Default: ``None``.
+
+    Returns:
+        output (list[Tensor[image_channels, image_height, image_width]])
+    """
+    device = torch.device(device)
+    if device.type == "cuda":
+        if size_hint is not None:
+            raise ValueError("size_hint is only supported when decoding on CPU")
+        return [torch.ops.image.decode_jpeg_cuda(data, mode.value, device) for data in input]
+    output = torch.ops.image.decode_jpegs(input, mode.value, _size_hint_to_list(size_hint))
     return output
 
 
@@ -182,7 +266,9 @@ def write_jpeg(input: torch.Tensor, filename: str, quality: int = 75):
     write_file(filename, output)
 
 
-def decode_image(input: torch.Tensor, mode: ImageReadMode = ImageReadMode.UNCHANGED) -> torch.Tensor:
+def decode_image(
+    input: torch.Tensor, mode: ImageReadMode = ImageReadMode.UNCHANGED, size_hint: Optional[Tuple[int, int]] = None
+) -> torch.Tensor:
     """
     Detects whether an image is a JPEG or PNG and performs the appropriate
     operation to decode the image into a 3 dimensional RGB or grayscale Tensor.
@@ -197,15 +283,21 @@ def decode_image(input: torch.Tensor, mode: ImageReadMode = ImageReadMode.UNCHAN
             Default: ``ImageReadMode.UNCHANGED``.
             See ``ImageReadMode`` class for more information on various
             available modes.
+        size_hint (tuple of int, optional): the (height, width) the image is going to be
+            resized to. JPEG images are decoded at a reduced scale that is at least that
+            large, see :func:`decode_jpeg`. PNG images are always decoded in full.
+            Default: ``None``.
 
     Returns:
         output (Tensor[image_channels, image_height, image_width])
     """
-    output = torch.ops.image.decode_image(input, mode.value)
+    output = torch.ops.image.decode_image(input, mode.value, _size_hint_to_list(size_hint))
     return output
 
 
-def read_image(path: str, mode: ImageReadMode = ImageReadMode.UNCHANGED) -> torch.Tensor:
+def read_image(
+    path: str, mode: ImageReadMode = ImageReadMode.UNCHANGED, size_hint: Optional[Tuple[int, int]] = None
+) -> torch.Tensor:
     """
     Reads a JPEG or PNG image into a 3 dimensional RGB or grayscale Tensor.
     Optionally converts the image to the desired format.
@@ -217,12 +309,14 @@ def read_image(path: str, mode: ImageReadMode = ImageReadMode.UNCHANGED) -> torc
             Default: ``ImageReadMode.UNCHANGED``.
             See ``ImageReadMode`` class for more information on various
             available modes.
+        size_hint (tuple of int, optional): the (height, width) the image is going to be
+            resized to, see :func:`decode_image`. Default: ``None``.
 
     Returns:
         output (Tensor[image_channels, image_height, image_width])
     """
     data = read_file(path)
-    return decode_image(data, mode)
+    return decode_image(data, mode, size_hint)
 
 
 def _read_png_16(path: str, mode: ImageReadMode = ImageReadMode.UNCHANGED) -> torch.Tensor:
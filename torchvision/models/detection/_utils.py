@@ -1,9 +1,13 @@
 import math
 from collections import OrderedDict
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import torch
+import torchvision
 from torch import Tensor, nn
+from torch.nn.utils.rnn import pad_sequence
+from torchvision.extension import _has_ops
+from torchvision.ops import boxes as box_ops
 from torchvision.ops.misc import FrozenBatchNorm2d
 
 
@@ -37,38 +41,43 @@ class BalancedPositiveNegativeSampler:
         The first list contains the positive elements that were selected,
         and the second list the negative example.
         """
-        pos_idx = []
-        neg_idx = []
-        for matched_idxs_per_image in matched_idxs:
-            positive = torch.where(matched_idxs_per_image >= 1)[0]
-            negative = torch.where(matched_idxs_per_image == 0)[0]
-
-            num_pos = int(self.batch_size_per_image * self.positive_fraction)
-            # protect against not enough positive examples
-            num_pos = min(positive.numel(), num_pos)
-            num_neg = self.batch_size_per_image - num_pos
-            # protect against not enough negative examples
-            num_neg = min(negative.numel(), num_neg)
-
-            # randomly select positive and negative examples
-            perm1 = torch.randperm(positive.numel(), device=positive.device)[:num_pos]
-            perm2 = torch.randperm(negative.numel(), device=negative.device)[:num_neg]
-
-            pos_idx_per_image = positive[perm1]
-            neg_idx_per_image = negative[perm2]
-
-            # create binary mask from indices
-            pos_idx_per_image_mask = torch.zeros_like(matched_idxs_per_image, dtype=torch.uint8)
-            neg_idx_per_image_mask = torch.zeros_like(matched_idxs_per_image, dtype=torch.uint8)
-
-            pos_idx_per_image_mask[pos_idx_per_image] = 1
-            neg_idx_per_image_mask[neg_idx_per_image] = 1
-
-            pos_idx.append(pos_idx_per_image_mask)
-            neg_idx.append(neg_idx_per_image_mask)
-
+        if len(matched_idxs) == 0:
+            return [], []
+        # The images are sampled all at once: their labels are padded into a [B, N] tensor, and the examples are
+        # drawn by taking the topk of random scores, which selects a uniformly random subset of them
+        lengths = [matched_idxs_per_image.numel() for matched_idxs_per_image in matched_idxs]
+        padded = pad_sequence(matched_idxs, batch_first=True, padding_value=-1.0)
+        # the positives and the negatives are disjoint, they can be drawn with the same random scores
+        scores = torch.rand(padded.shape, device=padded.device)
+
+        max_num_pos = int(self.batch_size_per_image * self.positive_fraction)
+        pos_idx_mask, num_pos = self._sample(scores, padded >= 1, max_num_pos, None)
+        # negatives complete the batch of each image
+        neg_idx_mask, _ = self._sample(scores, padded == 0, self.batch_size_per_image, num_pos)
+
+        pos_idx = [mask[:length] for mask, length in zip(pos_idx_mask, lengths)]
+        neg_idx = [mask[:length] for mask, length in zip(neg_idx_mask, lengths)]
         return pos_idx, neg_idx
 
+    def _sample(
+        self, scores: Tensor, candidates: Tensor, max_num_samples: int, num_other_samples: Optional[Tensor]
+    ) -> Tuple[Tensor, Tensor]:
+        """
+        Selects the candidates of each row i with the highest random scores, at most
+        ``max_num_samples - num_other_samples[i]`` of them, and returns the uint8 mask of the selected elements
+        and their number per row.
+        """
+        k = min(max_num_samples, candidates.shape[1])
+        # the candidates have keys in [1, 2) and come first in the topk
+        keys, idxs = (scores + candidates).topk(k, dim=1)
+        # protect against not enough candidates
+        num_samples = (keys >= 1).sum(dim=1)
+        if num_other_samples is not None:
+            num_samples = torch.min(num_samples, max_num_samples - num_other_samples)
+        selected = torch.arange(k, device=scores.device)[None, :] < num_samples[:, None]
+        mask = torch.zeros(candidates.shape, dtype=torch.uint8, device=scores.device)
+        return mask.scatter_(1, idxs, selected.to(torch.uint8)), num_samples
+
 
 @torch.jit._script_if_tracing
 def encode_boxes(reference_boxes: Tensor, proposals: Tensor, weights: Tensor) -> Tensor:
@@ -183,6 +192,7 @@ class BoxCoder:
             boxes (Tensor): reference boxes.
         """
 
+        rel_codes = _upcast_rel_codes(rel_codes, boxes)
         boxes = boxes.to(rel_codes.dtype)
 
         widths = boxes[:, 2] - boxes[:, 0]
@@ -216,6 +226,69 @@ class BoxCoder:
         pred_boxes = torch.stack((pred_boxes1, pred_boxes2, pred_boxes3, pred_boxes4), dim=2).flatten(1)
         return pred_boxes
 
+    def decode_and_clip(self, rel_codes: Tensor, boxes: List[Tensor], image_shapes: List[Tuple[int, int]]) -> Tensor:
+        """
+        Decodes the boxes as :meth:`decode` does, and clips the boxes of each image to its size as
+        :func:`~torchvision.ops.clip_boxes_to_image` does. On CPU, both are done in a single pass, without
+        intermediate tensors.
+
+        Args:
+            rel_codes (Tensor): encoded boxes
+            boxes (List[Tensor]): reference boxes of each image
+            image_shapes (List[Tuple[int, int]]): height and width of each image
+
+        Returns:
+            Tensor[N, K, 4]: the decoded and clipped boxes
+        """
+        boxes_per_image = [b.size(0) for b in boxes]
+        box_sum = 0
+        for val in boxes_per_image:
+            box_sum += val
+        if box_sum > 0:
+            rel_codes = _upcast_rel_codes(rel_codes, boxes[0])
+        if box_sum > 0 and _use_native_decode_and_clip(rel_codes, boxes):
+            image_sizes: List[int] = []
+            for image_shape in image_shapes:
+                image_sizes += [image_shape[0], image_shape[1]]
+            wx, wy, ww, wh = self.weights
+            pred_boxes = torch.ops.torchvision.decode_and_clip(
+                rel_codes.reshape(box_sum, -1),
+                torch.cat(boxes, dim=0).to(rel_codes.dtype),
+                [float(wx), float(wy), float(ww), float(wh)],
+                float(self.bbox_xform_clip),
+                image_sizes,
+                boxes_per_image,
+            )
+            return pred_boxes.reshape(box_sum, -1, 4)
+
+        pred_boxes = self.decode(rel_codes, boxes)
+        clipped_boxes = [
+            box_ops.clip_boxes_to_image(image_boxes, image_shape)
+            for image_boxes, image_shape in zip(pred_boxes.split(boxes_per_image), image_shapes)
+        ]
+        return torch.cat(clipped_boxes, dim=0)
+
+
+def _upcast_rel_codes(rel_codes: Tensor, boxes: Tensor) -> Tensor:
+    # Regressions of heads run in reduced precision, e.g. under autocast, are decoded in the
+    # precision of the reference boxes, as bfloat16 rounds the coordinates of large images
+    # by several pixels
+    if rel_codes.dtype in (torch.float16, torch.bfloat16):
+        return rel_codes.to(torch.promote_types(rel_codes.dtype, boxes.dtype))
+    return rel_codes
+
+
+def _use_native_decode_and_clip(rel_codes: Tensor, boxes: List[Tensor]) -> bool:
+    # The native kernel is CPU only and has no autograd support
+    if not _has_ops() or torchvision._is_tracing() or rel_codes.requires_grad:
+        return False
+    if rel_codes.device.type != "cpu" or rel_codes.dtype not in (torch.float32, torch.float64):
+        return False
+    for b in boxes:
+        if b.device.type != "cpu" or b.requires_grad:
+            return False
+    return True
+
 
 class Matcher:
     """
@@ -272,12 +345,7 @@ class Matcher:
             [0, M - 1] or a negative value indicating that prediction i could not
             be matched.
         """
-        if match_quality_matrix.numel() == 0:
-            # empty targets or proposals not supported during training
-            if match_quality_matrix.shape[0] == 0:
-                raise ValueError("No ground-truth boxes available for one of the images during training")
-            else:
-                raise ValueError("No proposal boxes available for one of the images during training")
+        self._check_not_empty(match_quality_matrix.shape[0], match_quality_matrix.shape[1])
 
         # match_quality_matrix is M (gt) x N (predicted)
         # Max over gt elements (dim 0) to find best gt candidate for each prediction
@@ -287,11 +355,7 @@ class Matcher:
         else:
             all_matches = None  # type: ignore[assignment]
 
-        # Assign candidate matches with low quality to negative (unassigned) values
-        below_low_threshold = matched_vals < self.low_threshold
-        between_thresholds = (matched_vals >= self.low_threshold) & (matched_vals < self.high_threshold)
-        matches[below_low_threshold] = self.BELOW_LOW_THRESHOLD
-        matches[between_thresholds] = self.BETWEEN_THRESHOLDS
+        self._apply_thresholds_(matches, matched_vals)
 
         if self.allow_low_quality_matches:
             assert all_matches is not None
@@ -299,6 +363,54 @@ class Matcher:
 
         return matches
 
+    def match_boxes(self, gt_boxes: Tensor, boxes: Tensor) -> Tensor:
+        """
+        Same as ``self(box_ops.box_iou(gt_boxes, boxes))``, but the reductions are computed
+        directly from the boxes, without materializing the MxN IoU matrix.
+
+        Args:
+            gt_boxes (Tensor[M, 4]): the ground-truth boxes
+            boxes (Tensor[N, 4]): the predicted boxes, e.g. anchors or proposals
+
+        Returns:
+            matches (Tensor[int64]): an N tensor where N[i] is a matched gt in
+            [0, M - 1] or a negative value indicating that prediction i could not
+            be matched.
+        """
+        self._check_not_empty(gt_boxes.shape[0], boxes.shape[0])
+
+        matched_vals, matches, _, highest_quality = box_ops._box_iou_match(
+            gt_boxes, boxes, self.allow_low_quality_matches
+        )
+        if self.allow_low_quality_matches:
+            all_matches = matches.clone()
+        else:
+            all_matches = None  # type: ignore[assignment]
+
+        self._apply_thresholds_(matches, matched_vals)
+
+        if self.allow_low_quality_matches:
+            assert all_matches is not None
+            # see set_low_quality_matches_
+            matches[highest_quality] = all_matches[highest_quality]
+
+        return matches
+
+    def _check_not_empty(self, num_gt: int, num_predicted: int) -> None:
+        if num_gt == 0 or num_predicted == 0:
+            # empty targets or proposals not supported during training
+            if num_gt == 0:
+                raise ValueError("No ground-truth boxes available for one of the images during training")
+            else:
+                raise ValueError("No proposal boxes available for one of the images during training")
+
+    def _apply_thresholds_(self, matches: Tensor, matched_vals: Tensor) -> None:
+        # Assign candidate matches with low quality to negative (unassigned) values
+        below_low_threshold = matched_vals < self.low_threshold
+        between_thresholds = (matched_vals >= self.low_threshold) & (matched_vals < self.high_threshold)
+        matches[below_low_threshold] = self.BELOW_LOW_THRESHOLD
+        matches[between_thresholds] = self.BETWEEN_THRESHOLDS
+
     def set_low_quality_matches_(self, matches: Tensor, all_matches: Tensor, match_quality_matrix: Tensor) -> None:
         """
         Produce additional matches for predictions that have only low-quality matches.
@@ -344,6 +456,18 @@ class SSDMatcher(Matcher):
 
         return matches
 
+    def match_boxes(self, gt_boxes: Tensor, boxes: Tensor) -> Tensor:
+        self._check_not_empty(gt_boxes.shape[0], boxes.shape[0])
+
+        matched_vals, matches, highest_quality_pred_foreach_gt, _ = box_ops._box_iou_match(gt_boxes, boxes, False)
+        self._apply_thresholds_(matches, matched_vals)
+
+        matches[highest_quality_pred_foreach_gt] = torch.arange(
+            highest_quality_pred_foreach_gt.size(0), dtype=torch.int64, device=highest_quality_pred_foreach_gt.device
+        )
+
+        return matches
+
 
 def overwrite_eps(model: nn.Module, eps: float) -> None:
     """
@@ -391,3 +515,152 @@ def retrieve_out_channels(model: nn.Module, size: Tuple[int, int]) -> List[int]:
         model.train()
 
     return out_channels
+
+
+def _batched_nms_per_image(
+    boxes: List[Tensor], scores: List[Tensor], labels: List[Tensor], iou_threshold: float, detections_per_img: int
+) -> List[Dict[str, Tensor]]:
+    """
+    Runs the per-image non-maximum suppression of the detection post-processing
+    with a single :func:`~torchvision.ops.multi_image_batched_nms` call.
+
+    Args:
+        boxes (List[Tensor[N_i, 4]]): candidate boxes of every image
+        scores (List[Tensor[N_i]]): candidate scores of every image
+        labels (List[Tensor[N_i]]): non-negative candidate labels of every image
+        iou_threshold (float): NMS threshold
+        detections_per_img (int): maximum number of detections kept per image
+
+    Returns:
+        detections (List[Dict[str, Tensor]]): the kept boxes, scores and labels of every image
+    """
+    if len(boxes) == 0:
+        # pad_sequence does not accept an empty list
+        return []
+
+    # padding entries get a negative label and are ignored by the op
+    keep, num_keep = box_ops.multi_image_batched_nms(
+        pad_sequence(boxes, batch_first=True),
+        pad_sequence(scores, batch_first=True),
+        pad_sequence(labels, batch_first=True, padding_value=-1.0),
+        iou_threshold,
+        detections_per_img,
+    )
+
+    num_keep_per_image: List[int] = num_keep.tolist()
+    detections: List[Dict[str, Tensor]] = []
+    for index, num_kept in enumerate(num_keep_per_image):
+        keep_per_image = keep[index, :num_kept]
+        detections.append(
+            {
+                "boxes": boxes[index][keep_per_image],
+                "scores": scores[index][keep_per_image],
+                "labels": labels[index][keep_per_image],
+            }
+        )
+    return detections
+
+
+def _batched_nms_padded(
+    boxes: Tensor, scores: Tensor, labels: Tensor, iou_threshold: float, max_det: int
+) -> Tuple[Tensor, Tensor, Tensor]:
+    """
+    Runs the per-image non-maximum suppression of a padded batch and returns the kept
+    boxes, scores and labels padded to ``max_det`` per image, so that the output shapes
+    do not depend on the data.
+
+    Args:
+        boxes (Tensor[B, N, 4]): candidate boxes of every image
+        scores (Tensor[B, N]): candidate scores of every image
+        labels (Tensor[B, N]): candidate labels of every image, negative for the ignored candidates
+        iou_threshold (float): NMS threshold
+        max_det (int): number of detections per image
+
+    Returns:
+        boxes (Tensor[B, max_det, 4]), scores (Tensor[B, max_det]), labels (Tensor[B, max_det]): the kept
+        candidates sorted in decreasing order of scores, padded with empty boxes, zero scores and -1 labels
+    """
+    if torchvision._is_tracing() and boxes.device.type == "cpu" and _has_ops():
+        # recorded as a single op, so that the trace does not depend on the number of kept candidates
+        keep, _ = torch.ops.torchvision.multi_image_batched_nms(boxes, scores, labels, iou_threshold, max_det)
+    else:
+        keep, _ = box_ops.multi_image_batched_nms(boxes, scores, labels, iou_threshold, max_det)
+
+    valid = keep >= 0
+    keep = keep.clamp(min=0)
+    boxes = torch.where(valid[:, :, None], boxes.gather(1, keep[:, :, None].expand(-1, -1, 4)), boxes.new_zeros(()))
+    scores = torch.where(valid, scores.gather(1, keep), scores.new_zeros(()))
+    labels = torch.where(valid, labels.gather(1, keep), labels.new_full((), -1))
+    return boxes, scores, labels
+
+
+def _select_topk_per_segment(scores: Tensor, score_thresh: float, topk: int) -> Tuple[Tensor, Tensor, Tensor, Tensor]:
+    """
+    Selects, for every image and every segment of its candidates, the ``topk`` candidates with the highest scores
+    above ``score_thresh``, for all the images and segments at once.
+
+    Args:
+        scores (Tensor[B, S, L]): scores of the ``L`` candidates of the ``S`` segments of every image
+        score_thresh (float): only the candidates with a score greater than it are selected
+        topk (int): maximum number of candidates selected per image and segment
+
+    Returns:
+        image_idxs (Tensor[K]), segment_idxs (Tensor[K]), candidate_idxs (Tensor[K]), selected_scores (Tensor[K]):
+        the selected candidates, ordered by image, then segment, then decreasing score
+    """
+    num_topk = min(topk, scores.shape[-1])
+    top_scores, top_idxs = scores.topk(num_topk, dim=-1)
+    image_idxs, segment_idxs, ranks = torch.nonzero(top_scores > score_thresh).unbind(1)
+    return (
+        image_idxs,
+        segment_idxs,
+        top_idxs[image_idxs, segment_idxs, ranks],
+        top_scores[image_idxs, segment_idxs, ranks],
+    )
+
+
+def _postprocess_dense_detections(
+    box_coder: BoxCoder,
+    image_idxs: Tensor,
+    anchor_idxs: Tensor,
+    scores: Tensor,
+    labels: Tensor,
+    bbox_regression: Tensor,
+    anchors: Tensor,
+    image_shapes: List[Tuple[int, int]],
+    nms_thresh: float,
+    detections_per_img: int,
+) -> List[Dict[str, Tensor]]:
+    """
+    Post-processing of the candidates selected by :func:`_select_topk_per_segment` for the dense detectors: decodes
+    the boxes of the candidates only, for all the images at once, and runs the per-image non-maximum suppression.
+
+    Args:
+        box_coder (BoxCoder): decodes the boxes
+        image_idxs (Tensor[K]): image of every candidate, the candidates being ordered by image
+        anchor_idxs (Tensor[K]): anchor of every candidate
+        scores (Tensor[K]): score of every candidate
+        labels (Tensor[K]): label of every candidate
+        bbox_regression (Tensor[B, A, 4]): box regression of every anchor
+        anchors (Tensor[B, A, 4]): anchors of every image
+        image_shapes (List[Tuple[int, int]]): height and width of every image
+        nms_thresh (float): NMS threshold
+        detections_per_img (int): maximum number of detections kept per image
+
+    Returns:
+        detections (List[Dict[str, Tensor]]): the boxes, scores and labels of every image
+    """
+    boxes_per_image: List[int] = torch.bincount(image_idxs, minlength=len(image_shapes)).tolist()
+    boxes = box_coder.decode_and_clip(
+        bbox_regression[image_idxs, anchor_idxs],
+        list(anchors[image_idxs, anchor_idxs].split(boxes_per_image)),
+        image_shapes,
+    ).reshape(-1, 4)
+
+    return _batched_nms_per_image(
+        list(boxes.split(boxes_per_image)),
+        list(scores.split(boxes_per_image)),
+        list(labels.split(boxes_per_image)),
+        nms_thresh,
+        detections_per_img,
+    )
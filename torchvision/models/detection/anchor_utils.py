@@ -1,8 +1,10 @@
 import math
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 import torch
+import torchvision
 from torch import nn, Tensor
+from torchvision.ops._utils import _LRUCacheKeys
 
 from .image_list import ImageList
 
@@ -23,19 +25,27 @@ class AnchorGenerator(nn.Module):
     and AnchorGenerator will output a set of sizes[i] * aspect_ratios[i] anchors
     per spatial location for feature map i.
 
+    The anchors are cached for the last ``cache_size`` combinations of grid sizes, strides,
+    dtype and device, and the same tensor is returned for all the images of a batch. They
+    should not be modified in-place. The ``cache_hits`` and ``cache_misses`` attributes count
+    the calls served from the cache and the ones that had to compute the anchors.
+
     Args:
         sizes (Tuple[Tuple[int]]):
         aspect_ratios (Tuple[Tuple[float]]):
+        cache_size (int): maximum number of cached sets of anchors
     """
 
     __annotations__ = {
         "cell_anchors": List[torch.Tensor],
+        "_anchors_cache": Dict[str, Tensor],
     }
 
     def __init__(
         self,
         sizes=((128, 256, 512),),
         aspect_ratios=((0.5, 1.0, 2.0),),
+        cache_size: int = 8,
     ):
         super().__init__()
 
@@ -52,6 +62,9 @@ class AnchorGenerator(nn.Module):
         self.cell_anchors = [
             self.generate_anchors(size, aspect_ratio) for size, aspect_ratio in zip(sizes, aspect_ratios)
         ]
+        self.cache_size = cache_size
+        self._anchors_cache = {}
+        self._anchors_cache_keys = _LRUCacheKeys(cache_size)
 
     # TODO: https://github.com/pytorch/pytorch/issues/26792
     # For every (aspect_ratios, scales) combination, output a zero-centered anchor with those values.
@@ -81,6 +94,14 @@ class AnchorGenerator(nn.Module):
     def num_anchors_per_location(self):
         return [len(s) * len(a) for s, a in zip(self.sizes, self.aspect_ratios)]
 
+    @property
+    def cache_hits(self) -> int:
+        return self._anchors_cache_keys.hits
+
+    @property
+    def cache_misses(self) -> int:
+        return self._anchors_cache_keys.misses
+
     # For every combination of (a, (g, s), i) in (self.cell_anchors, zip(grid_sizes, strides), 0:2),
     # output g[i] anchors that are s[i] distance apart in direction i, with the same dimensions as a.
     def grid_anchors(self, grid_sizes: List[List[int]], strides: List[List[Tensor]]) -> List[Tensor]:
@@ -115,10 +136,12 @@ class AnchorGenerator(nn.Module):
 
         return anchors
 
-    def forward(self, image_list: ImageList, feature_maps: List[Tensor]) -> List[Tensor]:
+    def _compute_anchors(self, image_list: ImageList, feature_maps: List[Tensor]) -> Tensor:
         grid_sizes = [feature_map.shape[-2:] for feature_map in feature_maps]
         image_size = image_list.tensors.shape[-2:]
-        dtype, device = feature_maps[0].dtype, feature_maps[0].device
+        # the anchors follow the dtype of the images rather than the one of the feature maps, which is
+        # reduced under autocast and would round the anchors of large images
+        dtype, device = image_list.tensors.dtype, feature_maps[0].device
         strides = [
             [
                 torch.tensor(image_size[0] // g[0], dtype=torch.int64, device=device),
@@ -128,12 +151,32 @@ class AnchorGenerator(nn.Module):
         ]
         self.set_cell_anchors(dtype, device)
         anchors_over_all_feature_maps = self.grid_anchors(grid_sizes, strides)
-        anchors: List[List[torch.Tensor]] = []
-        for _ in range(len(image_list.image_sizes)):
-            anchors_in_image = [anchors_per_feature_map for anchors_per_feature_map in anchors_over_all_feature_maps]
-            anchors.append(anchors_in_image)
-        anchors = [torch.cat(anchors_per_image) for anchors_per_image in anchors]
-        return anchors
+        return torch.cat(anchors_over_all_feature_maps)
+
+    def forward(self, image_list: ImageList, feature_maps: List[Tensor]) -> List[Tensor]:
+        num_images = len(image_list.image_sizes)
+        if torchvision._is_tracing():
+            # the anchors must be part of the traced graph to follow the input sizes
+            anchors = self._compute_anchors(image_list, feature_maps)
+            return [anchors for _ in range(num_images)]
+
+        # the anchors only depend on the grid sizes and the strides of the feature maps
+        image_size = image_list.tensors.shape[-2:]
+        feature_map = feature_maps[0]
+        key = f"{image_list.tensors.dtype},{feature_map.device}"
+        for feature_map in feature_maps:
+            grid_height, grid_width = feature_map.shape[-2:]
+            key += f",{grid_height}x{grid_width}/{image_size[0] // grid_height}x{image_size[1] // grid_width}"
+
+        if self._anchors_cache_keys.lookup(key):
+            anchors = self._anchors_cache[key]
+        else:
+            anchors = self._compute_anchors(image_list, feature_maps)
+            evicted = self._anchors_cache_keys.insert(key)
+            if evicted is not None:
+                del self._anchors_cache[evicted]
+            self._anchors_cache[key] = anchors
+        return [anchors for _ in range(num_images)]
 
 
 class DefaultBoxGenerator(nn.Module):
@@ -152,8 +195,16 @@ class DefaultBoxGenerator(nn.Module):
             it will be estimated from the data.
         clip (bool): Whether the standardized values of default boxes should be clipped between 0 and 1. The clipping
             is applied while the boxes are encoded in format ``(cx, cy, w, h)``.
+        cache_size (int): The maximum number of cached sets of default boxes. They are cached for the last
+            ``cache_size`` combinations of grid sizes, image size, dtype and device, and the same tensor is returned
+            for all the images of a batch. The ``cache_hits`` and ``cache_misses`` attributes count the calls served
+            from the cache and the ones that had to compute the boxes.
     """
 
+    __annotations__ = {
+        "_default_boxes_cache": Dict[str, Tensor],
+    }
+
     def __init__(
         self,
         aspect_ratios: List[List[int]],
@@ -162,6 +213,7 @@ class DefaultBoxGenerator(nn.Module):
         scales: Optional[List[float]] = None,
         steps: Optional[List[int]] = None,
         clip: bool = True,
+        cache_size: int = 8,
     ):
         super().__init__()
         if steps is not None:
@@ -183,6 +235,9 @@ class DefaultBoxGenerator(nn.Module):
             self.scales = scales
 
         self._wh_pairs = self._generate_wh_pairs(num_outputs)
+        self.cache_size = cache_size
+        self._default_boxes_cache = {}
+        self._default_boxes_cache_keys = _LRUCacheKeys(cache_size)
 
     def _generate_wh_pairs(
         self, num_outputs: int, dtype: torch.dtype = torch.float32, device: torch.device = torch.device("cpu")
@@ -209,6 +264,14 @@ class DefaultBoxGenerator(nn.Module):
         return [2 + 2 * len(r) for r in self.aspect_ratios]
 
     # Default Boxes calculation based on page 6 of SSD paper
+    @property
+    def cache_hits(self) -> int:
+        return self._default_boxes_cache_keys.hits
+
+    @property
+    def cache_misses(self) -> int:
+        return self._default_boxes_cache_keys.misses
+
     def _grid_default_boxes(
         self, grid_sizes: List[List[int]], image_size: List[int], dtype: torch.dtype = torch.float32
     ) -> Tensor:
@@ -247,24 +310,44 @@ class DefaultBoxGenerator(nn.Module):
         s += ")"
         return s.format(**self.__dict__)
 
-    def forward(self, image_list: ImageList, feature_maps: List[Tensor]) -> List[Tensor]:
+    def _compute_default_boxes(self, image_list: ImageList, feature_maps: List[Tensor]) -> Tensor:
         grid_sizes = [feature_map.shape[-2:] for feature_map in feature_maps]
         image_size = image_list.tensors.shape[-2:]
-        dtype, device = feature_maps[0].dtype, feature_maps[0].device
+        # in the dtype of the images, as in AnchorGenerator
+        dtype, device = image_list.tensors.dtype, feature_maps[0].device
         default_boxes = self._grid_default_boxes(grid_sizes, image_size, dtype=dtype)
         default_boxes = default_boxes.to(device)
 
-        dboxes = []
-        for _ in image_list.image_sizes:
-            dboxes_in_image = default_boxes
-            dboxes_in_image = torch.cat(
-                [
-                    dboxes_in_image[:, :2] - 0.5 * dboxes_in_image[:, 2:],
-                    dboxes_in_image[:, :2] + 0.5 * dboxes_in_image[:, 2:],
-                ],
-                -1,
-            )
-            dboxes_in_image[:, 0::2] *= image_size[1]
-            dboxes_in_image[:, 1::2] *= image_size[0]
-            dboxes.append(dboxes_in_image)
+        dboxes = torch.cat(
+            [
+                default_boxes[:, :2] - 0.5 * default_boxes[:, 2:],
+                default_boxes[:, :2] + 0.5 * default_boxes[:, 2:],
+            ],
+            -1,
+        )
+        dboxes[:, 0::2] *= image_size[1]
+        dboxes[:, 1::2] *= image_size[0]
         return dboxes
+
+    def forward(self, image_list: ImageList, feature_maps: List[Tensor]) -> List[Tensor]:
+        num_images = len(image_list.image_sizes)
+        if torchvision._is_tracing():
+            # the boxes must be part of the traced graph to follow the input sizes
+            dboxes = self._compute_default_boxes(image_list, feature_maps)
+            return [dboxes for _ in range(num_images)]
+
+        image_size = image_list.tensors.shape[-2:]
+        feature_map = feature_maps[0]
+        key = f"{image_list.tensors.dtype},{feature_map.device},{image_size[0]}x{image_size[1]}"
+        for feature_map in feature_maps:
+            key += f",{feature_map.shape[-2]}x{feature_map.shape[-1]}"
+
+        if self._default_boxes_cache_keys.lookup(key):
+            dboxes = self._default_boxes_cache[key]
+        else:
+            dboxes = self._compute_default_boxes(image_list, feature_maps)
+            evicted = self._default_boxes_cache_keys.insert(key)
+            if evicted is not None:
+                del self._default_boxes_cache[evicted]
+            self._default_boxes_cache[key] = dboxes
+        return [dboxes for _ in range(num_images)]
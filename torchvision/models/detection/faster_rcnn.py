@@ -100,6 +100,15 @@ class FasterRCNN(GeneralizedRCNN):
             of the classification head
         bbox_reg_weights (Tuple[float, float, float, float]): weights for the encoding/decoding of the
             bounding boxes
+        static_shapes (bool): if True, the shapes of all the tensors computed during inference do not depend
+            on the data, so that the model can be traced once and the trace reused: the images are padded to a
+            fixed size, and every image gets exactly ``rpn_post_nms_top_n_test`` proposals and
+            ``box_detections_per_img`` detections, the padding detections having empty boxes, zero scores
+            and -1 labels. The valid detections are the same as without ``static_shapes`` only if the images
+            are padded to the same size, e.g. with the same ``fixed_size`` for the transform. Otherwise the
+            extra padding changes the features near the borders, and its anchors compete for the
+            ``rpn_pre_nms_top_n_test`` proposals of each level. RetinaNet and SSD have no such mode.
+            Default: False
 
     Example::
 
@@ -178,6 +187,7 @@ class FasterRCNN(GeneralizedRCNN):
         box_batch_size_per_image=512,
         box_positive_fraction=0.25,
         bbox_reg_weights=None,
+        static_shapes=False,
     ):
 
         if not hasattr(backbone, "out_channels"):
@@ -220,6 +230,7 @@ class FasterRCNN(GeneralizedRCNN):
             rpn_post_nms_top_n,
             rpn_nms_thresh,
             score_thresh=rpn_score_thresh,
+            static_shapes=static_shapes,
         )
 
         if box_roi_pool is None:
@@ -247,13 +258,14 @@ class FasterRCNN(GeneralizedRCNN):
             box_score_thresh,
             box_nms_thresh,
             box_detections_per_img,
+            static_shapes=static_shapes,
         )
 
         if image_mean is None:
             image_mean = [0.485, 0.456, 0.406]
         if image_std is None:
             image_std = [0.229, 0.224, 0.225]
-        transform = GeneralizedRCNNTransform(min_size, max_size, image_mean, image_std)
+        transform = GeneralizedRCNNTransform(min_size, max_size, image_mean, image_std, static_shapes=static_shapes)
 
         super().__init__(backbone, rpn, roi_heads, transform)
 
@@ -96,7 +96,16 @@ class GeneralizedRCNN(nn.Module):
         if isinstance(features, torch.Tensor):
             features = OrderedDict([("0", features)])
         proposals, proposal_losses = self.rpn(images, features, targets)
-        detections, detector_losses = self.roi_heads(features, proposals, images.image_sizes, targets)
+        # static_shapes is a constant of the transform, so scripting only compiles the
+        # call that is used and custom roi_heads don't need to accept batch_image_shape
+        if self.transform.static_shapes:
+            # the images may be padded far beyond their sizes, with static shapes
+            batch_image_shape = (images.tensors.shape[-2], images.tensors.shape[-1])
+            detections, detector_losses = self.roi_heads(
+                features, proposals, images.image_sizes, targets, batch_image_shape=batch_image_shape
+            )
+        else:
+            detections, detector_losses = self.roi_heads(features, proposals, images.image_sizes, targets)
         detections = self.transform.postprocess(detections, images.image_sizes, original_image_sizes)  # type: ignore[operator]
 
         losses = {}
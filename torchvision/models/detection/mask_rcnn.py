@@ -102,6 +102,15 @@ class MaskRCNN(FasterRCNN):
         mask_head (nn.Module): module that takes the cropped feature maps as input
         mask_predictor (nn.Module): module that takes the output of the mask_head and returns the
             segmentation mask logits
+        static_shapes (bool): if True, the shapes of all the tensors computed during inference do not depend
+            on the data, so that the model can be traced once and the trace reused: the images are padded to a
+            fixed size, and every image gets exactly ``rpn_post_nms_top_n_test`` proposals and
+            ``box_detections_per_img`` detections, the padding detections having empty boxes, zero scores
+            and -1 labels. The valid detections are the same as without ``static_shapes`` only if the images
+            are padded to the same size, e.g. with the same ``fixed_size`` for the transform. Otherwise the
+            extra padding changes the features near the borders, and its anchors compete for the
+            ``rpn_pre_nms_top_n_test`` proposals of each level. RetinaNet and SSD have no such mode.
+            Default: False
 
     Example::
 
@@ -189,6 +198,7 @@ class MaskRCNN(FasterRCNN):
         mask_roi_pool=None,
         mask_head=None,
         mask_predictor=None,
+        static_shapes=False,
     ):
 
         assert isinstance(mask_roi_pool, (MultiScaleRoIAlign, type(None)))
@@ -245,6 +255,7 @@ class MaskRCNN(FasterRCNN):
             box_batch_size_per_image,
             box_positive_fraction,
             bbox_reg_weights,
+            static_shapes=static_shapes,
         )
 
         self.roi_heads.mask_roi_pool = mask_roi_pool
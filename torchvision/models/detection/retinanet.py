@@ -8,7 +8,6 @@ from torch import nn, Tensor
 
 from ..._internally_replaced_utils import load_state_dict_from_url
 from ...ops import sigmoid_focal_loss
-from ...ops import boxes as box_ops
 from ...ops import misc as misc_nn_ops
 from ...ops.feature_pyramid_network import LastLevelP6P7
 from ...utils import _log_api_usage_once
@@ -401,8 +400,7 @@ class RetinaNet(nn.Module):
                 )
                 continue
 
-            match_quality_matrix = box_ops.box_iou(targets_per_image["boxes"], anchors_per_image)
-            matched_idxs.append(self.proposal_matcher(match_quality_matrix))
+            matched_idxs.append(self.proposal_matcher.match_boxes(targets_per_image["boxes"], anchors_per_image))
 
         return self.head.compute_loss(targets, head_outputs, anchors, matched_idxs)
 
@@ -411,64 +409,41 @@ class RetinaNet(nn.Module):
         class_logits = head_outputs["cls_logits"]
         box_regression = head_outputs["bbox_regression"]
 
-        num_images = len(image_shapes)
-
-        detections: List[Dict[str, Tensor]] = []
-
-        for index in range(num_images):
-            box_regression_per_image = [br[index] for br in box_regression]
-            logits_per_image = [cl[index] for cl in class_logits]
-            anchors_per_image, image_shape = anchors[index], image_shapes[index]
-
-            image_boxes = []
-            image_scores = []
-            image_labels = []
-
-            for box_regression_per_level, logits_per_level, anchors_per_level in zip(
-                box_regression_per_image, logits_per_image, anchors_per_image
-            ):
-                num_classes = logits_per_level.shape[-1]
-
-                # remove low scoring boxes
-                scores_per_level = torch.sigmoid(logits_per_level).flatten()
-                keep_idxs = scores_per_level > self.score_thresh
-                scores_per_level = scores_per_level[keep_idxs]
-                topk_idxs = torch.where(keep_idxs)[0]
-
-                # keep only topk scoring predictions
-                num_topk = min(self.topk_candidates, topk_idxs.size(0))
-                scores_per_level, idxs = scores_per_level.topk(num_topk)
-                topk_idxs = topk_idxs[idxs]
-
-                anchor_idxs = torch.div(topk_idxs, num_classes, rounding_mode="floor")
-                labels_per_level = topk_idxs % num_classes
-
-                boxes_per_level = self.box_coder.decode_single(
-                    box_regression_per_level[anchor_idxs], anchors_per_level[anchor_idxs]
-                )
-                boxes_per_level = box_ops.clip_boxes_to_image(boxes_per_level, image_shape)
-
-                image_boxes.append(boxes_per_level)
-                image_scores.append(scores_per_level)
-                image_labels.append(labels_per_level)
-
-            image_boxes = torch.cat(image_boxes, dim=0)
-            image_scores = torch.cat(image_scores, dim=0)
-            image_labels = torch.cat(image_labels, dim=0)
-
-            # non-maximum suppression
-            keep = box_ops.batched_nms(image_boxes, image_scores, image_labels, self.nms_thresh)
-            keep = keep[: self.detections_per_img]
-
-            detections.append(
-                {
-                    "boxes": image_boxes[keep],
-                    "scores": image_scores[keep],
-                    "labels": image_labels[keep],
-                }
+        num_classes = class_logits[0].shape[-1]
+
+        # the topk candidates of every level are selected for all the images at once, and the boxes of the
+        # candidates of all the levels decoded together
+        all_image_idxs = []
+        all_anchor_idxs = []
+        all_scores = []
+        all_labels = []
+        anchor_offset = 0
+        for logits_per_level in class_logits:
+            scores_per_level = torch.sigmoid(logits_per_level).flatten(1).unsqueeze(1)
+            image_idxs, _, topk_idxs, scores = det_utils._select_topk_per_segment(
+                scores_per_level, self.score_thresh, self.topk_candidates
             )
-
-        return detections
+            all_image_idxs.append(image_idxs)
+            all_anchor_idxs.append(torch.div(topk_idxs, num_classes, rounding_mode="floor") + anchor_offset)
+            all_scores.append(scores)
+            all_labels.append(topk_idxs % num_classes)
+            anchor_offset += logits_per_level.shape[1]
+
+        # order the candidates by image, then level
+        image_idxs, order = torch.sort(torch.cat(all_image_idxs), stable=True)
+
+        return det_utils._postprocess_dense_detections(
+            self.box_coder,
+            image_idxs,
+            torch.cat(all_anchor_idxs)[order],
+            torch.cat(all_scores)[order],
+            torch.cat(all_labels)[order],
+            torch.cat(box_regression, dim=1),
+            torch.stack([torch.cat(anchors_per_image) for anchors_per_image in anchors]),
+            image_shapes,
+            self.nms_thresh,
+            self.detections_per_img,
+        )
 
     def forward(self, images, targets=None):
         # type: (List[Tensor], Optional[List[Dict[str, Tensor]]]) -> Tuple[Dict[str, Tensor], List[Dict[str, Tensor]]]
@@ -163,6 +163,31 @@ def keypoints_to_heatmap(keypoints, rois, heatmap_size):
     return heatmaps, valid
 
 
+def _split_by_size(sizes, numel_per_pixel):
+    # type: (List[List[int]], int) -> List[List[int]]
+    """
+    Splits items of sizes ``[w, h]`` into chunks ``[begin, end, max_w, max_h]`` of consecutive items that hold at
+    most about 2 ** 22 elements once padded to the largest size of the chunk, to bound the memory of the
+    intermediate tensors of the batched computations.
+    """
+    max_numel = 1 << 22
+    chunks: List[List[int]] = []
+    num_items = len(sizes)
+    begin = 0
+    while begin < num_items:
+        max_w, max_h = sizes[begin][0], sizes[begin][1]
+        end = begin + 1
+        while end < num_items:
+            w, h = max(max_w, sizes[end][0]), max(max_h, sizes[end][1])
+            if (end + 1 - begin) * w * h * numel_per_pixel > max_numel:
+                break
+            max_w, max_h = w, h
+            end += 1
+        chunks.append([begin, end, max_w, max_h])
+        begin = end
+    return chunks
+
+
 def _onnx_heatmaps_to_keypoints(
     maps, maps_i, roi_map_width, roi_map_height, widths_i, heights_i, offset_x_i, offset_y_i
 ):
@@ -232,6 +257,39 @@ def _onnx_heatmaps_to_keypoints_loop(
     return xy_preds, end_scores
 
 
+def _bicubic_interpolation_matrix(out_sizes, max_out_size, in_size, dtype):
+    # type: (Tensor, int, int, torch.dtype) -> Tensor
+    """
+    Matrices[N, max_out_size, in_size] of the bicubic interpolation, along one dimension, of signals of size
+    ``in_size`` resized to ``out_sizes[N]``, computed as in F.interpolate(mode="bicubic", align_corners=False).
+    The rows beyond ``out_sizes[i]`` repeat the last one.
+    """
+    out_sizes = out_sizes.clamp(min=1)
+    # not in_size / out_size, which multiplies by the reciprocal of out_size
+    scale = torch.full(out_sizes.shape, float(in_size), device=out_sizes.device) / out_sizes.to(torch.float32)
+    dst = torch.min(torch.arange(max_out_size, device=out_sizes.device)[None, :], out_sizes[:, None] - 1)
+    src = scale[:, None] * (dst.to(torch.float32) + 0.5) - 0.5
+    src_floor = src.floor()
+    t = src - src_floor
+
+    # cubic convolution coefficients, with A = -0.75
+    a = -0.75
+    x1 = t + 1
+    x2 = 1 - t
+    x3 = 2 - t
+    coefficients = [
+        ((a * x1 - 5 * a) * x1 + 8 * a) * x1 - 4 * a,
+        ((a + 2) * t - (a + 3)) * t * t + 1,
+        ((a + 2) * x2 - (a + 3)) * x2 * x2 + 1,
+        ((a * x3 - 5 * a) * x3 + 8 * a) * x3 - 4 * a,
+    ]
+    matrix = torch.zeros((out_sizes.shape[0], max_out_size, in_size), dtype=dtype, device=out_sizes.device)
+    for k, coefficient in enumerate(coefficients):
+        index = (src_floor.to(torch.int64) + k - 1).clamp(min=0, max=in_size - 1)
+        matrix.scatter_add_(2, index[:, :, None], coefficient.to(dtype)[:, :, None])
+    return matrix
+
+
 def heatmaps_to_keypoints(maps, rois):
     """Extract predicted keypoint locations from heatmaps. Output has shape
     (#rois, 4, #keypoints) with the 4 rows corresponding to (x, y, logit, prob)
@@ -268,30 +326,38 @@ def heatmaps_to_keypoints(maps, rois):
         )
         return xy_preds.permute(0, 2, 1), end_scores
 
-    xy_preds = torch.zeros((len(rois), 3, num_keypoints), dtype=torch.float32, device=maps.device)
+    xy_preds = torch.ones((len(rois), 3, num_keypoints), dtype=torch.float32, device=maps.device)
     end_scores = torch.zeros((len(rois), num_keypoints), dtype=torch.float32, device=maps.device)
-    for i in range(len(rois)):
-        roi_map_width = int(widths_ceil[i].item())
-        roi_map_height = int(heights_ceil[i].item())
-        width_correction = widths[i] / roi_map_width
-        height_correction = heights[i] / roi_map_height
-        roi_map = F.interpolate(
-            maps[i][:, None], size=(roi_map_height, roi_map_width), mode="bicubic", align_corners=False
-        )[:, 0]
-        # roi_map_probs = scores_to_probs(roi_map.copy())
-        w = roi_map.shape[2]
-        pos = roi_map.reshape(num_keypoints, -1).argmax(dim=1)
-
-        x_int = pos % w
-        y_int = torch.div(pos - x_int, w, rounding_mode="floor")
-        # assert (roi_map_probs[k, y_int, x_int] ==
-        #         roi_map_probs[k, :, :].max())
-        x = (x_int.float() + 0.5) * width_correction
-        y = (y_int.float() + 0.5) * height_correction
-        xy_preds[i, 0, :] = x + offset_x[i]
-        xy_preds[i, 1, :] = y + offset_y[i]
-        xy_preds[i, 2, :] = 1
-        end_scores[i, :] = roi_map[torch.arange(num_keypoints, device=roi_map.device), y_int, x_int]
+    # The heatmaps of each roi are resized to (roi_map_height, roi_map_width) with two batched matmuls. The rois are
+    # processed by chunks of similar sizes, their maps being resized to the largest size of the chunk, with the
+    # last row and column repeated.
+    map_widths = widths_ceil.to(torch.int64)
+    map_heights = heights_ceil.to(torch.int64)
+    order = torch.argsort(map_widths * map_heights)
+    map_sizes: List[List[int]] = torch.stack([map_widths, map_heights], dim=1)[order].tolist()
+    # [N, K, H, W] -> [N, H, K * W], to resize the rows first and get the resized maps as [N, height, K, width]
+    maps = maps.permute(0, 2, 1, 3)
+    for begin, end, max_w, max_h in _split_by_size(map_sizes, num_keypoints):
+        idx = order[begin:end]
+        matrix_x = _bicubic_interpolation_matrix(map_widths[idx], max_w, maps.shape[3], maps.dtype)
+        matrix_y = _bicubic_interpolation_matrix(map_heights[idx], max_h, maps.shape[1], maps.dtype)
+        roi_maps = torch.bmm(matrix_y, maps[idx].reshape(len(idx), maps.shape[1], -1))
+        roi_maps = torch.bmm(roi_maps.reshape(len(idx), -1, maps.shape[3]), matrix_x.transpose(1, 2))
+        roi_maps = roi_maps.reshape(len(idx), max_h, num_keypoints, max_w)
+
+        # the first maximum in row-major order, as argmax over the flattened map
+        row_scores, row_x_int = roi_maps.max(dim=3)
+        scores, y_int = row_scores.max(dim=1)
+        x_int = row_x_int.gather(1, y_int[:, None]).squeeze(1)
+        # the repeated rows and columns have the values of the last ones
+        x_int = torch.min(x_int, map_widths[idx, None] - 1)
+        y_int = torch.min(y_int, map_heights[idx, None] - 1)
+
+        width_correction = widths[idx] / widths_ceil[idx]
+        height_correction = heights[idx] / heights_ceil[idx]
+        xy_preds[idx, 0] = (x_int.float() + 0.5) * width_correction[:, None] + offset_x[idx, None]
+        xy_preds[idx, 1] = (y_int.float() + 0.5) * height_correction[:, None] + offset_y[idx, None]
+        end_scores[idx] = scores.float()
 
     return xy_preds.permute(0, 2, 1), end_scores
 
@@ -469,24 +535,209 @@ def _onnx_paste_masks_in_image_loop(masks, boxes, im_h, im_w):
     return res_append
 
 
-def paste_masks_in_image(masks, boxes, img_shape, padding=1):
-    # type: (Tensor, Tensor, Tuple[int, int], int) -> Tensor
-    masks, scale = expand_masks(masks, padding=padding)
-    boxes = expand_boxes(boxes, scale).to(dtype=torch.int64)
+def _paste_interpolation_matrix(coords, start, end, in_size, dtype):
+    # type: (Tensor, Tensor, Tensor, int, torch.dtype) -> Tensor
+    """
+    Matrices[N, L, in_size] of the bilinear interpolation, along one dimension, of masks of size ``in_size``
+    resized to ``end - start + 1`` pixels and pasted at ``start``, at the image coordinates ``coords[N, L]``.
+    The weights are computed as in F.interpolate(mode="bilinear", align_corners=False), and are zero outside of
+    the range [start, end].
+    """
+    out_size = (end - start + 1).clamp(min=1).to(torch.float32)
+    # not in_size / out_size, which multiplies by the reciprocal of out_size
+    scale = torch.full_like(out_size, float(in_size)) / out_size
+    dst = (coords - start[:, None]).to(torch.float32)
+    src = (scale[:, None] * (dst + 0.5) - 0.5).clamp(min=0)
+    lo = src.to(torch.int64).clamp(max=in_size - 1)
+    hi = lo + (lo < in_size - 1).to(torch.int64)
+    w_hi = (src - lo).clamp(min=0, max=1)
+    w_lo = 1 - w_hi
+    valid = ((coords >= start[:, None]) & (coords <= end[:, None])).to(w_hi.dtype)
+
+    matrix = torch.zeros(coords.shape + (in_size,), dtype=dtype, device=coords.device)
+    matrix.scatter_add_(2, lo[:, :, None], (w_lo * valid).to(dtype)[:, :, None])
+    matrix.scatter_add_(2, hi[:, :, None], (w_hi * valid).to(dtype)[:, :, None])
+    return matrix
+
+
+def _paste_masks_chunk(masks, boxes, ys, xs):
+    # type: (Tensor, Tensor, Tensor, Tensor) -> Tensor
+    """
+    Resizes each mask of ``masks[N, M, M]`` to its box of ``boxes[N, 4]`` and samples it at the image rows
+    ``ys[N, H]`` and columns ``xs[N, W]``, which gives the same values as paste_mask_in_image at these
+    coordinates, up to float rounding.
+    """
+    mask_h, mask_w = masks.shape[1:]
+    matrix_x = _paste_interpolation_matrix(xs, boxes[:, 0], boxes[:, 2], mask_w, masks.dtype)
+    matrix_y = _paste_interpolation_matrix(ys, boxes[:, 1], boxes[:, 3], mask_h, masks.dtype)
+    # each row of the matrices has at most two non-zero weights, which sum to one
+    return torch.bmm(matrix_y, torch.bmm(masks, matrix_x.transpose(1, 2)))
+
+
+def _paste_masks_in_regions(masks, boxes, img_shape, padding, threshold, out):
+    # type: (Tensor, Tensor, Tuple[int, int], int, Optional[float], Optional[Tensor]) -> Tuple[List[Tensor], Tensor]
+    # Pastes the masks by chunks, only computing the pixels of the image that lie in their boxes. The crops are
+    # copied into out[N, 1, H, W] if it is given, and returned otherwise.
     im_h, im_w = img_shape
+    masks, scale = expand_masks(masks[:, 0], padding=padding)
+    boxes = expand_boxes(boxes, scale).to(dtype=torch.int64)
+    regions = torch.stack(
+        [
+            boxes[:, 0].clamp(min=0, max=im_w),
+            boxes[:, 1].clamp(min=0, max=im_h),
+            (boxes[:, 2] + 1).clamp(min=0, max=im_w),
+            (boxes[:, 3] + 1).clamp(min=0, max=im_h),
+        ],
+        dim=1,
+    )
+    regions[:, 2:] = torch.max(regions[:, 2:], regions[:, :2])
+    regions_list: List[List[int]] = regions.tolist()
+    sizes: List[List[int]] = (regions[:, 2:] - regions[:, :2]).tolist()
+
+    crops: List[Tensor] = []
+    for begin, end, max_w, max_h in _split_by_size(sizes, 1):
+        offsets_y = torch.arange(max_h, device=masks.device)
+        offsets_x = torch.arange(max_w, device=masks.device)
+        chunk = _paste_masks_chunk(
+            masks[begin:end],
+            boxes[begin:end],
+            regions[begin:end, 1, None] + offsets_y,
+            regions[begin:end, 0, None] + offsets_x,
+        )
+        if threshold is not None:
+            chunk = chunk > threshold
+        for i in range(begin, end):
+            region = regions_list[i]
+            crop = chunk[i - begin, : sizes[i][1], : sizes[i][0]]
+            if out is not None:
+                out[i, 0, region[1] : region[3], region[0] : region[2]] = crop
+            else:
+                crops.append(crop)
+    return crops, regions
 
+
+def paste_masks_in_image(masks, boxes, img_shape, padding=1, threshold=None):
+    # type: (Tensor, Tensor, Tuple[int, int], int, Optional[float]) -> Tensor
+    """
+    Pastes the masks predicted for the boxes in the image, resizing each of them to its box.
+
+    The masks are resized by chunks, and only in the part of the image covered by their box. When ``threshold``
+    is given, the returned masks are boolean.
+
+    Args:
+        masks (Tensor[N, 1, M, M]): predicted masks
+        boxes (Tensor[N, 4]): boxes in ``(x1, y1, x2, y2)`` format
+        img_shape (Tuple[int, int]): height and width of the image
+        padding (int): number of pixels the masks are padded with before being resized
+        threshold (float, optional): if given, the masks are binarized, ``mask > threshold``
+
+    Returns:
+        Tensor[N, 1, H, W]: the masks pasted in the image
+    """
+    im_h, im_w = img_shape
     if torchvision._is_tracing():
-        return _onnx_paste_masks_in_image_loop(
+        masks, scale = expand_masks(masks, padding=padding)
+        boxes = expand_boxes(boxes, scale).to(dtype=torch.int64)
+        ret = _onnx_paste_masks_in_image_loop(
             masks, boxes, torch.scalar_tensor(im_h, dtype=torch.int64), torch.scalar_tensor(im_w, dtype=torch.int64)
         )[:, None]
-    res = [paste_mask_in_image(m[0], b, im_h, im_w) for m, b in zip(masks, boxes)]
-    if len(res) > 0:
-        ret = torch.stack(res, dim=0)[:, None]
-    else:
-        ret = masks.new_empty((0, 1, im_h, im_w))
+        if threshold is not None:
+            ret = ret > threshold
+        return ret
+
+    dtype = torch.bool if threshold is not None else masks.dtype
+    ret = torch.zeros((masks.shape[0], 1, im_h, im_w), dtype=dtype, device=masks.device)
+    _paste_masks_in_regions(masks, boxes, img_shape, padding, threshold, ret)
     return ret
 
 
+def paste_masks_in_boxes(masks, boxes, img_shape, padding=1, threshold=None):
+    # type: (Tensor, Tensor, Tuple[int, int], int, Optional[float]) -> Tuple[List[Tensor], Tensor]
+    """
+    Same as :func:`paste_masks_in_image`, but only returns the part of each pasted mask that lies in its box,
+    instead of a full image per detection.
+
+    Args:
+        masks (Tensor[N, 1, M, M]): predicted masks
+        boxes (Tensor[N, 4]): boxes in ``(x1, y1, x2, y2)`` format
+        img_shape (Tuple[int, int]): height and width of the image
+        padding (int): number of pixels the masks are padded with before being resized
+        threshold (float, optional): if given, the masks are binarized, ``mask > threshold``
+
+    Returns:
+        crops (List[Tensor[h_i, w_i]]): the pasted masks, cropped to their region of the image
+        regions (Tensor[N, 4]): the regions of the image ``(x1, y1, x2, y2)``, end excluded, covered by the crops.
+            ``paste_masks_in_image(masks, boxes, img_shape)[i, 0, y1:y2, x1:x2]`` is ``crops[i]`` and the rest of
+            that mask is zero.
+    """
+    return _paste_masks_in_regions(masks, boxes, img_shape, padding, threshold, None)
+
+
+def _encode_rle(crops, regions, img_shape):
+    # type: (List[Tensor], Tensor, Tuple[int, int]) -> List[Tensor]
+    # Uncompressed COCO RLE of boolean masks that are zero outside of crops[i] = mask[i, y1:y2, x1:x2]. Only the
+    # columns x1:x2 of each mask are scanned, by chunks, the runs that cross the other columns being background.
+    im_h, im_w = img_shape
+    regions_list: List[List[int]] = regions.tolist()
+    sizes = [[max(region[2] - region[0], 1), im_h] for region in regions_list]
+    counts: List[Tensor] = []
+    for begin, end, max_w, _ in _split_by_size(sizes, 1):
+        # column-major bands of the masks, padded with background up to max_w columns
+        bands = torch.zeros((end - begin, max_w, im_h), dtype=torch.bool, device=regions.device)
+        for i in range(begin, end):
+            region = regions_list[i]
+            bands[i - begin, : region[2] - region[0], region[1] : region[3]] = crops[i].t()
+        flat = bands.reshape(end - begin, -1)
+        numel = flat.shape[1]
+        # every change of value, the masks starting and ending with background
+        boundaries = torch.empty((end - begin, numel + 1), dtype=torch.bool, device=regions.device)
+        boundaries[:, 0] = flat[:, 0]
+        boundaries[:, 1:numel] = flat[:, 1:] != flat[:, :-1]
+        boundaries[:, numel] = flat[:, -1]
+        nonzero = torch.nonzero(boundaries)
+        mask_idx, positions = nonzero[:, 0], nonzero[:, 1]
+        positions = positions + regions[begin:end, 0][mask_idx] * im_h
+        # the end of each mask closes its last run
+        keep = positions < im_h * im_w
+        ends = torch.arange(end - begin, device=regions.device)
+        mask_idx = torch.cat([mask_idx[keep], ends])
+        positions = torch.cat([positions[keep], torch.full_like(ends, im_h * im_w)])
+        order = torch.argsort(mask_idx * (im_h * im_w + 1) + positions)
+        mask_idx, positions = mask_idx[order], positions[order]
+
+        previous = torch.cat([positions.new_zeros(1), positions[:-1]])
+        first = torch.ones_like(mask_idx, dtype=torch.bool)
+        first[1:] = mask_idx[1:] != mask_idx[:-1]
+        runs = positions - previous.masked_fill(first, 0)
+        num_runs: List[int] = torch.bincount(mask_idx, minlength=end - begin).tolist()
+        counts.extend(runs.split(num_runs))
+    return counts
+
+
+def paste_masks_in_image_rle(masks, boxes, img_shape, padding=1, threshold=0.5):
+    # type: (Tensor, Tensor, Tuple[int, int], int, float) -> List[Tensor]
+    """
+    Pastes and binarizes the masks as :func:`paste_masks_in_image` does, and returns them run-length encoded.
+
+    The encoding is the uncompressed RLE of COCO, as expected by :func:`torchvision.ops.rle_masks_to_boxes`: the
+    lengths of the alternating runs of background and foreground pixels, starting with background, in column-major
+    order. Only the part of the masks covered by their box is computed and scanned, the masks are never held in
+    memory full size.
+
+    Args:
+        masks (Tensor[N, 1, M, M]): predicted masks
+        boxes (Tensor[N, 4]): boxes in ``(x1, y1, x2, y2)`` format
+        img_shape (Tuple[int, int]): height and width of the image
+        padding (int): number of pixels the masks are padded with before being resized
+        threshold (float): the masks are binarized, ``mask > threshold``
+
+    Returns:
+        List[Tensor[K_i]]: the run lengths of each mask
+    """
+    crops, regions = paste_masks_in_boxes(masks, boxes, img_shape, padding, threshold)
+    return _encode_rle(crops, regions, img_shape)
+
+
 class RoIHeads(nn.Module):
     __annotations__ = {
         "box_coder": det_utils.BoxCoder,
@@ -516,6 +767,7 @@ class RoIHeads(nn.Module):
         keypoint_roi_pool=None,
         keypoint_head=None,
         keypoint_predictor=None,
+        static_shapes=False,
     ):
         super().__init__()
 
@@ -545,6 +797,10 @@ class RoIHeads(nn.Module):
         self.keypoint_head = keypoint_head
         self.keypoint_predictor = keypoint_predictor
 
+        # during inference, every image gets exactly detections_per_img detections, padded with empty boxes
+        # and -1 labels, so that the output shapes do not depend on the data
+        self.static_shapes = static_shapes
+
     def has_mask(self):
         if self.mask_roi_pool is None:
             return False
@@ -563,6 +819,10 @@ class RoIHeads(nn.Module):
             return False
         return True
 
+    @torch.jit.unused
+    def _uses_box_iou(self) -> bool:
+        return self.box_similarity is box_ops.box_iou
+
     def assign_targets_to_proposals(self, proposals, gt_boxes, gt_labels):
         # type: (List[Tensor], List[Tensor], List[Tensor]) -> Tuple[List[Tensor], List[Tensor]]
         matched_idxs = []
@@ -577,9 +837,13 @@ class RoIHeads(nn.Module):
                 )
                 labels_in_image = torch.zeros((proposals_in_image.shape[0],), dtype=torch.int64, device=device)
             else:
-                #  set to self.box_similarity when https://github.com/pytorch/pytorch/issues/27495 lands
-                match_quality_matrix = box_ops.box_iou(gt_boxes_in_image, proposals_in_image)
-                matched_idxs_in_image = self.proposal_matcher(match_quality_matrix)
+                # match_boxes is only equivalent to the default box_similarity, and the
+                # scripted modules can't compare functions
+                if not torch.jit.is_scripting() and self._uses_box_iou():
+                    matched_idxs_in_image = self.proposal_matcher.match_boxes(gt_boxes_in_image, proposals_in_image)
+                else:
+                    match_quality_matrix = self.box_similarity(gt_boxes_in_image, proposals_in_image)
+                    matched_idxs_in_image = self.proposal_matcher(match_quality_matrix)
 
                 clamped_matched_idxs_in_image = matched_idxs_in_image.clamp(min=0)
 
@@ -670,19 +934,20 @@ class RoIHeads(nn.Module):
         num_classes = class_logits.shape[-1]
 
         boxes_per_image = [boxes_in_image.shape[0] for boxes_in_image in proposals]
-        pred_boxes = self.box_coder.decode(box_regression, proposals)
+        pred_boxes = self.box_coder.decode_and_clip(box_regression, proposals, image_shapes)
 
         pred_scores = F.softmax(class_logits, -1)
 
+        if self.static_shapes and not self.training:
+            return self._postprocess_detections_static(pred_boxes, pred_scores, len(proposals))
+
         pred_boxes_list = pred_boxes.split(boxes_per_image, 0)
         pred_scores_list = pred_scores.split(boxes_per_image, 0)
 
         all_boxes = []
         all_scores = []
         all_labels = []
-        for boxes, scores, image_shape in zip(pred_boxes_list, pred_scores_list, image_shapes):
-            boxes = box_ops.clip_boxes_to_image(boxes, image_shape)
-
+        for boxes, scores in zip(pred_boxes_list, pred_scores_list):
             # create labels for each prediction
             labels = torch.arange(num_classes, device=device)
             labels = labels.view(1, -1).expand_as(scores)
@@ -705,10 +970,9 @@ class RoIHeads(nn.Module):
             keep = box_ops.remove_small_boxes(boxes, min_size=1e-2)
             boxes, scores, labels = boxes[keep], scores[keep], labels[keep]
 
-            # non-maximum suppression, independently done per class
-            keep = box_ops.batched_nms(boxes, scores, labels, self.nms_thresh)
-            # keep only topk scoring predictions
-            keep = keep[: self.detections_per_img]
+            # non-maximum suppression, independently done per class,
+            # keeping only topk scoring predictions
+            keep = box_ops.batched_nms(boxes, scores, labels, self.nms_thresh, topk=self.detections_per_img)
             boxes, scores, labels = boxes[keep], scores[keep], labels[keep]
 
             all_boxes.append(boxes)
@@ -717,12 +981,35 @@ class RoIHeads(nn.Module):
 
         return all_boxes, all_scores, all_labels
 
+    def _postprocess_detections_static(self, pred_boxes, pred_scores, num_images):
+        # type: (Tensor, Tensor, int) -> Tuple[List[Tensor], List[Tensor], List[Tensor]]
+        # Same as postprocess_detections for images with the same number of proposals, but the filtered out
+        # predictions are masked instead of being removed
+        num_classes = pred_scores.shape[-1]
+
+        # remove predictions with the background label and batch everything, by making every class prediction
+        # be a separate instance
+        boxes = pred_boxes.view(num_images, -1, num_classes, 4)[:, :, 1:].reshape(num_images, -1, 4)
+        scores = pred_scores.view(num_images, -1, num_classes)[:, :, 1:].reshape(num_images, -1)
+        labels = torch.arange(1, num_classes, device=scores.device).repeat(scores.shape[1] // max(num_classes - 1, 1))
+
+        # low scoring and empty boxes get a negative label so that the NMS ignores them
+        ws, hs = boxes[:, :, 2] - boxes[:, :, 0], boxes[:, :, 3] - boxes[:, :, 1]
+        keep = (scores > self.score_thresh) & (ws >= 1e-2) & (hs >= 1e-2)
+        labels = torch.where(keep, labels, labels.new_full((), -1))
+
+        boxes, scores, labels = det_utils._batched_nms_padded(
+            boxes, scores, labels, self.nms_thresh, self.detections_per_img
+        )
+        return list(boxes.unbind(0)), list(scores.unbind(0)), list(labels.unbind(0))
+
     def forward(
         self,
         features,  # type: Dict[str, Tensor]
         proposals,  # type: List[Tensor]
         image_shapes,  # type: List[Tuple[int, int]]
         targets=None,  # type: Optional[List[Dict[str, Tensor]]]
+        batch_image_shape=None,  # type: Optional[Tuple[int, int]]
     ):
         # type: (...) -> Tuple[List[Dict[str, Tensor]], Dict[str, Tensor]]
         """
@@ -731,6 +1018,8 @@ class RoIHeads(nn.Module):
             proposals (List[Tensor[N, 4]])
             image_shapes (List[Tuple[H, W]])
             targets (List[Dict])
+            batch_image_shape (Tuple[H, W]): size of the padded batch of images the features were computed
+                from, used instead of the image sizes to infer the scales of the feature maps when given
         """
         if targets is not None:
             for t in targets:
@@ -748,7 +1037,8 @@ class RoIHeads(nn.Module):
             regression_targets = None
             matched_idxs = None
 
-        box_features = self.box_roi_pool(features, proposals, image_shapes)
+        pool_image_shapes = image_shapes if batch_image_shape is None else [batch_image_shape]
+        box_features = self.box_roi_pool(features, proposals, pool_image_shapes)
         box_features = self.box_head(box_features)
         class_logits, box_regression = self.box_predictor(box_features)
 
@@ -786,7 +1076,7 @@ class RoIHeads(nn.Module):
                 pos_matched_idxs = None
 
             if self.mask_roi_pool is not None:
-                mask_features = self.mask_roi_pool(features, mask_proposals, image_shapes)
+                mask_features = self.mask_roi_pool(features, mask_proposals, pool_image_shapes)
                 mask_features = self.mask_head(mask_features)
                 mask_logits = self.mask_predictor(mask_features)
             else:
@@ -831,7 +1121,7 @@ class RoIHeads(nn.Module):
             else:
                 pos_matched_idxs = None
 
-            keypoint_features = self.keypoint_roi_pool(features, keypoint_proposals, image_shapes)
+            keypoint_features = self.keypoint_roi_pool(features, keypoint_proposals, pool_image_shapes)
             keypoint_features = self.keypoint_head(keypoint_features)
             keypoint_logits = self.keypoint_predictor(keypoint_features)
 
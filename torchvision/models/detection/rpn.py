@@ -108,6 +108,14 @@ class RegionProposalNetwork(torch.nn.Module):
             contain two fields: training and testing, to allow for different values depending
             on training or evaluation
         nms_thresh (float): NMS threshold used for postprocessing the RPN proposals
+        topk_before_decode (bool): if True, the ``pre_nms_top_n`` anchors of each level are selected from
+            their objectness before decoding the proposals, so that only the selected ones are decoded.
+            The proposals are the same. Default: False
+        static_shapes (bool): if True, the proposals filtered out during inference are masked instead of being
+            removed, and exactly ``post_nms_top_n`` proposals are returned for every image, padded with empty
+            boxes, so that the output shapes do not depend on the data. The valid proposals are those of the
+            regular mode for the same padded images, the anchors in the padding being ranked like the others.
+            Default: False
 
     """
 
@@ -131,6 +139,8 @@ class RegionProposalNetwork(torch.nn.Module):
         post_nms_top_n: Dict[str, int],
         nms_thresh: float,
         score_thresh: float = 0.0,
+        topk_before_decode: bool = False,
+        static_shapes: bool = False,
     ) -> None:
         super().__init__()
         self.anchor_generator = anchor_generator
@@ -153,6 +163,8 @@ class RegionProposalNetwork(torch.nn.Module):
         self.nms_thresh = nms_thresh
         self.score_thresh = score_thresh
         self.min_size = 1e-3
+        self.topk_before_decode = topk_before_decode
+        self.static_shapes = static_shapes
 
     def pre_nms_top_n(self) -> int:
         if self.training:
@@ -164,6 +176,10 @@ class RegionProposalNetwork(torch.nn.Module):
             return self._post_nms_top_n["training"]
         return self._post_nms_top_n["testing"]
 
+    @torch.jit.unused
+    def _uses_box_iou(self) -> bool:
+        return self.box_similarity is box_ops.box_iou
+
     def assign_targets_to_anchors(
         self, anchors: List[Tensor], targets: List[Dict[str, Tensor]]
     ) -> Tuple[List[Tensor], List[Tensor]]:
@@ -179,8 +195,13 @@ class RegionProposalNetwork(torch.nn.Module):
                 matched_gt_boxes_per_image = torch.zeros(anchors_per_image.shape, dtype=torch.float32, device=device)
                 labels_per_image = torch.zeros((anchors_per_image.shape[0],), dtype=torch.float32, device=device)
             else:
-                match_quality_matrix = self.box_similarity(gt_boxes, anchors_per_image)
-                matched_idxs = self.proposal_matcher(match_quality_matrix)
+                # match_boxes is only equivalent to the default box_similarity, and the
+                # scripted modules can't compare functions
+                if not torch.jit.is_scripting() and self._uses_box_iou():
+                    matched_idxs = self.proposal_matcher.match_boxes(gt_boxes, anchors_per_image)
+                else:
+                    match_quality_matrix = self.box_similarity(gt_boxes, anchors_per_image)
+                    matched_idxs = self.proposal_matcher(match_quality_matrix)
                 # get the targets corresponding GT for each proposal
                 # NB: need to clamp the indices because we can have a single
                 # GT in the image, and matched_idxs can be -2, which goes
@@ -223,35 +244,67 @@ class RegionProposalNetwork(torch.nn.Module):
         image_shapes: List[Tuple[int, int]],
         num_anchors_per_level: List[int],
     ) -> Tuple[List[Tensor], List[Tensor]]:
+        # forward() decodes the proposals with decode_and_clip and skips this method, which clips the
+        # proposals of the other callers
+        return self._filter_proposals(proposals, objectness, image_shapes, num_anchors_per_level, False)
 
+    def _filter_proposals(
+        self,
+        proposals: Tensor,
+        objectness: Tensor,
+        image_shapes: List[Tuple[int, int]],
+        num_anchors_per_level: List[int],
+        clipped: bool,
+    ) -> Tuple[List[Tensor], List[Tensor]]:
         num_images = proposals.shape[0]
-        device = proposals.device
         # do not backprop through objectness
         objectness = objectness.detach()
         objectness = objectness.reshape(num_images, -1)
 
-        levels = [
-            torch.full((n,), idx, dtype=torch.int64, device=device) for idx, n in enumerate(num_anchors_per_level)
-        ]
-        levels = torch.cat(levels, 0)
-        levels = levels.reshape(1, -1).expand_as(objectness)
-
         # select top_n boxes independently per level before applying nms
         top_n_idx = self._get_top_n_idx(objectness, num_anchors_per_level)
 
-        image_range = torch.arange(num_images, device=device)
+        image_range = torch.arange(num_images, device=proposals.device)
         batch_idx = image_range[:, None]
 
         objectness = objectness[batch_idx, top_n_idx]
-        levels = levels[batch_idx, top_n_idx]
         proposals = proposals[batch_idx, top_n_idx]
+        levels = self._get_levels(num_anchors_per_level, proposals.device)[top_n_idx]
+        return self._filter_top_n_proposals(proposals, objectness, levels, image_shapes, clipped)
 
+    def _get_levels(self, num_anchors_per_level: List[int], device: torch.device) -> Tensor:
+        levels = [
+            torch.full((n,), idx, dtype=torch.int64, device=device) for idx, n in enumerate(num_anchors_per_level)
+        ]
+        return torch.cat(levels, 0)
+
+    def _filter_top_n_proposals(
+        self,
+        proposals: Tensor,
+        objectness: Tensor,
+        levels: Tensor,
+        image_shapes: List[Tuple[int, int]],
+        clipped: bool,
+    ) -> Tuple[List[Tensor], List[Tensor]]:
+        # clipped is True for the proposals of decode_and_clip, which are not clipped a second time
         objectness_prob = torch.sigmoid(objectness)
 
+        if self.static_shapes and not self.training:
+            # the proposals are already clipped, the small and low scoring ones get a negative level
+            # so that the NMS ignores them
+            ws, hs = proposals[:, :, 2] - proposals[:, :, 0], proposals[:, :, 3] - proposals[:, :, 1]
+            keep = (ws >= self.min_size) & (hs >= self.min_size) & (objectness_prob >= self.score_thresh)
+            levels = torch.where(keep, levels, levels.new_full((), -1))
+            boxes, scores, _ = det_utils._batched_nms_padded(
+                proposals, objectness_prob, levels, self.nms_thresh, self.post_nms_top_n()
+            )
+            return list(boxes.unbind(0)), list(scores.unbind(0))
+
         final_boxes = []
         final_scores = []
         for boxes, scores, lvl, img_shape in zip(proposals, objectness_prob, levels, image_shapes):
-            boxes = box_ops.clip_boxes_to_image(boxes, img_shape)
+            if not clipped:
+                boxes = box_ops.clip_boxes_to_image(boxes, img_shape)
 
             # remove small boxes
             keep = box_ops.remove_small_boxes(boxes, self.min_size)
@@ -262,17 +315,41 @@ class RegionProposalNetwork(torch.nn.Module):
             keep = torch.where(scores >= self.score_thresh)[0]
             boxes, scores, lvl = boxes[keep], scores[keep], lvl[keep]
 
-            # non-maximum suppression, independently done per level
-            keep = box_ops.batched_nms(boxes, scores, lvl, self.nms_thresh)
-
-            # keep only topk scoring predictions
-            keep = keep[: self.post_nms_top_n()]
+            # non-maximum suppression, independently done per level,
+            # keeping only topk scoring predictions
+            keep = box_ops.batched_nms(boxes, scores, lvl, self.nms_thresh, topk=self.post_nms_top_n())
             boxes, scores = boxes[keep], scores[keep]
 
             final_boxes.append(boxes)
             final_scores.append(scores)
         return final_boxes, final_scores
 
+    def _decode_top_n_proposals(
+        self,
+        pred_bbox_deltas: Tensor,
+        anchors: List[Tensor],
+        objectness: Tensor,
+        image_shapes: List[Tuple[int, int]],
+        num_anchors_per_level: List[int],
+    ) -> Tuple[List[Tensor], List[Tensor]]:
+        # Same proposals as filter_proposals, but only the pre_nms_top_n anchors of each level are decoded
+        num_images = len(anchors)
+        objectness = objectness.detach()
+        objectness = objectness.reshape(num_images, -1)
+        top_n_idx = self._get_top_n_idx(objectness, num_anchors_per_level)
+
+        image_range = torch.arange(num_images, device=objectness.device)
+        batch_idx = image_range[:, None]
+
+        pred_bbox_deltas = pred_bbox_deltas.reshape(num_images, -1, 4)[batch_idx, top_n_idx]
+        top_n_anchors = [anchors_per_image[idx] for anchors_per_image, idx in zip(anchors, top_n_idx)]
+        proposals = self.box_coder.decode_and_clip(pred_bbox_deltas.reshape(-1, 4), top_n_anchors, image_shapes)
+        proposals = proposals.view(num_images, -1, 4)
+
+        objectness = objectness[batch_idx, top_n_idx]
+        levels = self._get_levels(num_anchors_per_level, objectness.device)[top_n_idx]
+        return self._filter_top_n_proposals(proposals, objectness, levels, image_shapes, True)
+
     def compute_loss(
         self, objectness: Tensor, pred_bbox_deltas: Tensor, labels: List[Tensor], regression_targets: List[Tensor]
     ) -> Tuple[Tensor, Tensor]:
@@ -348,9 +425,16 @@ class RegionProposalNetwork(torch.nn.Module):
         # apply pred_bbox_deltas to anchors to obtain the decoded proposals
         # note that we detach the deltas because Faster R-CNN do not backprop through
         # the proposals
-        proposals = self.box_coder.decode(pred_bbox_deltas.detach(), anchors)
-        proposals = proposals.view(num_images, -1, 4)
-        boxes, scores = self.filter_proposals(proposals, objectness, images.image_sizes, num_anchors_per_level)
+        if self.topk_before_decode:
+            boxes, scores = self._decode_top_n_proposals(
+                pred_bbox_deltas.detach(), anchors, objectness, images.image_sizes, num_anchors_per_level
+            )
+        else:
+            proposals = self.box_coder.decode_and_clip(pred_bbox_deltas.detach(), anchors, images.image_sizes)
+            proposals = proposals.view(num_images, -1, 4)
+            boxes, scores = self._filter_proposals(
+                proposals, objectness, images.image_sizes, num_anchors_per_level, True
+            )
 
         losses = {}
         if self.training:
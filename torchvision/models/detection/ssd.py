@@ -7,7 +7,6 @@ import torch.nn.functional as F
 from torch import nn, Tensor
 
 from ..._internally_replaced_utils import load_state_dict_from_url
-from ...ops import boxes as box_ops
 from ...utils import _log_api_usage_once
 from .. import vgg
 from . import _utils as det_utils
@@ -366,8 +365,7 @@ class SSD(nn.Module):
                     )
                     continue
 
-                match_quality_matrix = box_ops.box_iou(targets_per_image["boxes"], anchors_per_image)
-                matched_idxs.append(self.proposal_matcher(match_quality_matrix))
+                matched_idxs.append(self.proposal_matcher.match_boxes(targets_per_image["boxes"], anchors_per_image))
 
             losses = self.compute_loss(targets, head_outputs, anchors, matched_idxs)
         else:
@@ -387,50 +385,23 @@ class SSD(nn.Module):
         bbox_regression = head_outputs["bbox_regression"]
         pred_scores = F.softmax(head_outputs["cls_logits"], dim=-1)
 
-        num_classes = pred_scores.size(-1)
-        device = pred_scores.device
-
-        detections: List[Dict[str, Tensor]] = []
+        # the topk candidates of every class but the background are selected for all the images at once
+        image_idxs, labels, anchor_idxs, scores = det_utils._select_topk_per_segment(
+            pred_scores[:, :, 1:].transpose(1, 2), self.score_thresh, self.topk_candidates
+        )
 
-        for boxes, scores, anchors, image_shape in zip(bbox_regression, pred_scores, image_anchors, image_shapes):
-            boxes = self.box_coder.decode_single(boxes, anchors)
-            boxes = box_ops.clip_boxes_to_image(boxes, image_shape)
-
-            image_boxes = []
-            image_scores = []
-            image_labels = []
-            for label in range(1, num_classes):
-                score = scores[:, label]
-
-                keep_idxs = score > self.score_thresh
-                score = score[keep_idxs]
-                box = boxes[keep_idxs]
-
-                # keep only topk scoring predictions
-                num_topk = min(self.topk_candidates, score.size(0))
-                score, idxs = score.topk(num_topk)
-                box = box[idxs]
-
-                image_boxes.append(box)
-                image_scores.append(score)
-                image_labels.append(torch.full_like(score, fill_value=label, dtype=torch.int64, device=device))
-
-            image_boxes = torch.cat(image_boxes, dim=0)
-            image_scores = torch.cat(image_scores, dim=0)
-            image_labels = torch.cat(image_labels, dim=0)
-
-            # non-maximum suppression
-            keep = box_ops.batched_nms(image_boxes, image_scores, image_labels, self.nms_thresh)
-            keep = keep[: self.detections_per_img]
-
-            detections.append(
-                {
-                    "boxes": image_boxes[keep],
-                    "scores": image_scores[keep],
-                    "labels": image_labels[keep],
-                }
-            )
-        return detections
+        return det_utils._postprocess_dense_detections(
+            self.box_coder,
+            image_idxs,
+            anchor_idxs,
+            scores,
+            labels + 1,
+            bbox_regression,
+            torch.stack(image_anchors),
+            image_shapes,
+            self.nms_thresh,
+            self.detections_per_img,
+        )
 
 
 class SSDFeatureExtractorVGG(nn.Module):
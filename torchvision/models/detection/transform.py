@@ -71,6 +71,22 @@ def _resize_image_and_masks(
     return image, target
 
 
+def _get_resized_image_size(
+    image_size: List[int],
+    self_min_size: float,
+    self_max_size: float,
+    fixed_size: Optional[Tuple[int, int]] = None,
+) -> List[int]:
+    # The size to which _resize_image_and_masks resizes an image of size image_size
+    if fixed_size is not None:
+        return [fixed_size[1], fixed_size[0]]
+    im_shape = torch.tensor(image_size)
+    min_size = torch.min(im_shape).to(dtype=torch.float32)
+    max_size = torch.max(im_shape).to(dtype=torch.float32)
+    scale_factor = torch.min(self_min_size / min_size, self_max_size / max_size).item()
+    return [int(math.floor(float(s) * scale_factor)) for s in image_size]
+
+
 class GeneralizedRCNNTransform(nn.Module):
     """
     Performs input / target transformation before feeding the data to a GeneralizedRCNN
@@ -81,8 +97,26 @@ class GeneralizedRCNNTransform(nn.Module):
         - input / target resizing to match min_size / max_size
 
     It returns a ImageList for the inputs, and a List[Dict[Tensor]] for the targets
+
+    When ``batched_inputs`` is ``True``, the images given in eager mode as a single ``(B, C, H, W)``
+    tensor are normalized and resized all at once, and copied into the padded batch. During
+    training, a single size is then drawn from ``min_size`` for the whole batch instead of one
+    per image. Otherwise, such a tensor is transformed image by image, like a list. When
+    ``reuse_batch_buffer`` is also ``True``, the padded batch is kept and overwritten by the next
+    call with images of the same size, so the tensors of a returned ImageList must not be used
+    after the next call.
+
+    When ``static_shapes`` is ``True``, the images are padded during inference to a batch of a
+    fixed size, ``fixed_size`` if given and ``max_size`` x ``max_size`` otherwise (rounded up to
+    ``size_divisible``), whatever the sizes of the input images. The outputs of the model then depend on
+    that padded size. Only the R-CNN models support this mode, not RetinaNet and SSD.
     """
 
+    __annotations__ = {
+        "_batch_buffer": Optional[Tensor],
+    }
+    __constants__ = ["static_shapes"]
+
     def __init__(
         self,
         min_size: int,
@@ -91,6 +125,9 @@ class GeneralizedRCNNTransform(nn.Module):
         image_std: List[float],
         size_divisible: int = 32,
         fixed_size: Optional[Tuple[int, int]] = None,
+        batched_inputs: bool = False,
+        reuse_batch_buffer: bool = False,
+        static_shapes: bool = False,
     ):
         super().__init__()
         if not isinstance(min_size, (list, tuple)):
@@ -101,10 +138,18 @@ class GeneralizedRCNNTransform(nn.Module):
         self.image_std = image_std
         self.size_divisible = size_divisible
         self.fixed_size = fixed_size
+        self.batched_inputs = batched_inputs
+        self.reuse_batch_buffer = reuse_batch_buffer
+        self.static_shapes = static_shapes
+        self._batch_buffer = None
+        self._batch_buffer_image_size = (0, 0)
 
     def forward(
         self, images: List[Tensor], targets: Optional[List[Dict[str, Tensor]]] = None
     ) -> Tuple[ImageList, Optional[List[Dict[str, Tensor]]]]:
+        if not torch.jit.is_scripting():
+            if isinstance(images, torch.Tensor) and self._can_transform_batch(images):
+                return self._transform_batch(images, targets)
         images = [img for img in images]
         if targets is not None:
             # make a copy of targets to avoid modifying it in-place
@@ -140,6 +185,62 @@ class GeneralizedRCNNTransform(nn.Module):
         image_list = ImageList(images, image_sizes_list)
         return image_list, targets
 
+    @torch.jit.unused
+    def _can_transform_batch(self, images: Tensor) -> bool:
+        return self.batched_inputs and images.dim() == 4 and not images.requires_grad and not torchvision._is_tracing()
+
+    @torch.jit.unused
+    def _transform_batch(
+        self, images: Tensor, targets: Optional[List[Dict[str, Tensor]]] = None
+    ) -> Tuple[ImageList, Optional[List[Dict[str, Tensor]]]]:
+        # Same as forward() for a batch of images of the same size, except that during training
+        # a single size is drawn for the whole batch
+        if targets is not None:
+            targets = [{k: v for k, v in t.items()} for t in targets]
+
+        h, w = images.shape[-2:]
+        if self.training:
+            size = float(self.torch_choice(self.min_size))
+        else:
+            size = float(self.min_size[-1])
+        new_h, new_w = _get_resized_image_size([h, w], size, float(self.max_size), self.fixed_size)
+
+        padded_shape = [images.shape[0], images.shape[1]] + self._padded_image_size([new_h, new_w], self.size_divisible)
+        batched_imgs = self._batch_buffer
+        if (
+            not self.reuse_batch_buffer
+            or batched_imgs is None
+            or list(batched_imgs.shape) != padded_shape
+            or batched_imgs.dtype != images.dtype
+            or batched_imgs.device != images.device
+        ):
+            batched_imgs = images.new_zeros(padded_shape)
+        elif self._batch_buffer_image_size != (new_h, new_w):
+            batched_imgs.zero_()
+        if self.reuse_batch_buffer:
+            self._batch_buffer = batched_imgs
+            self._batch_buffer_image_size = (new_h, new_w)
+
+        # A single interpolation for the whole batch, copied into the padded batch
+        batched_imgs[:, :, :new_h, :new_w].copy_(
+            torch.nn.functional.interpolate(
+                self.normalize(images), size=[new_h, new_w], mode="bilinear", align_corners=False
+            )
+        )
+
+        if targets is not None:
+            for i, target in enumerate(targets):
+                if "masks" in target:
+                    target["masks"] = torch.nn.functional.interpolate(
+                        target["masks"][:, None].float(), size=[new_h, new_w]
+                    )[:, 0].byte()
+                target["boxes"] = resize_boxes(target["boxes"], [h, w], [new_h, new_w])
+                if "keypoints" in target:
+                    target["keypoints"] = resize_keypoints(target["keypoints"], [h, w], [new_h, new_w])
+
+        image_sizes = [(new_h, new_w)] * images.shape[0]
+        return ImageList(batched_imgs, image_sizes), targets
+
     def normalize(self, image: Tensor) -> Tensor:
         if not image.is_floating_point():
             raise TypeError(
@@ -217,17 +318,25 @@ class GeneralizedRCNNTransform(nn.Module):
                 maxes[index] = max(maxes[index], item)
         return maxes
 
+    def _padded_image_size(self, image_size: List[int], size_divisible: int) -> List[int]:
+        # Size of the padded batch of images of at most image_size
+        if self.static_shapes and not self.training:
+            fixed_size = self.fixed_size
+            if fixed_size is not None:
+                image_size = [fixed_size[1], fixed_size[0]]
+            else:
+                image_size = [self.max_size, self.max_size]
+        stride = float(size_divisible)
+        return [int(math.ceil(float(s) / stride) * stride) for s in image_size]
+
     def batch_images(self, images: List[Tensor], size_divisible: int = 32) -> Tensor:
-        if torchvision._is_tracing():
+        if torchvision._is_tracing() and not (self.static_shapes and not self.training):
             # batch_images() does not export well to ONNX
             # call _onnx_batch_images() instead
             return self._onnx_batch_images(images, size_divisible)
 
         max_size = self.max_by_axis([list(img.shape) for img in images])
-        stride = float(size_divisible)
-        max_size = list(max_size)
-        max_size[1] = int(math.ceil(float(max_size[1]) / stride) * stride)
-        max_size[2] = int(math.ceil(float(max_size[2]) / stride) * stride)
+        max_size = max_size[:1] + self._padded_image_size(max_size[1:], size_divisible)
 
         batch_shape = [len(images)] + max_size
         batched_imgs = images[0].new_full(batch_shape, 0)
@@ -2,17 +2,24 @@ from ._register_onnx_ops import _register_custom_op
 from .boxes import (
     nms,
     batched_nms,
+    batched_soft_nms,
+    multi_image_batched_nms,
     remove_small_boxes,
     clip_boxes_to_image,
     box_area,
     box_iou,
     generalized_box_iou,
     masks_to_boxes,
+    packed_masks_to_boxes,
+    rle_masks_to_boxes,
 )
 from .boxes import box_convert
+from .ciou_loss import complete_box_iou_loss
 from .deform_conv import deform_conv2d, DeformConv2d
+from .diou_loss import distance_box_iou_loss
 from .feature_pyramid_network import FeaturePyramidNetwork
 from .focal_loss import sigmoid_focal_loss
+from .giou_loss import generalized_box_iou_loss
 from .misc import FrozenBatchNorm2d, ConvNormActivation, SqueezeExcitation
 from .poolers import MultiScaleRoIAlign
 from .ps_roi_align import ps_roi_align, PSRoIAlign
@@ -26,16 +33,23 @@ _register_custom_op()
 
 __all__ = [
     "masks_to_boxes",
+    "packed_masks_to_boxes",
+    "rle_masks_to_boxes",
     "deform_conv2d",
     "DeformConv2d",
     "nms",
     "batched_nms",
+    "batched_soft_nms",
+    "multi_image_batched_nms",
     "remove_small_boxes",
     "clip_boxes_to_image",
     "box_convert",
     "box_area",
     "box_iou",
     "generalized_box_iou",
+    "generalized_box_iou_loss",
+    "distance_box_iou_loss",
+    "complete_box_iou_loss",
     "roi_align",
     "RoIAlign",
     "roi_pool",
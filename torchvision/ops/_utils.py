@@ -1,7 +1,9 @@
 from typing import List, Optional, Tuple, Union
 
 import torch
+import torchvision
 from torch import nn, Tensor
+from torchvision.extension import _assert_has_ops, _has_ops
 
 
 def _cat(tensors: List[Tensor], dim: int = 0) -> Tensor:
@@ -61,3 +63,88 @@ def split_normalization_params(
         else:
             other_params.extend(p for p in module.parameters() if p.requires_grad)
     return norm_params, other_params
+
+
+def _upcast_non_float(t: Tensor) -> Tensor:
+    # Protects from numerical overflows in multiplications by upcasting to the equivalent higher type
+    if t.dtype not in (torch.float32, torch.float64):
+        return t.float()
+    return t
+
+
+def _loss_inter_union(boxes1: Tensor, boxes2: Tensor) -> Tuple[Tensor, Tensor]:
+    x1, y1, x2, y2 = boxes1.unbind(dim=-1)
+    x1g, y1g, x2g, y2g = boxes2.unbind(dim=-1)
+
+    # Intersection keypoints
+    xkis1 = torch.max(x1, x1g)
+    ykis1 = torch.max(y1, y1g)
+    xkis2 = torch.min(x2, x2g)
+    ykis2 = torch.min(y2, y2g)
+
+    intsctk = torch.zeros_like(x1)
+    mask = (ykis2 > ykis1) & (xkis2 > xkis1)
+    intsctk[mask] = (xkis2[mask] - xkis1[mask]) * (ykis2[mask] - ykis1[mask])
+    unionk = (x2 - x1) * (y2 - y1) + (x2g - x1g) * (y2g - y1g) - intsctk
+
+    return intsctk, unionk
+
+
+def _use_native_box_iou_loss(boxes1: Tensor, boxes2: Tensor) -> bool:
+    # The native kernel is CPU only and computes the loss of boxes of the same shape
+    return (
+        _has_ops()
+        and boxes1.device.type == "cpu"
+        and boxes2.device.type == "cpu"
+        and boxes1.dtype == boxes2.dtype
+        and boxes1.shape == boxes2.shape
+        and not torchvision._is_tracing()
+    )
+
+
+def _box_iou_loss(boxes1: Tensor, boxes2: Tensor, loss_type: str, eps: float) -> Tensor:
+    # The values of loss_type should be kept in sync with
+    # torchvision/csrc/ops/cpu/box_iou_loss_kernel.cpp
+    if loss_type == "giou":
+        loss_type_value = 0
+    elif loss_type == "diou":
+        loss_type_value = 1
+    elif loss_type == "ciou":
+        loss_type_value = 2
+    else:
+        raise ValueError(f"Unknown loss_type {loss_type}")
+    _assert_has_ops()
+    return torch.ops.torchvision.box_iou_loss(boxes1, boxes2, loss_type_value, eps)
+
+
+class _LRUCacheKeys:
+    """
+    Bookkeeping of a least recently used cache of at most ``size`` entries: the recency of the keys and
+    the number of hits and misses. The values stay in a typed dict of the owner, since TorchScript has
+    no generic containers. Keys are few, so the linear scans are cheaper than the value computations.
+    """
+
+    def __init__(self, size: int) -> None:
+        if size < 1:
+            raise ValueError(f"cache_size should be a positive integer, got {size}")
+        self.size = size
+        self.keys: List[str] = []
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key: str) -> bool:
+        """Returns whether ``key`` is cached and, if so, marks it as the most recently used."""
+        if key in self.keys:
+            self.keys.remove(key)
+            self.keys.append(key)
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def insert(self, key: str) -> Optional[str]:
+        """Records a new ``key`` and returns the least recently used one if it has to be evicted."""
+        self.keys.append(key)
+        if len(self.keys) > self.size:
+            return self.keys.pop(0)
+        return None
@@ -1,9 +1,9 @@
-from typing import Tuple
+from typing import List, Optional, Tuple
 
 import torch
 import torchvision
 from torch import Tensor
-from torchvision.extension import _assert_has_ops
+from torchvision.extension import _assert_has_ops, _has_ops
 
 from ..utils import _log_api_usage_once
 from ._box_convert import _box_cxcywh_to_xyxy, _box_xyxy_to_cxcywh, _box_xywh_to_xyxy, _box_xyxy_to_xywh
@@ -44,6 +44,7 @@ def batched_nms(
     scores: Tensor,
     idxs: Tensor,
     iou_threshold: float,
+    topk: Optional[int] = None,
 ) -> Tensor:
     """
     Performs non-maximum suppression in a batched fashion.
@@ -58,19 +59,33 @@ def batched_nms(
         scores (Tensor[N]): scores for each one of the boxes
         idxs (Tensor[N]): indices of the categories for each one of the boxes.
         iou_threshold (float): discards all overlapping boxes with IoU > iou_threshold
+        topk (int, optional): if set, only the ``topk`` highest scoring boxes that survive
+            NMS are returned. On CPU, the suppression stops as soon as they are found.
 
     Returns:
         Tensor: int64 tensor with the indices of the elements that have been kept by NMS, sorted
         in decreasing order of scores
     """
     _log_api_usage_once("torchvision.ops.batched_nms")
+    # validated here as only the CPU kernel checks it, and keep[:topk] silently drops boxes otherwise
+    if topk is not None and topk < 0:
+        raise ValueError(f"topk should be non-negative, got {topk}")
     # Benchmarks that drove the following thresholds are at
     # https://github.com/pytorch/vision/issues/1311#issuecomment-781329339
     # Ideally for GPU we'd use a higher threshold
+    # On CPU the native kernel is at least as fast as both alternatives at every
+    # size we measured, see test/batched-nms-bench.py
+    if boxes.numel() > 0 and boxes.device.type == "cpu" and not boxes.is_quantized and not torchvision._is_tracing():
+        if topk is not None:
+            return _batched_nms_topk_native(boxes, scores, idxs, iou_threshold, topk)
+        return _batched_nms_native(boxes, scores, idxs, iou_threshold)
     if boxes.numel() > 4_000 and not torchvision._is_tracing():
-        return _batched_nms_vanilla(boxes, scores, idxs, iou_threshold)
+        keep = _batched_nms_vanilla(boxes, scores, idxs, iou_threshold)
     else:
-        return _batched_nms_coordinate_trick(boxes, scores, idxs, iou_threshold)
+        keep = _batched_nms_coordinate_trick(boxes, scores, idxs, iou_threshold)
+    if topk is not None:
+        keep = keep[:topk]
+    return keep
 
 
 @torch.jit._script_if_tracing
@@ -110,6 +125,128 @@ def _batched_nms_vanilla(
     return keep_indices[scores[keep_indices].sort(descending=True)[1]]
 
 
+def _batched_nms_native(
+    boxes: Tensor,
+    scores: Tensor,
+    idxs: Tensor,
+    iou_threshold: float,
+) -> Tensor:
+    # Same output as _batched_nms_vanilla, but all the categories are handled
+    # by a single call to the native kernel instead of a Python loop
+    _assert_has_ops()
+    return torch.ops.torchvision.batched_nms(boxes, scores, idxs, iou_threshold)
+
+
+def _batched_nms_topk_native(
+    boxes: Tensor,
+    scores: Tensor,
+    idxs: Tensor,
+    iou_threshold: float,
+    topk: int,
+) -> Tensor:
+    # Candidates are only compared with the boxes kept so far, and the scan
+    # stops after topk of them
+    _assert_has_ops()
+    return torch.ops.torchvision.batched_nms_topk(boxes, scores, idxs, iou_threshold, topk)
+
+
+def batched_soft_nms(
+    boxes: Tensor,
+    scores: Tensor,
+    idxs: Tensor,
+    iou_threshold: float,
+    sigma: float = 0.5,
+    score_threshold: float = 0.001,
+    method: str = "gaussian",
+) -> Tuple[Tensor, Tensor]:
+    """
+    Performs Soft-NMS in a batched fashion, as described in
+    `Soft-NMS -- Improving Object Detection With One Line of Code <https://arxiv.org/abs/1704.04503>`_.
+
+    Instead of discarding the boxes that overlap a higher scoring box, their scores are decayed
+    according to the IoU between the two boxes, and the boxes whose score falls below
+    ``score_threshold`` are discarded. Each index value correspond to a category, and the
+    suppression is not applied between elements of different categories.
+
+    .. note::
+        Only CPU tensors are supported.
+
+    Args:
+        boxes (Tensor[N, 4]): boxes where Soft-NMS will be performed. They
+            are expected to be in ``(x1, y1, x2, y2)`` format with ``0 <= x1 < x2`` and
+            ``0 <= y1 < y2``.
+        scores (Tensor[N]): scores for each one of the boxes
+        idxs (Tensor[N]): indices of the categories for each one of the boxes.
+        iou_threshold (float): for the ``"linear"`` method, only the boxes with
+            IoU > iou_threshold get their score decayed, by a factor ``1 - IoU``.
+            It is ignored by the ``"gaussian"`` method.
+        sigma (float): the scores are decayed by a factor ``exp(-IoU ** 2 / sigma)`` with
+            the ``"gaussian"`` method. Default: 0.5
+        score_threshold (float): discards all boxes whose decayed score is lower than
+            score_threshold. Default: 0.001
+        method (str): ``"linear"`` or ``"gaussian"``. Default: ``"gaussian"``
+
+    Returns:
+        Tuple[Tensor, Tensor]: int64 tensor with the indices of the elements that have been kept,
+        sorted in decreasing order of decayed scores, and the decayed scores of these elements
+    """
+    _log_api_usage_once("torchvision.ops.batched_soft_nms")
+    _assert_has_ops()
+    # Should be kept in sync with the SoftNMSMethod enum of the CPU kernel
+    if method == "linear":
+        method_id = 0
+    elif method == "gaussian":
+        method_id = 1
+    else:
+        raise ValueError(f"method should be 'linear' or 'gaussian', got {method}")
+    return torch.ops.torchvision.batched_soft_nms(boxes, scores, idxs, iou_threshold, sigma, score_threshold, method_id)
+
+
+def multi_image_batched_nms(
+    boxes: Tensor,
+    scores: Tensor,
+    labels: Tensor,
+    iou_threshold: float,
+    max_det: int,
+) -> Tuple[Tensor, Tensor]:
+    """
+    Performs :func:`batched_nms` independently on every image of a padded batch.
+
+    Entries with a negative label are treated as padding and are never kept,
+    which allows images with different numbers of candidates to share a batch.
+
+    Args:
+        boxes (Tensor[B, N, 4]): boxes where NMS will be performed. They
+            are expected to be in ``(x1, y1, x2, y2)`` format with ``0 <= x1 < x2`` and
+            ``0 <= y1 < y2``.
+        scores (Tensor[B, N]): scores for each one of the boxes
+        labels (Tensor[B, N]): indices of the categories for each one of the boxes.
+            Negative values mark padding entries.
+        iou_threshold (float): discards all overlapping boxes with IoU > iou_threshold
+        max_det (int): maximum number of boxes kept per image
+
+    Returns:
+        Tuple[Tensor, Tensor]: an int64 tensor of shape ``[B, max_det]`` with, for every image,
+        the indices of the elements that have been kept by NMS sorted in decreasing order
+        of scores and padded with -1, and an int64 tensor of shape ``[B]`` with the number
+        of elements kept for every image.
+    """
+    _log_api_usage_once("torchvision.ops.multi_image_batched_nms")
+    if boxes.device.type == "cpu" and not boxes.is_quantized and not torchvision._is_tracing():
+        _assert_has_ops()
+        return torch.ops.torchvision.multi_image_batched_nms(boxes, scores, labels, iou_threshold, max_det)
+
+    keep = torch.full((boxes.size(0), max_det), -1, dtype=torch.int64, device=boxes.device)
+    num_keep = torch.zeros(boxes.size(0), dtype=torch.int64, device=boxes.device)
+    for index in range(boxes.size(0)):
+        valid = torch.where(labels[index] >= 0)[0]
+        keep_per_image = batched_nms(boxes[index, valid], scores[index, valid], labels[index, valid], iou_threshold)
+        keep_per_image = keep_per_image[:max_det]
+        keep[index, : keep_per_image.size(0)] = valid[keep_per_image]
+        num_keep[index] = keep_per_image.size(0)
+    return keep, num_keep
+
+
 def remove_small_boxes(boxes: Tensor, min_size: float) -> Tensor:
     """
     Remove boxes which contains at least one side smaller than min_size.
@@ -270,11 +407,83 @@ def box_iou(boxes1: Tensor, boxes2: Tensor) -> Tensor:
         Tensor[N, M]: the NxM matrix containing the pairwise IoU values for every element in boxes1 and boxes2
     """
     _log_api_usage_once("torchvision.ops.box_iou")
+    if _use_native_box_iou(boxes1, boxes2):
+        # computes the IoU in a single pass, without the N x M x 2 temporaries
+        return torch.ops.torchvision.box_iou(boxes1, boxes2)
     inter, union = _box_inter_union(boxes1, boxes2)
     iou = inter / union
     return iou
 
 
+def _use_native_box_iou(boxes1: Tensor, boxes2: Tensor) -> bool:
+    # The native kernels are CPU only and have no autograd support
+    return (
+        _has_ops()
+        and boxes1.device.type == "cpu"
+        and boxes2.device.type == "cpu"
+        and boxes1.dtype in (torch.float32, torch.float64)
+        and boxes2.dtype == boxes1.dtype
+        and not (boxes1.requires_grad or boxes2.requires_grad)
+        and not torchvision._is_tracing()
+    )
+
+
+def _box_iou_match(
+    boxes1: Tensor, boxes2: Tensor, with_low_quality_matches: bool, max_chunk_numel: int = 2 ** 24
+) -> Tuple[Tensor, Tensor, Tensor, Tensor]:
+    """
+    Computes the reductions of ``box_iou(boxes1, boxes2)`` needed to match boxes2 to boxes1,
+    without materializing the full NxM IoU matrix. On CPU this is a single native call,
+    elsewhere the matrix is computed by chunks of boxes2 of at most ``max_chunk_numel`` IoUs.
+
+    Args:
+        boxes1 (Tensor[N, 4]): first set of boxes, typically the ground-truth boxes. Should not be empty.
+        boxes2 (Tensor[M, 4]): second set of boxes, typically the anchors or proposals. Should not be empty.
+        with_low_quality_matches (bool): whether to compute the last output
+        max_chunk_numel (int): maximum number of IoU values computed at once by the fallback
+
+    Returns:
+        Tuple[Tensor[M], Tensor[M], Tensor[N], Tensor[M]]: for every box of boxes2, its highest IoU with
+        boxes1 and the index of that box of boxes1; for every box of boxes1, the index of the box of boxes2
+        with which it has the highest IoU; and a bool mask of the boxes of boxes2 that have the highest IoU
+        of at least one box of boxes1, ties included (all False if ``with_low_quality_matches`` is False).
+        Ties in the argmaxes resolve to the first index, like :meth:`torch.Tensor.max` does.
+    """
+    if _use_native_box_iou(boxes1, boxes2):
+        return torch.ops.torchvision.box_iou_match(boxes1, boxes2, with_low_quality_matches)
+
+    num_boxes2 = boxes2.size(0)
+    chunk_size = max(1, max_chunk_numel // max(1, boxes1.size(0)))
+
+    matched_vals = []
+    matches = []
+    max_foreach_boxes1 = torch.empty(0)
+    best_foreach_boxes1 = torch.empty(0, dtype=torch.int64)
+    for start in range(0, num_boxes2, chunk_size):
+        inter, union = _box_inter_union(boxes1, boxes2[start : start + chunk_size])
+        iou = inter / union
+        chunk_vals, chunk_matches = iou.max(dim=0)
+        matched_vals.append(chunk_vals)
+        matches.append(chunk_matches)
+        chunk_max, chunk_best = iou.max(dim=1)
+        if start == 0:
+            max_foreach_boxes1, best_foreach_boxes1 = chunk_max, chunk_best
+        else:
+            # strict comparison keeps the first maximal index across chunks
+            update = chunk_max > max_foreach_boxes1
+            max_foreach_boxes1 = torch.where(update, chunk_max, max_foreach_boxes1)
+            best_foreach_boxes1 = torch.where(update, chunk_best + start, best_foreach_boxes1)
+
+    highest_quality = torch.zeros((num_boxes2,), dtype=torch.bool, device=boxes2.device)
+    if with_low_quality_matches:
+        for start in range(0, num_boxes2, chunk_size):
+            inter, union = _box_inter_union(boxes1, boxes2[start : start + chunk_size])
+            iou = inter / union
+            highest_quality[start : start + chunk_size] = (iou == max_foreach_boxes1[:, None]).any(dim=0)
+
+    return torch.cat(matched_vals), torch.cat(matches), best_foreach_boxes1, highest_quality
+
+
 # Implementation adapted from https://github.com/facebookresearch/detr/blob/master/util/box_ops.py
 def generalized_box_iou(boxes1: Tensor, boxes2: Tensor) -> Tensor:
     """
@@ -315,7 +524,7 @@ def masks_to_boxes(masks: torch.Tensor) -> torch.Tensor:
     Compute the bounding boxes around the provided masks.
 
     Returns a [N, 4] tensor containing bounding boxes. The boxes are in ``(x1, y1, x2, y2)`` format with
-    ``0 <= x1 < x2`` and ``0 <= y1 < y2``.
+    ``0 <= x1 < x2`` and ``0 <= y1 < y2``. The box of an empty mask is ``(0, 0, 0, 0)``.
 
     Args:
         masks (Tensor[N, H, W]): masks to transform where N is the number of masks
@@ -325,19 +534,129 @@ def masks_to_boxes(masks: torch.Tensor) -> torch.Tensor:
         Tensor[N, 4]: bounding boxes
     """
     _log_api_usage_once("torchvision.ops.masks_to_boxes")
+    return _masks_to_boxes(masks)
+
+
+def _masks_to_boxes(masks: Tensor, max_chunk_numel: int = 2 ** 24) -> Tensor:
     if masks.numel() == 0:
         return torch.zeros((0, 4), device=masks.device, dtype=torch.float)
 
-    n = masks.shape[0]
+    # The masks are only reduced to their row and column projections. Masks are processed by chunks to bound
+    # the memory used by the non-zero temporaries.
+    n, h, w = masks.shape
+    chunk_size = max(1, max_chunk_numel // (h * w))
+    rows = []
+    cols = []
+    for start in range(0, n, chunk_size):
+        chunk = masks[start : start + chunk_size]
+        if chunk.dtype != torch.uint8:
+            if chunk.dtype != torch.bool:
+                chunk = chunk != 0
+            # max reductions of bytes are much faster than any reductions
+            if torch.jit.is_scripting():
+                chunk = chunk.to(torch.uint8)
+            else:
+                chunk = chunk.view(torch.uint8)
+        rows.append(chunk.amax(dim=2) != 0)
+        cols.append(chunk.amax(dim=1) != 0)
+
+    y1, y2 = _occupied_range(torch.cat(rows))
+    x1, x2 = _occupied_range(torch.cat(cols))
+    return _stack_mask_boxes(x1, y1, x2, y2)
+
+
+def packed_masks_to_boxes(packed_masks: Tensor) -> Tensor:
+    """
+    Compute the bounding boxes around the provided bit-packed masks, without unpacking them.
 
-    bounding_boxes = torch.zeros((n, 4), device=masks.device, dtype=torch.float)
+    The masks are expected to be packed along their width, with the first pixel in the most significant bit of
+    each byte, as done by ``numpy.packbits(masks, axis=-1)``. The boxes are the same as the ones
+    :func:`masks_to_boxes` returns for the unpacked masks.
 
-    for index, mask in enumerate(masks):
-        y, x = torch.where(mask != 0)
+    Args:
+        packed_masks (Tensor[N, H, ceil(W / 8)]): uint8 tensor of bit-packed masks, where N is the number of
+            masks and (H, W) are the spatial dimensions.
 
-        bounding_boxes[index, 0] = torch.min(x)
-        bounding_boxes[index, 1] = torch.min(y)
-        bounding_boxes[index, 2] = torch.max(x)
-        bounding_boxes[index, 3] = torch.max(y)
+    Returns:
+        Tensor[N, 4]: bounding boxes
+    """
+    _log_api_usage_once("torchvision.ops.packed_masks_to_boxes")
+    if packed_masks.dtype != torch.uint8:
+        raise ValueError(f"packed_masks should be a uint8 tensor, got {packed_masks.dtype}")
+    if packed_masks.numel() == 0:
+        return torch.zeros((0, 4), device=packed_masks.device, dtype=torch.float)
+
+    y1, y2 = _occupied_range(packed_masks.amax(dim=2) != 0)
+
+    # Within a column of bytes, the first pixel of the masks is the highest bit set in any of the rows, which is
+    # the highest bit of their max. The last pixel is the lowest bit set in any of the rows: x & (~x + 1)
+    # isolates the lowest bit of x, and subtracting 1 makes empty bytes wrap around to 255 so that they are
+    # ignored by the min.
+    max_bytes = packed_masks.amax(dim=1)
+    lowest_bits = ((packed_masks & (~packed_masks + 1)) - 1).amin(dim=1) + 1
+    occupied = max_bytes != 0
+    byte_offsets = 8 * torch.arange(max_bytes.shape[1], device=max_bytes.device)
+    first = byte_offsets + 7 - torch.log2(max_bytes.float()).floor().long()
+    last = byte_offsets + 7 - torch.log2(lowest_bits.float()).long()
+    x1 = first.masked_fill(~occupied, max_bytes.shape[1] * 8).amin(dim=1)
+    x2 = last.masked_fill(~occupied, -1).amax(dim=1)
+    return _stack_mask_boxes(x1, y1, x2, y2)
+
+
+def rle_masks_to_boxes(counts: List[Tensor], height: int) -> Tensor:
+    """
+    Compute the bounding boxes around the provided run-length encoded masks, without decoding them.
 
-    return bounding_boxes
+    The masks are expected to use the uncompressed RLE format of COCO: the counts of each mask are the lengths
+    of its alternating runs of background and foreground pixels, starting with background, when the pixels are
+    read in column-major order. The boxes are the same as the ones :func:`masks_to_boxes` returns for the decoded
+    masks.
+
+    Args:
+        counts (List[Tensor[K]]): run lengths of each of the N masks.
+        height (int): height of the masks.
+
+    Returns:
+        Tensor[N, 4]: bounding boxes
+    """
+    _log_api_usage_once("torchvision.ops.rle_masks_to_boxes")
+    if len(counts) == 0:
+        return torch.zeros((0, 4), dtype=torch.float)
+
+    runs = torch.nn.utils.rnn.pad_sequence(counts, batch_first=True).long()
+    ends = runs.cumsum(dim=1)
+    starts = ends - runs
+    # odd runs are foreground, and padding only adds empty runs
+    foreground = runs > 0
+    foreground[:, ::2] = False
+
+    x_starts = torch.div(starts, height, rounding_mode="floor")
+    x_ends = torch.div(ends - 1, height, rounding_mode="floor")
+    y_starts = starts % height
+    y_ends = (ends - 1) % height
+    # a run that wraps to the next column covers its first and last rows
+    wraps = x_ends > x_starts
+    y_starts = y_starts.masked_fill(wraps, 0)
+    y_ends = y_ends.masked_fill(wraps, height - 1)
+
+    background = ~foreground
+    # the number of pixels of the masks is larger than any of their columns
+    x1 = torch.where(foreground, x_starts, ends[:, -1:]).amin(dim=1)
+    x2 = x_ends.masked_fill(background, -1).amax(dim=1)
+    y1 = y_starts.masked_fill(background, height).amin(dim=1)
+    y2 = y_ends.masked_fill(background, -1).amax(dim=1)
+    return _stack_mask_boxes(x1, y1, x2, y2)
+
+
+def _occupied_range(occupied: Tensor) -> Tuple[Tensor, Tensor]:
+    # First and last indices of the True values of each row of occupied. The range of rows without any is empty.
+    size = occupied.shape[1]
+    indices = torch.arange(size, device=occupied.device)
+    first = indices.masked_fill(~occupied, size).amin(dim=1)
+    last = indices.masked_fill(~occupied, -1).amax(dim=1)
+    return first, last
+
+
+def _stack_mask_boxes(x1: Tensor, y1: Tensor, x2: Tensor, y2: Tensor) -> Tensor:
+    boxes = torch.stack([x1, y1, x2, y2], dim=1).float()
+    return boxes.masked_fill_((x2 < x1).unsqueeze(1), 0.0)
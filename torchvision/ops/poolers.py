@@ -3,9 +3,11 @@ from typing import Optional, List, Dict, Tuple, Union
 import torch
 import torchvision
 from torch import nn, Tensor
+from torchvision.extension import _has_ops
 from torchvision.ops.boxes import box_area
 
 from ..utils import _log_api_usage_once
+from ._utils import _LRUCacheKeys
 from .roi_align import roi_align
 
 
@@ -32,6 +34,19 @@ def _onnx_merge_levels(levels: Tensor, unmerged_results: List[Tensor]) -> Tensor
     return res
 
 
+def _use_multi_level_roi_align(x_filtered: List[Tensor], rois: Tensor) -> bool:
+    # The single-call kernel is CPU only and expects all the levels to share the dtype
+    # of the rois, or float rois for reduced precision levels. Tracing keeps the
+    # per-level loop so that ONNX export still works.
+    if not _has_ops() or torchvision._is_tracing() or rois.device.type != "cpu":
+        return False
+    dtype = x_filtered[0].dtype
+    for feature in x_filtered:
+        if feature.device.type != "cpu" or feature.is_quantized or feature.dtype != dtype:
+            return False
+    return rois.dtype == dtype or (rois.dtype == torch.float32 and dtype in (torch.float16, torch.bfloat16))
+
+
 # TODO: (eellison) T54974082 https://github.com/pytorch/pytorch/issues/26744/pytorch/issues/26744
 def initLevelMapper(
     k_min: int,
@@ -101,6 +116,8 @@ class MultiScaleRoIAlign(nn.Module):
         sampling_ratio (int): sampling ratio for ROIAlign
         canonical_scale (int, optional): canonical_scale for LevelMapper
         canonical_level (int, optional): canonical_level for LevelMapper
+        cache_size (int, optional): maximum number of input shapes for which the scales and the
+            level mapper are kept. When it is exceeded, the least recently used entry is dropped.
 
     Examples::
 
@@ -119,7 +136,11 @@ class MultiScaleRoIAlign(nn.Module):
 
     """
 
-    __annotations__ = {"scales": Optional[List[float]], "map_levels": Optional[LevelMapper]}
+    __annotations__ = {
+        "scales": Optional[List[float]],
+        "map_levels": Optional[LevelMapper],
+        "_scales_cache": Dict[str, Tuple[List[float], LevelMapper]],
+    }
 
     def __init__(
         self,
@@ -129,6 +150,7 @@ class MultiScaleRoIAlign(nn.Module):
         *,
         canonical_scale: int = 224,
         canonical_level: int = 4,
+        cache_size: int = 8,
     ):
         super().__init__()
         _log_api_usage_once(self)
@@ -141,6 +163,9 @@ class MultiScaleRoIAlign(nn.Module):
         self.map_levels = None
         self.canonical_scale = canonical_scale
         self.canonical_level = canonical_level
+        self.cache_size = cache_size
+        self._scales_cache = {}
+        self._scales_cache_keys = _LRUCacheKeys(cache_size)
 
     def convert_to_roi_format(self, boxes: List[Tensor]) -> Tensor:
         concat_boxes = torch.cat(boxes, dim=0)
@@ -192,6 +217,40 @@ class MultiScaleRoIAlign(nn.Module):
             canonical_level=self.canonical_level,
         )
 
+    def _scales_cache_key(self, features: List[Tensor], image_shapes: List[Tuple[int, int]]) -> str:
+        # The scales only depend on the sizes of the feature maps and on the largest image size
+        max_x = 0
+        max_y = 0
+        for shape in image_shapes:
+            max_x = max(shape[0], max_x)
+            max_y = max(shape[1], max_y)
+        key = f"{max_x}x{max_y}"
+        for feature in features:
+            key += f",{feature.shape[-2]}x{feature.shape[-1]}"
+        return key
+
+    def _get_scales_and_mapper(
+        self,
+        features: List[Tensor],
+        image_shapes: List[Tuple[int, int]],
+    ) -> Tuple[List[float], LevelMapper]:
+        key = self._scales_cache_key(features, image_shapes)
+        if self._scales_cache_keys.lookup(key):
+            scales, mapper = self._scales_cache[key]
+        else:
+            self.setup_scales(features, image_shapes)
+            scales = self.scales
+            mapper = self.map_levels
+            assert scales is not None
+            assert mapper is not None
+            evicted = self._scales_cache_keys.insert(key)
+            if evicted is not None:
+                del self._scales_cache[evicted]
+            self._scales_cache[key] = (scales, mapper)
+        self.scales = scales
+        self.map_levels = mapper
+        return scales, mapper
+
     def forward(
         self,
         x: Dict[str, Tensor],
@@ -217,11 +276,7 @@ class MultiScaleRoIAlign(nn.Module):
                 x_filtered.append(v)
         num_levels = len(x_filtered)
         rois = self.convert_to_roi_format(boxes)
-        if self.scales is None:
-            self.setup_scales(x_filtered, image_shapes)
-
-        scales = self.scales
-        assert scales is not None
+        scales, mapper = self._get_scales_and_mapper(x_filtered, image_shapes)
 
         if num_levels == 1:
             return roi_align(
@@ -232,11 +287,20 @@ class MultiScaleRoIAlign(nn.Module):
                 sampling_ratio=self.sampling_ratio,
             )
 
-        mapper = self.map_levels
-        assert mapper is not None
-
         levels = mapper(boxes)
 
+        if _use_multi_level_roi_align(x_filtered, rois):
+            return torch.ops.torchvision.multi_level_roi_align(
+                x_filtered,
+                rois,
+                levels,
+                scales,
+                self.output_size[0],
+                self.output_size[1],
+                self.sampling_ratio,
+                False,
+            )
+
         num_rois = len(rois)
         num_channels = x_filtered[0].shape[1]
 
@@ -0,0 +1,5 @@
+__version__ = '0.12.0a0+69669c1'
+git_version = '69669c1114172e633cb07fb9750419eea70d1508'
+from torchvision.extension import _check_cuda_version
+if _check_cuda_version() > 0:
+    cuda = _check_cuda_version()